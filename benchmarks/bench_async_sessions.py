@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sessions per process and memory per session, asyncio client vs. Appium client.
+
+Drives N sessions of a short test (create, find, click, text, page source,
+screenshot, terminate/activate app, quit) against the bundled fake Appium
+server, each mode in its own fresh process so resident memory is comparable:
+
+- async:   AsyncWebDriver, all sessions on one event loop
+- threads: the Appium WebDriver client, one thread per session
+- process: what the parallel runner pays per item today, a pytest process
+           importing the Appium client (measured once, times N)
+
+    python benchmarks/bench_async_sessions.py --sessions 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from liveboard_test.fake_appium import FakeAppiumServer
+
+
+BUNDLE_ID = 'com.inconceptlabs.liveboard'
+LOG_IN = ('-ios predicate string', "name == 'Log in' AND type == 'XCUIElementTypeButton'")
+SCREEN = (
+    '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT>'
+    '<XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard">'
+    '<XCUIElementTypeTextField type="XCUIElementTypeTextField" value="Email address"/>'
+    '<XCUIElementTypeButton type="XCUIElementTypeButton" name="Log in" label="Log in"/>'
+    '</XCUIElementTypeApplication></AppiumAUT>'
+)
+
+# Import cost of one runner item process: pytest plus the Appium client.
+PROCESS_IMPORTS = "import pytest, appium.webdriver.webdriver"
+
+
+def rss_kib():
+    """Peak resident memory of this process in KiB (ru_maxrss is bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def capabilities():
+    return {'platformName': 'iOS', 'appium:automationName': 'XCUITest', 'appium:bundleId': BUNDLE_ID}
+
+
+async def async_session(url, hold):
+    from liveboard_test.async_driver import AsyncWebDriver
+
+    async with await AsyncWebDriver.create(url, capabilities()) as driver:
+        await driver.implicitly_wait(0)
+        button = await driver.find_element(*LOG_IN)
+        await button.click()
+        await button.text()
+        await driver.page_source()
+        await driver.screenshot()
+        await driver.terminate_app(BUNDLE_ID)
+        await driver.activate_app(BUNDLE_ID)
+        # Every session is open at once when memory is sampled.
+        await hold()
+
+
+def run_async(url, sessions):
+    from liveboard_test.async_driver import AsyncWebDriver  # noqa: F401 (import cost before the baseline)
+
+    baseline = rss_kib()
+    peak = {}
+
+    async def main():
+        arrived = 0
+        all_open = asyncio.Event()
+
+        async def hold():
+            nonlocal arrived
+            arrived += 1
+            if arrived == sessions:
+                peak['rss'] = rss_kib()
+                all_open.set()
+            await all_open.wait()
+
+        await asyncio.gather(*(async_session(url, hold) for _ in range(sessions)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start, baseline, peak['rss']
+
+
+def run_threads(url, sessions):
+    from appium.options.ios.xcuitest.base import XCUITestOptions
+    from liveboard_test.drivers import create_driver
+
+    baseline = rss_kib()
+    peak = {}
+    barrier = threading.Barrier(sessions, action=lambda: peak.setdefault('rss', rss_kib()))
+
+    def session():
+        options = XCUITestOptions()
+        options.bundle_id = BUNDLE_ID
+        driver = create_driver(url, options)
+        try:
+            driver.implicitly_wait(0)
+            button = driver.find_element(*LOG_IN)
+            button.click()
+            button.text
+            driver.page_source
+            driver.get_screenshot_as_png()
+            driver.terminate_app(BUNDLE_ID)
+            driver.activate_app(BUNDLE_ID)
+            barrier.wait()
+        finally:
+            driver.quit()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, baseline, peak['rss']
+
+
+def child(mode, url, sessions):
+    """Run one mode in this (fresh) process and print its metrics as JSON."""
+    if mode == 'process':
+        start = time.perf_counter()
+        exec(PROCESS_IMPORTS)
+        print(json.dumps({'import_seconds': time.perf_counter() - start, 'rss_kib': rss_kib()}))
+        return
+    wall, baseline, peak = (run_async if mode == 'async' else run_threads)(url, sessions)
+    print(json.dumps({'wall_seconds': wall, 'baseline_kib': baseline, 'peak_kib': peak}))
+
+
+def measure(mode, url, sessions):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--url', url, '--sessions', str(sessions)],
+        capture_output=True, text=True, check=True,
+        # A connection per thread, as the async client has one per session.
+        env=dict(os.environ, PYTHONPATH=SRC, APPIUM_POOL_MAXSIZE=str(sessions)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50, help="Concurrent sessions per process")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds per fake Appium command")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--child', choices=('async', 'threads', 'process'), help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.url, args.sessions)
+        return 0
+
+    with FakeAppiumServer(latency=args.latency) as server:
+        server.page_source = SCREEN
+        process = measure('process', server.url, 1)
+        results = {mode: measure(mode, server.url, args.sessions) for mode in ('async', 'threads')}
+
+    n = args.sessions
+    for r in results.values():
+        r['per_session_kib'] = round((r['peak_kib'] - r['baseline_kib']) / n, 1)
+    print(f"🏁 {n} sessions against the fake Appium server ({args.latency * 1000:.0f} ms/command)")
+    print(f"{'mode':<22} | {'wall':>7} | {'total MiB':>11} | {'per session':>12}")
+    print(f"{'process per session':<22} | {'-':>7} | {process['rss_kib'] / 1024 * n:11.1f} | "
+          f"{process['rss_kib']:9.0f} KiB  ({process['import_seconds']:.2f}s imports each)")
+    for mode, label in (('threads', 'threads, Appium client'), ('async', 'asyncio, one loop')):
+        r = results[mode]
+        print(f"{label:<22} | {r['wall_seconds']:6.2f}s | {r['peak_kib'] / 1024:11.1f} | "
+              f"{r['per_session_kib']:9.1f} KiB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': {'sessions': n, 'latency': args.latency}, 'process': process, **results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
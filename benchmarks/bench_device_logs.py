@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: background device log collection (liveboard_test.device_logs).
+
+Starts a fake Appium server emitting synthetic logcat lines at --rate lines
+per second, runs --tests simulated tests of --duration seconds each (every
+third one failing) with a DeviceLogCollector polling in the background, and
+reports:
+
+- entries emitted vs. written (nothing lost or duplicated),
+- poll count and mean poll time,
+- log text written, gzip size and segments rotated out,
+- bytes the report gets (failed-test slices) vs. the whole log,
+- peak Python memory of the collection (tracemalloc), which stays flat
+  however long the run is (the fake server's log ring included).
+
+    python benchmarks/bench_device_logs.py --rate 2000 --tests 9 --duration 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+
+from liveboard_test import steps
+from liveboard_test.device_logs import DeviceLogCollector
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=int, default=2000, help="Synthetic log lines per second")
+    parser.add_argument('--tests', type=int, default=9)
+    parser.add_argument('--duration', type=float, default=1.0, help="Seconds per simulated test")
+    parser.add_argument('--interval', type=float, default=0.5, help="Background poll interval")
+    parser.add_argument('--segment-kb', type=int, default=256, help="Uncompressed size of a log segment")
+    parser.add_argument('--keep', type=int, default=4, help="Segments kept per log type")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='device-logs-')
+    with FakeAppiumServer() as server:
+        # Enough for a few poll intervals, like a device's own log ring
+        server.log_buffer = max(1000, int(args.rate * args.interval * 4))
+        driver = create_driver(server.url, UiAutomator2Options())
+        try:
+            tracemalloc.start()
+            collector = DeviceLogCollector(driver, ['logcat'], directory, args.interval,
+                                           args.segment_kb * 1024, args.keep).start()
+            timed_poll = collector.poll
+            poll_times = []
+
+            def poll():
+                start = time.perf_counter()
+                try:
+                    return timed_poll()
+                finally:
+                    poll_times.append(time.perf_counter() - start)
+
+            collector.poll = poll
+            server.start_synthetic_logs(per_second=args.rate, log_types=['logcat'])
+            for i in range(args.tests):
+                test = f"tests/test_bench.py::test_{i}"
+                steps.start_test(test)
+                time.sleep(args.duration)
+                steps.end_test(test, outcome='failed' if i % 3 == 2 else 'passed')
+            server.stop_synthetic_logs()
+            collector.stop()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            emitted = server._log_seq
+        finally:
+            driver.quit()
+
+    s = collector.stats()
+    sliced = sum(os.path.getsize(path) for path in collector.slices)
+    print(f"📜 {args.tests} tests x {args.duration:.1f}s at {args.rate} lines/s, polling every {args.interval}s")
+    print(f"   entries:  {s['entries']} written / {emitted} emitted")
+    print(f"   polls:    {s['polls']}, mean {sum(poll_times) / len(poll_times) * 1000:.2f} ms")
+    print(f"   log:      {s['bytes'] / 1024:.0f} KiB text -> {s['compressed_bytes'] / 1024:.0f} KiB gzip, "
+          f"{s['segments_dropped']} segment(s) rotated out")
+    print(f"   report:   {len(collector.slices)} failed-test slice(s), {sliced / 1024:.0f} KiB "
+          f"({sliced / max(s['bytes'], 1):.0%} of the whole log)")
+    print(f"   memory:   {peak / 1024:.0f} KiB peak (tracemalloc)")
+    print(f"   files in  {directory}")
+    return 0 if s['entries'] == emitted else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: step-by-step execution vs. the compiled plan of the login flow.
+
+Runs liveboard_flows.LOGIN both ways against the bundled fake Appium server
+(canned Liveboard screens, configurable per-command latency and transition
+time) and reports Appium commands, screenshots and wall-clock time per platform.
+
+    python benchmarks/bench_flow_plans.py --latency 0.05 --transition 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test.connection_pool import shutdown_connection_pools
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.flows import FlowRunner
+from liveboard_test.liveboard_flows import LOGIN
+from liveboard_test.waits import WaitEngine
+
+
+OPTIONS = {'ios': XCUITestOptions, 'android': UiAutomator2Options}
+
+
+def measure(platform, optimize, latency, transition):
+    """(commands, screenshots, wall seconds) of one run of the login flow."""
+    with FakeAppiumServer(latency=latency) as server:
+        FakeLiveboardApp(platform, transition_delay=transition).install(server)
+        driver = create_driver(server.url, OPTIONS[platform]())
+        try:
+            shots = []
+            runner = FlowRunner(driver, WaitEngine(driver, timeout=15),
+                                screenshot=lambda name: shots.append(name) or driver.get_screenshot_as_base64())
+            plan = LOGIN.compile(platform, optimize)
+            server.reset_counters()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                runner.run(plan)
+            return server.command_count, len(shots), time.perf_counter() - start
+        finally:
+            driver.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds per fake Appium command")
+    parser.add_argument('--transition', type=float, default=0.3, help="Seconds a screen transition takes")
+    args = parser.parse_args(argv)
+
+    print(f"🧭 {LOGIN.name}: {args.latency * 1000:.0f} ms/command, {args.transition * 1000:.0f} ms transitions")
+    print(f"{'platform':<8} | {'plan':<12} | {'commands':>8} | {'screenshots':>11} | {'wall (s)':>8}")
+    for platform in sorted(OPTIONS):
+        results = {}
+        for optimize, label in ((False, 'step by step'), (True, 'compiled')):
+            results[optimize] = measure(platform, optimize, args.latency, args.transition)
+            commands, shots, wall = results[optimize]
+            print(f"{platform:<8} | {label:<12} | {commands:8d} | {shots:11d} | {wall:8.2f}")
+        saved = results[False][0] - results[True][0]
+        print(f"{platform:<8} | {saved} fewer commands ({saved / results[False][0]:.0%})")
+    shutdown_connection_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-locator WebDriverWait polling vs. single-fetch local resolution.
+
+Runs against the bundled fake Appium server with a configurable per-command
+latency (a real device round trip is typically 50-300 ms) and reports round
+trips and wall-clock time for resolving the locators of one screen.
+
+    python benchmarks/bench_locator_resolution.py --latency 0.05 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.common.appiumby import AppiumBy
+from appium.webdriver.webdriver import WebDriver
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.locators import LocatorResolver
+from liveboard_test.ui_tree import parse_page_source
+
+
+LOCATORS = [
+    (AppiumBy.IOS_PREDICATE, "value == 'Email address'"),
+    (AppiumBy.IOS_PREDICATE, "value == 'Password'"),
+    (AppiumBy.IOS_PREDICATE, "name == 'Log in' AND label == 'Log in' AND type == 'XCUIElementTypeButton'"),
+    (AppiumBy.IOS_PREDICATE, "name == 'Forgot password?'"),
+    (AppiumBy.XPATH, "//XCUIElementTypeStaticText[@name='Welcome back']"),
+]
+
+
+def build_screen(filler=200):
+    """A login screen with the locators above plus `filler` unrelated cells."""
+    cells = ''.join(
+        f'<XCUIElementTypeCell type="XCUIElementTypeCell" name="cell {i}" enabled="true" visible="true" '
+        f'x="0" y="{i * 44}" width="375" height="44"/>'
+        for i in range(filler)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT>'
+        '<XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard">'
+        '<XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="Welcome back"/>'
+        '<XCUIElementTypeTextField type="XCUIElementTypeTextField" value="Email address"/>'
+        '<XCUIElementTypeSecureTextField type="XCUIElementTypeSecureTextField" value="Password"/>'
+        '<XCUIElementTypeButton type="XCUIElementTypeButton" name="Forgot password?" label="Forgot password?"/>'
+        '<XCUIElementTypeButton type="XCUIElementTypeButton" name="Log in" label="Log in"/>'
+        f'<XCUIElementTypeTable type="XCUIElementTypeTable">{cells}</XCUIElementTypeTable>'
+        '</XCUIElementTypeApplication></AppiumAUT>'
+    )
+
+
+def per_locator(driver):
+    for locator in LOCATORS:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located(locator))
+
+
+def single_fetch(driver):
+    resolver = LocatorResolver(driver)
+    found = resolver.resolve_many(LOCATORS)
+    assert all(found.values())
+
+
+def measure(server, driver, strategy, repeat):
+    server.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        strategy(driver)
+    elapsed = time.perf_counter() - start
+    return server.command_count / repeat, elapsed / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds per fake Appium command")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filler', type=int, default=200, help="Extra elements on the screen")
+    args = parser.parse_args(argv)
+
+    with FakeAppiumServer(latency=args.latency) as server:
+        server.page_source = build_screen(args.filler)
+        driver = WebDriver(server.url, options=XCUITestOptions())
+        try:
+            baseline_trips, baseline_time = measure(server, driver, per_locator, args.repeat)
+            resolver_trips, resolver_time = measure(server, driver, single_fetch, args.repeat)
+        finally:
+            driver.quit()
+
+    start = time.perf_counter()
+    root = parse_page_source(server.page_source)
+    parse_ms = (time.perf_counter() - start) * 1000
+    node_count = sum(1 for _ in root.iter())
+
+    print(f"📐 {len(LOCATORS)} locators, {node_count} nodes, {args.latency * 1000:.0f} ms/command")
+    print(f"{'strategy':<14} | {'round trips':>11} | {'wall (ms)':>9}")
+    print(f"{'per-locator':<14} | {baseline_trips:11.1f} | {baseline_time * 1000:9.1f}")
+    print(f"{'single-fetch':<14} | {resolver_trips:11.1f} | {resolver_time * 1000:9.1f}")
+    print(f"Local parse of the page source: {parse_ms:.2f} ms")
+    print(f"Speed-up: {baseline_time / resolver_time:.1f}x, "
+          f"{baseline_trips - resolver_trips:.0f} fewer round trips per screen")
+
+
+if __name__ == "__main__":
+    main()
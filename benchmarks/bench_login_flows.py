@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark: framework overhead of the login flows against a fake Appium server.
+
+Runs test_liveboard_login_flow and test_android_login_flow end to end against
+the bundled fake server (canned Liveboard screens, configurable per-command
+latency and screen transition time) and reports wall-clock time, Appium
+command count, time the test thread spent sleeping and peak Python memory.
+Results are compared with benchmarks/baseline.json; the exit status is 1 when
+a metric regressed by more than the tolerance.
+
+    python benchmarks/bench_login_flows.py --latency 0.02 --repeat 3
+    python benchmarks/bench_login_flows.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from liveboard_test.connection_pool import shutdown_connection_pools
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.screenshots import shutdown_screenshot_pipeline
+from liveboard_test.session_pool import shutdown_session_pool
+from liveboard_test.visual import get_golden_store  # NumPy import cost outside the measured flows
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+METRICS = ('wall_seconds', 'commands', 'idle_sleep_seconds', 'peak_memory_kib')
+
+# Absolute slack per metric so tiny baselines don't flag noise as a regression.
+SLACK = {'wall_seconds': 0.25, 'commands': 2, 'idle_sleep_seconds': 0.25, 'peak_memory_kib': 256}
+
+
+def ios_flow():
+    from tests.test_login_ios import TestLiveboardiOS
+    return TestLiveboardiOS, 'test_liveboard_login_flow'
+
+
+def android_flow():
+    from tests.test_login_android_compose import TestAndroidLogin
+    return TestAndroidLogin, 'test_android_login_flow'
+
+
+FLOWS = {'ios': ios_flow, 'android': android_flow}
+
+
+class SleepMeter:
+    """Adds up the time one thread spends in time.sleep() while installed."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._thread = threading.get_ident()
+        self._sleep = time.sleep
+
+    def _timed_sleep(self, seconds):
+        if threading.get_ident() != self._thread:
+            return self._sleep(seconds)
+        start = time.perf_counter()
+        try:
+            return self._sleep(seconds)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def __enter__(self):
+        time.sleep = self._timed_sleep
+        return self
+
+    def __exit__(self, *exc_info):
+        time.sleep = self._sleep
+
+
+def run_flow(platform, latency, transition, verbose=False):
+    """Run one login flow in-process against a fresh fake server and return its metrics."""
+    test_class, test_name = FLOWS[platform]()
+    with FakeAppiumServer(latency=latency) as server:
+        FakeLiveboardApp(platform, transition_delay=transition).install(server)
+        os.environ['APPIUM_PORT'] = str(server.port)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with output, SleepMeter() as sleeps:
+                test = test_class()
+                test.setup_method()
+                try:
+                    getattr(test, test_name)()
+                finally:
+                    test.teardown_method()
+                    shutdown_session_pool()
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'wall_seconds': round(wall, 3),
+            'commands': server.command_count,
+            'idle_sleep_seconds': round(sleeps.seconds, 3),
+            'peak_memory_kib': round(peak / 1024),
+        }
+
+
+def median_metrics(runs):
+    return {metric: round(statistics.median(run[metric] for run in runs), 3) for metric in METRICS}
+
+
+def compare(results, baseline, tolerance):
+    """[(flow, metric, baseline, current)] for metrics worse than baseline * (1 + tolerance) + slack."""
+    regressions = []
+    for flow, metrics in results.items():
+        expected = baseline.get('flows', {}).get(flow)
+        if not expected:
+            continue
+        for metric in METRICS:
+            if metric in expected and metrics[metric] > expected[metric] * (1 + tolerance) + SLACK[metric]:
+                regressions.append((flow, metric, expected[metric], metrics[metric]))
+    return regressions
+
+
+def format_results(results, baseline):
+    lines = [f"{'flow':<8} | {'metric':<18} | {'baseline':>9} | {'current':>9} | {'change':>7}"]
+    for flow, metrics in results.items():
+        expected = baseline.get('flows', {}).get(flow, {})
+        for metric in METRICS:
+            current = metrics[metric]
+            before = expected.get(metric)
+            change = f"{(current - before) / before:+.0%}" if before else "-"
+            before = f"{before:9}" if before is not None else f"{'-':>9}"
+            lines.append(f"{flow:<8} | {metric:<18} | {before} | {current:9} | {change:>7}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--flow', choices=sorted(FLOWS), action='append', help="Flow to run (default: all)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds per fake Appium command")
+    parser.add_argument('--transition', type=float, default=0.2, help="Seconds a screen transition takes")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1, help="Unmeasured runs first (lazy imports, caches)")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the flows' own output")
+    args = parser.parse_args(argv)
+
+    # Reuse one artifacts/benchmark directory instead of a new run directory per invocation.
+    os.environ.setdefault('RUN_ID', 'benchmark')
+    # Goldens of the fake screens, kept out of the repository's goldens/
+    os.environ.setdefault('VISUAL_GOLDEN_DIR', os.path.join('artifacts', 'benchmark', 'goldens'))
+    # A missing golden fails the flow: record them with one unmeasured run each
+    goldens = get_golden_store()
+    update, goldens.update = goldens.update, True
+    for flow in args.flow or sorted(FLOWS):
+        run_flow(flow, 0, 0)
+    goldens.update = update
+    results = {}
+    for flow in args.flow or sorted(FLOWS):
+        for _ in range(args.warmup):
+            run_flow(flow, args.latency, args.transition)
+        runs = [run_flow(flow, args.latency, args.transition, args.verbose) for _ in range(args.repeat)]
+        results[flow] = median_metrics(runs)
+    shutdown_screenshot_pipeline()
+    shutdown_connection_pools()
+
+    settings = {'latency': args.latency, 'transition': args.transition}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline and baseline.get('settings') != settings:
+        print(f"⚠️ Baseline was recorded with {baseline.get('settings')}, this run used {settings}")
+
+    print(f"🏁 Login flows against the fake Appium server "
+          f"({args.latency * 1000:.0f} ms/command, {args.transition * 1000:.0f} ms transitions, "
+          f"median of {args.repeat})")
+    print(format_results(results, baseline))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': settings, 'flows': results}, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'settings': settings, 'flows': results}, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for flow, metric, before, current in regressions:
+        print(f"❌ {flow} {metric} regressed: {before} -> {current}")
+    if not regressions:
+        print("✅ No regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: building the consolidated run report (liveboard_test.run_report).
+
+Replays the events of a synthetic run: --tests tests spread over --devices
+workers, each with --steps steps, a screenshot per step and every tenth
+test failing. The events are interleaved across workers, as the parallel
+runner sees them. For each run size it reports events per second consumed,
+the time to render index.html, the sizes of the index and the page, and
+peak Python memory (tracemalloc, measured in a second run). Memory stays
+flat as the run grows, because finished tests live only in the on-disk
+index (only the list of failures grows).
+
+    python benchmarks/bench_run_report.py --tests 100 1000 5000 --devices 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from liveboard_test.run_report import RunReport
+
+
+def run_events(tests, devices, steps):
+    """Events of a run, one round of tests at a time with the devices' events interleaved."""
+    clock = 0.0
+    for first in range(0, tests, devices):
+        batch = [(f"device-{d}", f"tests/test_bench.py::test_flow[{first + d}]")
+                 for d in range(min(devices, tests - first))]
+        for worker, test in batch:
+            yield {'event': 'test_start', 'worker': worker, 'test': test, 'time': clock}
+        for s in range(steps):
+            for worker, test in batch:
+                clock += 0.01
+                name = f"Step {s + 1}: Tap 'Continue'"
+                yield {'event': 'step', 'worker': worker, 'test': test, 'step': name, 'time': clock}
+                yield {'event': 'screenshot', 'worker': worker, 'test': test, 'step': name, 'time': clock,
+                       'path': f"artifacts/bench/screenshots/{test[-5:-1]}_{s:02d}.png"}
+                yield {'event': 'step_end', 'worker': worker, 'test': test, 'step': name, 'duration': 0.8,
+                       'time': clock}
+        for n, (worker, test) in enumerate(batch):
+            failed = (first + n) % 10 == 0
+            if failed:
+                yield {'event': 'failure', 'worker': worker, 'test': test, 'when': 'call', 'time': clock,
+                       'message': "TimeoutException: 'Dashboard' not shown after 15s"}
+            yield {'event': 'test_end', 'worker': worker, 'test': test, 'time': clock,
+                   'outcome': 'failed' if failed else 'passed', 'duration': steps * 0.8}
+
+
+def build(tests, devices, steps):
+    report = RunReport(tempfile.mkdtemp(prefix='run-report-'))
+    start = time.perf_counter()
+    for event in run_events(tests, devices, steps):
+        report(event)
+    consume = time.perf_counter() - start
+    start = time.perf_counter()
+    report.close()
+    return report, consume, time.perf_counter() - start
+
+
+def bench(tests, devices, steps):
+    """Timings from one run, peak memory from a second one under tracemalloc (which slows it down)."""
+    report, consume, render = build(tests, devices, steps)
+    tracemalloc.start()
+    build(tests, devices, steps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (report.events, report.events / consume, render, os.path.getsize(report.index_path),
+            os.path.getsize(report.html_path), peak)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tests', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--devices', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    print(f"{'tests':>6} | {'events':>7} | {'events/s':>9} | {'render (s)':>10} | {'index KiB':>9} | "
+          f"{'html KiB':>8} | {'peak KiB':>8}")
+    for tests in args.tests:
+        events, rate, render, index, html, peak = bench(tests, args.devices, args.steps)
+        print(f"{tests:>6} | {events:>7} | {rate:9.0f} | {render:10.3f} | {index / 1024:9.0f} | "
+              f"{html / 1024:8.0f} | {peak / 1024:8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: comparing page sources by string vs. by UI-tree shape and diff.
+
+Builds synthetic iOS hierarchies of increasing size (a list of cells with
+labels and buttons, nested a few levels deep) and times, per tree size:
+
+- parse:       parse_page_source()
+- shape:       node.shape / node.digest for the whole tree (first use)
+- fingerprint: the cross-process screen id ScreenCache looks up
+- diff:        diff_trees() for an identical tree, a typed value, moved
+               elements (geometry only) and one inserted element
+- recognise:   a ScreenCache hit on an already hashed tree
+
+and, for comparison, plain string equality of the two sources.
+
+    python benchmarks/bench_ui_tree.py --sizes 200 2000 20000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from liveboard_test.screens import ScreenCache
+from liveboard_test.ui_tree import diff_trees, fingerprint, parse_page_source
+
+
+def build_source(nodes, typed='Search', offset=0, banner=False):
+    """An iOS page source with about `nodes` elements (3 per cell)."""
+    cells = []
+    for i in range(max(1, nodes // 3)):
+        y = i * 44 + offset
+        cells.append(
+            f'<XCUIElementTypeCell type="XCUIElementTypeCell" name="cell {i}" enabled="true" visible="true" '
+            f'x="0" y="{y}" width="375" height="44">'
+            f'<XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="Board {i}" label="Board {i}" '
+            f'enabled="true" visible="true" x="16" y="{y}" width="250" height="44"/>'
+            f'<XCUIElementTypeButton type="XCUIElementTypeButton" name="Share {i}" label="Share" '
+            f'enabled="true" visible="true" x="300" y="{y}" width="60" height="44"/>'
+            '</XCUIElementTypeCell>'
+        )
+    if banner:
+        cells.insert(len(cells) // 2, '<XCUIElementTypeStaticText type="XCUIElementTypeStaticText" '
+                                      'name="Sync failed" label="Sync failed" x="0" y="0" width="375" height="20"/>')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT>'
+        '<XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard">'
+        f'<XCUIElementTypeSearchField type="XCUIElementTypeSearchField" value="{typed}" x="0" y="0" width="375" height="44"/>'
+        f'<XCUIElementTypeTable type="XCUIElementTypeTable">{"".join(cells)}</XCUIElementTypeTable>'
+        '</XCUIElementTypeApplication></AppiumAUT>'
+    )
+
+
+def timed(fn, repeat):
+    """Best of `repeat` runs in milliseconds, and the last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench(nodes, repeat):
+    source = build_source(nodes)
+    variants = {
+        'identical': build_source(nodes),
+        'typed value': build_source(nodes, typed='boards'),
+        'geometry only': build_source(nodes, offset=-120),
+        'inserted element': build_source(nodes, banner=True),
+    }
+    parse_ms, root = timed(lambda: parse_page_source(source), repeat)
+    count = sum(1 for _ in root.iter())
+
+    def hash_fresh():
+        tree = parse_page_source(source)
+        start = time.perf_counter()
+        tree.shape
+        return time.perf_counter() - start
+
+    shape_ms = min(hash_fresh() for _ in range(repeat)) * 1000
+    fingerprint_ms, _ = timed(lambda: fingerprint(root), repeat)
+
+    rows = []
+    for label, other_source in variants.items():
+        other = parse_page_source(other_source)
+        other.shape
+        diff_ms, diff = timed(lambda: diff_trees(root, other), repeat)
+        equal_ms, _ = timed(lambda: source == other_source, repeat)
+        rows.append((label, diff_ms, diff.summary(), root.shape == other.shape, equal_ms))
+
+    cache = ScreenCache()
+    cache.learn('boards', root)
+    recognise_ms, (name, _) = timed(lambda: cache.recognise(root), repeat)
+    assert name == 'boards'
+    return count, parse_ms, shape_ms, fingerprint_ms, recognise_ms, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2000, 20000], help="Elements per tree")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for nodes in args.sizes:
+        count, parse_ms, shape_ms, fingerprint_ms, recognise_ms, rows = bench(nodes, args.repeat)
+        print(f"🌳 {count} nodes: parse {parse_ms:.2f} ms, shape+digest {shape_ms:.2f} ms, "
+              f"fingerprint {fingerprint_ms:.2f} ms, cache recognise {recognise_ms:.2f} ms")
+        print(f"   {'change':<17} | {'diff (ms)':>9} | {'result':<26} | {'same screen':<11} | {'str == (ms)':>11}")
+        for label, diff_ms, summary, same, equal_ms in rows:
+            print(f"   {label:<17} | {diff_ms:9.3f} | {summary:<26} | {str(same):<11} | {equal_ms:11.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
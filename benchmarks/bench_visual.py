@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the perceptual screenshot comparison (liveboard_test.visual).
+
+Generates UI-like frames (flat backgrounds, bars, buttons and list rows, as
+in app screenshots) at phone resolution and reports frames per second for:
+
+- decode:    PNG -> pixels with the NumPy decoder (Up-filtered and
+             Paeth-filtered PNGs) and with Pillow when installed
+- signature: perceptual hash + grey grid of one frame
+- phash:     one frame at a time vs. phash_many() over the whole batch
+- compare:   two signatures with a status-bar mask
+- inline:    what a golden check or the dedupe costs per screenshot
+             (decode + signature + compare)
+
+    python benchmarks/bench_visual.py --frames 30 --width 1170 --height 2532
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from liveboard_test.visual import (
+    PNG_SIGNATURE, compare, decode_png, decode_png_numpy, encode_png, phash, phash_many, signature,
+)
+
+
+STATUS_BAR = [(0, 0, 1, 0.07)]
+
+
+def make_frames(count, width, height, seed=0):
+    """Frames of a few screens, each shown several times with small changes (clock, cursor, a row)."""
+    rng = np.random.default_rng(seed)
+    screens = []
+    for _ in range(max(1, count // 5)):
+        frame = np.full((height, width, 3), rng.integers(225, 256, 3), np.uint8)
+        frame[:height // 14] = rng.integers(0, 256, 3)
+        for _ in range(12):
+            y, x = rng.integers(height // 10, height - height // 10), rng.integers(0, width // 2)
+            frame[y:y + height // 20, x:x + rng.integers(width // 4, width // 2)] = rng.integers(0, 256, 3)
+        screens.append(frame)
+    frames = []
+    for i in range(count):
+        frame = screens[i % len(screens)].copy()
+        frame[height // 40:height // 25, width // 2:width // 2 + width // 10] = (i * 37) % 256  # clock
+        frame[height // 2:height // 2 + height // 60, width // 3 + i % 7] = 0                    # cursor
+        frames.append(frame)
+    return frames
+
+
+def paeth_png(pixels):
+    """A Paeth-filtered PNG (what libpng-based encoders pick for most rows of photos and gradients)."""
+    height, width, _ = pixels.shape
+    p = pixels.astype(np.int16)
+    up = np.concatenate([np.zeros_like(p[:1]), p[:-1]])
+    left = np.concatenate([np.zeros_like(p[:, :1]), p[:, :-1]], axis=1)
+    upleft = np.concatenate([np.zeros_like(up[:, :1]), up[:, :-1]], axis=1)
+    estimate = left + up - upleft
+    pa, pb, pc = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - upleft)
+    predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+    rows = ((p - predictor) & 0xFF).astype(np.uint8).reshape(height, width * 3)
+    raw = np.hstack([np.full((height, 1), 4, np.uint8), rows])
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    return (PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def fps(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    return len(items) / elapsed, elapsed / len(items) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--width', type=int, default=1170, help="Screenshot width in pixels (iPhone 13: 1170)")
+    parser.add_argument('--height', type=int, default=2532)
+    parser.add_argument('--paeth-frames', type=int, default=3, help="Paeth-filtered frames to decode (slow path)")
+    args = parser.parse_args(argv)
+
+    frames = make_frames(args.frames, args.width, args.height)
+    up_pngs = [encode_png(frame) for frame in frames]
+    paeth_pngs = [paeth_png(frame) for frame in frames[:args.paeth_frames]]
+    signatures = [signature(frame) for frame in frames]
+    pairs = list(zip(signatures, signatures[1:]))
+
+    rows = [
+        ("decode, NumPy, Up rows", *fps(decode_png_numpy, up_pngs)),
+        ("decode, NumPy, Paeth rows", *fps(decode_png_numpy, paeth_pngs)),
+    ]
+    try:
+        import PIL  # noqa: F401
+        rows.append(("decode, Pillow", *fps(decode_png, up_pngs)))
+    except ImportError:
+        rows.append(("decode, Pillow", None, None))
+    rows.append(("signature", *fps(signature, frames)))
+    rows.append(("phash, one at a time", *fps(phash, frames)))
+    start = time.perf_counter()
+    phash_many(frames)
+    batch = time.perf_counter() - start
+    rows.append(("phash_many, one batch", len(frames) / batch, batch / len(frames) * 1000))
+    rows.append(("compare (masked)", *fps(lambda pair: compare(*pair, mask=STATUS_BAR), pairs)))
+    rows.append(("inline check (Up PNG)", *fps(
+        lambda png: compare(signatures[0], signature(decode_png(png)), mask=STATUS_BAR), up_pngs)))
+
+    print(f"🖼️ {len(frames)} frames of {args.width}x{args.height} "
+          f"({sum(map(len, up_pngs)) / len(up_pngs) / 1024:.0f} KiB PNG each)")
+    print(f"{'operation':<26} | {'frames/s':>9} | {'ms/frame':>9}")
+    for label, rate, ms in rows:
+        if rate is None:
+            print(f"{label:<26} | {'-':>9} | {'-':>9}  (not installed)")
+        else:
+            print(f"{label:<26} | {rate:9.1f} | {ms:9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Appium server process manager.
+
+Instead of starting `appium -p 4723` / `appium -p 4724` by hand (and
+`pkill -f appium` afterwards), the parallel runner can let
+AppiumServerManager own the servers: it keeps a warm pool of started,
+/status-checked servers on free ports, binds one to each device on first
+use, recycles a server after $APPIUM_MAX_SESSIONS sessions or once its
+memory passes $APPIUM_MAX_RSS_MB, and stops every process it started at
+exit. The server command is $APPIUM_COMMAND (default `appium`); anything
+accepting --address/--port/--base-path works, e.g. the fake server:
+
+    APPIUM_COMMAND="python -m liveboard_test.fake_appium" APPIUM_MANAGED=1 poetry run python tests/test_parallel_mobile.py
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+
+from .artifacts import run_directory
+
+
+def free_port(host='127.0.0.1'):
+    """A port nothing listens on right now (the OS picks it)."""
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def process_rss(pid):
+    """Resident memory of a process in bytes via ps (macOS and Linux), or None."""
+    try:
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)], capture_output=True, text=True,
+                                timeout=5).stdout
+        return int(output.split()[0]) * 1024
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+class ServerStartError(RuntimeError):
+    """An Appium server exited or never answered /status."""
+
+
+class AppiumServer:
+    """One Appium process the manager started."""
+
+    def __init__(self, process, host, port, base_path, log_path, start_seconds):
+        self.process = process
+        self.host = host
+        self.port = port
+        self.base_path = base_path
+        self.log_path = log_path
+        self.start_seconds = start_seconds
+        self.sessions = 0
+        self.device = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}{self.base_path}'
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def healthy(self, timeout=2.0):
+        """The process runs and /status says it is ready."""
+        if not self.alive():
+            return False
+        try:
+            with urllib.request.urlopen(self.url + '/status', timeout=timeout) as response:
+                value = json.load(response).get('value') or {}
+        except Exception:
+            return False
+        return value.get('ready', True) is not False
+
+    def rss(self):
+        return process_rss(self.pid)
+
+    def stop(self, timeout=10.0):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __repr__(self):
+        return f"AppiumServer(port={self.port}, pid={self.pid}, sessions={self.sessions})"
+
+
+class AppiumServerManager:
+    """Warm pool of Appium servers on free ports, one bound to each device."""
+
+    def __init__(self, command=None, warm=1, max_sessions=25, max_rss_mb=1500, host='127.0.0.1',
+                 base_path='/wd/hub', start_timeout=60.0, log_dir=None):
+        self.command = shlex.split(command or os.getenv('APPIUM_COMMAND') or 'appium')
+        self.warm = warm
+        self.max_sessions = max_sessions
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.host = host
+        self.base_path = base_path
+        self.start_timeout = start_timeout
+        self.log_dir = log_dir
+        self._idle = []
+        self._bound = {}
+        self._starting = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.started = 0
+        self.start_failures = 0
+        self.start_seconds = []
+        self.acquisitions = 0
+        self.reused = 0
+        self.warm_hits = 0
+        self.recycled = {}
+
+    def start_server(self):
+        """Start one server on a free port and wait until /status answers."""
+        log_dir = self.log_dir or run_directory('logs')
+        os.makedirs(log_dir, exist_ok=True)
+        for _ in range(3):
+            port = free_port(self.host)
+            log_path = os.path.join(log_dir, f'appium-{port}.log')
+            start = time.perf_counter()
+            with open(log_path, 'w') as log:
+                process = subprocess.Popen(
+                    [*self.command, '--address', self.host, '--port', str(port), '--base-path', self.base_path],
+                    stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                )
+            server = AppiumServer(process, self.host, port, self.base_path, log_path, 0.0)
+            deadline = time.monotonic() + self.start_timeout
+            while server.alive() and time.monotonic() < deadline:
+                if server.healthy(timeout=1.0):
+                    server.start_seconds = time.perf_counter() - start
+                    with self._lock:
+                        self.started += 1
+                        self.start_seconds.append(server.start_seconds)
+                    return server
+                time.sleep(0.05)
+            # Exited (often: someone else took the port first) or too slow; try another port.
+            server.stop()
+            with self._lock:
+                self.start_failures += 1
+        raise ServerStartError(f"{' '.join(self.command)} did not become ready; see {log_path}")
+
+    def prewarm(self, count=None):
+        """Start servers concurrently until `count` (default: the warm pool size) are idle or ready."""
+        with self._lock:
+            missing = (self.warm if count is None else count) - len(self._idle) - len(self._starting)
+            pending = list(self._starting)
+        threads = pending + [self._top_up() for _ in range(max(0, missing))]
+        for thread in threads:
+            thread.join()
+        return self
+
+    def _top_up(self):
+        def start():
+            server = None
+            try:
+                server = self.start_server()
+            except ServerStartError as e:
+                print(f"⚠️ Warm Appium server failed to start: {e}")
+            with self._lock:
+                self._starting.remove(thread)
+                if server is not None and not self._closed:
+                    self._idle.append(server)
+                    return
+            if server is not None:
+                server.stop()
+
+        thread = threading.Thread(target=start, name="appium-warm", daemon=True)
+        with self._lock:
+            self._starting.append(thread)
+        thread.start()
+        return thread
+
+    def acquire(self, device):
+        """The server bound to this device (started or taken from the warm pool if needed).
+
+        Sets device.appium_port, which is what the device's test processes connect to, and gives a
+        device without one its own mjpeg_port (and wda_port on iOS): Appium forwards every device's
+        screen stream and WebDriverAgent connection to a port on this host.
+        """
+        if device.mjpeg_port is None:
+            device.mjpeg_port = free_port(self.host)
+        if device.platform == 'ios' and device.wda_port is None:
+            device.wda_port = free_port(self.host)
+        with self._lock:
+            self.acquisitions += 1
+            server = self._bound.get(device.udid)
+        if server is not None:
+            if server.healthy():
+                with self._lock:
+                    self.reused += 1
+                device.appium_port = server.port
+                return server
+            self._recycle(device, server, 'unhealthy')
+        with self._lock:
+            server = self._idle.pop(0) if self._idle else None
+        if server is not None and not server.healthy():
+            self._count_recycle('unhealthy')
+            server.stop()
+            server = None
+        if server is None:
+            server = self.start_server()
+        else:
+            with self._lock:
+                self.warm_hits += 1
+        server.device = device.udid
+        with self._lock:
+            self._bound[device.udid] = server
+            refill = not self._closed and len(self._idle) + len(self._starting) < self.warm
+        if refill:
+            self._top_up()
+        device.appium_port = server.port
+        return server
+
+    def release(self, device, sessions=1):
+        """Count the sessions a device ran on its server; recycle it when worn out or too big."""
+        with self._lock:
+            server = self._bound.get(device.udid)
+        if server is None:
+            return
+        server.sessions += sessions
+        if server.sessions >= self.max_sessions:
+            self._recycle(device, server, 'sessions')
+        elif self.max_rss is not None:
+            rss = server.rss()
+            if rss is not None and rss > self.max_rss:
+                self._recycle(device, server, 'memory')
+
+    @contextlib.contextmanager
+    def server_for(self, device):
+        """Acquire the device's server for one test process and count its session afterwards."""
+        server = self.acquire(device)
+        try:
+            yield server
+        finally:
+            self.release(device)
+
+    def bind(self, devices):
+        """Give every device its server up front (concurrently), e.g. before preflight."""
+        self.prewarm(len(devices))
+        threads = [threading.Thread(target=self.acquire, args=(device,), name=f"appium-bind-{device.name}")
+                   for device in devices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self
+
+    def _recycle(self, device, server, reason):
+        with self._lock:
+            if self._bound.get(device.udid) is server:
+                del self._bound[device.udid]
+        self._count_recycle(reason)
+        print(f"♻️ Recycling Appium server :{server.port} of {device.name} ({reason}, {server.sessions} sessions)")
+        server.stop()
+
+    def _count_recycle(self, reason):
+        with self._lock:
+            self.recycled[reason] = self.recycled.get(reason, 0) + 1
+
+    def servers(self):
+        with self._lock:
+            return list(self._bound.values()) + list(self._idle)
+
+    def close(self):
+        """Stop every server this manager started, including ones still warming up."""
+        with self._lock:
+            self._closed = True
+            starting = list(self._starting)
+        for thread in starting:
+            thread.join(self.start_timeout)
+        with self._lock:
+            servers = list(self._bound.values()) + self._idle
+            self._bound.clear()
+            self._idle = []
+        for server in servers:
+            server.stop()
+
+    @property
+    def reuse_ratio(self):
+        """Share of acquisitions served by the device's already running server."""
+        return self.reused / self.acquisitions if self.acquisitions else 0.0
+
+    def stats(self):
+        return {
+            'started': self.started,
+            'start_failures': self.start_failures,
+            'avg_start_seconds': round(sum(self.start_seconds) / len(self.start_seconds), 3) if self.start_seconds else 0.0,
+            'max_start_seconds': round(max(self.start_seconds), 3) if self.start_seconds else 0.0,
+            'acquisitions': self.acquisitions,
+            'reused': self.reused,
+            'warm_hits': self.warm_hits,
+            'reuse_ratio': round(self.reuse_ratio, 3),
+            'recycled': dict(self.recycled),
+        }
+
+    def format(self):
+        s = self.stats()
+        recycled = ', '.join(f"{n} {reason}" for reason, n in sorted(s['recycled'].items())) or 'none'
+        return (f"🖧 Appium servers: {s['started']} started (avg {s['avg_start_seconds']:.2f}s, "
+                f"max {s['max_start_seconds']:.2f}s), {s['reused']}/{s['acquisitions']} acquisitions reused "
+                f"({s['reuse_ratio']:.0%}), {s['warm_hits']} warm hits, recycled: {recycled}")
+
+
+_default_manager = None
+
+
+def get_server_manager():
+    """Process-wide manager configured from the environment; stops its servers at exit."""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = AppiumServerManager(
+            warm=int(os.getenv('APPIUM_WARM_POOL', '1')),
+            max_sessions=int(os.getenv('APPIUM_MAX_SESSIONS', '25')),
+            max_rss_mb=float(os.getenv('APPIUM_MAX_RSS_MB', '1500')),
+            start_timeout=float(os.getenv('APPIUM_START_TIMEOUT', '60')),
+            log_dir=os.getenv('APPIUM_LOG_DIR'),
+        )
+        atexit.register(_default_manager.close)
+    return _default_manager
+
+
+def shutdown_server_manager():
+    """Stop the process-wide manager's servers if one was created and return it for reporting."""
+    global _default_manager
+    manager, _default_manager = _default_manager, None
+    if manager is not None:
+        atexit.unregister(manager.close)
+        manager.close()
+    return manager
@@ -0,0 +1,49 @@
+"""
+Per-run artifact directory shared by screenshots, reports and metrics.
+"""
+
+import os
+import re
+import time
+
+
+_run_id = None
+
+
+def run_id():
+    """Identifier of this test run: $RUN_ID (set by CI or the parallel runner) or a timestamp."""
+    global _run_id
+    if _run_id is None:
+        _run_id = os.getenv('RUN_ID') or time.strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
+    return _run_id
+
+
+def recording_enabled(environ=None):
+    """Whether this process records into the history kept across runs and the run report.
+
+    Only runs that drive devices do: parallel runner workers ($LIVEBOARD_WORKER)
+    and runs started with $LIVEBOARD_RECORD=1. Unit tests leave it alone.
+    """
+    environ = os.environ if environ is None else environ
+    if environ.get('LIVEBOARD_RECORD', '').lower() in ('0', 'false', 'no', 'off'):
+        return False
+    return bool(environ.get('LIVEBOARD_WORKER') or environ.get('LIVEBOARD_RECORD'))
+
+
+def process_tag():
+    """Name of this test process inside a shared run directory: <worker>-<pid>, or the pid alone.
+
+    The parallel runner starts one pytest process per item under the same RUN_ID,
+    and each numbers its files from 1 again.
+    """
+    worker = os.getenv('LIVEBOARD_WORKER')
+    if not worker:
+        return str(os.getpid())
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', worker).strip('_') + f"-{os.getpid()}"
+
+
+def run_directory(*parts):
+    """Create and return artifacts/<run id>/<parts...> (root overridable with $ARTIFACTS_DIR)."""
+    path = os.path.join(os.getenv('ARTIFACTS_DIR', 'artifacts'), run_id(), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
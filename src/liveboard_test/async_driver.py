@@ -0,0 +1,416 @@
+"""
+asyncio WebDriver/Appium client for driving many devices from one process.
+
+The parallel runner starts one pytest process per item, each paying the
+Appium client and pytest import cost (~30 MB, 0.3 s) before its first
+command. AsyncWebDriver speaks the W3C protocol subset the suite uses
+(session create/delete, find, click, send_keys, page source, screenshot,
+app terminate/activate, execute script) over one keep-alive connection per
+session, so one event loop can drive dozens of sessions concurrently:
+
+    async def login(url, options):
+        async with await AsyncWebDriver.create(url, options) as driver:
+            await (await driver.find_element('accessibility id', 'Log in')).click()
+
+    await asyncio.gather(*(login(url, options) for url, options in devices))
+
+SyncDriver is a blocking facade over it (commands run on a shared background
+loop) with the WebDriver methods the existing tests and flows call; set
+$APPIUM_CLIENT=async and create_driver() returns one. Errors are raised as
+the usual selenium exceptions so waits and retries behave the same. Per-
+command instrumentation (instrumentation.py) only covers the default client.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    InvalidArgumentException,
+    InvalidSelectorException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+ERRORS = {
+    'no such element': NoSuchElementException,
+    'stale element reference': StaleElementReferenceException,
+    'element not interactable': ElementNotInteractableException,
+    'invalid selector': InvalidSelectorException,
+    'invalid argument': InvalidArgumentException,
+    'invalid session id': InvalidSessionIdException,
+    'timeout': TimeoutException,
+}
+
+
+def error_for(status, value):
+    """The selenium exception for a W3C error response."""
+    if isinstance(value, dict):
+        error = value.get('error', '')
+        return ERRORS.get(error, WebDriverException)(value.get('message') or error or f"HTTP {status}",
+                                                     stacktrace=value.get('stacktrace'))
+    return WebDriverException(f"HTTP {status}: {value!r}")
+
+
+class AsyncConnection:
+    """One keep-alive HTTP/1.1 connection to an Appium server; requests go one at a time."""
+
+    def __init__(self, host, port, connect_timeout=10.0, read_timeout=300.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.requests = 0
+        self.connections = 0
+        self._reader = None
+        self._writer = None
+        self._used = 0
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, body=None):
+        """Send one request and return (status, decoded JSON body or raw bytes)."""
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        async with self._lock:
+            while True:
+                if self._writer is None:
+                    await self._connect()
+                reused = self._used > 0
+                try:
+                    response = await asyncio.wait_for(self._round_trip(method, path, payload), self.read_timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    await self.close()
+                    # The server may drop an idle keep-alive connection; retry once on a fresh one.
+                    if reused:
+                        continue
+                    raise
+                except asyncio.TimeoutError:
+                    await self.close()
+                    raise TimeoutException(f"{method} {path} got no response in {self.read_timeout}s")
+                self.requests += 1
+                return response
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        self._used = 0
+        self.connections += 1
+
+    async def _round_trip(self, method, path, payload):
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Accept: application/json\r\nContent-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n\r\n")
+        self._writer.write(head.encode('latin-1') + payload)
+        await self._writer.drain()
+        self._used += 1
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif 'content-length' in headers:
+            data = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            data = await self._reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        if headers.get('content-type', '').startswith('application/json') or data[:1] in (b'{', b'['):
+            return status, json.loads(data) if data else None
+        return status, data
+
+    async def _read_chunked(self):
+        data = b''
+        while True:
+            size = int((await self._reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await self._reader.readline()
+                return data
+            data += await self._reader.readexactly(size)
+            await self._reader.readline()
+
+    async def close(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class AsyncElement:
+    """A found element; every method is one round trip."""
+
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    def _command(self, method, path, body=None):
+        return self.driver.command(method, f'/element/{self.id}{path}', body)
+
+    async def click(self):
+        await self._command('POST', '/click', {})
+
+    async def send_keys(self, text):
+        text = str(text)
+        await self._command('POST', '/value', {'text': text, 'value': list(text)})
+
+    async def clear(self):
+        await self._command('POST', '/clear', {})
+
+    async def text(self):
+        return await self._command('GET', '/text')
+
+    async def get_attribute(self, name):
+        return await self._command('GET', f'/attribute/{name}')
+
+    async def is_displayed(self):
+        return bool(await self._command('GET', '/displayed'))
+
+    async def is_enabled(self):
+        return bool(await self._command('GET', '/enabled'))
+
+    def __repr__(self):
+        return f"AsyncElement({self.id!r})"
+
+
+class AsyncWebDriver:
+    """One Appium session driven with coroutines."""
+
+    def __init__(self, url, connect_timeout=None, read_timeout=None):
+        parts = urlsplit(url)
+        self.url = url
+        self.base_path = parts.path.rstrip('/')
+        self.connection = AsyncConnection(
+            parts.hostname, parts.port or 80,
+            float(connect_timeout or os.getenv('APPIUM_CONNECT_TIMEOUT', '10')),
+            float(read_timeout or os.getenv('APPIUM_READ_TIMEOUT', '300')),
+        )
+        self.session_id = None
+        self.capabilities = {}
+
+    @classmethod
+    async def create(cls, url, options):
+        """Start a session with these options (an Appium options object or a capability dict)."""
+        driver = cls(url)
+        capabilities = options.to_capabilities() if hasattr(options, 'to_capabilities') else dict(options)
+        try:
+            value = await driver.request('POST', '/session',
+                                         {'capabilities': {'alwaysMatch': capabilities, 'firstMatch': [{}]}})
+        except BaseException:
+            await driver.connection.close()
+            raise
+        driver.session_id = value['sessionId']
+        driver.capabilities = value.get('capabilities') or {}
+        return driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.quit()
+
+    async def request(self, method, path, body=None):
+        """Send a command below the base path and return its value, raising selenium exceptions."""
+        status, payload = await self.connection.request(method, self.base_path + path, body)
+        value = payload.get('value') if isinstance(payload, dict) else payload
+        if status >= 400:
+            raise error_for(status, value)
+        return value
+
+    def command(self, method, path, body=None):
+        """A command of this session (path relative to /session/<id>)."""
+        return self.request(method, f'/session/{self.session_id}{path}', body)
+
+    def _element(self, value):
+        return AsyncElement(self, value.get(ELEMENT_KEY) or value.get('ELEMENT'))
+
+    async def find_element(self, by, value):
+        return self._element(await self.command('POST', '/element', {'using': by, 'value': value}))
+
+    async def find_elements(self, by, value):
+        return [self._element(v) for v in await self.command('POST', '/elements', {'using': by, 'value': value})]
+
+    async def page_source(self):
+        return await self.command('GET', '/source')
+
+    async def screenshot_base64(self):
+        return await self.command('GET', '/screenshot')
+
+    async def screenshot(self):
+        """The screen as PNG bytes."""
+        return base64.b64decode(await self.screenshot_base64())
+
+    async def execute_script(self, script, *args):
+        return await self.command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def terminate_app(self, app_id):
+        return await self.execute_script('mobile: terminateApp', {'appId': app_id, 'bundleId': app_id})
+
+    async def activate_app(self, app_id):
+        return await self.execute_script('mobile: activateApp', {'appId': app_id, 'bundleId': app_id})
+
+    async def log_types(self):
+        return await self.command('GET', '/se/log/types')
+
+    async def get_log(self, log_type):
+        """Device log entries logged since the last request for log_type."""
+        return await self.command('POST', '/se/log', {'type': log_type})
+
+    async def timeouts(self):
+        return await self.command('GET', '/timeouts')
+
+    async def implicitly_wait(self, seconds):
+        await self.command('POST', '/timeouts', {'implicit': int(seconds * 1000)})
+
+    async def quit(self):
+        """Delete the session and close its connection."""
+        try:
+            if self.session_id is not None:
+                await self.command('DELETE', '')
+        finally:
+            self.session_id = None
+            await self.connection.close()
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    """The event loop SyncDriver runs its commands on, in a daemon thread."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-webdriver", daemon=True).start()
+    return _loop
+
+
+def run_sync(coroutine):
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+
+
+class SyncElement:
+    """Blocking view of an AsyncElement with the WebElement methods the tests use."""
+
+    def __init__(self, element):
+        self._element = element
+
+    @property
+    def id(self):
+        return self._element.id
+
+    def click(self):
+        run_sync(self._element.click())
+
+    def send_keys(self, *value):
+        run_sync(self._element.send_keys(''.join(str(v) for v in value)))
+
+    def clear(self):
+        run_sync(self._element.clear())
+
+    @property
+    def text(self):
+        return run_sync(self._element.text())
+
+    def get_attribute(self, name):
+        return run_sync(self._element.get_attribute(name))
+
+    def is_displayed(self):
+        return run_sync(self._element.is_displayed())
+
+    def is_enabled(self):
+        return run_sync(self._element.is_enabled())
+
+
+class SyncDriver:
+    """Blocking facade over AsyncWebDriver for code written against the Appium WebDriver."""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    @classmethod
+    def create(cls, url, options):
+        return cls(run_sync(AsyncWebDriver.create(url, options)))
+
+    @property
+    def session_id(self):
+        return self._driver.session_id
+
+    @property
+    def capabilities(self):
+        return self._driver.capabilities
+
+    def find_element(self, by='id', value=None):
+        return SyncElement(run_sync(self._driver.find_element(by, value)))
+
+    def find_elements(self, by='id', value=None):
+        return [SyncElement(e) for e in run_sync(self._driver.find_elements(by, value))]
+
+    @property
+    def page_source(self):
+        return run_sync(self._driver.page_source())
+
+    def get_screenshot_as_base64(self):
+        return run_sync(self._driver.screenshot_base64())
+
+    def get_screenshot_as_png(self):
+        return run_sync(self._driver.screenshot())
+
+    def execute_script(self, script, *args):
+        return run_sync(self._driver.execute_script(script, *args))
+
+    def terminate_app(self, app_id, **options):
+        return run_sync(self._driver.terminate_app(app_id))
+
+    def activate_app(self, app_id):
+        return run_sync(self._driver.activate_app(app_id))
+
+    def push_file(self, destination_path, base64data=None, source_path=None):
+        if source_path is not None:
+            with open(source_path, 'rb') as f:
+                base64data = base64.b64encode(f.read()).decode('ascii')
+        return self.execute_script('mobile: pushFile', {'remotePath': destination_path, 'payload': base64data})
+
+    def pull_file(self, path):
+        return self.execute_script('mobile: pullFile', {'remotePath': path})
+
+    @property
+    def log_types(self):
+        return run_sync(self._driver.log_types())
+
+    def get_log(self, log_type):
+        return run_sync(self._driver.get_log(log_type))
+
+    @property
+    def timeouts(self):
+        return run_sync(self._driver.timeouts())
+
+    def implicitly_wait(self, time_to_wait):
+        run_sync(self._driver.implicitly_wait(time_to_wait))
+
+    def quit(self):
+        run_sync(self._driver.quit())
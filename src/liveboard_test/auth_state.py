@@ -0,0 +1,317 @@
+"""
+Login-once authenticated app state.
+
+Logging in through the UI is the slowest part of every test that needs a
+signed-in user. AuthStateManager logs in once per device and app build and
+hands the authenticated app to every later test:
+
+- keep (default): the session runs with noReset, so the app simply stays
+  signed in; relaunching it lands on the signed-in screen.
+- container: additionally pulls the app's auth files out of its data
+  container after the login and pushes them back when a new session (or a
+  fullReset) wiped them.
+- off: clear the app and log in through the UI for every test.
+
+Each stored state is checked before it is trusted: it is invalidated when it
+is older than $AUTH_STATE_TTL, was captured on another app build ($APP_BUILD)
+or the app turns out to be signed out (revoked token), and the UI login runs
+again. States live in $AUTH_STATE_FILE (default ~/.liveboard/auth_state.json,
+outside the uploaded artifacts because it may contain session tokens).
+Parallel workers share the file: saves merge under a lock, so one worker's
+login never drops another's.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from .flows import FlowRunner
+from .locators import compile_locator
+from .session_pool import app_id_for, reset_app_state
+from .ui_tree import parse_page_source
+from .waits import WaitEngine, page_source_stable
+
+
+MODES = ('keep', 'container', 'off')
+
+
+class AuthStateError(RuntimeError):
+    """The UI login finished but the app is still signed out."""
+
+
+def default_state_path():
+    return os.getenv('AUTH_STATE_FILE') or os.path.join(os.path.expanduser('~'), '.liveboard', 'auth_state.json')
+
+
+def _capability(capabilities, name):
+    return capabilities.get(name) or capabilities.get('appium:' + name)
+
+
+class AuthState:
+    """One device's signed-in app: when and on which build it was captured, plus its auth files."""
+
+    def __init__(self, key, fingerprint, captured_at, login_seconds=None, files=None):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.captured_at = captured_at
+        self.login_seconds = login_seconds
+        self.files = files or {}
+
+    def age(self, now=None):
+        return (now or time.time()) - self.captured_at
+
+    def stale_reason(self, fingerprint, ttl, now=None):
+        """Why this state can't be reused, or None if it is still fresh."""
+        if self.fingerprint != fingerprint:
+            return f"app build changed ({self.fingerprint} -> {fingerprint})"
+        if ttl and self.age(now) > ttl:
+            return f"expired ({self.age(now) / 3600:.1f}h old)"
+        return None
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'fingerprint': self.fingerprint,
+            'captured_at': self.captured_at,
+            'login_seconds': self.login_seconds,
+            'files': self.files,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['key'], data['fingerprint'], data['captured_at'], data.get('login_seconds'),
+                   data.get('files'))
+
+
+class AuthStateManager:
+    """Logs in once per device and reuses (or restores) the authenticated app afterwards."""
+
+    def __init__(self, flow, signed_out, auth_files=None, path=None, mode='keep', ttl=12 * 3600,
+                 settle_timeout=5, app_build=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown auth state mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.flow = flow
+        self.signed_out = signed_out
+        self.auth_files = auth_files or {}
+        self.path = path or default_state_path()
+        self.mode = mode
+        self.ttl = ttl
+        self.settle_timeout = settle_timeout
+        self.app_build = app_build
+        self.states = {}
+        self.dropped = {}
+        self.logins = []
+        self.reused = 0
+        self.restored = 0
+        self.invalidated = []
+        self.check_seconds = 0.0
+        if mode != 'off':
+            self.load()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return {d['key']: AuthState.from_dict(d) for d in json.load(f).get('states', [])}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # A half-written or hand-edited file only costs a UI login
+            print(f"⚠️ Ignoring unreadable auth state file {self.path}: {e}")
+            return {}
+
+    def load(self):
+        self.states = self._read()
+        return self
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Re-read the file, let the caller merge into it and write it back atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            states = self._read()
+            yield states
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({'states': [s.to_dict() for s in states.values()]}, f, indent=2)
+            # Auth files are session tokens: keep them private to the user running the tests.
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+
+    def save(self):
+        """Merge this process's states into the file; the newest capture of a key wins."""
+        if self.mode == 'off':
+            return None
+        with self._locked() as states:
+            for key, captured_at in self.dropped.items():
+                if key in states and states[key].captured_at <= captured_at:
+                    del states[key]
+            for key, state in self.states.items():
+                if key not in states or states[key].captured_at <= state.captured_at:
+                    states[key] = state
+            self.states = dict(states)
+        return self.path
+
+    def key(self, driver, platform):
+        capabilities = driver.capabilities
+        device = _capability(capabilities, 'udid') or _capability(capabilities, 'deviceName') or '-'
+        return f"{platform}:{device}:{app_id_for(capabilities)}"
+
+    def fingerprint(self):
+        return f"{self.flow.name}@{self.app_build or 'unknown build'}"
+
+    def ensure(self, driver, platform, waits=None):
+        """Leave the app signed in; returns 'reused', 'restored' or 'logged_in'."""
+        waits = waits or WaitEngine(driver)
+        app_id = app_id_for(driver.capabilities)
+        if self.mode == 'off':
+            self.clear(driver, app_id)
+            return self.login(driver, platform, waits)
+
+        key = self.key(driver, platform)
+        state = self.states.get(key)
+        reason = state.stale_reason(self.fingerprint(), self.ttl) if state else None
+        if reason:
+            self.invalidate(key, reason)
+            self.clear(driver, app_id)
+            state = None
+
+        if state is None and not reason and self.signed_in(driver, platform, waits):
+            # Signed in by an earlier run that didn't record its state; its age is unknown from here on.
+            print(f"🔑 {key}: app already signed in, adopting its state")
+            self.states[key] = AuthState(key, self.fingerprint(), time.time(), files=self.capture(driver, platform))
+            self.reused += 1
+            return 'reused'
+
+        if state is not None:
+            if self.signed_in(driver, platform, waits):
+                self.reused += 1
+                print(f"🔑 {key}: reusing signed-in app ({state.age() / 60:.0f} min old)")
+                return 'reused'
+            if state.files:
+                self.restore(driver, state, app_id)
+                if self.signed_in(driver, platform, waits):
+                    self.restored += 1
+                    print(f"🔑 {key}: restored {len(state.files)} auth file(s) into the app container")
+                    return 'restored'
+            self.invalidate(key, "app is signed out")
+        return self.login(driver, platform, waits, key)
+
+    def signed_in(self, driver, platform, waits):
+        """Let the launch screen settle, then check the signed-out marker is gone."""
+        start = time.monotonic()
+        try:
+            waits.until(page_source_stable(), name="auth state check", timeout=self.settle_timeout,
+                        required=False)
+            root = parse_page_source(driver.page_source)
+            return not compile_locator(*self.signed_out[platform])(root)
+        finally:
+            self.check_seconds += time.monotonic() - start
+
+    def login(self, driver, platform, waits, key=None):
+        start = time.monotonic()
+        FlowRunner(driver, waits).run(self.flow.compile(platform))
+        seconds = time.monotonic() - start
+        self.logins.append(seconds)
+        if not self.signed_in(driver, platform, waits):
+            raise AuthStateError(f"{self.flow.name} finished but the app on {platform} is still signed out")
+        if key is not None:
+            self.states[key] = AuthState(key, self.fingerprint(), time.time(), seconds,
+                                         self.capture(driver, platform))
+            self.save()
+        print(f"🔑 Logged in through the UI on {platform} in {seconds:.1f}s")
+        return 'logged_in'
+
+    def capture(self, driver, platform):
+        """{device path: base64 contents} of the app's auth files (container mode only)."""
+        if self.mode != 'container':
+            return {}
+        files = {}
+        for path in self.auth_files.get(platform, ()):
+            try:
+                files[path] = driver.pull_file(path)
+            except WebDriverException as e:
+                print(f"⚠️ Could not pull {path}: {e.msg}")
+        return files
+
+    def restore(self, driver, state, app_id):
+        for path, data in state.files.items():
+            driver.push_file(path, base64data=data)
+        # Relaunch so the app reads the restored files.
+        reset_app_state(driver, app_id)
+
+    def clear(self, driver, app_id):
+        """Wipe the app's data so a stale session can't leak into the next login."""
+        if not app_id:
+            return
+        try:
+            driver.execute_script('mobile: clearApp', {'appId': app_id})
+        except WebDriverException as e:
+            print(f"⚠️ Could not clear {app_id}: {e.msg}")
+        reset_app_state(driver, app_id)
+
+    def invalidate(self, key, reason):
+        state = self.states.pop(key, None)
+        if state is not None:
+            # Another worker's newer login of the same key survives the merge in save()
+            self.dropped[key] = max(state.captured_at, self.dropped.get(key, 0))
+        self.invalidated.append((key, reason))
+        print(f"♻️ Auth state for {key} invalidated: {reason}")
+        self.save()
+
+    @property
+    def login_seconds(self):
+        """Average UI login time, from this run or from the stored states."""
+        samples = self.logins or [s.login_seconds for s in self.states.values() if s.login_seconds]
+        return sum(samples) / len(samples) if samples else 0.0
+
+    @property
+    def seconds_saved(self):
+        return max(0.0, (self.reused + self.restored) * self.login_seconds - self.check_seconds)
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'logins': len(self.logins),
+            'reused': self.reused,
+            'restored': self.restored,
+            'invalidated': [{'key': key, 'reason': reason} for key, reason in self.invalidated],
+            'login_seconds': round(self.login_seconds, 3),
+            'seconds_saved': round(self.seconds_saved, 3),
+        }
+
+    def format(self):
+        return (f"🔑 Auth state ({self.mode}): {len(self.logins)} UI login(s), {self.reused} reused, "
+                f"{self.restored} restored, {len(self.invalidated)} invalidated "
+                f"(~{self.seconds_saved:.1f}s of logins saved)")
+
+
+_default_manager = None
+
+
+def get_auth_state_manager():
+    """Process-wide manager for the Liveboard login ($AUTH_STATE_MODE, $AUTH_STATE_TTL, $APP_BUILD)."""
+    global _default_manager
+    if _default_manager is None:
+        from .liveboard_flows import AUTH_FILES, LOGIN, SIGNED_OUT
+
+        _default_manager = AuthStateManager(
+            LOGIN, SIGNED_OUT, AUTH_FILES,
+            mode=os.getenv('AUTH_STATE_MODE', 'keep'),
+            ttl=float(os.getenv('AUTH_STATE_TTL', 12 * 3600)),
+            app_build=os.getenv('APP_BUILD'),
+        )
+    return _default_manager
+
+
+def shutdown_auth_state_manager():
+    """Save and drop the process-wide manager if one was created and return it for reporting."""
+    global _default_manager
+    manager, _default_manager = _default_manager, None
+    if manager is not None:
+        manager.save()
+    return manager
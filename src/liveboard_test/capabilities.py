@@ -0,0 +1,295 @@
+"""
+Capability profile registry.
+
+Every driver factory builds its capabilities here instead of keeping its own
+copy. Capabilities are merged in this order (later wins):
+
+    platform base -> appium_inspector_config.json -> profile -> environment -> overrides
+
+Profiles decide how much work Appium does before the session is ready:
+
+    cold      full reset: reinstall the app and wipe its data (slowest, cleanest)
+    warm      keep the installed app and its data, only relaunch it
+    prebuilt  warm, plus reuse the installed WDA / UiAutomator2 server (fastest)
+
+The profile is chosen with $CAPABILITY_PROFILE (default: warm). Session
+creation time is recorded per profile so the fastest safe one can be picked.
+"""
+
+import json
+import os
+import statistics
+import threading
+
+
+APP_ID = 'com.inconceptlabs.liveboard'
+
+DEFAULT_PROFILE = 'warm'
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'appium_inspector_config.json')
+
+BASE_CAPABILITIES = {
+    'ios': {
+        'platformName': 'iOS',
+        'automationName': 'XCUITest',
+        'platformVersion': '17.2',
+        'deviceName': 'iPhone SE',
+        'udid': '00008030-000151561A85402E',
+        'bundleId': APP_ID,
+        'newCommandTimeout': 600,
+        'wdaLaunchTimeout': 180000,
+        'wdaConnectionTimeout': 180000,
+        'xcuitestTeamId': '2FHJSTZ57U',
+        'updateWDABundleId': '2FHJSTZ57U.WebDriverAgentRunner',
+    },
+    'android': {
+        'platformName': 'Android',
+        'automationName': 'UiAutomator2',
+        'platformVersion': '13',
+        'deviceName': 'Android Device',
+        'udid': 'HT7991A08308',
+        'appPackage': APP_ID,
+        'appActivity': f'{APP_ID}.pages.activities.LaunchActivity',
+        'newCommandTimeout': 600,
+        'uiautomator2ServerLaunchTimeout': 180000,
+        'uiautomator2ServerInstallTimeout': 180000,
+        'autoGrantPermissions': True,
+    },
+}
+
+# Environment variables (as exported by the scheduler for each device) -> capability.
+ENVIRONMENT = {
+    'ios': {
+        'DEVICE_UDID': 'udid',
+        'DEVICE_NAME': 'deviceName',
+        'PLATFORM_VERSION': 'platformVersion',
+        'MJPEG_PORT': 'mjpegServerPort',
+        'WDA_LOCAL_PORT': 'wdaLocalPort',
+    },
+    'android': {
+        'ANDROID_DEVICE_UDID': 'udid',
+        'ANDROID_DEVICE_NAME': 'deviceName',
+        'ANDROID_PLATFORM_VERSION': 'platformVersion',
+        'MJPEG_PORT': 'mjpegServerPort',
+    },
+}
+
+TIMEOUT_CAPABILITIES = (
+    'newCommandTimeout', 'wdaLaunchTimeout', 'wdaConnectionTimeout',
+    'uiautomator2ServerLaunchTimeout', 'uiautomator2ServerInstallTimeout',
+)
+
+
+class CapabilityError(ValueError):
+    """Raised for unknown profiles and inconsistent capability sets."""
+
+
+class CapabilityProfile:
+    """A named set of capabilities layered over the platform base."""
+
+    def __init__(self, name, platform, capabilities, description="", resets_app_data=False):
+        self.name = name
+        self.platform = platform
+        self.capabilities = capabilities
+        self.description = description
+        self.resets_app_data = resets_app_data
+
+
+_profiles = {}
+
+
+def register_profile(profile):
+    """Add or replace a profile in the registry."""
+    _profiles[(profile.platform, profile.name)] = profile
+    return profile
+
+
+def get_profile(platform, name):
+    try:
+        return _profiles[(platform, name)]
+    except KeyError:
+        known = ", ".join(profile_names(platform)) or "none"
+        raise CapabilityError(f"Unknown {platform} capability profile '{name}' (known: {known})") from None
+
+
+def profile_names(platform):
+    return sorted(name for profile_platform, name in _profiles if profile_platform == platform)
+
+
+register_profile(CapabilityProfile('cold', 'ios', {
+    'fullReset': True, 'noReset': False, 'shouldTerminateApp': True, 'forceAppLaunch': True,
+}, "Reinstall the app and wipe its data", resets_app_data=True))
+register_profile(CapabilityProfile('warm', 'ios', {
+    'fullReset': False, 'noReset': True, 'forceAppLaunch': True, 'useNewWDA': False,
+}, "Keep the app and its data, relaunch it"))
+register_profile(CapabilityProfile('prebuilt', 'ios', {
+    'fullReset': False, 'noReset': True, 'forceAppLaunch': True, 'usePrebuiltWDA': True, 'useNewWDA': False,
+}, "Warm, and reuse the WebDriverAgent already on the device"))
+
+register_profile(CapabilityProfile('cold', 'android', {
+    'fullReset': True, 'noReset': False,
+}, "Reinstall the app and wipe its data", resets_app_data=True))
+register_profile(CapabilityProfile('warm', 'android', {
+    'fullReset': False, 'noReset': True,
+}, "Keep the app and its data, relaunch it"))
+register_profile(CapabilityProfile('prebuilt', 'android', {
+    'fullReset': False, 'noReset': True, 'skipServerInstallation': True, 'skipDeviceInitialization': True,
+}, "Warm, and reuse the UiAutomator2 server already on the device"))
+
+
+def default_profile():
+    return os.getenv('CAPABILITY_PROFILE', DEFAULT_PROFILE)
+
+
+def load_config_file(platform, path=None):
+    """Capabilities from an Appium Inspector config file, if it exists and targets this platform."""
+    path = path or os.getenv('APPIUM_CAPABILITIES_FILE') or CONFIG_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        capabilities = json.load(f)
+    if str(capabilities.get('platformName', '')).lower() != platform:
+        return {}
+    return {name.split(':', 1)[-1]: value for name, value in capabilities.items()}
+
+
+def environment_capabilities(platform, environ=None):
+    environ = os.environ if environ is None else environ
+    capabilities = {name: environ[var] for var, name in ENVIRONMENT[platform].items() if environ.get(var)}
+    for port in ('mjpegServerPort', 'wdaLocalPort'):
+        if port in capabilities:
+            capabilities[port] = int(capabilities[port])
+    if platform == 'ios' and environ.get('TEAM_ID'):
+        capabilities['xcuitestTeamId'] = environ['TEAM_ID']
+        capabilities['updateWDABundleId'] = f"{environ['TEAM_ID']}.WebDriverAgentRunner"
+    return capabilities
+
+
+def validate_capabilities(platform, capabilities):
+    """Raise CapabilityError if the merged capabilities can't start a sensible session."""
+    problems = []
+    if str(capabilities.get('platformName', '')).lower() != platform:
+        problems.append(f"platformName is {capabilities.get('platformName')!r}, expected {platform}")
+    for name in ('automationName', 'deviceName', 'udid'):
+        if not capabilities.get(name):
+            problems.append(f"{name} is missing")
+    app_keys = ('bundleId', 'app') if platform == 'ios' else ('appPackage', 'app')
+    if not any(capabilities.get(name) for name in app_keys):
+        problems.append(f"one of {' / '.join(app_keys)} is required")
+    if capabilities.get('fullReset') and capabilities.get('noReset'):
+        problems.append("fullReset and noReset are both set")
+    if capabilities.get('usePrebuiltWDA') and capabilities.get('useNewWDA'):
+        problems.append("usePrebuiltWDA and useNewWDA are both set (useNewWDA rebuilds WDA every session)")
+    for name in TIMEOUT_CAPABILITIES:
+        value = capabilities.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            problems.append(f"{name} must be a positive integer, got {value!r}")
+    if problems:
+        raise CapabilityError(f"Invalid {platform} capabilities: " + "; ".join(problems))
+    return capabilities
+
+
+def build_capabilities(platform, profile=None, overrides=None, config_file=None, environ=None):
+    """Merge base, config file, profile, environment and overrides into one validated dict."""
+    profile = get_profile(platform, profile or default_profile())
+    capabilities = dict(BASE_CAPABILITIES[platform])
+    capabilities.update(load_config_file(platform, config_file))
+    capabilities.update(profile.capabilities)
+    capabilities.update(environment_capabilities(platform, environ))
+    capabilities.update(overrides or {})
+    return validate_capabilities(platform, capabilities)
+
+
+def build_options(platform, profile=None, overrides=None, config_file=None, environ=None):
+    """Appium options object for a profile; remembers the profile name for session timing."""
+    if platform == 'ios':
+        from appium.options.ios.xcuitest.base import XCUITestOptions as Options
+    else:
+        from appium.options.android.uiautomator2.base import UiAutomator2Options as Options
+    name = profile or default_profile()
+    options = Options()
+    options.load_capabilities(build_capabilities(platform, name, overrides, config_file, environ))
+    options.capability_profile = name
+    return options
+
+
+def profile_of(options):
+    return getattr(options, 'capability_profile', None)
+
+
+class SessionTimings:
+    """Session-creation time per (platform, profile), kept across runs in a JSON history file."""
+
+    def __init__(self, history=200):
+        self.history = history
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform, profile, seconds, ok=True):
+        key = f"{platform}/{profile or 'custom'}"
+        with self._lock:
+            samples = self.samples.setdefault(key, [])
+            samples.append({'seconds': round(seconds, 3), 'ok': ok})
+            del samples[:-self.history]
+
+    def summary(self):
+        """{platform/profile: {sessions, failures, median, min, max}}"""
+        summary = {}
+        with self._lock:
+            items = sorted(self.samples.items())
+        for key, samples in items:
+            durations = [s['seconds'] for s in samples if s['ok']]
+            summary[key] = {
+                'sessions': len(samples),
+                'failures': sum(not s['ok'] for s in samples),
+                'median': round(statistics.median(durations), 3) if durations else None,
+                'min': min(durations, default=None),
+                'max': max(durations, default=None),
+            }
+        return summary
+
+    def fastest_profile(self, platform):
+        """The profile with the lowest median session time that never failed to start."""
+        candidates = [
+            (s['median'], key.split('/', 1)[1]) for key, s in self.summary().items()
+            if key.startswith(f"{platform}/") and not s['failures'] and s['median'] is not None
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def load(self, path):
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            with self._lock:
+                for key, samples in stored.items():
+                    self.samples[key] = samples + self.samples.get(key, [])
+                    del self.samples[key][:-self.history]
+        return self
+
+    def save(self, path):
+        """Write the history; sessions from hand-built options (no profile) aren't comparable and are left out."""
+        with self._lock:
+            data = {key: samples for key, samples in self.samples.items() if not key.endswith('/custom')}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def format(self):
+        lines = []
+        for key, s in self.summary().items():
+            median = f"{s['median']:.1f}s" if s['median'] is not None else "-"
+            lines.append(f"🚦 {key}: {s['sessions']} sessions, median {median}, {s['failures']} failed")
+        return "\n".join(lines)
+
+
+_default_timings = SessionTimings()
+
+
+def get_session_timings():
+    return _default_timings
+
+
+def timings_path():
+    """History file shared by all runs: $SESSION_TIMINGS_FILE or <artifacts>/session_timings.json."""
+    return os.getenv('SESSION_TIMINGS_FILE') or os.path.join(os.getenv('ARTIFACTS_DIR', 'artifacts'), 'session_timings.json')
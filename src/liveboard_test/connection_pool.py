@@ -0,0 +1,122 @@
+"""
+Process-wide keep-alive HTTP connection pools for Appium servers.
+
+Every driver the framework creates shares one urllib3 PoolManager, which keeps
+one bounded pool of persistent connections per Appium host:port. Connect and
+read timeouts are configured in one place and driver.quit() no longer tears
+the sockets down, so the next session on the same server reuses them.
+
+Configured from the environment:
+    APPIUM_POOL_MAXSIZE      connections kept per Appium server (default 4)
+    APPIUM_POOL_BLOCK        1 to wait for a free connection instead of opening extras (default 1)
+    APPIUM_CONNECT_TIMEOUT   seconds to establish a connection (default 10)
+    APPIUM_READ_TIMEOUT      seconds to wait for a response (default 300, session creation can be slow)
+"""
+
+import atexit
+import os
+import threading
+
+import urllib3
+from appium.webdriver.appium_connection import AppiumConnection
+
+
+class ConnectionPools:
+    """A shared PoolManager with per-host limits, timeouts and statistics."""
+
+    def __init__(self, maxsize=4, block=True, connect_timeout=10.0, read_timeout=300.0):
+        self.maxsize = maxsize
+        self.block = block
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.manager = urllib3.PoolManager(num_pools=32, maxsize=maxsize, block=block, timeout=self.timeout)
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _pools(self):
+        pools = self.manager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                yield f"{pool.host}:{pool.port}", pool
+
+    def stats(self):
+        """{host:port: {connections_opened, requests, idle, reuse_ratio}} for every Appium server contacted."""
+        stats = {}
+        with self._lock:
+            for host, counts in self._retired.items():
+                stats[host] = dict(counts)
+        for host, pool in self._pools():
+            counts = stats.setdefault(host, {'connections_opened': 0, 'requests': 0})
+            counts['connections_opened'] += pool.num_connections
+            counts['requests'] += pool.num_requests
+            counts['idle'] = sum(conn is not None for conn in list(pool.pool.queue)) if pool.pool else 0
+        for counts in stats.values():
+            counts.setdefault('idle', 0)
+            requests = counts['requests']
+            counts['reuse_ratio'] = round(1 - counts['connections_opened'] / requests, 3) if requests else 0.0
+        return stats
+
+    def clear(self):
+        """Close every pooled connection, keeping the counters for the final report."""
+        with self._lock:
+            for host, pool in self._pools():
+                counts = self._retired.setdefault(host, {'connections_opened': 0, 'requests': 0})
+                counts['connections_opened'] += pool.num_connections
+                counts['requests'] += pool.num_requests
+            self.manager.clear()
+
+    def format(self):
+        lines = []
+        for host, s in sorted(self.stats().items()):
+            lines.append(f"🔌 {host}: {s['requests']} requests over {s['connections_opened']} connections "
+                         f"({s['reuse_ratio']:.0%} reused, {s['idle']} idle)")
+        return "\n".join(lines) or "🔌 No Appium connections opened"
+
+
+_default_pools = None
+_default_lock = threading.Lock()
+
+
+def get_connection_pools():
+    """The process-wide ConnectionPools, configured from the environment on first use."""
+    global _default_pools
+    with _default_lock:
+        if _default_pools is None:
+            _default_pools = ConnectionPools(
+                maxsize=int(os.getenv('APPIUM_POOL_MAXSIZE', '4')),
+                block=os.getenv('APPIUM_POOL_BLOCK', '1') != '0',
+                connect_timeout=float(os.getenv('APPIUM_CONNECT_TIMEOUT', '10')),
+                read_timeout=float(os.getenv('APPIUM_READ_TIMEOUT', '300')),
+            )
+            atexit.register(_default_pools.clear)
+        return _default_pools
+
+
+def shutdown_connection_pools():
+    """Close the process-wide pools if they were created and return them for reporting."""
+    global _default_pools
+    with _default_lock:
+        pools, _default_pools = _default_pools, None
+    if pools is not None:
+        atexit.unregister(pools.clear)
+        pools.clear()
+    return pools
+
+
+class PooledConnection(AppiumConnection):
+    """AppiumConnection that sends its commands through the shared ConnectionPools."""
+
+    def _get_connection_manager(self):
+        return get_connection_pools().manager
+
+    def close(self):
+        # The pool is shared with every other driver; shutdown_connection_pools() closes it.
+        pass
+
+
+def pooled_client_config(url, **config):
+    """AppiumClientConfig for a URL with keep-alive on and the shared pools' timeouts."""
+    from appium.webdriver.client_config import AppiumClientConfig
+
+    config.setdefault('timeout', get_connection_pools().timeout)
+    return AppiumClientConfig(remote_server_addr=url, keep_alive=True, **config)
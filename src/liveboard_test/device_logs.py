@@ -0,0 +1,349 @@
+"""
+Background device log collection.
+
+Appium serves device logs (logcat, iOS syslog) through /se/log, returning
+only the entries logged since the session last asked. DeviceLogCollector
+polls those endpoints on a daemon thread and appends each new entry to
+rotating gzip segments under artifacts/<RUN_ID>/device_logs/:
+
+- <device>.<type>.<n>.log.gz: the log text, a new segment every
+  $DEVICE_LOG_SEGMENT_MB MiB (default 8), only the last $DEVICE_LOG_SEGMENTS
+  kept (default 20),
+- <device>.index.jsonl: one line per test with its start and end offset in
+  every log,
+- <test>.<type>.log: just the lines logged during a failed test, which the
+  run report links instead of the whole log.
+
+Nothing is kept in memory but the current test's offsets and a compressor
+per log type. Enable with $DEVICE_LOGS=1; $DEVICE_LOG_TYPES (comma separated,
+default logcat on Android and syslog on iOS) and $DEVICE_LOG_INTERVAL
+(seconds, default 2) override the defaults.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+from . import steps
+from .artifacts import run_directory
+
+
+DEFAULT_LOG_TYPES = {'android': ['logcat'], 'ios': ['syslog']}
+
+READ_CHUNK = 64 * 1024
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'test'
+
+
+class RotatingLogWriter:
+    """Appends text to gzip segments of max_bytes (uncompressed) each and reads ranges back by offset.
+
+    Offsets count uncompressed bytes since the first segment, so they stay valid
+    across rotations. Every flush() ends a deflate block, which makes the open
+    segment readable before it is closed.
+    """
+
+    def __init__(self, directory, stem, max_bytes=8 * 1024 * 1024, keep=20, level=6):
+        self.directory = directory
+        self.stem = stem
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.level = level
+        self.offset = 0
+        self.compressed = 0
+        self.segments = []  # [path, first offset, end offset]
+        self.dropped = 0
+        self._file = None
+        self._compressor = None
+
+    def _open(self):
+        path = os.path.join(self.directory, f"{self.stem}.{len(self.segments) + self.dropped:04d}.log.gz")
+        self._file = open(path, 'wb')
+        self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        self.segments.append([path, self.offset, self.offset])
+
+    def _close_segment(self):
+        data = self._compressor.flush(zlib.Z_FINISH)
+        self._file.write(data)
+        self.compressed += len(data)
+        self._file.close()
+        self._file = self._compressor = None
+
+    def write(self, text):
+        data = text.encode('utf-8', 'replace')
+        if not data:
+            return
+        if self._file is None:
+            self._open()
+        compressed = self._compressor.compress(data)
+        self._file.write(compressed)
+        self.compressed += len(compressed)
+        self.offset += len(data)
+        self.segments[-1][2] = self.offset
+        if self.offset - self.segments[-1][1] >= self.max_bytes:
+            self._close_segment()
+            while len(self.segments) > self.keep:
+                path = self.segments.pop(0)[0]
+                self.dropped += 1
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def flush(self):
+        if self._file is not None:
+            data = self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._file.write(data)
+            self.compressed += len(data)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._close_segment()
+
+    def read(self, start, end=None, limit=1024 * 1024):
+        """Text between two offsets, at most the last `limit` bytes of it; rotated-out parts are skipped."""
+        end = self.offset if end is None else end
+        self.flush()
+        out = bytearray()
+        for path, first, last in list(self.segments):
+            if last <= start or first >= end:
+                continue
+            position = first
+            decompressor = zlib.decompressobj(31)
+            with open(path, 'rb') as f:
+                while position < end:
+                    chunk = f.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    data = decompressor.decompress(chunk)
+                    lo, hi = max(start - position, 0), min(end - position, len(data))
+                    if lo < hi:
+                        out += data[lo:hi]
+                        if len(out) > limit:
+                            del out[:len(out) - limit]
+                    position += len(data)
+        return out.decode('utf-8', 'replace')
+
+
+class LogCursor:
+    """Last timestamp written and the entries logged at it.
+
+    Appium returns only entries logged since the previous request, but some
+    drivers (and a reconnect) hand back their whole buffer. The head of a batch
+    that repeats what was already written is dropped; the rest is new.
+    """
+
+    def __init__(self):
+        self.timestamp = None
+        self.tail = []  # (level, message) of the entries logged at self.timestamp
+
+    def new_entries(self, entries):
+        fresh = []
+        replaying, index = self.timestamp is not None, 0
+        for entry in entries:
+            timestamp = entry.get('timestamp') or 0
+            key = (entry.get('level'), entry.get('message'))
+            if replaying:
+                if timestamp < self.timestamp:
+                    continue
+                if timestamp == self.timestamp and index < len(self.tail) and self.tail[index] == key:
+                    index += 1
+                    continue
+                replaying = False
+            if timestamp != self.timestamp:
+                self.timestamp, self.tail = timestamp, []
+            self.tail.append(key)
+            fresh.append(entry)
+        return fresh
+
+
+def format_entry(entry):
+    timestamp = entry.get('timestamp') or 0
+    clock = time.strftime('%H:%M:%S', time.localtime(timestamp / 1000)) + f'.{int(timestamp) % 1000:03d}'
+    return f"{clock} {entry.get('level', '')} {entry.get('message', '')}\n"
+
+
+class DeviceLogCollector:
+    """Polls a driver's device logs in the background and slices them per test."""
+
+    def __init__(self, driver, log_types=None, directory=None, interval=2.0,
+                 segment_bytes=8 * 1024 * 1024, keep=20, slice_bytes=1024 * 1024):
+        self.driver = driver
+        self.log_types = list(log_types) if log_types else None
+        self.directory = directory
+        self.interval = interval
+        self.segment_bytes = segment_bytes
+        self.keep = keep
+        self.slice_bytes = slice_bytes
+        self.name = None
+        self.writers = {}
+        self.cursors = {}
+        self.polls = 0
+        self.entries = 0
+        self.slices = []
+        self.errors = 0
+        self._test = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.directory = self.directory or run_directory('device_logs')
+        os.makedirs(self.directory, exist_ok=True)
+        capabilities = getattr(self.driver, 'capabilities', None) or {}
+        platform = str(capabilities.get('platformName', '')).lower()
+        device = capabilities.get('deviceName') or capabilities.get('appium:deviceName') or platform or 'device'
+        self.name = _safe_name(f"{device}-{(self.driver.session_id or '')[:8]}")
+        if self.log_types is None:
+            self.log_types = self._available(DEFAULT_LOG_TYPES.get(platform, DEFAULT_LOG_TYPES['ios']))
+        for log_type in self.log_types:
+            self.writers[log_type] = RotatingLogWriter(
+                self.directory, f"{self.name}.{_safe_name(log_type)}", self.segment_bytes, self.keep)
+            self.cursors[log_type] = LogCursor()
+        steps.add_listener(self)
+        if steps.current_test() is not None:
+            self._begin(steps.current_test())
+        self._thread = threading.Thread(target=self._run, name="device-logs", daemon=True)
+        self._thread.start()
+        return self
+
+    def _available(self, wanted):
+        try:
+            available = self.driver.log_types
+        except Exception as e:
+            print(f"⚠️ Device log types unavailable ({e}); trying {', '.join(wanted)}")
+            return wanted
+        return [t for t in wanted if t in available]
+
+    def stop(self):
+        """Poll one last time and close the segments (call before the session quits)."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        steps.remove_listener(self)
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self.poll()
+        with self._lock:
+            for writer in self.writers.values():
+                writer.close()
+
+    def __call__(self, event, data):
+        if event == 'test_start':
+            self._begin(data['test'])
+        elif event == 'test_end':
+            self._end(data['test'], data.get('outcome'))
+
+    def poll(self):
+        """Fetch and append whatever each log gained since the last poll; returns the number of new entries."""
+        added = 0
+        with self._lock:
+            for log_type, writer in self.writers.items():
+                try:
+                    entries = self.driver.get_log(log_type) or []
+                except Exception as e:
+                    self.errors += 1
+                    if self.errors == 1:
+                        print(f"⚠️ Device log {log_type} unavailable ({e}); retrying")
+                    continue
+                fresh = self.cursors[log_type].new_entries(entries)
+                if fresh:
+                    writer.write(''.join(format_entry(entry) for entry in fresh))
+                    writer.flush()
+                    added += len(fresh)
+            self.polls += 1
+            self.entries += added
+        return added
+
+    def _offsets(self):
+        return {log_type: writer.offset for log_type, writer in self.writers.items()}
+
+    def _begin(self, test):
+        self.poll()
+        with self._lock:
+            self._test = (test, self._offsets())
+
+    def _end(self, test, outcome):
+        self.poll()
+        with self._lock:
+            current, self._test = self._test, None
+            if current is None or current[0] != test:
+                return
+            start, end = current[1], self._offsets()
+            with open(os.path.join(self.directory, f"{self.name}.index.jsonl"), 'a') as f:
+                f.write(json.dumps({'test': test, 'outcome': outcome, 'start': start, 'end': end}) + "\n")
+            if outcome != 'failed':
+                return
+            written = []
+            for log_type, writer in self.writers.items():
+                text = writer.read(start[log_type], end[log_type], self.slice_bytes)
+                path = os.path.join(self.directory, f"{_safe_name(test)}.{_safe_name(log_type)}.log")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                self.slices.append(path)
+                written.append((log_type, path, text.count("\n")))
+        for log_type, path, lines in written:
+            steps.notify('device_log', test=test, type=log_type, path=path, lines=lines)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.poll()
+
+    def stats(self):
+        return {
+            'log_types': list(self.writers),
+            'polls': self.polls,
+            'entries': self.entries,
+            'bytes': sum(w.offset for w in self.writers.values()),
+            'compressed_bytes': sum(w.compressed for w in self.writers.values()),
+            'segments_dropped': sum(w.dropped for w in self.writers.values()),
+            'slices': len(self.slices),
+            'errors': self.errors,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"📜 Device logs {self.name} ({', '.join(s['log_types']) or 'none'}): {s['entries']} entries in "
+                f"{s['polls']} polls, {s['bytes'] / 1024:.0f} KiB -> {s['compressed_bytes'] / 1024:.0f} KiB gzip, "
+                f"{s['slices']} failed-test slice(s), {s['segments_dropped']} segment(s) rotated out -> {self.directory}")
+
+
+_collectors = {}
+
+
+def start_device_logs(driver):
+    """Start (or reuse) the collector for this driver's session when $DEVICE_LOGS is set; else None."""
+    if os.getenv('DEVICE_LOGS', '0').lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if driver.session_id not in _collectors:
+        log_types = [t.strip() for t in os.getenv('DEVICE_LOG_TYPES', '').split(',') if t.strip()]
+        _collectors[driver.session_id] = DeviceLogCollector(
+            driver,
+            log_types=log_types or None,
+            interval=float(os.getenv('DEVICE_LOG_INTERVAL', '2')),
+            segment_bytes=int(float(os.getenv('DEVICE_LOG_SEGMENT_MB', '8')) * 1024 * 1024),
+            keep=int(os.getenv('DEVICE_LOG_SEGMENTS', '20')),
+        ).start()
+    return _collectors[driver.session_id]
+
+
+def stop_device_logs(driver):
+    """Collect the last entries of this driver's session before it quits; a no-op without a collector."""
+    collector = _collectors.get(driver.session_id)
+    if collector is not None:
+        collector.stop()
+
+
+def shutdown_device_log_collectors():
+    """Stop every collector started in this process and return them for reporting."""
+    collectors = list(_collectors.values())
+    _collectors.clear()
+    for collector in collectors:
+        collector.stop()
+    return collectors
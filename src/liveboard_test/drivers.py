@@ -0,0 +1,47 @@
+"""
+Driver factory used by every fixture, test class and script that talks to Appium.
+"""
+
+import os
+import time
+
+from .capabilities import get_session_timings, profile_of
+from .instrumentation import instrumented_connection
+
+
+def device_of(options):
+    """The device UDID (or name) an options object targets, used to tag metrics."""
+    capabilities = options.to_capabilities() if hasattr(options, 'to_capabilities') else dict(options)
+    for name in ('appium:udid', 'udid', 'appium:deviceName', 'deviceName'):
+        if capabilities.get(name):
+            return capabilities[name]
+    return None
+
+
+def platform_of(options):
+    capabilities = options.to_capabilities() if hasattr(options, 'to_capabilities') else dict(options)
+    return str(capabilities.get('platformName', '')).lower() or None
+
+
+def create_driver(url, options):
+    """Create an Appium WebDriver whose commands are timed by the instrumentation layer.
+
+    Session creation time is recorded per capability profile (see capabilities.build_options).
+    With $APPIUM_CLIENT=async the driver is an async_driver.SyncDriver instead.
+    """
+    start = time.perf_counter()
+    try:
+        if os.getenv('APPIUM_CLIENT') == 'async':
+            from .async_driver import SyncDriver
+
+            driver = SyncDriver.create(url, options)
+        else:
+            from appium.webdriver.webdriver import WebDriver
+
+            driver = WebDriver(command_executor=instrumented_connection(url, device=device_of(options)),
+                               options=options)
+    except Exception:
+        get_session_timings().record(platform_of(options), profile_of(options), time.perf_counter() - start, ok=False)
+        raise
+    get_session_timings().record(platform_of(options), profile_of(options), time.perf_counter() - start)
+    return driver
@@ -0,0 +1,222 @@
+"""
+Streaming JSONL test events between pytest workers and the parallel runner.
+
+Inside a worker (a pytest process started by the scheduler) EventWriter
+subscribes to the step events and writes one JSON object per line to the
+pipe whose file descriptor is in $LIVEBOARD_EVENT_FD. The runner reads every
+worker's pipe as lines arrive, prints a merged live view (LiveConsole) and
+collects the outcomes into a merged JUnit / JSON report (EventReport).
+Worker stdout goes to a log file on disk, never into runner memory.
+"""
+
+import json
+import os
+import threading
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+from . import steps
+
+
+EVENT_FD_ENV = 'LIVEBOARD_EVENT_FD'
+WORKER_ENV = 'LIVEBOARD_WORKER'
+
+MAX_MESSAGE = 4000
+
+
+class EventWriter:
+    """Step listener that writes events as JSON lines to a file object."""
+
+    def __init__(self, stream, worker=None):
+        self.stream = stream
+        self.worker = worker
+        self._lock = threading.Lock()
+
+    def __call__(self, event, data):
+        record = {'event': event, 'time': round(time.time(), 3), 'worker': self.worker}
+        record.update(data)
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def close(self):
+        steps.remove_listener(self)
+        self.stream.close()
+
+
+def install_from_env(environ=None):
+    """Start streaming events if the runner passed an event pipe; returns the writer or None."""
+    environ = os.environ if environ is None else environ
+    fd = environ.get(EVENT_FD_ENV)
+    if not fd:
+        return None
+    writer = EventWriter(os.fdopen(int(fd), 'w', buffering=1, encoding='utf-8'), environ.get(WORKER_ENV))
+    steps.add_listener(writer)
+    return writer
+
+
+def read_events(stream):
+    """Yield events from a JSONL stream as lines arrive, skipping anything that isn't JSON."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+class LiveConsole:
+    """Prints a merged, prefixed line per event from all workers as they happen."""
+
+    ICONS = {'passed': '✅', 'failed': '❌', 'skipped': '⏭️'}
+
+    def __init__(self, out=None, show_steps=True):
+        self.out = out
+        self.show_steps = show_steps
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = self.format(event)
+        if line is None:
+            return
+        with self._lock:
+            print(line, file=self.out, flush=True)
+
+    def format(self, event):
+        kind = event.get('event')
+        prefix = f"[{event.get('worker') or '-'}]"
+        test = event.get('test')
+        if kind == 'test_start':
+            return f"{prefix} ▶️ {test}"
+        if kind == 'step' and self.show_steps:
+            return f"{prefix}    {event.get('step')}"
+        if kind == 'screenshot' and self.show_steps:
+            return f"{prefix}    📸 {os.path.basename(event.get('path', ''))}"
+        if kind == 'screen' and self.show_steps:
+            changes = f" ({event['changes']})" if event.get('changes') else ""
+            return f"{prefix}    🗺️ {event.get('screen')}{changes}"
+        if kind == 'device_log':
+            return f"{prefix}    📜 {event.get('type')} log of the failure: {event.get('path')} ({event.get('lines')} lines)"
+        if kind == 'retry':
+            return f"{prefix}    🔁 retrying {event.get('step')} ({event.get('error')}, attempt {event.get('attempt')})"
+        if kind == 'failure':
+            return f"{prefix} ❌ {test} failed in {event.get('when')}: {event.get('message')}"
+        if kind == 'test_end':
+            icon = self.ICONS.get(event.get('outcome'), '❔')
+            duration = event.get('duration')
+            took = f" ({duration:.2f}s)" if isinstance(duration, (int, float)) else ""
+            return f"{prefix} {icon} {test} {str(event.get('outcome', '')).upper()}{took}"
+        if kind == 'worker_exit' and event.get('returncode'):
+            return f"{prefix} ⚠️ worker exited with {event.get('returncode')} (log: {event.get('log')})"
+        return None
+
+
+class EventReport:
+    """Accumulates test outcomes from all workers and writes merged JUnit XML / JSON."""
+
+    def __init__(self):
+        self.tests = []
+        self._current = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        kind = event.get('event')
+        key = (event.get('worker'), event.get('test'))
+        with self._lock:
+            if kind == 'test_start':
+                self._current[key] = {'screenshots': 0, 'steps': 0, 'failure': None}
+            elif kind in ('step', 'screenshot', 'failure'):
+                current = self._current.setdefault(key, {'screenshots': 0, 'steps': 0, 'failure': None})
+                if kind == 'step':
+                    current['steps'] += 1
+                elif kind == 'screenshot':
+                    current['screenshots'] += 1
+                elif current['failure'] is None:
+                    current['failure'] = (event.get('message') or '')[:MAX_MESSAGE]
+            elif kind == 'device_log':
+                # Written by the log collector when the test ends, so usually after test_end
+                log = {'type': event.get('type'), 'path': event.get('path'), 'lines': event.get('lines')}
+                if key in self._current:
+                    self._current[key].setdefault('logs', []).append(log)
+                else:
+                    for test in reversed(self.tests):
+                        if (test['worker'], test['test']) == key:
+                            test['logs'].append(log)
+                            break
+            elif kind == 'test_end':
+                current = self._current.pop(key, {'screenshots': 0, 'steps': 0, 'failure': None})
+                self.tests.append({
+                    'test': event.get('test'),
+                    'worker': event.get('worker'),
+                    'outcome': event.get('outcome'),
+                    'duration': event.get('duration') or 0.0,
+                    'message': (event.get('message') or current['failure'] or '')[:MAX_MESSAGE] or None,
+                    'steps': current['steps'],
+                    'screenshots': current['screenshots'],
+                    'logs': current.get('logs', []),
+                })
+
+    def counts(self):
+        counts = {'tests': len(self.tests), 'passed': 0, 'failed': 0, 'skipped': 0}
+        for test in self.tests:
+            if test['outcome'] in counts:
+                counts[test['outcome']] += 1
+        return counts
+
+    def to_dict(self):
+        return {'summary': self.counts(), 'tests': list(self.tests)}
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def _log_tails(self, test):
+        """The end of each device log slice of a failed test, with the path of the whole slice."""
+        parts = []
+        for log in test['logs']:
+            try:
+                with open(log['path'], encoding='utf-8', errors='replace') as f:
+                    f.seek(max(0, os.path.getsize(log['path']) - MAX_MESSAGE))
+                    tail = f.read()
+            except (OSError, TypeError):
+                tail = ''
+            parts.append(f"--- {log['type']} log ({log['lines']} lines): {log['path']} ---\n{tail}")
+        return "\n".join(parts)
+
+    def write_junit(self, path, name='liveboard-mobile'):
+        counts = self.counts()
+        total = sum(test['duration'] for test in self.tests)
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            f'<testsuites name={quoteattr(name)} tests="{counts["tests"]}" failures="{counts["failed"]}" '
+            f'skipped="{counts["skipped"]}" time="{total:.3f}">',
+        ]
+        by_worker = {}
+        for test in self.tests:
+            by_worker.setdefault(test['worker'] or '-', []).append(test)
+        for worker, tests in sorted(by_worker.items()):
+            failed = sum(t['outcome'] == 'failed' for t in tests)
+            skipped = sum(t['outcome'] == 'skipped' for t in tests)
+            lines.append(f'  <testsuite name={quoteattr(worker)} tests="{len(tests)}" failures="{failed}" '
+                         f'skipped="{skipped}" time="{sum(t["duration"] for t in tests):.3f}">')
+            for test in tests:
+                module, _, case = (test['test'] or '').rpartition('::')
+                lines.append(f'    <testcase classname={quoteattr(module.replace("/", ".").replace("::", "."))} '
+                             f'name={quoteattr(case)} time="{test["duration"]:.3f}">')
+                if test['outcome'] == 'failed':
+                    lines.append(f'      <failure message={quoteattr(test["message"] or "failed")}>'
+                                 f'{escape(test["message"] or "")}</failure>')
+                    if test['logs']:
+                        lines.append(f'      <system-out>{escape(self._log_tails(test))}</system-out>')
+                elif test['outcome'] == 'skipped':
+                    lines.append('      <skipped/>')
+                lines.append('    </testcase>')
+            lines.append('  </testsuite>')
+        lines.append('</testsuites>')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        return path
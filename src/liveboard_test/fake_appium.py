@@ -0,0 +1,527 @@
+"""
+Minimal fake Appium/WebDriver HTTP server.
+
+Lets the framework (schedulers, pools, drivers) be exercised on a plain
+machine without a real device or Appium installation.
+"""
+
+import argparse
+import base64
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .locators import UnsupportedLocator, compile_locator
+from .ui_tree import parse_page_source
+
+
+DEFAULT_PAGE_SOURCE = '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT><XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard"/></AppiumAUT>'
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+# What /se/log/types lists per platformName, as the XCUITest / UiAutomator2 drivers do.
+LOG_TYPES = {
+    'ios': ['syslog', 'crashlog', 'performance', 'server'],
+    'android': ['logcat', 'bugreport', 'server'],
+}
+
+
+def _png(width, height, rows):
+    """Encode RGB rows (bytes of width * 3) as an unfiltered PNG."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(b''.join(b'\x00' + bytes(row) for row in rows)))
+            + chunk(b'IEND', b''))
+
+
+def solid_png(width=32, height=64, rgb=(255, 255, 255)):
+    """Encode a single-colour RGB PNG (used as the fake device's screen)."""
+    return _png(width, height, [bytes(rgb) * width] * height)
+
+
+def render_png(source, width=120):
+    """A PNG of a page source: every element's frame as a box coloured by its type and label."""
+    root = parse_page_source(source)
+    boxes = [(node, node.rect) for node in root.iter() if node.rect]
+    screen_w = max((x + w for _, (x, _, w, _) in boxes), default=width)
+    screen_h = max((y + h for _, (_, y, _, h) in boxes), default=width * 2)
+    scale = width / screen_w
+    height = max(1, round(screen_h * scale))
+    rows = [bytearray(b'\xff' * 3 * width) for _ in range(height)]
+    for node, (x, y, w, h) in boxes:
+        if w >= screen_w and h >= screen_h:
+            continue  # the application / root layout itself
+        label = node.get('name') or node.get('text') or ''
+        rgb = zlib.crc32(f"{node.tag}:{label}".encode()).to_bytes(4, 'big')[:3]
+        left, right = round(x * scale), max(round(x * scale) + 1, round((x + w) * scale))
+        for row in rows[round(y * scale):max(round(y * scale) + 1, round((y + h) * scale))]:
+            row[left * 3:right * 3] = rgb * (right - left)
+    return _png(width, height, rows)
+
+
+def _element_command(handler):
+    """Resolve the session and element of a route match before calling handler(self, node, match, body)."""
+    def wrapper(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        node = self.element(match)
+        if node is None:
+            return 404, {'error': 'stale element reference', 'message': match.group('eid'), 'stacktrace': ''}
+        return handler(self, node, match, body)
+    return wrapper
+
+
+class FakeAppiumServer:
+    """A tiny in-process WebDriver server speaking enough of the W3C protocol for our tests."""
+
+    def __init__(self, host='127.0.0.1', port=0, base_path='/wd/hub', latency=0.0):
+        self.host = host
+        self.base_path = base_path.rstrip('/')
+        self.latency = latency
+        self.delays = []
+        self.sessions = {}
+        self.commands = []
+        self.page_source = DEFAULT_PAGE_SOURCE
+        self.on_click = None
+        self.on_launch = None
+        self.on_reset = None
+        # Device file system for push_file / pull_file (path -> bytes)
+        self.files = {}
+        self.screenshot_png = solid_png()
+        # Device logs: the last log_buffer entries per type, each tagged with a sequence number
+        self.log_buffer = 10000
+        self._logs = {}
+        self._log_seq = 0
+        self._log_stop = threading.Event()
+        self._log_thread = None
+        self._tree_source = None
+        self._tree = None
+        self._elements = {}
+        self._lock = threading.Lock()
+        self._routes = []
+        self._register_default_routes()
+
+        server = self
+
+        class Handler(_FakeAppiumHandler):
+            fake = server
+
+        self._httpd = _FakeHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}{self.base_path}"
+
+    @property
+    def command_count(self):
+        return len(self.commands)
+
+    def start(self):
+        """Serve requests on a background daemon thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down and release its port."""
+        self.stop_synthetic_logs()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, method, pattern, handler):
+        """Register handler(match, body) -> (status, value) for METHOD + path regex (below the base path)."""
+        self._routes.insert(0, (method, re.compile(f"^{pattern}$"), handler))
+
+    def delay(self, method, pattern, seconds):
+        """Add extra latency to commands matching METHOD + path regex (below the base path)."""
+        self.delays.append((method, re.compile(f"^{pattern}$"), seconds))
+
+    def reset_counters(self):
+        with self._lock:
+            self.commands.clear()
+
+    def emit_log(self, log_type, message, level='INFO', timestamp=None):
+        """Append an entry to the device log of log_type (kept in a ring of log_buffer entries)."""
+        with self._lock:
+            self._log_seq += 1
+            entries = self._logs.get(log_type)
+            if entries is None:
+                entries = self._logs[log_type] = deque(maxlen=self.log_buffer)
+            entries.append((self._log_seq, {
+                'timestamp': int(time.time() * 1000) if timestamp is None else timestamp,
+                'level': level,
+                'message': message,
+            }))
+
+    def start_synthetic_logs(self, per_second=100, log_types=('logcat', 'syslog'), size=120):
+        """Emit about per_second lines of roughly `size` characters to every log type on a daemon thread."""
+        self.stop_synthetic_logs()
+        self._log_stop.clear()
+        levels = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING']
+
+        def run():
+            count, started = 0, time.monotonic()
+            while not self._log_stop.wait(0.01):
+                due = (time.monotonic() - started) * per_second
+                while count < due:
+                    count += 1
+                    line = f"Liveboard[4242] sync tick {count}: " + 'x' * max(0, size - 40)
+                    for log_type in log_types:
+                        self.emit_log(log_type, line, levels[count % len(levels)])
+
+        self._log_thread = threading.Thread(target=run, name="fake-device-logs", daemon=True)
+        self._log_thread.start()
+        return self
+
+    def stop_synthetic_logs(self):
+        self._log_stop.set()
+        if self._log_thread is not None:
+            self._log_thread.join()
+            self._log_thread = None
+
+    def _register_default_routes(self):
+        self.route('GET', r'/status', self._status)
+        self.route('POST', r'/session', self._new_session)
+        self.route('DELETE', r'/session/(?P<sid>[^/]+)', self._delete_session)
+        self.route('GET', r'/session/(?P<sid>[^/]+)/timeouts', self._get_timeouts)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/timeouts', self._set_timeouts)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/execute/sync', self._execute_script)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/appium/device/terminate_app', self._terminate_app)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/appium/device/activate_app', self._activate_app)
+        self.route('GET', r'/session/(?P<sid>[^/]+)/source', self._source)
+        self.route('GET', r'/session/(?P<sid>[^/]+)/screenshot', self._screenshot)
+        self.route('GET', r'/session/(?P<sid>[^/]+)/se/log/types', self._log_types)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/se/log', self._get_log)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/element', self._find_element)
+        self.route('POST', r'/session/(?P<sid>[^/]+)/elements', self._find_elements)
+        element = r'/session/(?P<sid>[^/]+)/element/(?P<eid>[^/]+)'
+        self.route('POST', element + r'/click', self._click)
+        self.route('POST', element + r'/value', self._send_keys)
+        self.route('POST', element + r'/clear', self._clear)
+        self.route('GET', element + r'/displayed', self._element_flag('visible', 'true'))
+        self.route('GET', element + r'/enabled', self._element_flag('enabled', 'true'))
+        self.route('GET', element + r'/attribute/(?P<name>[^/]+)', self._attribute)
+        self.route('GET', element + r'/text', self._text)
+        self.route('GET', element + r'/rect', self._rect)
+
+    def _status(self, match, body):
+        return 200, {'ready': True, 'message': 'fake appium ready', 'build': {'version': 'fake'}}
+
+    def _new_session(self, match, body):
+        capabilities = (body.get('capabilities') or {}).get('alwaysMatch', {})
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self.sessions[session_id] = {
+                'capabilities': capabilities,
+                'timeouts': {'implicit': 0, 'pageLoad': 300000, 'script': 30000},
+                'app_launches': 1,
+            }
+        reset = capabilities.get('appium:fullReset') or not capabilities.get('appium:noReset')
+        if reset and self.on_reset:
+            self.on_reset()
+        if self.on_launch:
+            self.on_launch()
+        return 200, {'sessionId': session_id, 'capabilities': capabilities}
+
+    def _delete_session(self, match, body):
+        with self._lock:
+            self.sessions.pop(match.group('sid'), None)
+        return 200, None
+
+    def _get_timeouts(self, match, body):
+        session = self.session(match)
+        if session is None:
+            return _invalid_session(match)
+        return 200, session['timeouts']
+
+    def _set_timeouts(self, match, body):
+        session = self.session(match)
+        if session is None:
+            return _invalid_session(match)
+        session['timeouts'].update(body)
+        return 200, None
+
+    def _execute_script(self, match, body):
+        scripts = {
+            'mobile: terminateApp': self._terminate_app,
+            'mobile: activateApp': self._activate_app,
+            'mobile: clearApp': self._clear_app,
+            'mobile: pushFile': self._push_file,
+            'mobile: pullFile': self._pull_file,
+        }
+        handler = scripts.get(body.get('script'))
+        if handler is None:
+            return 200, None
+        args = body.get('args') or [{}]
+        return handler(match, args[0] if args else {})
+
+    def _terminate_app(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        return 200, True
+
+    def _activate_app(self, match, body):
+        session = self.session(match)
+        if session is None:
+            return _invalid_session(match)
+        session['app_launches'] += 1
+        if self.on_launch:
+            self.on_launch()
+        return 200, None
+
+    def _clear_app(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        if self.on_reset:
+            self.on_reset()
+        return 200, True
+
+    def _push_file(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        with self._lock:
+            self.files[body.get('remotePath')] = base64.b64decode(body.get('payload') or '')
+        return 200, None
+
+    def _pull_file(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        with self._lock:
+            data = self.files.get(body.get('remotePath'))
+        if data is None:
+            return 404, {'error': 'unknown error', 'message': f"No such file {body.get('remotePath')}",
+                         'stacktrace': ''}
+        return 200, base64.b64encode(data).decode('ascii')
+
+    def tree(self):
+        """The parsed current page source; element ids stay valid while the source is unchanged."""
+        with self._lock:
+            if self._tree_source is not self.page_source:
+                self._tree_source = self.page_source
+                self._tree = parse_page_source(self.page_source)
+                self._elements = {}
+            return self._tree
+
+    def _source(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        return 200, self.page_source
+
+    def _screenshot(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        return 200, base64.b64encode(self.screenshot_png).decode('ascii')
+
+    def _log_types(self, match, body):
+        session = self.session(match)
+        if session is None:
+            return _invalid_session(match)
+        platform = str(session['capabilities'].get('platformName', 'ios')).lower()
+        return 200, LOG_TYPES.get(platform, LOG_TYPES['ios'])
+
+    def _get_log(self, match, body):
+        """Entries logged since this session last asked for the type, like Appium's log endpoints."""
+        session = self.session(match)
+        if session is None:
+            return _invalid_session(match)
+        log_type = body.get('type')
+        with self._lock:
+            cursors = session.setdefault('log_cursors', {})
+            since = cursors.get(log_type, 0)
+            entries = [entry for seq, entry in self._logs.get(log_type, ()) if seq > since]
+            cursors[log_type] = self._log_seq
+        return 200, entries
+
+    def _match_nodes(self, body):
+        try:
+            select = compile_locator(body.get('using'), body.get('value'))
+        except UnsupportedLocator as e:
+            return None, (400, {'error': 'invalid selector', 'message': str(e), 'stacktrace': ''})
+        return select(self.tree()), None
+
+    def _reference(self, node):
+        with self._lock:
+            eid = f"{id(node):x}"
+            self._elements[eid] = node
+        return {ELEMENT_KEY: eid}
+
+    def _find_element(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        nodes, error = self._match_nodes(body)
+        if error:
+            return error
+        if not nodes:
+            return 404, {'error': 'no such element', 'message': body.get('value'), 'stacktrace': ''}
+        return 200, self._reference(nodes[0])
+
+    def _find_elements(self, match, body):
+        if self.session(match) is None:
+            return _invalid_session(match)
+        nodes, error = self._match_nodes(body)
+        if error:
+            return error
+        return 200, [self._reference(node) for node in nodes]
+
+    def element(self, match):
+        """Return the UiNode for a route match carrying an `eid` group, or None if stale."""
+        self.tree()
+        return self._elements.get(match.group('eid'))
+
+    @_element_command
+    def _click(self, node, match, body):
+        if self.on_click:
+            self.on_click(node)
+        return 200, None
+
+    @_element_command
+    def _send_keys(self, node, match, body):
+        node.attrs['value'] = node.attrs.get('value', '') + body.get('text', '')
+        return 200, None
+
+    @_element_command
+    def _clear(self, node, match, body):
+        node.attrs['value'] = ''
+        return 200, None
+
+    @_element_command
+    def _attribute(self, node, match, body):
+        return 200, node.attrs.get(match.group('name'))
+
+    @_element_command
+    def _text(self, node, match, body):
+        attrs = node.attrs
+        return 200, attrs.get('text') or attrs.get('label') or attrs.get('value') or attrs.get('name') or ''
+
+    @_element_command
+    def _rect(self, node, match, body):
+        x, y, width, height = node.rect or (0, 0, 0, 0)
+        return 200, {'x': x, 'y': y, 'width': width, 'height': height}
+
+    def _element_flag(self, attribute, default):
+        @_element_command
+        def handler(self, node, match, body):
+            return 200, node.attrs.get(attribute, default).lower() == 'true'
+        return lambda match, body: handler(self, match, body)
+
+    @property
+    def sessions_created(self):
+        return sum(1 for method, path in self.commands if method == 'POST' and path == '/session')
+
+    def session(self, match):
+        """Return the session dict for a route match carrying a `sid` group, or None."""
+        return self.sessions.get(match.group('sid'))
+
+    def _dispatch(self, method, path, body):
+        if path.startswith(self.base_path):
+            path = path[len(self.base_path):] or '/'
+        with self._lock:
+            self.commands.append((method, path))
+        delay = self.latency + sum(s for m, p, s in self.delays if m == method and p.match(path))
+        if delay:
+            time.sleep(delay)
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                return handler(match, body)
+        sid = re.match(r'^/session/([^/]+)', path)
+        if sid and sid.group(1) in self.sessions:
+            # Unknown but session-scoped commands succeed with a null value.
+            return 200, None
+        return 404, {'error': 'unknown command', 'message': f'{method} {path}', 'stacktrace': ''}
+
+
+def _invalid_session(match):
+    return 404, {'error': 'invalid session id', 'message': match.group('sid'), 'stacktrace': ''}
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # One process may open dozens of sessions at once (see async_driver.py).
+    request_queue_size = 128
+
+
+class _FakeAppiumHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle add latency between them.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        status, value = self.fake._dispatch(method, self.path.split('?')[0], body)
+        if isinstance(value, bytes):
+            payload = value
+            content_type = 'application/octet-stream'
+        else:
+            payload = json.dumps({'value': value}).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Appium server")
+    parser.add_argument('-p', '--port', type=int, default=4723)
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--base-path', default='/wd/hub')
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every command")
+    args = parser.parse_args(argv)
+
+    server = FakeAppiumServer(args.address, args.port, args.base_path, args.latency)
+    print(f"🤖 Fake Appium listening on {server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
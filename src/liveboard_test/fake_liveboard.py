@@ -0,0 +1,205 @@
+"""
+Canned Liveboard login screens for the fake Appium server.
+
+FakeLiveboardApp installs a small screen state machine on a FakeAppiumServer:
+clicks on the buttons the login flows use move to the next screen (after an
+optional transition delay) and launching the app returns to the first one,
+so test_liveboard_login_flow and test_android_login_flow run end to end
+without a device. With remember_login the app writes a session token to its
+data container on reaching the dashboard and launches straight into it while
+the token is there, like the real app does under noReset. Screenshots show
+the current screen's element frames as coloured boxes (fake_appium.render_png).
+"""
+
+import threading
+
+from .fake_appium import render_png
+from .liveboard_flows import AUTH_FILES
+
+
+def _ios_element(kind, name=None, value=None, y=0, height=44, enabled=True):
+    attrs = f'type="XCUIElementType{kind}"'
+    if name is not None:
+        attrs += f' name="{name}" label="{name}"'
+    if value is not None:
+        attrs += f' value="{value}"'
+    attrs += f' enabled="{str(enabled).lower()}" visible="true" x="20" y="{y}" width="335" height="{height}"'
+    return f'<XCUIElementType{kind} {attrs}/>'
+
+
+def _ios_screen(*elements):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT>'
+        '<XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard" label="Liveboard" '
+        'enabled="true" visible="true" x="0" y="0" width="375" height="667">'
+        '<XCUIElementTypeWindow type="XCUIElementTypeWindow" enabled="true" visible="true" x="0" y="0" width="375" height="667">'
+        + ''.join(elements)
+        + '</XCUIElementTypeWindow></XCUIElementTypeApplication></AppiumAUT>'
+    )
+
+
+def _android_element(kind, index, text='', top=0, clickable=False, resource_id=''):
+    return (f'<{kind} index="{index}" class="{kind}" package="com.inconceptlabs.liveboard" text="{text}" '
+            f'resource-id="{resource_id}" clickable="{str(clickable).lower()}" enabled="true" displayed="true" '
+            f'bounds="[40,{top}][1040,{top + 120}]"/>')
+
+
+def _android_screen(*elements):
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?><hierarchy index=\"0\" rotation=\"0\">"
+        '<android.widget.FrameLayout index="0" class="android.widget.FrameLayout" bounds="[0,0][1080,2340]">'
+        '<android.view.View index="0" class="android.view.View" clickable="false" bounds="[0,0][1080,2340]">'
+        + ''.join(elements)
+        + '</android.view.View></android.widget.FrameLayout></hierarchy>'
+    )
+
+
+VIEW = 'android.view.View'
+EDIT_TEXT = 'android.widget.EditText'
+
+IOS_SCREENS = {
+    'welcome': _ios_screen(
+        _ios_element('Image', 'Liveboard logo', y=120, height=120),
+        _ios_element('StaticText', 'Teach and learn live', y=280),
+        _ios_element('Button', 'Sign up', y=520, height=50),
+        _ios_element('Button', 'Log in', y=590, height=50),
+    ),
+    'auth_options': _ios_screen(
+        _ios_element('StaticText', 'Log in to Liveboard', y=80),
+        _ios_element('Button', 'Continue with Apple', y=400, height=50),
+        _ios_element('Button', 'Continue with Google', y=460, height=50),
+        _ios_element('Button', 'Continue with Email', y=520, height=50),
+    ),
+    'email_login': _ios_screen(
+        _ios_element('StaticText', 'Welcome back', y=80),
+        _ios_element('TextField', value='Email address', y=200),
+        _ios_element('SecureTextField', value='Password', y=260),
+        _ios_element('Button', 'Forgot password?', y=320),
+        _ios_element('Button', 'Log in', y=400, height=50),
+    ),
+    'dashboard': _ios_screen(
+        _ios_element('NavigationBar', 'Boards', y=44),
+        _ios_element('Cell', 'My first board', y=120),
+        _ios_element('Button', 'New board', y=600, height=50),
+    ),
+}
+
+IOS_TRANSITIONS = {
+    ('welcome', 'Log in'): 'auth_options',
+    ('auth_options', 'Continue with Email'): 'email_login',
+    ('email_login', 'Log in'): 'dashboard',
+}
+
+# The Android flow addresses Compose views by UiSelector instance, so the
+# order of android.view.View nodes below matters (the root View is instance 0).
+ANDROID_SCREENS = {
+    'launch': _android_screen(
+        _android_element(VIEW, 0, 'Liveboard', top=200),
+        _android_element(VIEW, 1, 'Teach and learn live', top=400),
+        _android_element(VIEW, 2, 'Get started', top=1800, clickable=True),
+        _android_element(VIEW, 3, 'Sign up', top=1960, clickable=True),
+    ),
+    'intro': _android_screen(
+        _android_element(VIEW, 0, 'Welcome', top=200),
+        _android_element(VIEW, 1, 'Choose how to continue', top=400),
+        _android_element(VIEW, 2, 'Log in with email', top=1800, clickable=True),
+        _android_element(VIEW, 3, 'Back', top=1960, clickable=True),
+    ),
+    'login': _android_screen(
+        _android_element(VIEW, 0, 'Log in', top=200),
+        _android_element(VIEW, 1, 'Email', top=500),
+        _android_element(EDIT_TEXT, 2, '', top=600, clickable=True, resource_id='email'),
+        _android_element(VIEW, 3, 'Password', top=800),
+        _android_element(EDIT_TEXT, 4, '', top=900, clickable=True, resource_id='password'),
+        _android_element(VIEW, 5, 'Forgot password?', top=1100, clickable=True),
+        _android_element(VIEW, 6, 'Log in', top=1800, clickable=True),
+    ),
+    'dashboard': _android_screen(
+        _android_element(VIEW, 0, 'Boards', top=200),
+        _android_element(VIEW, 1, 'My first board', top=400, clickable=True),
+    ),
+}
+
+ANDROID_TRANSITIONS = {
+    ('launch', 'Get started'): 'intro',
+    ('intro', 'Log in with email'): 'login',
+    ('login', 'Log in'): 'dashboard',
+}
+
+
+class FakeLiveboardApp:
+    """Drives a FakeAppiumServer's page source through the Liveboard login screens."""
+
+    def __init__(self, platform='ios', transition_delay=0.0, remember_login=False):
+        self.platform = platform
+        if platform == 'ios':
+            self.screens, self.transitions, self.first_screen = IOS_SCREENS, IOS_TRANSITIONS, 'welcome'
+        else:
+            self.screens, self.transitions, self.first_screen = ANDROID_SCREENS, ANDROID_TRANSITIONS, 'launch'
+        self.transition_delay = transition_delay
+        self.remember_login = remember_login
+        self.auth_file = AUTH_FILES[platform][0]
+        self.logins = 0
+        # Clicks to ignore, like a tap the device never registered.
+        self.lose_clicks = 0
+        self.screen = None
+        self.history = []
+        self.server = None
+        self._timer = None
+        self._images = {}
+
+    def install(self, server):
+        """Hook the app into server clicks and launches and show the first screen."""
+        self.server = server
+        server.on_click = self.click
+        server.on_launch = self.launch
+        server.on_reset = self.reset
+        self.show(self.first_screen)
+        return self
+
+    def show(self, screen):
+        self.screen = screen
+        self.history.append(screen)
+        self.server.page_source = self.screens[screen]
+        self.server.screenshot_png = self._image(screen)
+        if screen == 'dashboard' and self.remember_login and not self.signed_in:
+            self.logins += 1
+            self.server.files[self.auth_file] = f'token=fake-{self.logins}'.encode()
+
+    def _image(self, screen):
+        if screen not in self._images:
+            self._images[screen] = render_png(self.screens[screen])
+        return self._images[screen]
+
+    @property
+    def signed_in(self):
+        return self.remember_login and self.server.files.get(self.auth_file, b'').startswith(b'token=')
+
+    def launch(self):
+        if self._timer:
+            self._timer.cancel()
+        self.show('dashboard' if self.signed_in else self.first_screen)
+
+    def reset(self):
+        """Wipe the app's data container (fullReset / mobile: clearApp)."""
+        self.server.files.pop(self.auth_file, None)
+
+    def sign_out(self):
+        """Revoke the stored session the way an expired server-side token would."""
+        if self.auth_file in self.server.files:
+            self.server.files[self.auth_file] = b'revoked'
+
+    def click(self, node):
+        label = node.get('name') or node.get('text')
+        target = self.transitions.get((self.screen, label))
+        if target is None:
+            return
+        if self.lose_clicks:
+            self.lose_clicks -= 1
+            return
+        if self.transition_delay:
+            self._timer = threading.Timer(self.transition_delay, self.show, args=(target,))
+            self._timer.daemon = True
+            self._timer.start()
+        else:
+            self.show(target)
@@ -0,0 +1,117 @@
+"""
+Stand-in for the MJPEG screen stream WDA / UiAutomator2 serve on mjpegServerPort.
+
+Serves multipart/x-mixed-replace frames at a fixed rate. Frame payloads are
+JPEG-shaped (SOI ... EOI) byte strings naming their sequence number, which is
+all the recorder needs; set `frames` to real JPEG bytes to stream images.
+
+    PYTHONPATH=src python -m liveboard_test.fake_mjpeg --port 9100
+"""
+
+import argparse
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+BOUNDARY = 'liveboard-frame'
+
+
+def fake_jpeg(text):
+    return b'\xff\xd8' + text.encode() + b'\xff\xd9'
+
+
+class FakeMjpegServer:
+    """Streams numbered frames to every client at `fps` until stopped."""
+
+    def __init__(self, host='127.0.0.1', port=0, fps=20.0, content_length=True, frames=None):
+        self.fps = fps
+        self.content_length = content_length
+        self.frames = frames
+        self.sequence = itertools.count(1)
+        self.frames_sent = 0
+        self.clients = 0
+        self._stopping = threading.Event()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def next_frame(self):
+        number = next(self.sequence)
+        if self.frames:
+            return self.frames[(number - 1) % len(self.frames)]
+        return fake_jpeg(f'frame {number}')
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-mjpeg", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.0'
+
+            def do_GET(self):
+                server.clients += 1
+                self.send_response(200)
+                self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    while not server._stopping.is_set():
+                        frame = server.next_frame()
+                        headers = f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                        if server.content_length:
+                            headers += f'Content-Length: {len(frame)}\r\n'
+                        self.wfile.write(headers.encode() + b'\r\n' + frame + b'\r\n')
+                        self.wfile.flush()
+                        server.frames_sent += 1
+                        time.sleep(1 / server.fps)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake MJPEG screen stream")
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--fps', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    server = FakeMjpegServer(args.address, args.port, args.fps)
+    print(f"🎞️ Fake MJPEG stream on {server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._stopping.set()
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,581 @@
+"""
+Declarative cross-platform flows compiled into minimal-round-trip plans.
+
+A Flow lists its steps once with per-platform locators:
+
+    Flow("login", [
+        Tap("Step 1: Log in", ios=(IOS_PREDICATE, "name == 'Log in'"), android=(..., ...), transition=True),
+        Type("Step 2: Email", ios=..., android=..., text="prod@mailinator.com"),
+        Screenshot("email_filled"),
+    ])
+
+Flow.compile(platform) turns it into a Plan. The optimized plan
+
+* prefetches: one page_source poll resolves every locator of a screen (up to
+  and including the tap that leaves it) locally, instead of a find/is_displayed/
+  is_enabled poll per element;
+* merges consecutive waits: "screen changed" + "screen settled" + "next
+  elements present" after a transition become a single poll loop;
+* skips redundant screenshots: a screenshot with no tap or typing since the
+  previous one would capture the same screen.
+
+Flow.compile(platform, optimize=False) runs each step the way the hand-coded
+tests did, which is what the benchmarks and tests compare against.
+
+Looks(name) compares the screen, once the wait before it has settled, with a
+golden screenshot (visual.py); FlowRunner skips it unless given goldens=.
+
+FlowRunner retries a step that times out on the same live session
+($STEP_RETRIES per step, default 1) when that is safe: waits are always
+re-run, an action only if it never reached the device or is idempotent
+(typing, expecting), and a lost transition tap (the screen never changed) is
+tapped again.
+"""
+
+import base64
+import os
+import time
+
+from selenium.common.exceptions import (
+    ElementNotInteractableException, NoSuchElementException, StaleElementReferenceException, TimeoutException,
+    WebDriverException,
+)
+
+from . import steps
+from .screens import get_screen_cache
+from .locators import compile_locator
+from .ui_tree import diff_trees, parse_page_source
+from .waits import GEOMETRY_RE, WaitEngine, element_clickable, no_animation, page_source_stable
+
+
+# Quiet periods of page_source_stable() and no_animation()
+SETTLE_SECONDS = 0.5
+ANIMATION_SECONDS = 0.3
+
+# Always ignored by visual checks: the status bar (clock, battery, signal) as screen fractions.
+VISUAL_MASKS = {'ios': [(0, 0, 1, 0.07)], 'android': [(0, 0, 1, 0.04)]}
+
+# Failures a retry on the same session can recover from; anything else fails the step right away.
+RETRYABLE_ERRORS = (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, ElementNotInteractableException,
+)
+
+
+class FlowError(ValueError):
+    """The flow cannot be compiled for the requested platform."""
+
+
+class Action:
+    """A step that needs an element located by a per-platform (by, value) locator."""
+
+    mutates = True
+    idempotent = False
+    transition = False
+    platforms = None
+
+    def __init__(self, step=None, ios=None, android=None):
+        self.step = step
+        self.locators = {'ios': ios, 'android': android}
+
+    def locator(self, platform):
+        locator = self.locators.get(platform)
+        if locator is None:
+            raise FlowError(f"{self.step or type(self).__name__} has no {platform} locator")
+        return tuple(locator)
+
+    def perform(self, element):
+        raise NotImplementedError
+
+
+class Tap(Action):
+    """Click an element; transition=True waits for the next screen to settle afterwards."""
+
+    def __init__(self, step=None, ios=None, android=None, transition=False, replaces=0.0):
+        super().__init__(step, ios, android)
+        self.transition = transition
+        self.replaces = replaces
+
+    def perform(self, element):
+        element.click()
+
+
+class Type(Action):
+    """Clear a text field and type into it."""
+
+    idempotent = True
+
+    def __init__(self, step=None, ios=None, android=None, text=''):
+        super().__init__(step, ios, android)
+        self.text = text
+
+    def perform(self, element):
+        element.clear()
+        element.send_keys(self.text)
+
+
+class Expect(Action):
+    """Require an element to be present without interacting with it."""
+
+    mutates = False
+    idempotent = True
+
+    def perform(self, element):
+        pass
+
+
+class Settle:
+    """Wait for the screen to stop changing (animation=True: only element geometry is compared)."""
+
+    def __init__(self, name, replaces=0.0, animation=False, platforms=None):
+        self.name = name
+        self.replaces = replaces
+        self.animation = animation
+        self.platforms = platforms
+
+
+class Screenshot:
+    def __init__(self, name, platforms=None):
+        self.name = name
+        self.platforms = platforms
+
+
+class Looks:
+    """Check the screen against the golden screenshot `name` (see visual.py); masks are screen fractions."""
+
+    def __init__(self, name, mask=(), platforms=None):
+        self.name = name
+        self.mask = list(mask)
+        self.platforms = platforms
+
+
+class Flow:
+    """An ordered list of actions, settles and screenshots shared by iOS and Android."""
+
+    def __init__(self, name, actions):
+        self.name = name
+        self.actions = list(actions)
+
+    def entries(self, platform):
+        """The actions that apply to platform (settles and screenshots can be limited to some)."""
+        return [action for action in self.actions if action.platforms is None or platform in action.platforms]
+
+    def compile(self, platform, optimize=True):
+        if optimize:
+            return _compile_optimized(self, platform)
+        return _compile_step_by_step(self, platform)
+
+
+# --- Plan operations -------------------------------------------------------
+
+class StepOp:
+    def __init__(self, name):
+        self.name = name
+
+    def run(self, runner):
+        steps.step(self.name)
+        print(f"🔍 {self.name}")
+
+    def describe(self):
+        return f"step     {self.name}"
+
+
+class CaptureOp:
+    def __init__(self, name):
+        self.name = name
+
+    def run(self, runner):
+        runner.screenshot(self.name)
+
+    def describe(self):
+        return f"capture  {self.name}"
+
+
+class LookOp:
+    def __init__(self, looks):
+        self.looks = looks
+
+    def run(self, runner):
+        runner.check_looks(self.looks.name, self.looks.mask)
+
+    def describe(self):
+        return f"looks    {self.looks.name}"
+
+
+class WaitOp:
+    """One poll loop over page_source: optionally changed, settled, and with all locators present."""
+
+    def __init__(self, name, locators=(), clickable=(), changed=False, settle=None, geometry=False, replaces=0.0):
+        self.name = name
+        self.locators = list(locators)
+        self.clickable = set(clickable)
+        self.changed = changed
+        self.settle = settle
+        self.geometry = geometry
+        self.replaces = replaces
+
+    def run(self, runner):
+        before = runner.before if self.changed else None
+        state = {'start': None, 'key': None, 'since': None}
+        # Changed/settled are best effort like the waits they replace; elements are required.
+        grace = runner.waits.timeout
+
+        def condition(driver):
+            source = runner.fetch_source()
+            now = time.monotonic()
+            if state['start'] is None:
+                state['start'] = now
+            patient = now - state['start'] < grace
+            if before is not None and runner.same_screen(source, before):
+                if patient:
+                    return None
+                if runner.can_retry():
+                    # The transition tap was probably lost; let the runner tap again.
+                    raise TimeoutException(f"Screen did not change within {grace}s after {self.name}")
+            if self.settle is not None:
+                key = GEOMETRY_RE.findall(source) if self.geometry else source
+                if key != state['key']:
+                    state['key'], state['since'] = key, now
+                    if self.settle > 0 and patient:
+                        return None
+                elif now - state['since'] < self.settle and patient:
+                    return None
+            for locator in self.locators:
+                node = runner.locate(locator)
+                if node is None or (locator in self.clickable and not _interactable(node)):
+                    return None
+            return True
+
+        timeout = grace * 2 if self.locators and (self.changed or self.settle is not None) else grace
+        required = bool(self.locators)
+        runner.waits.until(condition, self.name, timeout=timeout, replaces=self.replaces, required=required)
+        runner.observe_screen()
+
+    def describe(self):
+        parts = []
+        if self.changed:
+            parts.append("changed")
+        if self.settle is not None:
+            parts.append(f"{'no animation' if self.geometry else 'settled'} {self.settle:.1f}s")
+        if self.locators:
+            parts.append(f"{len(self.locators)} locator(s)")
+        return f"wait     {self.name} [{', '.join(parts)}]"
+
+
+class ActOp:
+    """Interact with an element the preceding WaitOp already found in the page source."""
+
+    def __init__(self, action, locator):
+        self.action = action
+        self.locator = locator
+
+    def run(self, runner):
+        if isinstance(self.action, Expect):
+            return
+        element = runner.driver.find_element(*self.locator)
+        if self.action.transition:
+            # The last polled source is the "before" picture unless something changed the screen since.
+            runner.before = runner.last_source if runner.source_fresh else runner.fetch_source()
+        runner.performing = self
+        self.action.perform(element)
+        runner.performing = None
+        runner.source_fresh = False
+
+    def describe(self):
+        return f"{type(self.action).__name__.lower():<8} {self.locator[1]}"
+
+
+class StepByStepOp:
+    """What the hand-coded tests do: poll until clickable, act, then wait for the transition."""
+
+    def __init__(self, action, locator):
+        self.action = action
+        self.locator = locator
+
+    def run(self, runner):
+        element = runner.waits.until(element_clickable(*self.locator))
+        runner.performing = self
+        if isinstance(self.action, Tap) and self.action.transition:
+            runner.waits.click_and_wait_for_transition(element, self.locator[1], replaces=self.action.replaces)
+        else:
+            self.action.perform(element)
+        runner.performing = None
+
+    def describe(self):
+        return f"{type(self.action).__name__.lower():<8} {self.locator[1]} (polling)"
+
+
+class SettleOp:
+    def __init__(self, settle):
+        self.settle = settle
+
+    def run(self, runner):
+        condition = no_animation() if self.settle.animation else page_source_stable()
+        runner.waits.until(condition, self.settle.name, replaces=self.settle.replaces, required=False)
+
+    def describe(self):
+        return f"settle   {self.settle.name}"
+
+
+def _interactable(node):
+    enabled = node.get('enabled', 'true').lower() != 'false'
+    visible = node.get('visible', node.get('displayed', 'true')).lower() != 'false'
+    return enabled and visible
+
+
+# --- Compilers -------------------------------------------------------------
+
+class Plan:
+    """Platform-specific operations compiled from a Flow."""
+
+    def __init__(self, flow, platform, ops, optimized, skipped_screenshots=()):
+        self.flow = flow
+        self.platform = platform
+        self.ops = ops
+        self.optimized = optimized
+        self.skipped_screenshots = list(skipped_screenshots)
+
+    def format(self):
+        mode = "optimized" if self.optimized else "step by step"
+        lines = [f"🧭 {self.flow.name} ({self.platform}, {mode}): {len(self.ops)} operations"]
+        lines.extend(f"   {op.describe()}" for op in self.ops)
+        for name in self.skipped_screenshots:
+            lines.append(f"   skipped redundant screenshot {name}")
+        return "\n".join(lines)
+
+
+def _compile_step_by_step(flow, platform):
+    ops = []
+    for action in flow.entries(platform):
+        if isinstance(action, Screenshot):
+            ops.append(CaptureOp(action.name))
+        elif isinstance(action, Looks):
+            ops.append(LookOp(action))
+        elif isinstance(action, Settle):
+            ops.append(SettleOp(action))
+        else:
+            if action.step:
+                ops.append(StepOp(action.step))
+            ops.append(StepByStepOp(action, action.locator(platform)))
+    return Plan(flow, platform, ops, optimized=False)
+
+
+def _screen_group(actions, start, platform):
+    """Locators of the actions from `start` up to and including the next transition tap."""
+    group, clickable = [], []
+    for action in actions[start:]:
+        if not isinstance(action, Action):
+            continue
+        locator = action.locator(platform)
+        if locator not in group:
+            group.append(locator)
+        if isinstance(action, Tap):
+            clickable.append(locator)
+            if action.transition:
+                break
+    return group, clickable
+
+
+def _compile_optimized(flow, platform):
+    ops, skipped, deferred = [], [], []
+    pending = None
+    prefetched = set()
+    mutated = True
+    entries = flow.entries(platform)
+    for index, action in enumerate(entries):
+        if isinstance(action, Settle):
+            pending = pending or {'changed': False, 'settle': None, 'geometry': True, 'replaces': 0.0, 'names': []}
+            quiet = ANIMATION_SECONDS if action.animation else SETTLE_SECONDS
+            pending['settle'] = max(pending['settle'] or 0.0, quiet)
+            pending['geometry'] = pending['geometry'] and action.animation
+            pending['replaces'] += action.replaces
+            pending['names'].append(action.name)
+            continue
+        if isinstance(action, Screenshot):
+            if not mutated:
+                skipped.append(action.name)
+                continue
+            mutated = False
+            # A screenshot after a tap or settle shows the screen once the wait is over.
+            (deferred if pending else ops).append(CaptureOp(action.name))
+            continue
+        if isinstance(action, Looks):
+            # Like a screenshot: checked once the pending wait has settled the screen.
+            (deferred if pending else ops).append(LookOp(action))
+            continue
+
+        locator = action.locator(platform)
+        if pending or locator not in prefetched:
+            group, clickable = _screen_group(entries, index, platform)
+            pending = pending or {'changed': False, 'settle': None, 'geometry': False, 'replaces': 0.0, 'names': []}
+            name = " + ".join(pending['names'] + [f"{len(group)} element(s)"])
+            ops.append(WaitOp(name, group, clickable, pending['changed'], pending['settle'],
+                              pending['geometry'] and pending['settle'] is not None, pending['replaces']))
+            ops.extend(deferred)
+            deferred, pending, prefetched = [], None, set(group)
+        if action.step:
+            ops.append(StepOp(action.step))
+        ops.append(ActOp(action, locator))
+        mutated = mutated or action.mutates
+        if isinstance(action, Tap) and action.transition:
+            pending = {'changed': True, 'settle': SETTLE_SECONDS, 'geometry': False,
+                       'replaces': action.replaces, 'names': [f"{action.step or locator[1]} (transition)"]}
+            prefetched = set()
+    if pending:
+        ops.append(WaitOp(" + ".join(pending['names']), (), (), pending['changed'], pending['settle'],
+                          pending['geometry'] and pending['settle'] is not None, pending['replaces']))
+    ops.extend(deferred)
+    return Plan(flow, platform, ops, optimized=True, skipped_screenshots=skipped)
+
+
+# --- Runner ----------------------------------------------------------------
+
+class FlowRunner:
+    """Executes a Plan against one driver."""
+
+    def __init__(self, driver, waits=None, screenshot=None, retries=None, screens=None, goldens=None):
+        self.driver = driver
+        self.waits = waits or WaitEngine(driver)
+        self.screenshot = screenshot or self._capture
+        self.retries = int(os.getenv('STEP_RETRIES', '1')) if retries is None else retries
+        self.screens = screens if screens is not None else get_screen_cache()
+        # visual.GoldenStore for Looks entries; without one they are skipped.
+        self.goldens = goldens
+        self.screen = None
+        self.platform = None
+        self.retried = []
+        self.performing = None
+        self._used = {}
+        self.before = None
+        self.last_source = None
+        self.source_fresh = False
+        self._trees = {}
+        self._screen_root = None
+        self._compiled = {}
+
+    def _capture(self, name):
+        from .screenshots import get_screenshot_pipeline
+
+        return get_screenshot_pipeline().capture(self.driver, name)
+
+    def fetch_source(self):
+        self.last_source = self.driver.page_source
+        self.source_fresh = True
+        return self.last_source
+
+    def tree(self, source):
+        """Parsed page source, cached for the last few sources (the polls and the "before" picture)."""
+        root = self._trees.get(source)
+        if root is None:
+            if len(self._trees) >= 4:
+                self._trees.pop(next(iter(self._trees)))
+            root = self._trees[source] = parse_page_source(source)
+        return root
+
+    def same_screen(self, source, other):
+        """Same elements on screen, whatever moved or was typed (see ui_tree.UiNode.shape)."""
+        return source == other or self.tree(source).shape == self.tree(other).shape
+
+    def observe_screen(self):
+        """Recognise the last fetched screen and announce it when it differs from the previous one."""
+        if self.last_source is None:
+            return
+        root = self.tree(self.last_source)
+        previous = self._screen_root
+        if previous is not None and previous.shape == root.shape:
+            return
+        self._screen_root = root
+        name, key = self.screens.recognise(root, self.platform)
+        self.screen = name or f"screen {key[:8]}"
+        changes = diff_trees(previous, root).summary() if previous is not None else None
+        steps.notify('screen', screen=self.screen, fingerprint=key, changes=changes)
+
+    def check_looks(self, name, mask=()):
+        """Compare a fresh screenshot with the golden `name`; raises visual.VisualMismatch."""
+        if self.goldens is None:
+            print(f"🖼️ {name}: no golden store, visual check skipped")
+            return None
+        from .visual import VisualMismatch
+
+        png = base64.b64decode(self.driver.get_screenshot_as_base64())
+        # Goldens are per device: screen size and rendering differ between models, and deviceName is
+        # the same default on every iOS device
+        capabilities = getattr(self.driver, 'capabilities', None) or {}
+        device = (capabilities.get('udid') or capabilities.get('appium:udid')
+                  or capabilities.get('deviceName') or capabilities.get('appium:deviceName'))
+        result = self.goldens.check(self.platform, name, png, list(mask) + VISUAL_MASKS.get(self.platform, []),
+                                    device=device)
+        print(result.format())
+        steps.notify('visual', name=name, status=result.status,
+                     distance=result.diff.distance if result.diff else None,
+                     changed=result.diff.changed if result.diff else None)
+        if not result.ok:
+            raise VisualMismatch(result.format())
+        return result
+
+    def locate(self, locator):
+        """First node matching locator in the last fetched page source, or None."""
+        select = self._compiled.get(locator)
+        if select is None:
+            select = self._compiled[locator] = compile_locator(*locator)
+        matches = select(self.tree(self.last_source))
+        return matches[0] if matches else None
+
+    def run(self, plan):
+        self.platform = plan.platform
+        ops = plan.ops
+        used = self._used = {}
+        index, last_transition = 0, -1
+        try:
+            while index < len(ops):
+                op = ops[index]
+                try:
+                    op.run(self)
+                except RETRYABLE_ERRORS as e:
+                    step = steps.current_step()
+                    restart = self._retry_point(ops, index, last_transition)
+                    if restart is None or used.get(step, 0) >= self.retries:
+                        raise
+                    used[step] = used.get(step, 0) + 1
+                    self.retried.append((step, type(e).__name__))
+                    steps.notify('retry', attempt=used[step], error=type(e).__name__)
+                    print(f"🔁 Retrying {step or op.describe()} on the same session ({type(e).__name__})")
+                    self.performing, self.source_fresh = None, False
+                    index = restart
+                    continue
+                if isinstance(op, ActOp) and op.action.transition:
+                    last_transition = index
+                index += 1
+        except Exception:
+            try:
+                self.screenshot("error_state")
+            except WebDriverException:
+                pass
+            raise
+        print(f"✅ {plan.flow.name} completed on {plan.platform}")
+        return self
+
+    def can_retry(self):
+        """Whether the current step still has retries left."""
+        return self._used.get(steps.current_step(), 0) < self.retries
+
+    def _retry_point(self, ops, index, last_transition):
+        """Index to resume from after ops[index] failed, or None when retrying could repeat a side effect."""
+        op = ops[index]
+        if self.performing is op and not op.action.idempotent:
+            return None
+        if isinstance(op, WaitOp) and op.changed and self.before is not None:
+            try:
+                unchanged = self.same_screen(self.fetch_source(), self.before)
+            except WebDriverException:
+                return None
+            if unchanged and last_transition >= 0:
+                # The screen never changed: the transition tap didn't register, so tap again.
+                return last_transition
+        if isinstance(op, ActOp):
+            # Look the element up again through the screen's wait, unless that would repeat a tap.
+            for previous in range(index - 1, last_transition, -1):
+                if isinstance(ops[previous], WaitOp):
+                    return previous
+                if isinstance(ops[previous], ActOp) and not ops[previous].action.idempotent:
+                    break
+        return index
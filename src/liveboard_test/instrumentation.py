@@ -0,0 +1,155 @@
+"""
+Per-command latency instrumentation for the Appium command executor.
+
+InstrumentedConnection wraps every WebDriver command (including session
+creation) and records its latency, request/response payload size and
+whether it repeated the previous command verbatim (a retry / poll), tagged
+with the current test, step and device. The recorder summarises p50/p95/p99
+per command and is written as JSON at the end of the pytest session.
+"""
+
+import json
+import math
+import threading
+import time
+
+from . import steps
+from .connection_pool import PooledConnection, pooled_client_config
+
+
+def _payload_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+class CommandSample:
+    __slots__ = ('command', 'test', 'step', 'device', 'seconds', 'request_bytes', 'response_bytes', 'ok', 'retry')
+
+    def __init__(self, command, test, step, device, seconds, request_bytes, response_bytes, ok, retry):
+        self.command = command
+        self.test = test
+        self.step = step
+        self.device = device
+        self.seconds = seconds
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.ok = ok
+        self.retry = retry
+
+
+class CommandRecorder:
+    """Collects CommandSamples from every instrumented connection in the process."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, sample):
+        with self._lock:
+            self.samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+
+    def summary(self, group_by='command'):
+        """{group: {count, errors, retries, p50/p95/p99/max/total seconds, bytes}} grouped by a sample field."""
+        groups = {}
+        with self._lock:
+            samples = list(self.samples)
+        for sample in samples:
+            groups.setdefault(getattr(sample, group_by) or '-', []).append(sample)
+        summary = {}
+        for key, group in sorted(groups.items()):
+            latencies = sorted(s.seconds for s in group)
+            summary[key] = {
+                'count': len(group),
+                'errors': sum(not s.ok for s in group),
+                'retries': sum(s.retry for s in group),
+                'p50': round(percentile(latencies, 0.50), 4),
+                'p95': round(percentile(latencies, 0.95), 4),
+                'p99': round(percentile(latencies, 0.99), 4),
+                'max': round(latencies[-1], 4),
+                'total': round(sum(latencies), 4),
+                'request_bytes': sum(s.request_bytes for s in group),
+                'response_bytes': sum(s.response_bytes for s in group),
+            }
+        return summary
+
+    def to_dict(self):
+        return {
+            'commands': self.summary('command'),
+            'by_test': self.summary('test'),
+            'by_step': self.summary('step'),
+            'by_device': self.summary('device'),
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def format(self, limit=8):
+        commands = sorted(self.summary().items(), key=lambda item: item[1]['total'], reverse=True)
+        lines = [f"{'command':<28} | {'count':>5} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | {'total s':>7}"]
+        for name, s in commands[:limit]:
+            lines.append(f"{name:<28} | {s['count']:5d} | {s['p50'] * 1000:7.1f} | {s['p95'] * 1000:7.1f} | "
+                         f"{s['p99'] * 1000:7.1f} | {s['total']:7.2f}")
+        return "\n".join(lines)
+
+
+_default_recorder = CommandRecorder()
+
+
+def get_recorder():
+    return _default_recorder
+
+
+class InstrumentedConnection(PooledConnection):
+    """Pooled Appium connection that times every command it executes."""
+
+    recorder = None
+    device = None
+
+    def execute(self, command, params):
+        recorder = self.recorder or _default_recorder
+        signature = (command, repr(params))
+        retry = signature == getattr(self, '_last_signature', None)
+        self._last_signature = signature
+        start = time.perf_counter()
+        value = None
+        ok = False
+        try:
+            response = super().execute(command, params)
+            value = response.get('value') if isinstance(response, dict) else response
+            # Errors come back as a normal response; WebDriver raises them afterwards.
+            status = response.get('status') if isinstance(response, dict) else None
+            ok = not ((isinstance(status, int) and status >= 400) or (isinstance(value, dict) and 'error' in value))
+            return response
+        finally:
+            recorder.record(CommandSample(
+                command, steps.current_test(), steps.current_step(), self.device,
+                time.perf_counter() - start, _payload_size(params), _payload_size(value), ok, retry,
+            ))
+
+
+def instrumented_connection(url, device=None, recorder=None, **config):
+    """Build an InstrumentedConnection for an Appium server URL on the shared connection pools."""
+    connection = InstrumentedConnection(client_config=pooled_client_config(url, **config))
+    connection.device = device
+    connection.recorder = recorder
+    return connection
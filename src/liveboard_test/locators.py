@@ -0,0 +1,462 @@
+"""
+Local locator evaluation against a single page_source fetch.
+
+Every WebDriverWait / find_element poll is a full HTTP round trip to Appium.
+LocatorResolver fetches the page source once, parses it into a UiNode tree
+and evaluates many locators locally. Only interaction (click, send_keys)
+goes back to the server. Supported strategies:
+
+* iOS predicate strings: ==, !=, <, >, CONTAINS, BEGINSWITH, ENDSWITH, LIKE,
+  MATCHES with [c]/[d] modifiers, combined with AND / OR / NOT and parentheses
+* UiSelector chains: className, text, resourceId, description (+ Contains,
+  StartsWith, Matches variants), boolean flags, index(n), instance(n)
+* Simple XPath: / and // steps, name tests, [n], [@a='v'], contains(),
+  starts-with() joined with and / or
+* id, accessibility id, class name, name
+"""
+
+import fnmatch
+import re
+import unicodedata
+
+from .ui_tree import parse_page_source
+
+
+IOS_PREDICATE = '-ios predicate string'
+ANDROID_UIAUTOMATOR = '-android uiautomator'
+XPATH = 'xpath'
+ACCESSIBILITY_ID = 'accessibility id'
+ID = 'id'
+CLASS_NAME = 'class name'
+NAME = 'name'
+
+
+class UnsupportedLocator(ValueError):
+    """The locator cannot be evaluated locally; callers should ask the server instead."""
+
+
+def _is_true(value):
+    return str(value).lower() in ('true', '1', 'yes')
+
+
+# Page sources write boolean attributes as words; NSPredicate compares them as 1 / 0
+BOOLEAN_NUMBERS = {'true': 1.0, 'yes': 1.0, 'false': 0.0, 'no': 0.0}
+
+
+def _fold(text, modifiers):
+    if 'c' in modifiers:
+        text = text.lower()
+    if 'd' in modifiers:
+        text = ''.join(ch for ch in unicodedata.normalize('NFD', text) if not unicodedata.combining(ch))
+    return text
+
+
+# --- iOS predicate strings -------------------------------------------------
+
+_PREDICATE_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<op>==|!=|<=|>=|=|<|>|&&|\|\||!)
+      | (?P<paren>[()])
+      | (?P<modifier>\[[cdn]+\])
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+    )""", re.VERBOSE)
+
+_WORD_OPERATORS = ('CONTAINS', 'BEGINSWITH', 'ENDSWITH', 'LIKE', 'MATCHES')
+
+
+def _tokenize_predicate(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _PREDICATE_TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise UnsupportedLocator(f"Cannot parse predicate near: {text[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == 'word':
+            upper = value.upper()
+            if upper in ('AND', 'OR', 'NOT') + _WORD_OPERATORS:
+                kind, value = 'op', upper
+            elif upper in ('TRUE', 'YES', 'FALSE', 'NO'):
+                kind, value = 'bool', upper in ('TRUE', 'YES')
+        elif kind == 'op':
+            value = {'&&': 'AND', '||': 'OR', '!': 'NOT', '=': '=='}.get(value, value)
+        elif kind == 'number':
+            value = float(value)
+        tokens.append((kind, value))
+    return tokens
+
+
+def _ios_attribute(node, name):
+    if name.startswith('wd') and len(name) > 2:
+        name = name[2].lower() + name[3:]
+    if name in ('type', 'elementType'):
+        return node.attrs.get('type', node.tag)
+    if name == 'visible':
+        return node.attrs.get('visible', 'true')
+    return node.attrs.get(name)
+
+
+class _PredicateParser:
+    def __init__(self, text):
+        self.tokens = _tokenize_predicate(text)
+        self.position = 0
+
+    def parse(self):
+        predicate = self._or()
+        if self.position != len(self.tokens):
+            raise UnsupportedLocator(f"Unexpected token {self.tokens[self.position]!r}")
+        return predicate
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _or(self):
+        parts = [self._and()]
+        while self._peek() == ('op', 'OR'):
+            self._take()
+            parts.append(self._and())
+        return parts[0] if len(parts) == 1 else (lambda node: any(p(node) for p in parts))
+
+    def _and(self):
+        parts = [self._not()]
+        while self._peek() == ('op', 'AND'):
+            self._take()
+            parts.append(self._not())
+        return parts[0] if len(parts) == 1 else (lambda node: all(p(node) for p in parts))
+
+    def _not(self):
+        if self._peek() == ('op', 'NOT'):
+            self._take()
+            inner = self._not()
+            return lambda node: not inner(node)
+        if self._peek() == ('paren', '('):
+            self._take()
+            inner = self._or()
+            if self._take() != ('paren', ')'):
+                raise UnsupportedLocator("Unbalanced parentheses in predicate")
+            return inner
+        return self._comparison()
+
+    def _comparison(self):
+        kind, attribute = self._take()
+        if kind != 'word':
+            raise UnsupportedLocator(f"Expected attribute name, got {attribute!r}")
+        kind, operator = self._take()
+        if kind != 'op' or operator in ('AND', 'OR', 'NOT'):
+            raise UnsupportedLocator(f"Expected operator after {attribute!r}")
+        modifiers = ''
+        if self._peek()[0] == 'modifier':
+            modifiers = self._take()[1].strip('[]')
+        kind, expected = self._take()
+        if kind not in ('string', 'number', 'bool'):
+            raise UnsupportedLocator(f"Expected literal after {attribute} {operator}")
+        return _make_comparison(attribute, operator, modifiers, kind, expected)
+
+
+def _make_comparison(attribute, operator, modifiers, kind, expected):
+    if kind == 'bool':
+        def compare_bool(node):
+            actual = _ios_attribute(node, attribute)
+            result = actual is not None and _is_true(actual) == expected
+            return result if operator == '==' else not result
+        return compare_bool
+
+    if kind == 'number':
+        def compare_number(node):
+            actual = _ios_attribute(node, attribute)
+            try:
+                actual = BOOLEAN_NUMBERS.get(str(actual).lower(), actual)
+                actual = float(actual)
+            except (TypeError, ValueError):
+                return False
+            return {
+                '==': actual == expected, '!=': actual != expected, '<': actual < expected,
+                '>': actual > expected, '<=': actual <= expected, '>=': actual >= expected,
+            }.get(operator, False)
+        return compare_number
+
+    folded = _fold(expected, modifiers)
+    if operator == 'MATCHES':
+        pattern = re.compile(expected, re.IGNORECASE if 'c' in modifiers else 0)
+    elif operator == 'LIKE':
+        pattern = re.compile(fnmatch.translate(folded))
+
+    def compare_string(node):
+        actual = _ios_attribute(node, attribute)
+        if actual is None:
+            return operator == '!='
+        if operator == 'MATCHES':
+            return pattern.fullmatch(actual) is not None
+        actual = _fold(actual, modifiers)
+        if operator == '==':
+            return actual == folded
+        if operator == '!=':
+            return actual != folded
+        if operator == 'CONTAINS':
+            return folded in actual
+        if operator == 'BEGINSWITH':
+            return actual.startswith(folded)
+        if operator == 'ENDSWITH':
+            return actual.endswith(folded)
+        if operator == 'LIKE':
+            return pattern.match(actual) is not None
+        return False
+    return compare_string
+
+
+def compile_ios_predicate(text):
+    """Compile an iOS predicate string into node -> bool."""
+    return _PredicateParser(text).parse()
+
+
+# --- Android UiSelector ----------------------------------------------------
+
+_SELECTOR_CALL_RE = re.compile(r"""\.?\s*(\w+)\(\s*("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^)]*?)\s*\)""")
+
+_SELECTOR_TEXT_ATTRIBUTES = {
+    'className': 'class',
+    'text': 'text',
+    'resourceId': 'resource-id',
+    'description': 'content-desc',
+    'packageName': 'package',
+}
+
+_SELECTOR_FLAGS = ('clickable', 'enabled', 'checked', 'checkable', 'focusable', 'focused',
+                   'selected', 'scrollable', 'longClickable')
+
+
+def _android_attribute(node, name):
+    if name == 'class':
+        return node.attrs.get('class', node.tag)
+    return node.attrs.get(name)
+
+
+def compile_uiselector(text):
+    """Compile a `new UiSelector()...` chain into a function returning matches from a tree."""
+    body = text.strip().rstrip(';')
+    if body.startswith('new UiSelector()'):
+        body = body[len('new UiSelector()'):]
+    filters = []
+    instance = None
+    position = 0
+    while position < len(body):
+        match = _SELECTOR_CALL_RE.match(body, position)
+        if not match:
+            raise UnsupportedLocator(f"Cannot parse UiSelector near: {body[position:]!r}")
+        position = match.end()
+        method, raw = match.group(1), match.group(2)
+        if raw[:1] in ('"', "'"):
+            argument = re.sub(r"\\(.)", r"\1", raw[1:-1])
+        elif raw in ('true', 'false'):
+            argument = raw == 'true'
+        elif raw.lstrip('-').isdigit():
+            argument = int(raw)
+        else:
+            raise UnsupportedLocator(f"Unsupported UiSelector argument {raw!r}")
+
+        if method == 'instance':
+            instance = argument
+        elif method == 'index':
+            filters.append(lambda node, n=argument: int(node.attrs.get('index', node.position)) == n)
+        elif method in _SELECTOR_FLAGS:
+            attribute = re.sub(r'([A-Z])', r'-\1', method).lower()
+            filters.append(lambda node, a=attribute, v=argument: _is_true(node.attrs.get(a, 'false')) == v)
+        else:
+            filters.append(_selector_text_filter(method, argument))
+
+    def select(root):
+        matches = [node for node in root.iter() if all(f(node) for f in filters)]
+        if instance is not None:
+            return matches[instance:instance + 1]
+        return matches
+    return select
+
+
+def _selector_text_filter(method, argument):
+    for prefix, attribute in _SELECTOR_TEXT_ATTRIBUTES.items():
+        if not method.startswith(prefix):
+            continue
+        suffix = method[len(prefix):]
+        if suffix == '':
+            return lambda node: _android_attribute(node, attribute) == argument
+        if suffix == 'Contains':
+            return lambda node: argument in (_android_attribute(node, attribute) or '')
+        if suffix == 'StartsWith':
+            return lambda node: (_android_attribute(node, attribute) or '').startswith(argument)
+        if suffix == 'Matches':
+            pattern = re.compile(argument)
+            return lambda node: pattern.fullmatch(_android_attribute(node, attribute) or '') is not None
+    raise UnsupportedLocator(f"Unsupported UiSelector method {method}()")
+
+
+# --- XPath subset ----------------------------------------------------------
+
+_XPATH_STEP_RE = re.compile(r"(//|/)([\w.\-]+|\*)((?:\[[^\]]*\])*)")
+_XPATH_PREDICATE_RE = re.compile(r"\[([^\]]*)\]")
+_XPATH_CONDITION_RE = re.compile(
+    r"""^\s*(?:
+        @(?P<attr>[\w\-:]+)\s*=\s*(?P<value>'[^']*'|"[^"]*")
+      | (?P<func>contains|starts-with)\(\s*@(?P<fattr>[\w\-:]+)\s*,\s*(?P<fvalue>'[^']*'|"[^"]*")\s*\)
+      | @(?P<has>[\w\-:]+)
+    )\s*$""", re.VERBOSE)
+
+
+def _compile_xpath_condition(text):
+    alternatives = []
+    for alternative in re.split(r"\s+or\s+", text):
+        checks = []
+        for part in re.split(r"\s+and\s+", alternative):
+            match = _XPATH_CONDITION_RE.match(part)
+            if not match:
+                raise UnsupportedLocator(f"Unsupported XPath predicate [{text}]")
+            if match.group('attr'):
+                checks.append(lambda node, a=match.group('attr'), v=match.group('value')[1:-1]: node.attrs.get(a) == v)
+            elif match.group('func') == 'contains':
+                checks.append(lambda node, a=match.group('fattr'), v=match.group('fvalue')[1:-1]:
+                              v in node.attrs.get(a, ''))
+            elif match.group('func'):
+                checks.append(lambda node, a=match.group('fattr'), v=match.group('fvalue')[1:-1]:
+                              node.attrs.get(a, '').startswith(v))
+            else:
+                checks.append(lambda node, a=match.group('has'): a in node.attrs)
+        alternatives.append(checks)
+    return lambda node: any(all(check(node) for check in checks) for checks in alternatives)
+
+
+def compile_xpath(text):
+    """Compile a simple absolute XPath into a function returning matches from a tree."""
+    text = text.strip()
+    steps = []
+    position = 0
+    while position < len(text):
+        match = _XPATH_STEP_RE.match(text, position)
+        if not match:
+            raise UnsupportedLocator(f"Unsupported XPath near: {text[position:]!r}")
+        position = match.end()
+        axis, name, predicates = match.groups()
+        conditions = []
+        for predicate in _XPATH_PREDICATE_RE.findall(predicates):
+            if predicate.strip().isdigit():
+                conditions.append(int(predicate))
+            else:
+                conditions.append(_compile_xpath_condition(predicate))
+        steps.append((axis, name, conditions))
+    if not steps:
+        raise UnsupportedLocator(f"Empty XPath {text!r}")
+
+    def select(root):
+        # A virtual document node whose only child is the root element.
+        context = [None]
+        for axis, name, conditions in steps:
+            parents = []
+            for node in context:
+                if axis == '/':
+                    parents.append([root] if node is None else node.children)
+                elif node is None:
+                    parents.append([root])
+                    parents.extend(n.children for n in root.iter())
+                else:
+                    parents.extend(n.children for n in node.iter())
+            selected = []
+            seen = set()
+            for children in parents:
+                candidates = [c for c in children if name == '*' or c.tag == name]
+                for condition in conditions:
+                    if isinstance(condition, int):
+                        candidates = candidates[condition - 1:condition] if condition >= 1 else []
+                    else:
+                        candidates = [c for c in candidates if condition(c)]
+                for candidate in candidates:
+                    if id(candidate) not in seen:
+                        seen.add(id(candidate))
+                        selected.append(candidate)
+            context = selected
+        return context
+    return select
+
+
+# --- Resolver --------------------------------------------------------------
+
+def compile_locator(by, value):
+    """Return a function root -> [matching UiNode, ...] for a locator strategy."""
+    if by == IOS_PREDICATE:
+        predicate = compile_ios_predicate(value)
+        return lambda root: [node for node in root.iter() if predicate(node)]
+    if by == ANDROID_UIAUTOMATOR:
+        return compile_uiselector(value)
+    if by == XPATH:
+        return compile_xpath(value)
+    if by == ACCESSIBILITY_ID:
+        return lambda root: [n for n in root.iter() if n.attrs.get('name') == value or n.attrs.get('content-desc') == value]
+    if by == ID:
+        return lambda root: [n for n in root.iter() if n.attrs.get('resource-id') == value or n.attrs.get('name') == value]
+    if by == CLASS_NAME:
+        return lambda root: [n for n in root.iter() if n.tag == value or n.attrs.get('class') == value]
+    if by == NAME:
+        return lambda root: [n for n in root.iter() if n.attrs.get('name') == value]
+    raise UnsupportedLocator(f"Locator strategy {by!r} is not evaluated locally")
+
+
+class LocatorResolver:
+    """Evaluates locators against one cached page-source snapshot of a driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.root = None
+        self.fetches = 0
+        self.server_finds = 0
+        self._compiled = {}
+
+    @property
+    def round_trips(self):
+        return self.fetches + self.server_finds
+
+    def refresh(self):
+        """Fetch and parse the page source (one round trip)."""
+        self.root = parse_page_source(self.driver.page_source)
+        self.fetches += 1
+        return self
+
+    def find_all(self, by, value):
+        if self.root is None:
+            self.refresh()
+        key = (by, value)
+        select = self._compiled.get(key)
+        if select is None:
+            select = self._compiled[key] = compile_locator(by, value)
+        return select(self.root)
+
+    def find(self, by, value):
+        """The first matching node in the current snapshot, or None."""
+        matches = self.find_all(by, value)
+        return matches[0] if matches else None
+
+    def resolve_many(self, locators):
+        """Map each (by, value) locator to its first matching node (or None) from one snapshot."""
+        return {locator: self.find(*locator) for locator in locators}
+
+    def all_present(self, locators):
+        """WaitEngine condition: refresh once per poll and check every locator locally."""
+        def condition(driver):
+            self.refresh()
+            found = self.resolve_many(locators)
+            return found if all(found.values()) else None
+        condition.__name__ = f"{len(locators)} locators present"
+        return condition
+
+    def element(self, by, value):
+        """Server-side WebElement for interaction (one round trip, no polling)."""
+        self.server_finds += 1
+        return self.driver.find_element(by, value)
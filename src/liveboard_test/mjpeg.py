@@ -0,0 +1,346 @@
+"""
+Background MJPEG screen capture.
+
+WDA and UiAutomator2 stream the device screen as MJPEG on mjpegServerPort
+(9100 in appium_inspector_config.json). MjpegRecorder reads that stream on a
+daemon thread, keeps frames at a configurable rate, tags each with the test
+and step running when it arrived, and per test writes
+
+- <test>.mjpeg: the sampled frames back to back (ffplay / VLC play it),
+- <test>.json: offset, time and step of every frame,
+- <test>_sheet.jpg: the last frame of every step on one contact sheet (needs Pillow),
+
+to artifacts/<RUN_ID>/video/. Test commands never wait for it. Enable with
+$MJPEG_CAPTURE=1; $MJPEG_FPS (default 2) and $MJPEG_URL override the defaults.
+"""
+
+import io
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from . import steps
+from .artifacts import run_directory
+
+
+SOI = b'\xff\xd8'
+EOI = b'\xff\xd9'
+
+# Appium's defaults when the session doesn't set mjpegServerPort.
+DEFAULT_PORTS = {'ios': 9100, 'android': 7810}
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'test'
+
+
+class _StreamBuffer:
+    """Reads a stream in chunks and keeps what a frame didn't use for the next one."""
+
+    def __init__(self, stream, chunk_size=64 * 1024):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # read1 returns what has arrived instead of blocking for a whole chunk of a live stream
+        self._read = getattr(stream, 'read1', stream.read)
+        self.buffer = bytearray()
+
+    def _fill(self):
+        data = self._read(self.chunk_size)
+        self.buffer += data
+        return bool(data)
+
+    def _take(self, size):
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self):
+        searched = 0
+        while True:
+            end = self.buffer.find(b'\n', searched)
+            if end >= 0:
+                return self._take(end + 1)
+            searched = len(self.buffer)
+            if not self._fill():
+                return self._take(len(self.buffer))
+
+    def read(self, size):
+        while len(self.buffer) < size and self._fill():
+            pass
+        return self._take(size)
+
+    def read_until(self, marker):
+        """Bytes up to and including marker, or None if the stream ends first."""
+        searched = 0
+        while True:
+            end = self.buffer.find(marker, searched)
+            if end >= 0:
+                return self._take(end + len(marker))
+            searched = max(0, len(self.buffer) - len(marker) + 1)
+            if not self._fill():
+                return None
+
+
+def read_frames(stream):
+    """Yield JPEG payloads from a multipart/x-mixed-replace body (Content-Length or SOI/EOI framed)."""
+    stream = _StreamBuffer(stream)
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        line = line.strip()
+        if not line or line.startswith(b'--'):
+            continue
+        headers = {}
+        while line:
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip()
+            line = stream.readline().strip()
+        length = headers.get(b'content-length')
+        if length:
+            frame = stream.read(int(length))
+            if len(frame) < int(length):
+                return
+        else:
+            frame = _read_until_eoi(stream)
+            if frame is None:
+                return
+        yield frame
+
+
+def _read_until_eoi(stream):
+    data = stream.read_until(EOI)
+    if data is None:
+        return None
+    return data[max(0, data.find(SOI)):]
+
+
+class Clip:
+    """Frames recorded for one test, appended straight to disk."""
+
+    def __init__(self, test, directory):
+        self.test = test
+        self.path = os.path.join(directory, _safe_name(test) + '.mjpeg')
+        self.file = open(self.path, 'wb')
+        self.started = time.monotonic()
+        self.index = []
+        self.last_by_step = {}
+        self.bytes = 0
+
+    def add(self, frame, step):
+        self.index.append({
+            'offset': self.bytes,
+            'length': len(frame),
+            'time': round(time.monotonic() - self.started, 3),
+            'step': step,
+        })
+        self.file.write(frame)
+        self.bytes += len(frame)
+        self.last_by_step[step] = frame
+
+    def close(self, outcome=None):
+        self.file.close()
+        index_path = self.path[:-len('.mjpeg')] + '.json'
+        with open(index_path, 'w') as f:
+            json.dump({'test': self.test, 'outcome': outcome, 'frames': self.index}, f, indent=2)
+        return index_path
+
+
+def contact_sheet(frames, path, columns=4, width=180):
+    """Tile (label, jpeg) frames into one captioned JPEG; returns path, or None without Pillow."""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return None
+    tiles = []
+    for label, frame in frames:
+        try:
+            image = Image.open(io.BytesIO(frame)).convert('RGB')
+        except Exception:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        tiles.append((label, image.resize((width, height))))
+    if not tiles:
+        return None
+    caption = 16
+    cell = max(image.height for _, image in tiles) + caption
+    rows = (len(tiles) + columns - 1) // columns
+    sheet = Image.new('RGB', (columns * width, rows * cell), 'white')
+    draw = ImageDraw.Draw(sheet)
+    for i, (label, image) in enumerate(tiles):
+        x, y = (i % columns) * width, (i // columns) * cell
+        sheet.paste(image, (x, y + caption))
+        draw.text((x + 2, y + 2), (label or '-')[:28], fill='black')
+    sheet.save(path, 'JPEG', quality=70)
+    return path
+
+
+class MjpegRecorder:
+    """Samples a device's MJPEG stream at `fps` and writes one clip per test."""
+
+    def __init__(self, url, fps=2.0, directory=None, sheets=True, reconnect_delay=1.0, timeout=10):
+        self.url = url
+        self.interval = 1.0 / fps if fps else 0.0
+        self.directory = directory
+        self.sheets = sheets
+        self.reconnect_delay = reconnect_delay
+        self.timeout = timeout
+        self.received = 0
+        self.sampled = 0
+        self.bytes_written = 0
+        self.clips = []
+        self.errors = 0
+        self._clip = None
+        self._last_sample = 0.0
+        self._last_step = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._response = None
+        self._thread = None
+
+    def start(self):
+        self.directory = self.directory or run_directory('video')
+        os.makedirs(self.directory, exist_ok=True)
+        steps.add_listener(self)
+        if steps.current_test() is not None:
+            self._open(steps.current_test())
+        self._thread = threading.Thread(target=self._run, name="mjpeg-reader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        steps.remove_listener(self)
+        response = self._response
+        if response is not None:
+            # Unblocks the reader thread's pending read.
+            try:
+                response.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout)
+        self._close(None)
+
+    def __call__(self, event, data):
+        if event == 'test_start':
+            self._open(data['test'])
+        elif event == 'test_end':
+            self._close(data.get('outcome'))
+
+    def _open(self, test):
+        with self._lock:
+            if self._clip is not None:
+                self._finish(self._clip, None)
+            self._clip = Clip(test, self.directory)
+            self._last_step = None
+
+    def _close(self, outcome):
+        with self._lock:
+            clip, self._clip = self._clip, None
+            if clip is not None:
+                self._finish(clip, outcome)
+
+    def _finish(self, clip, outcome):
+        clip.close(outcome)
+        self.bytes_written += clip.bytes
+        sheet = None
+        if self.sheets and clip.last_by_step:
+            sheet = contact_sheet(list(clip.last_by_step.items()), clip.path[:-len('.mjpeg')] + '_sheet.jpg')
+        self.clips.append(clip.path)
+        steps.notify('clip', test=clip.test, path=clip.path, frames=len(clip.index), sheet=sheet)
+
+    def offer(self, frame):
+        """Keep frame if the sampling interval has passed or the step changed since the last kept one."""
+        self.received += 1
+        now = time.monotonic()
+        step = steps.current_step()
+        with self._lock:
+            clip = self._clip
+            if clip is None:
+                return False
+            if step == self._last_step and now - self._last_sample < self.interval:
+                return False
+            self._last_sample, self._last_step = now, step
+            clip.add(frame, step)
+            self.sampled += 1
+        return True
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._response = urllib.request.urlopen(self.url, timeout=self.timeout)
+                with self._response:
+                    for frame in read_frames(self._response):
+                        if self._stopping.is_set():
+                            return
+                        self.offer(frame)
+            except Exception as e:
+                if self._stopping.is_set():
+                    return
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"⚠️ MJPEG stream {self.url} unavailable ({e}); retrying")
+            self._stopping.wait(self.reconnect_delay)
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'frames_received': self.received,
+            'frames_sampled': self.sampled,
+            'clips': len(self.clips),
+            'bytes_written': self.bytes_written,
+            'errors': self.errors,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"🎞️ MJPEG {s['url']}: {s['frames_sampled']}/{s['frames_received']} frames kept in "
+                f"{s['clips']} clip(s) ({s['bytes_written'] / 1024:.0f} KiB) -> {self.directory}")
+
+
+def server_host(driver):
+    """Host of the Appium server a driver talks to, or 127.0.0.1 when it can't be told."""
+    executor = getattr(driver, 'command_executor', None)
+    url = getattr(getattr(executor, '_client_config', None), 'remote_server_addr', None)
+    # async_driver.SyncDriver keeps the URL on the wrapped AsyncWebDriver
+    url = url or getattr(getattr(driver, '_driver', None), 'url', None)
+    return (urlsplit(url).hostname if url else None) or '127.0.0.1'
+
+
+def mjpeg_url(driver):
+    """$MJPEG_URL, or the session's mjpegServerPort, which Appium forwards to its own host."""
+    if os.getenv('MJPEG_URL'):
+        return os.getenv('MJPEG_URL')
+    capabilities = driver.capabilities
+    port = capabilities.get('mjpegServerPort') or capabilities.get('appium:mjpegServerPort')
+    if not port:
+        platform = str(capabilities.get('platformName', '')).lower()
+        port = DEFAULT_PORTS.get(platform, DEFAULT_PORTS['ios'])
+    return f'http://{server_host(driver)}:{port}/'
+
+
+_recorders = {}
+
+
+def start_mjpeg_capture(driver):
+    """Start (or reuse) the recorder for this driver's stream when $MJPEG_CAPTURE is set; else None."""
+    if os.getenv('MJPEG_CAPTURE', '0').lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    url = mjpeg_url(driver)
+    if url not in _recorders:
+        _recorders[url] = MjpegRecorder(url, fps=float(os.getenv('MJPEG_FPS', '2'))).start()
+    return _recorders[url]
+
+
+def shutdown_mjpeg_recorders():
+    """Stop every recorder started in this process and return them for reporting."""
+    recorders = list(_recorders.values())
+    _recorders.clear()
+    for recorder in recorders:
+        recorder.stop()
+    return recorders
@@ -0,0 +1,341 @@
+"""
+Concurrent preflight and device-health prober.
+
+Probes everything a run needs at once with asyncio instead of one shell check
+after another: every Appium server's /status, the installed Appium drivers
+(`appium driver list --installed --json`), and the device listings
+(`idevice_id -l`, `adb devices`). The result is a health report
+per inventory device, cached in $PREFLIGHT_CACHE (default
+artifacts/preflight.json) for $PREFLIGHT_TTL seconds (default 300), so the
+scheduler and the test fixtures of every worker skip dead devices right away
+instead of waiting for a 180 s session start to fail:
+
+    PYTHONPATH=src python -m liveboard_test.preflight            # probe (or reuse a fresh report)
+    PYTHONPATH=src python -m liveboard_test.preflight --force --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+from .scheduler import load_inventory
+
+
+DEFAULT_TTL = 300.0
+
+# Appium 2 serves /status at the root unless started with --base-path /wd/hub like ours.
+BASE_PATHS = ('/wd/hub', '')
+
+REQUIRED_DRIVERS = {'ios': 'xcuitest', 'android': 'uiautomator2'}
+
+# Listings that name devices by UDID: `xcrun devicectl list devices` shows CoreDevice identifiers instead.
+LISTING_COMMANDS = {
+    'ios': ('idevice_id', '-l'),
+    'android': ('adb', 'devices'),
+}
+
+# Words in a device listing line that mean the device can't take a session.
+BAD_STATES = ('unavailable', 'disconnected', 'offline', 'unauthorized', 'no permissions')
+
+_DRIVER_LINE = re.compile(r'^\W*([A-Za-z0-9_-]+)@\S+.*installed', re.MULTILINE)
+
+
+def default_cache_path():
+    """$PREFLIGHT_CACHE or artifacts/preflight.json (shared by the runner and its workers)."""
+    return os.getenv('PREFLIGHT_CACHE') or os.path.join(os.getenv('ARTIFACTS_DIR', 'artifacts'), 'preflight.json')
+
+
+def default_ttl():
+    return float(os.getenv('PREFLIGHT_TTL', DEFAULT_TTL))
+
+
+class Check:
+    """Outcome of one probe."""
+
+    def __init__(self, name, ok, detail='', seconds=0.0, data=None):
+        self.name = name
+        self.ok = ok
+        self.detail = detail
+        self.seconds = seconds
+        self.data = data or {}
+
+    def to_dict(self):
+        return {'name': self.name, 'ok': self.ok, 'detail': self.detail,
+                'seconds': round(self.seconds, 3), 'data': self.data}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['ok'], data.get('detail', ''), data.get('seconds', 0.0), data.get('data'))
+
+
+async def http_json(host, port, path, timeout):
+    """(status, parsed JSON body) of a plain HTTP GET, without leaving the event loop."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\nAccept: application/json\r\n\r\n".encode())
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    try:
+        return status, json.loads(body) if body.strip() else None
+    except ValueError:
+        return status, None
+
+
+async def run_command(argv, timeout):
+    """(returncode, combined output) of a command; returncode None if it is missing or hung."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    except (FileNotFoundError, PermissionError) as e:
+        return None, str(e)
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None, f"{argv[0]} did not answer within {timeout}s"
+    return process.returncode, output.decode(errors='replace')
+
+
+def installed_drivers(output):
+    """Driver names from `appium driver list --installed` (--json or text output)."""
+    start = output.find('{')
+    if start >= 0:
+        try:
+            data = json.loads(output[start:])
+            return sorted(name for name, info in data.items() if not isinstance(info, dict) or info.get('installed', True))
+        except ValueError:
+            pass
+    return sorted(set(_DRIVER_LINE.findall(output)))
+
+
+def listing_line(listing, udid):
+    """The line of a device listing that mentions udid, or None."""
+    for line in listing.splitlines():
+        if udid.lower() in line.lower():
+            return line.strip()
+    return None
+
+
+class HealthReport:
+    """Checks plus a healthy/unhealthy verdict per inventory device."""
+
+    def __init__(self, checks, devices, generated=None, duration=0.0):
+        self.checks = checks
+        self.devices = devices
+        self.generated = generated or time.time()
+        self.duration = duration
+
+    def age(self, now=None):
+        return (now or time.time()) - self.generated
+
+    def covers(self, devices):
+        """Every device was probed on the Appium port it uses now (managed servers move between runs)."""
+        return all(self.devices.get(d.name, {}).get('appium_port') == d.appium_port for d in devices)
+
+    def healthy(self, devices):
+        """The inventory devices the report found healthy (unknown devices are kept)."""
+        return [d for d in devices if self.devices.get(d.name, {}).get('healthy', True)]
+
+    def find(self, platform, port=None, udid=None):
+        for entry in self.devices.values():
+            if entry['platform'] != platform:
+                continue
+            if (port is None or entry['appium_port'] == int(port)) and (udid is None or entry['udid'] == udid):
+                return entry
+        return None
+
+    def to_dict(self):
+        return {
+            'generated': self.generated,
+            'duration_seconds': round(self.duration, 3),
+            'checks': [c.to_dict() for c in self.checks],
+            'devices': self.devices,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([Check.from_dict(c) for c in data.get('checks', [])], data.get('devices', {}),
+                   data.get('generated'), data.get('duration_seconds', 0.0))
+
+    def save(self, path=None):
+        path = path or default_cache_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or default_cache_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except ValueError:
+            return None
+
+    def format(self):
+        lines = [f"🩺 Preflight ({self.duration:.2f}s, {self.age():.0f}s old)"]
+        for check in self.checks:
+            lines.append(f"   {'✅' if check.ok else '❌'} {check.name:<16} {check.seconds:6.2f}s  {check.detail}")
+        for name, entry in self.devices.items():
+            verdict = "healthy" if entry['healthy'] else "UNHEALTHY: " + "; ".join(entry['reasons'])
+            lines.append(f"   📱 {name} ({entry['platform']}, :{entry['appium_port']}) {verdict}")
+        return "\n".join(lines)
+
+
+class HealthProber:
+    """Runs every probe for a device inventory concurrently."""
+
+    def __init__(self, devices, timeout=5.0, host='127.0.0.1'):
+        self.devices = list(devices)
+        self.timeout = timeout
+        self.host = host
+
+    def run(self):
+        return asyncio.run(self.probe())
+
+    async def probe(self):
+        start = time.monotonic()
+        platforms = sorted({d.platform for d in self.devices})
+        probes = [self._appium_status(port) for port in sorted({d.appium_port for d in self.devices})]
+        probes.append(self._drivers(platforms))
+        probes.extend(self._listing(platform) for platform in platforms if platform in LISTING_COMMANDS)
+        checks = list(await asyncio.gather(*probes))
+        return HealthReport(checks, self._verdicts(checks), duration=time.monotonic() - start)
+
+    async def _timed(self, name, probe):
+        start = time.monotonic()
+        try:
+            ok, detail, data = await probe
+        except Exception as e:
+            ok, detail, data = False, f"{type(e).__name__}: {e}", None
+        return Check(name, ok, detail, time.monotonic() - start, data)
+
+    def _appium_status(self, port):
+        async def probe():
+            for base in BASE_PATHS:
+                status, body = await http_json(self.host, port, base + '/status', self.timeout)
+                if status == 200 and isinstance(body, dict):
+                    value = body.get('value') or {}
+                    ready = value.get('ready', True)
+                    version = (value.get('build') or {}).get('version', '?')
+                    return ready, f"ready (Appium {version}) at {base or '/'}" if ready else "not ready", None
+            return False, f"no /status (HTTP {status})", None
+        return self._timed(f"appium:{port}", probe())
+
+    def _drivers(self, platforms):
+        async def probe():
+            returncode, output = await run_command(('appium', 'driver', 'list', '--installed', '--json'),
+                                                   self.timeout * 2)
+            if returncode is None:
+                return False, output, {'installed': []}
+            installed = installed_drivers(output)
+            missing = [REQUIRED_DRIVERS[p] for p in platforms if REQUIRED_DRIVERS.get(p) not in installed]
+            detail = ", ".join(installed) or "none installed"
+            return not missing, detail + (f" (missing {', '.join(missing)})" if missing else ""), \
+                {'installed': installed}
+        return self._timed("appium drivers", probe())
+
+    def _listing(self, platform):
+        async def probe():
+            returncode, output = await run_command(LISTING_COMMANDS[platform], self.timeout)
+            if returncode != 0:
+                return False, output.strip().splitlines()[-1] if output.strip() else "failed", {'listing': ''}
+            return True, f"{len(output.strip().splitlines())} line(s)", {'listing': output}
+        return self._timed(f"{platform} devices", probe())
+
+    def _verdicts(self, checks):
+        by_name = {c.name: c for c in checks}
+        drivers = by_name.get("appium drivers")
+        devices = {}
+        for device in self.devices:
+            reasons = []
+            server = by_name.get(f"appium:{device.appium_port}")
+            if server is None or not server.ok:
+                reasons.append(f"Appium on :{device.appium_port} {server.detail if server else 'not probed'}")
+            driver = REQUIRED_DRIVERS.get(device.platform)
+            if driver and (drivers is None or driver not in drivers.data.get('installed', [])):
+                reasons.append(f"Appium driver {driver} not installed")
+            listing = by_name.get(f"{device.platform} devices")
+            if listing is not None:
+                line = listing_line(listing.data.get('listing', ''), device.udid) if listing.ok else None
+                if not listing.ok:
+                    reasons.append(f"cannot list {device.platform} devices: {listing.detail}")
+                elif line is None:
+                    reasons.append(f"{device.udid} not connected")
+                elif any(state in line.lower() for state in BAD_STATES):
+                    reasons.append(f"{device.udid} is {line.split(None, 1)[-1]}")
+            devices[device.name] = {
+                'platform': device.platform,
+                'udid': device.udid,
+                'appium_port': device.appium_port,
+                'healthy': not reasons,
+                'reasons': reasons,
+            }
+        return devices
+
+
+def get_health_report(devices=None, ttl=None, path=None, force=False, timeout=5.0):
+    """A cached report younger than ttl covering the inventory, or a freshly probed (and cached) one."""
+    devices = load_inventory() if devices is None else devices
+    ttl = default_ttl() if ttl is None else ttl
+    if not force:
+        cached = HealthReport.load(path)
+        if cached is not None and cached.age() < ttl and cached.covers(devices):
+            return cached
+    report = HealthProber(devices, timeout).run()
+    report.save(path)
+    return report
+
+
+def unhealthy_reason(platform, port, udid=None, path=None, ttl=None):
+    """Why the device on this Appium port is known to be dead, from a fresh cached report; else None.
+
+    Never probes, so fixtures can call it before every session.
+    """
+    if os.getenv('PREFLIGHT') == 'off':
+        return None
+    report = HealthReport.load(path)
+    if report is None or report.age() >= (default_ttl() if ttl is None else ttl):
+        return None
+    entry = report.find(platform, port, udid)
+    if entry is None or entry['healthy']:
+        return None
+    return f"{platform} device on :{port} failed preflight: " + "; ".join(entry['reasons'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Probe Appium servers, drivers and devices concurrently")
+    parser.add_argument('--inventory', default=None, help="Device inventory JSON (default: $DEVICE_INVENTORY)")
+    parser.add_argument('--cache', default=None, help="Report file (default: $PREFLIGHT_CACHE or artifacts/preflight.json)")
+    parser.add_argument('--ttl', type=float, default=None, help="Reuse a cached report younger than this many seconds")
+    parser.add_argument('--force', action='store_true', help="Probe even if a fresh report is cached")
+    parser.add_argument('--timeout', type=float, default=5.0, help="Per-probe timeout in seconds")
+    parser.add_argument('--require', choices=('any', 'all'), default='any',
+                        help="Exit 1 unless any / all devices are healthy")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    devices = load_inventory(args.inventory)
+    report = get_health_report(devices, args.ttl, args.cache, args.force, args.timeout)
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format())
+    healthy = report.healthy(devices)
+    ok = len(healthy) == len(devices) if args.require == 'all' else bool(healthy)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Flaky-test quarantine.
+
+A test that only passed because FlowRunner retried one of its steps is flaky.
+QuarantineTracker records it in a local quarantine file ($QUARANTINE_FILE,
+default artifacts/quarantine.json, kept across runs like the timing history).
+Quarantined tests run in a lower-priority lane after everything else (the
+device pool scheduler, or the end of a plain pytest run) and their failures
+don't fail the run. A test leaves quarantine after $QUARANTINE_RELEASE_AFTER
+(default 3) consecutive passes without a retry. It also leaves it, and fails
+the run again, when it breaks for real: a failure without any step retry, or
+$QUARANTINE_FAIL_AFTER (default 3) failures in a row.
+
+    PYTHONPATH=src python -m liveboard_test.quarantine list
+    PYTHONPATH=src python -m liveboard_test.quarantine release "tests/test_login_android_compose.py::TestAndroidLogin::test_android_login_flow"
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import sys
+import time
+
+from . import steps
+from .artifacts import recording_enabled
+
+
+def default_quarantine_path():
+    """$QUARANTINE_FILE or artifacts/quarantine.json (kept across runs, unlike the per-run directory)."""
+    return os.getenv('QUARANTINE_FILE') or os.path.join(os.getenv('ARTIFACTS_DIR', 'artifacts'), 'quarantine.json')
+
+
+class Quarantine:
+    """The quarantine file: {nodeid: {'since', 'reason', 'flaky_runs', 'clean_passes', 'failures'}}."""
+
+    def __init__(self, path=None, release_after=3, fail_after=3):
+        self.path = path or default_quarantine_path()
+        self.release_after = release_after
+        self.fail_after = fail_after
+        self.entries = self._read()
+
+    def __contains__(self, nodeid):
+        return nodeid in self.entries
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            text = f.read()
+        return json.loads(text).get('tests', {}) if text.strip() else {}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Re-read, let the caller change and write back the file; parallel workers share it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.entries = self._read()
+            yield self.entries
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({'tests': self.entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def record(self, nodeid, outcome, retried=()):
+        """Update a test's entry after a run; returns 'quarantined', 'released', 'failing' or None.
+
+        'failing' means the test broke for real and left quarantine, so its failure counts again.
+        """
+        if outcome == 'passed' and retried:
+            step, error = retried[0]
+            with self._locked() as entries:
+                entry = entries.setdefault(nodeid, {'since': time.time(), 'flaky_runs': 0})
+                entry['flaky_runs'] += 1
+                entry['clean_passes'] = 0
+                entry['failures'] = 0
+                entry['reason'] = f"passed after retrying {step or 'a step'} ({error})"
+            return 'quarantined'
+        if nodeid not in self.entries:
+            return None
+        with self._locked() as entries:
+            entry = entries.get(nodeid)
+            if entry is None:
+                return None
+            if outcome == 'failed':
+                entry['clean_passes'] = 0
+                entry['failures'] = entry.get('failures', 0) + 1
+                # No retry involved means nothing flaky about it; a retried step that keeps failing is broken too
+                if not retried or entry['failures'] >= self.fail_after:
+                    del entries[nodeid]
+                    return 'failing'
+                return None
+            entry['failures'] = 0
+            entry['clean_passes'] = entry.get('clean_passes', 0) + 1 if outcome == 'passed' else 0
+            if entry['clean_passes'] >= self.release_after:
+                del entries[nodeid]
+                return 'released'
+        return None
+
+    def release(self, nodeid):
+        with self._locked() as entries:
+            return entries.pop(nodeid, None) is not None
+
+    def split(self, items):
+        """(critical, quarantined) keeping the original order within each lane."""
+        critical = [item for item in items if item not in self.entries]
+        return critical, [item for item in items if item in self.entries]
+
+
+class QuarantineTracker:
+    """Step listener that quarantines tests which only passed thanks to a step retry."""
+
+    def __init__(self, quarantine):
+        self.quarantine = quarantine
+        self._retried = []
+
+    def __call__(self, event, data):
+        if event == 'test_start':
+            self._retried = []
+        elif event == 'retry':
+            self._retried.append((data.get('step'), data.get('error')))
+        elif event == 'test_end':
+            change = self.quarantine.record(data['test'], data.get('outcome'), self._retried)
+            if change == 'quarantined':
+                print(f"🚧 {data['test']} passed only after a retry - quarantined in {self.quarantine.path}")
+            elif change == 'released':
+                print(f"✅ {data['test']} passed {self.quarantine.release_after} times in a row - released")
+            elif change == 'failing':
+                print(f"❌ {data['test']} failed for real - out of quarantine, its failures count again")
+            self._retried = []
+
+    def close(self):
+        steps.remove_listener(self)
+
+
+def install_quarantine_tracker(path=None):
+    """Track flaky tests of a device run; $QUARANTINE_FILE=off disables it."""
+    if os.getenv('QUARANTINE_FILE') == 'off' or not recording_enabled():
+        return None
+    tracker = QuarantineTracker(Quarantine(path, int(os.getenv('QUARANTINE_RELEASE_AFTER', '3')),
+                                           int(os.getenv('QUARANTINE_FAIL_AFTER', '3'))))
+    steps.add_listener(tracker)
+    return tracker
+
+
+def load_quarantine(path=None):
+    """The current quarantine, or an empty one when $QUARANTINE_FILE=off."""
+    if os.getenv('QUARANTINE_FILE') == 'off':
+        return Quarantine(os.devnull)
+    return Quarantine(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or edit the flaky-test quarantine")
+    parser.add_argument('--file', default=None, help="Quarantine file (default: $QUARANTINE_FILE or artifacts/quarantine.json)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Show quarantined tests")
+    release = commands.add_parser('release', help="Take a test out of quarantine")
+    release.add_argument('nodeid')
+
+    args = parser.parse_args(argv)
+    quarantine = Quarantine(args.file)
+    if args.command == 'release':
+        if not quarantine.release(args.nodeid):
+            print(f"⚠️ {args.nodeid} is not quarantined")
+            return 1
+        print(f"✅ Released {args.nodeid}")
+        return 0
+    for nodeid, entry in sorted(quarantine.entries.items()):
+        since = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['since']))
+        print(f"🚧 {nodeid}\n   since {since} | {entry['flaky_runs']} flaky run(s) | "
+              f"{entry.get('clean_passes', 0)} clean pass(es) | {entry.get('failures', 0)} failure(s) in a row | "
+              f"{entry.get('reason', '-')}")
+    print(f"{len(quarantine.entries)} quarantined test(s) in {quarantine.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
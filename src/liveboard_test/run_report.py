@@ -0,0 +1,342 @@
+"""
+Consolidated run report: a JSON index and one static HTML page per run.
+
+RunReport consumes test events as they arrive: the worker events of the
+parallel runner (events.py), or the step events of a plain pytest run.
+Only the tests still running are kept in memory. When a test is done, its
+record is appended as one line to artifacts/<RUN_ID>/report/tests.jsonl.
+The record holds the steps with start and duration, screenshots, screens,
+retries, visual checks, the failure, device log slices, the clip and the
+worker log.
+
+render_html() streams that index into report/index.html: a summary per
+device, links to the failures, then one section per test with its
+timeline. Screenshots are linked by relative path and loaded lazily by the
+browser, never read here, so rendering is linear in the number of events
+whatever the size of the run.
+
+    PYTHONPATH=src python -m liveboard_test.run_report artifacts/<RUN_ID>/report/tests.jsonl
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from html import escape
+
+from . import steps
+from .artifacts import recording_enabled, run_directory
+from .events import EVENT_FD_ENV, MAX_MESSAGE
+from .scheduler import item_platform
+
+
+ICONS = {'passed': '✅', 'failed': '❌', 'skipped': '⏭️'}
+
+# Events drawn as marks on a test's timeline, with the field used as their label.
+MARKS = {'screen': 'screen', 'retry': 'step', 'visual': 'name'}
+
+STYLE = """
+body { font: 14px -apple-system, Segoe UI, sans-serif; margin: 24px; color: #222; }
+table { border-collapse: collapse; margin: 8px 0; }
+td, th { border: 1px solid #ddd; padding: 3px 8px; text-align: left; }
+th { background: #f4f4f4; }
+section { border: 1px solid #ddd; border-radius: 6px; margin: 8px 0; }
+section.failed { border-color: #d33; }
+summary { padding: 6px 10px; cursor: pointer; }
+.body { padding: 0 12px 12px; }
+.timeline { position: relative; height: 22px; background: #f4f4f4; margin: 8px 0; }
+.timeline span { position: absolute; top: 0; height: 22px; overflow: hidden; font-size: 11px;
+                 white-space: nowrap; border-right: 1px solid #fff; }
+.s0 { background: #9cc3e6; } .s1 { background: #a8d8a8; } .s2 { background: #f3c98b; }
+.s3 { background: #c9b3e6; } .s4 { background: #e6b3c9; } .s5 { background: #b3e0e6; }
+.timeline i { position: absolute; top: -3px; width: 2px; height: 28px; background: #555; }
+.timeline i.failure { background: #d33; } .timeline i.screenshot { background: #333; height: 6px; }
+pre { background: #fff3f3; padding: 8px; white-space: pre-wrap; }
+img { width: 120px; margin: 4px; border: 1px solid #ccc; vertical-align: top; }
+"""
+
+
+def _seconds(value):
+    return f"{value:.2f}s" if isinstance(value, (int, float)) else "-"
+
+
+class RunReport:
+    """Builds tests.jsonl from events as they arrive and renders it to index.html."""
+
+    def __init__(self, directory=None, title='Liveboard mobile run'):
+        self.directory = directory or run_directory('report')
+        os.makedirs(self.directory, exist_ok=True)
+        self.title = title
+        self.index_path = os.path.join(self.directory, 'tests.jsonl')
+        self.html_path = os.path.join(self.directory, 'index.html')
+        self.events = 0
+        self.written = 0
+        self._running = {}  # (worker, test) -> record of a test in progress
+        self._finished = {}  # worker -> ended record still collecting its clip / logs
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self._handle(event)
+
+    def _handle(self, event):
+        self.events += 1
+        kind = event.get('event')
+        worker, test = event.get('worker'), event.get('test')
+        now = event['time'] if event.get('time') is not None else time.time()
+        if kind == 'test_start':
+            self._flush(worker)
+            self._running[(worker, test)] = {
+                'test': test, 'worker': worker, 'device': worker or item_platform(test or ''),
+                'started': now, 'outcome': None, 'duration': None, 'message': None, 'failure': None,
+                'steps': [], 'screenshots': [], 'marks': [], 'logs': [], 'clip': None, 'log': None,
+            }
+            return
+        if kind == 'worker_exit':
+            crashed = self._running.pop((worker, test), None)
+            if crashed is not None:
+                # The worker died before reporting the end of its test
+                self._flush(worker)
+                crashed.update(outcome='failed', duration=round(now - crashed['started'], 3),
+                               message=f"worker exited with {event.get('returncode')}")
+                self._finished[worker] = crashed
+            record = self._finished.get(worker)
+            if record is not None and record['test'] == test:
+                record['log'] = event.get('log')
+            self._flush(worker)
+            return
+        record = self._running.get((worker, test))
+        if kind in ('clip', 'device_log') and record is None:
+            # Written by recorders when the test ends, so usually after test_end
+            record = self._finished.get(worker)
+            if record is None or record['test'] != test:
+                return
+        if record is None:
+            return
+        at = round(now - record['started'], 3)
+        if kind == 'step':
+            record['steps'].append({'name': event.get('step'), 'start': at, 'duration': None})
+        elif kind == 'step_end':
+            for step in reversed(record['steps']):
+                if step['name'] == event.get('step') and step['duration'] is None:
+                    step['duration'] = round(event.get('duration') or 0.0, 3)
+                    break
+        elif kind == 'screenshot':
+            record['screenshots'].append({'path': event.get('path'), 'at': at, 'step': event.get('step')})
+        elif kind in MARKS:
+            label = event.get(MARKS[kind])
+            if kind == 'retry':
+                label = f"retry {label} ({event.get('error')})"
+            elif kind == 'visual':
+                label = f"{label}: {event.get('status')}"
+            record['marks'].append({'kind': kind, 'at': at, 'label': label})
+        elif kind == 'failure':
+            if record['failure'] is None:
+                record['failure'] = {'at': at, 'when': event.get('when'),
+                                     'message': (event.get('message') or '')[:MAX_MESSAGE]}
+        elif kind == 'device_log':
+            record['logs'].append({'type': event.get('type'), 'path': event.get('path'), 'lines': event.get('lines')})
+        elif kind == 'clip':
+            record['clip'] = {'path': event.get('path'), 'sheet': event.get('sheet')}
+        elif kind == 'test_end':
+            del self._running[(worker, test)]
+            record['outcome'] = event.get('outcome')
+            record['duration'] = event.get('duration') if event.get('duration') is not None else at
+            record['message'] = (event.get('message') or '')[:MAX_MESSAGE] or None
+            self._flush(worker)
+            self._finished[worker] = record
+
+    def _flush(self, worker):
+        record = self._finished.pop(worker, None)
+        if record is not None:
+            self._index.write(json.dumps(record, default=str) + "\n")
+            self._index.flush()
+            self.written += 1
+
+    def step_listener(self, worker=None):
+        """A steps listener feeding this report the events of the current process."""
+        def listener(event, data):
+            record = {'event': event, 'time': time.time(), 'worker': worker}
+            record.update(data)
+            self(record)
+        return listener
+
+    def close(self):
+        """Write the tests still waiting for attachments, then render index.html; returns its path."""
+        if self._listener is not None:
+            steps.remove_listener(self._listener)
+            self._listener = None
+        with self._lock:
+            for worker in list(self._finished):
+                self._flush(worker)
+            for record in self._running.values():
+                self._finished[record['worker']] = record
+                self._flush(record['worker'])
+            self._running.clear()
+            self._index.close()
+        return render_html(self.index_path, self.html_path, self.title)
+
+    def format(self):
+        return f"🧾 Run report: {self.written} test(s) from {self.events} events -> {self.html_path}"
+
+
+def read_index(path):
+    """Yield the test records of a tests.jsonl index, skipping torn lines."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def summarize(path):
+    """One pass over the index: totals per device and the failed tests, in order."""
+    devices, failures = {}, []
+    for i, record in enumerate(read_index(path)):
+        device = devices.setdefault(record.get('device') or '-',
+                                    {'tests': 0, 'passed': 0, 'failed': 0, 'skipped': 0, 'duration': 0.0})
+        device['tests'] += 1
+        if record.get('outcome') in device:
+            device[record['outcome']] += 1
+        device['duration'] += record.get('duration') or 0.0
+        if record.get('outcome') == 'failed':
+            failures.append((i, record.get('test'), record.get('device')))
+    return devices, failures
+
+
+def _link(path, base):
+    """Artifact paths in events are relative to the working directory; links are relative to the page."""
+    return escape(os.path.relpath(os.path.abspath(path), base), quote=True)
+
+
+def render_test(i, record, base):
+    """HTML section for one test record."""
+    outcome = record.get('outcome') or 'unknown'
+    total = max(record.get('duration') or 0.0, 0.001)
+    for step in record['steps']:
+        total = max(total, step['start'] + (step['duration'] or 0.0))
+    out = [
+        f'<section id="t{i}" class="{escape(outcome)}"><details{" open" if outcome == "failed" else ""}>',
+        f'<summary>{ICONS.get(outcome, "❔")} <b>{escape(record.get("test") or "")}</b> '
+        f'on {escape(record.get("device") or "-")} ({_seconds(record.get("duration"))})</summary><div class="body">',
+        '<div class="timeline">',
+    ]
+    for n, step in enumerate(record['steps']):
+        width = max((step['duration'] or 0.0) / total * 100, 0.5)
+        out.append(f'<span class="s{n % 6}" style="left:{step["start"] / total * 100:.2f}%;width:{width:.2f}%" '
+                   f'title="{escape(step["name"] or "", quote=True)} ({_seconds(step["duration"])})">'
+                   f'{escape(step["name"] or "")}</span>')
+    for shot in record['screenshots']:
+        out.append(f'<i class="screenshot" style="left:{shot["at"] / total * 100:.2f}%" '
+                   f'title="{escape(os.path.basename(shot["path"] or ""), quote=True)}"></i>')
+    for mark in record['marks']:
+        out.append(f'<i class="{escape(mark["kind"])}" style="left:{mark["at"] / total * 100:.2f}%" '
+                   f'title="{escape(str(mark["label"]), quote=True)}"></i>')
+    failure = record.get('failure')
+    if failure:
+        out.append(f'<i class="failure" style="left:{min(failure["at"] / total, 1) * 100:.2f}%" '
+                   f'title="failed in {escape(str(failure["when"]), quote=True)}"></i>')
+    out.append('</div>')
+    if record['steps']:
+        out.append('<table><tr><th>step</th><th>start</th><th>duration</th></tr>')
+        for step in record['steps']:
+            out.append(f'<tr><td>{escape(step["name"] or "")}</td><td>{_seconds(step["start"])}</td>'
+                       f'<td>{_seconds(step["duration"])}</td></tr>')
+        out.append('</table>')
+    message = record.get('message') or (failure or {}).get('message')
+    if outcome == 'failed' and message:
+        out.append(f'<pre>{escape(message)}</pre>')
+    links = [(f"{log['type']} log ({log['lines']} lines)", log['path']) for log in record['logs']]
+    if record.get('clip'):
+        links.append(('screen recording', record['clip']['path']))
+        if record['clip'].get('sheet'):
+            links.append(('contact sheet', record['clip']['sheet']))
+    if record.get('log'):
+        links.append(('worker log', record['log']))
+    if links:
+        out.append('<p>' + ' · '.join(f'<a href="{_link(path, base)}">{escape(label)}</a>'
+                                      for label, path in links if path) + '</p>')
+    # Dropped duplicates were announced but never written
+    shots = [shot for shot in record['screenshots'] if shot.get('path') and os.path.exists(shot['path'])]
+    if shots:
+        out.append('<p>')
+        for shot in shots:
+            href = _link(shot['path'], base)
+            out.append(f'<a href="{href}"><img loading="lazy" src="{href}" '
+                       f'title="{escape(shot.get("step") or "", quote=True)}"></a>')
+        out.append('</p>')
+    out.append('</div></details></section>')
+    return "\n".join(out)
+
+
+def render_html(index_path, html_path=None, title='Liveboard mobile run'):
+    """Render a tests.jsonl index to static HTML in two streaming passes; returns the HTML path."""
+    html_path = html_path or os.path.join(os.path.dirname(index_path), 'index.html')
+    base = os.path.dirname(os.path.abspath(html_path))
+    devices, failures = summarize(index_path)
+    totals = {key: sum(d[key] for d in devices.values()) for key in ('tests', 'passed', 'failed', 'skipped')}
+    with open(html_path, 'w', encoding='utf-8') as out:
+        out.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{escape(title)}</title>'
+                  f'<style>{STYLE}</style></head><body>\n<h1>{escape(title)}</h1>\n')
+        out.write(f'<p>{totals["tests"]} tests: {totals["passed"]} passed, {totals["failed"]} failed, '
+                  f'{totals["skipped"]} skipped on {len(devices)} device(s)</p>\n')
+        out.write('<table><tr><th>device</th><th>tests</th><th>passed</th><th>failed</th><th>skipped</th>'
+                  '<th>time</th></tr>\n')
+        for name, d in sorted(devices.items()):
+            out.write(f'<tr><td>{escape(name)}</td><td>{d["tests"]}</td><td>{d["passed"]}</td>'
+                      f'<td>{d["failed"]}</td><td>{d["skipped"]}</td><td>{_seconds(d["duration"])}</td></tr>\n')
+        out.write('</table>\n')
+        if failures:
+            out.write('<h2>Failures</h2>\n<ul>\n')
+            for i, test, device in failures:
+                out.write(f'<li><a href="#t{i}">{escape(test or "")}</a> on {escape(device or "-")}</li>\n')
+            out.write('</ul>\n')
+        out.write('<h2>Tests</h2>\n')
+        for i, record in enumerate(read_index(index_path)):
+            out.write(render_test(i, record, base) + "\n")
+        out.write('</body></html>\n')
+    return html_path
+
+
+_report = None
+
+
+def install_run_report(environ=None):
+    """Build the report of a plain pytest device run; None inside a parallel runner worker (the runner builds it)."""
+    global _report
+    environ = os.environ if environ is None else environ
+    if environ.get(EVENT_FD_ENV) or environ.get('RUN_REPORT', '1').lower() in ('0', 'false', 'no', 'off'):
+        return None
+    if not recording_enabled(environ):
+        return None
+    if _report is None:
+        _report = RunReport()
+        _report._listener = _report.step_listener()
+        steps.add_listener(_report._listener)
+    return _report
+
+
+def shutdown_run_report():
+    """Render the installed report (if any) and return it."""
+    global _report
+    report, _report = _report, None
+    if report is not None:
+        report.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a run report index (tests.jsonl) to static HTML")
+    parser.add_argument('index', help="artifacts/<RUN_ID>/report/tests.jsonl")
+    parser.add_argument('-o', '--output', help="HTML file (default: index.html next to the index)")
+    parser.add_argument('--title', default='Liveboard mobile run')
+    args = parser.parse_args(argv)
+    print(f"🧾 Run report: {render_html(args.index, args.output, args.title)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Work-stealing device-pool scheduler.
+
+Collected pytest items are put on shared per-platform queues and one worker
+per device pulls the next item as soon as its previous one finishes, so a
+slow platform never leaves the other devices idle. Quarantined (flaky) items
+wait in a lower-priority lane that devices only pull from once the critical
+items are done, and their failures don't fail the run. Each item's pytest
+process writes its output to a log file and streams JSONL test events back
+over a pipe (see events.py).
+"""
+
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from .artifacts import run_directory
+from .events import EVENT_FD_ENV, WORKER_ENV, read_events
+
+
+ANY_PLATFORM = 'any'
+
+
+class Device:
+    """One entry of the device inventory."""
+
+    def __init__(self, name, platform, udid, appium_port, platform_version=None, mjpeg_port=None,
+                 wda_port=None):
+        self.name = name
+        self.platform = platform.lower()
+        self.udid = udid
+        self.appium_port = int(appium_port)
+        self.platform_version = platform_version
+        self.mjpeg_port = int(mjpeg_port) if mjpeg_port else None
+        self.wda_port = int(wda_port) if wda_port else None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data.get('name') or data['udid'],
+            platform=data['platform'],
+            udid=data['udid'],
+            appium_port=data['appium_port'],
+            platform_version=data.get('platform_version'),
+            mjpeg_port=data.get('mjpeg_port'),
+            wda_port=data.get('wda_port'),
+        )
+
+    def env(self):
+        """Environment variables the fixtures in conftest.py read for this device."""
+        env = {'APPIUM_PORT': str(self.appium_port)}
+        if self.mjpeg_port:
+            env['MJPEG_PORT'] = str(self.mjpeg_port)
+        if self.platform == 'android':
+            env['ANDROID_DEVICE_UDID'] = self.udid
+            env['ANDROID_DEVICE_NAME'] = self.name
+            if self.platform_version:
+                env['ANDROID_PLATFORM_VERSION'] = self.platform_version
+        else:
+            env['DEVICE_UDID'] = self.udid
+            env['DEVICE_NAME'] = self.name
+            if self.platform_version:
+                env['PLATFORM_VERSION'] = self.platform_version
+            if self.wda_port:
+                env['WDA_LOCAL_PORT'] = str(self.wda_port)
+        return env
+
+    def __repr__(self):
+        return f"Device({self.name!r}, {self.platform!r}, port={self.appium_port})"
+
+
+def default_inventory():
+    """The historical two-device bench: iOS on 4723 and Android on 4724."""
+    return [
+        Device(
+            name=os.getenv('DEVICE_NAME', 'iPhone SE'),
+            platform='ios',
+            udid=os.getenv('DEVICE_UDID', '00008030-000151561A85402E'),
+            appium_port=4723,
+            platform_version=os.getenv('PLATFORM_VERSION', '17.2'),
+        ),
+        Device(
+            name=os.getenv('ANDROID_DEVICE_NAME', 'Android Device'),
+            platform='android',
+            udid=os.getenv('ANDROID_DEVICE_UDID', 'HT7991A08308'),
+            appium_port=4724,
+            platform_version=os.getenv('ANDROID_PLATFORM_VERSION', '13'),
+        ),
+    ]
+
+
+def load_inventory(path=None):
+    """Load devices from a JSON list (or {"devices": [...]}); fall back to the default bench."""
+    path = path or os.getenv('DEVICE_INVENTORY')
+    if not path:
+        return default_inventory()
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('devices', [])
+    return [Device.from_dict(entry) for entry in data]
+
+
+def collect_items(paths, cwd=None, extra_args=()):
+    """Return pytest node ids for the given paths without running them."""
+    result = subprocess.run(
+        [sys.executable, '-m', 'pytest', '--collect-only', '-q', *extra_args, *paths],
+        capture_output=True, text=True, cwd=cwd,
+    )
+    items = [line.strip() for line in result.stdout.splitlines() if '::' in line]
+    if not items and result.returncode not in (0, 5):
+        raise RuntimeError(f"pytest collection failed:\n{result.stdout}\n{result.stderr}")
+    return items
+
+
+def item_platform(nodeid):
+    """Infer the platform an item needs from its file name."""
+    filename = os.path.basename(nodeid.split('::', 1)[0]).lower()
+    if 'android' in filename:
+        return 'android'
+    if 'ios' in filename:
+        return 'ios'
+    return ANY_PLATFORM
+
+
+class ItemResult:
+    """Outcome of running one pytest item on one device."""
+
+    def __init__(self, nodeid, device, returncode, duration, stdout='', stderr='', log_path=None,
+                 quarantined=False):
+        self.nodeid = nodeid
+        self.device = device
+        self.returncode = returncode
+        self.duration = duration
+        self.stdout = stdout
+        self.stderr = stderr
+        self.log_path = log_path
+        self.quarantined = quarantined
+
+    @property
+    def passed(self):
+        return self.returncode == 0
+
+
+def _safe_name(text):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_')[:120]
+
+
+def run_pytest_item(nodeid, device, cwd=None, pytest_args=(), on_event=None, log_dir=None):
+    """Default runner: execute a single item in a fresh pytest process with the device's env.
+
+    Nothing in-process outlives the item: the session pool and the auth state manager start
+    empty every time (stored auth states are still read from their file).
+    The process's stdout/stderr go to a log file; its JSONL events are read from a pipe
+    while it runs and handed to on_event(event) as soon as each one arrives.
+    """
+    env = dict(os.environ)
+    env.update(device.env())
+    env[WORKER_ENV] = device.name
+    log_path = os.path.join(log_dir or run_directory('logs'), f"{_safe_name(device.name)}-{_safe_name(nodeid)}.log")
+    read_fd, write_fd = os.pipe()
+    env[EVENT_FD_ENV] = str(write_fd)
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'pytest', nodeid, '-v', *pytest_args],
+                stdout=log, stderr=subprocess.STDOUT, env=env, cwd=cwd, pass_fds=(write_fd,),
+            )
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        with os.fdopen(read_fd, encoding='utf-8', errors='replace') as stream:
+            for event in read_events(stream):
+                event['worker'] = event.get('worker') or device.name
+                if on_event:
+                    on_event(event)
+        returncode = process.wait()
+    if on_event:
+        on_event({'event': 'worker_exit', 'worker': device.name, 'test': nodeid,
+                  'returncode': returncode, 'log': log_path})
+    return ItemResult(nodeid, device, returncode, time.perf_counter() - start, log_path=log_path)
+
+
+def tail(path, lines=20):
+    """Last lines of a (possibly large) log file without reading it all into memory."""
+    if not path or not os.path.exists(path):
+        return ""
+    with open(path, errors='replace') as f:
+        return "".join(deque(f, maxlen=lines))
+
+
+class DeviceStats:
+    """Per-device busy time and item counts."""
+
+    def __init__(self, device):
+        self.device = device
+        self.busy = 0.0
+        self.items = 0
+        self.failed = 0
+
+    def utilisation(self, wall):
+        return self.busy / wall if wall > 0 else 0.0
+
+
+class SchedulerReport:
+    """Results plus throughput and per-device utilisation for one scheduler run."""
+
+    def __init__(self, results, stats, unscheduled, wall):
+        self.results = results
+        self.stats = stats
+        self.unscheduled = unscheduled
+        self.wall = wall
+
+    @property
+    def all_passed(self):
+        """Every item ran on a device and every critical one passed (quarantined items don't count)."""
+        return not self.unscheduled and all(r.passed for r in self.results if not r.quarantined)
+
+    @property
+    def quarantined(self):
+        return [r for r in self.results if r.quarantined]
+
+    def unquarantine(self, quarantine):
+        """Count quarantined failures as critical again when their test has since left `quarantine`."""
+        failing = [r for r in self.quarantined if not r.passed and r.nodeid not in quarantine]
+        for result in failing:
+            result.quarantined = False
+        return failing
+
+    @property
+    def throughput(self):
+        """Completed items per minute."""
+        return len(self.results) / self.wall * 60 if self.wall > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'wall_seconds': round(self.wall, 3),
+            'items': len(self.results),
+            'passed': sum(r.passed for r in self.results),
+            'failed': sum(not r.passed for r in self.results),
+            'unscheduled': list(self.unscheduled),
+            'quarantined': {r.nodeid: 'passed' if r.passed else 'failed' for r in self.quarantined},
+            'throughput_per_minute': round(self.throughput, 2),
+            'devices': {
+                s.device.name: {
+                    'platform': s.device.platform,
+                    'items': s.items,
+                    'failed': s.failed,
+                    'busy_seconds': round(s.busy, 3),
+                    'utilisation': round(s.utilisation(self.wall), 3),
+                }
+                for s in self.stats
+            },
+        }
+
+    def format(self):
+        lines = ["📊 DEVICE POOL SUMMARY", "=" * 50]
+        for s in self.stats:
+            lines.append(
+                f"{s.device.name:<20} | {s.device.platform:<7} | {s.items:3d} items | "
+                f"{s.busy:7.2f}s busy | {s.utilisation(self.wall):6.1%}"
+            )
+        lines.append("-" * 50)
+        lines.append(f"Items: {len(self.results)}  Failed: {sum(not r.passed for r in self.results)}  "
+                     f"Unscheduled: {len(self.unscheduled)}")
+        if self.quarantined:
+            lines.append(f"Quarantine lane: {len(self.quarantined)} items, "
+                         f"{sum(not r.passed for r in self.quarantined)} failed (not counted)")
+        lines.append(f"Wall: {self.wall:.2f}s  Throughput: {self.throughput:.2f} items/min")
+        return "\n".join(lines)
+
+
+class DevicePoolScheduler:
+    """Runs pytest items across a device inventory, one worker thread per device."""
+
+    def __init__(self, devices, runner=None, on_event=None, quarantined=()):
+        if not devices:
+            raise ValueError("Device inventory is empty")
+        self.devices = list(devices)
+        self.runner = runner or (lambda nodeid, device: run_pytest_item(nodeid, device, on_event=on_event))
+        self.quarantined = set(quarantined)
+
+    def run(self, items, on_result=None):
+        queues = {ANY_PLATFORM: queue.Queue()}
+        for device in self.devices:
+            queues.setdefault(device.platform, queue.Queue())
+        # The quarantine lane: same platforms, pulled only when the critical queues are empty.
+        slow_lane = {platform: queue.Queue() for platform in queues}
+
+        unscheduled = []
+        for nodeid in items:
+            platform = item_platform(nodeid)
+            if platform in queues:
+                (slow_lane if nodeid in self.quarantined else queues)[platform].put(nodeid)
+            else:
+                unscheduled.append(nodeid)
+
+        results = []
+        results_lock = threading.Lock()
+        stats = [DeviceStats(device) for device in self.devices]
+
+        def worker(device_stats):
+            device = device_stats.device
+            lanes = (queues[device.platform], queues[ANY_PLATFORM],
+                     slow_lane[device.platform], slow_lane[ANY_PLATFORM])
+            while True:
+                nodeid = _next_item(*lanes)
+                if nodeid is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    result = self.runner(nodeid, device)
+                except Exception as e:
+                    result = ItemResult(nodeid, device, 1, time.perf_counter() - start, '', str(e))
+                result.quarantined = nodeid in self.quarantined
+                device_stats.busy += time.perf_counter() - start
+                device_stats.items += 1
+                device_stats.failed += not result.passed
+                with results_lock:
+                    results.append(result)
+                if on_result:
+                    on_result(result)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(s,), name=f"device-{s.device.name}") for s in stats]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return SchedulerReport(results, stats, unscheduled, time.perf_counter() - start)
+
+
+def _next_item(*queues):
+    for q in queues:
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            continue
+    return None
@@ -0,0 +1,83 @@
+"""
+Screen recognition by fingerprint.
+
+ScreenCache maps ui_tree.fingerprint() values to screen names. The first
+time a screen is seen it is classified with locator rules (the first rule
+whose locator is present wins) or named explicitly with learn(); after
+that, recognising it is a dict lookup by node.shape (already computed by
+the flow's same-screen checks), falling back to the fingerprint. Screens no
+rule matches are reported by fingerprint. The fingerprint ignores geometry
+and typed values, so the email form is still the email form once it is
+filled in.
+"""
+
+from .locators import compile_locator
+from .ui_tree import fingerprint
+
+
+class ScreenCache:
+    """Fingerprint -> screen name, classified once per screen with locator rules."""
+
+    def __init__(self, rules=None):
+        # {platform: [(name, (by, value)), ...]} checked in order
+        self.rules = rules or {}
+        self._names = {}
+        self._keys = {}  # node.shape -> fingerprint, this process only
+        self._compiled = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, root):
+        key = self._keys.get(root.shape)
+        if key is None:
+            key = self._keys[root.shape] = fingerprint(root)
+        return key
+
+    def learn(self, name, root):
+        """Remember root's screen as `name`; returns its fingerprint."""
+        key = self._key(root)
+        self._names[key] = name
+        return key
+
+    def recognise(self, root, platform=None):
+        """(name or None, fingerprint) of the screen root shows."""
+        key = self._key(root)
+        if key in self._names:
+            self.hits += 1
+            return self._names[key], key
+        self.misses += 1
+        name = self._classify(root, platform)
+        self._names[key] = name
+        return name, key
+
+    def _classify(self, root, platform):
+        for name, locator in self.rules.get(platform, ()):
+            select = self._compiled.get(locator)
+            if select is None:
+                select = self._compiled[locator] = compile_locator(*locator)
+            if select(root):
+                return name
+        return None
+
+    def __len__(self):
+        return len(self._names)
+
+    def stats(self):
+        return {'screens': len(self._names), 'hits': self.hits, 'misses': self.misses}
+
+    def format(self):
+        s = self.stats()
+        return f"🗺️ Screens: {s['screens']} known, {s['hits']} recognised from cache, {s['misses']} classified"
+
+
+_default_cache = None
+
+
+def get_screen_cache():
+    """Process-wide cache using the Liveboard screen rules (liveboard_flows.SCREENS)."""
+    global _default_cache
+    if _default_cache is None:
+        from .liveboard_flows import SCREENS
+
+        _default_cache = ScreenCache(SCREENS)
+    return _default_cache
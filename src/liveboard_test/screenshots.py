@@ -0,0 +1,319 @@
+"""
+Asynchronous, deduplicating screenshot pipeline.
+
+The test thread only fetches the base64 payload from Appium. A worker thread
+decodes it, drops frames identical to the previous one, optionally downscales
+or recompresses (needs Pillow), and writes collision-free file names into the
+per-run artifact directory. With near_duplicates (a visual.Tolerance) it also
+drops frames that only differ from the previous one in a blinking cursor, the
+status bar clock or similar (perceptual hash and grid, see visual.py).
+
+In failure-only mode ($SCREENSHOT_MODE=failure) frames are not written at
+all: the current test's last N frames are kept in memory as decoded PNG bytes
+(already compressed, a quarter smaller than the base64 payload) under a byte
+cap, and only written when the test fails or errors.
+"""
+
+import atexit
+import base64
+import collections
+import hashlib
+import io
+import itertools
+import os
+import queue
+import re
+import threading
+
+from . import steps
+from .artifacts import process_tag, run_directory
+
+
+_STOP = object()
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'screenshot'
+
+
+class FrameRing:
+    """The last `size` frames, evicting the oldest beyond `size` frames or `max_bytes` bytes."""
+
+    def __init__(self, size=20, max_bytes=32 * 1024 * 1024):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.frames = collections.deque()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def add(self, data, path, stream):
+        """Buffer one frame; returns the frames evicted to make room for it."""
+        self.frames.append((data, path, stream))
+        self.bytes += len(data)
+        evicted = []
+        while len(self.frames) > 1 and (len(self.frames) > self.size or self.bytes > self.max_bytes):
+            evicted.append(self.frames.popleft())
+            self.bytes -= len(evicted[-1][0])
+        return evicted
+
+    def drain(self):
+        frames, self.frames, self.bytes = list(self.frames), collections.deque(), 0
+        return frames
+
+
+class ScreenshotPipeline:
+    """Background writer for driver screenshots."""
+
+    def __init__(self, directory=None, dedupe=True, max_width=None, jpeg_quality=None, max_queue=64,
+                 ring=None, near_duplicates=None):
+        self.directory = directory or run_directory('screenshots', process_tag())
+        os.makedirs(self.directory, exist_ok=True)
+        self.dedupe = dedupe
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._sequence = itertools.count(1)
+        self._last_digest = {}
+        self.near_duplicates = near_duplicates
+        self._last_signature = {}
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.written = 0
+        self.duplicates = 0
+        self.near_duplicates_dropped = 0
+        self.bytes_written = 0
+        self.bytes_skipped = 0
+        self.errors = 0
+        self.ring = ring
+        self.buffered = 0
+        self.discarded = 0
+        self.bytes_avoided = 0
+        self.failure_flushes = 0
+        self._pillow_warned = False
+        self._worker = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+        self._worker.start()
+
+    @property
+    def failure_only(self):
+        return self.ring is not None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def capture(self, driver, name="screenshot", prefix=""):
+        """Fetch a screenshot and queue it for writing; returns the path it will be written to."""
+        payload = driver.get_screenshot_as_base64()
+        return self.submit(payload, name, prefix, stream=id(driver))
+
+    def submit(self, payload, name="screenshot", prefix="", stream=None):
+        """Queue an already fetched base64 payload."""
+        extension = 'jpg' if self.jpeg_quality else 'png'
+        filename = f"{prefix}{next(self._sequence):04d}_{_safe_name(name)}.{extension}"
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            self.captured += 1
+            if self.ring is not None:
+                data = base64.b64decode(payload)
+                self.buffered += 1
+                self._discard(self.ring.add(data, path, stream))
+                return path
+        self._queue.put((payload, path, stream))
+        steps.notify('screenshot', path=path)
+        return path
+
+    def flush_buffer(self):
+        """Write the buffered frames of a failed test; returns how many were queued."""
+        if self.ring is None:
+            return 0
+        with self._lock:
+            frames = self.ring.drain()
+            if frames:
+                self.failure_flushes += 1
+        for data, path, stream in frames:
+            self._queue.put((data, path, stream))
+            steps.notify('screenshot', path=path)
+        return len(frames)
+
+    def discard_buffer(self):
+        """Drop the buffered frames of a test that passed; returns how many were dropped."""
+        if self.ring is None:
+            return 0
+        with self._lock:
+            frames = self.ring.drain()
+            self._discard(frames)
+        return len(frames)
+
+    def _discard(self, frames):
+        self.discarded += len(frames)
+        self.bytes_avoided += sum(len(data) for data, _, _ in frames)
+
+    def flush(self):
+        """Block until every queued screenshot has been processed."""
+        self._queue.join()
+
+    def close(self):
+        """Flush and stop the worker thread; frames still buffered are dropped."""
+        self.discard_buffer()
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join()
+
+    def stats(self):
+        stats = {
+            'captured': self.captured,
+            'written': self.written,
+            'duplicates_dropped': self.duplicates,
+            'near_duplicates_dropped': self.near_duplicates_dropped,
+            'queue_depth': self.queue_depth,
+            'bytes_written': self.bytes_written,
+            'bytes_skipped': self.bytes_skipped,
+            'errors': self.errors,
+        }
+        if self.ring is not None:
+            stats.update({
+                'buffered': self.buffered,
+                'discarded': self.discarded,
+                'failure_flushes': self.failure_flushes,
+                'bytes_avoided': self.bytes_avoided,
+                'buffer_bytes': self.ring.bytes,
+            })
+        return stats
+
+    def format(self):
+        s = self.stats()
+        line = (f"📸 Screenshots: {s['written']} written ({s['bytes_written'] / 1024:.0f} KiB), "
+                f"{s['duplicates_dropped'] + s['near_duplicates_dropped']} duplicates dropped "
+                f"({s['near_duplicates_dropped']} near, {s['bytes_skipped'] / 1024:.0f} KiB avoided) "
+                f"-> {self.directory}")
+        if self.ring is not None:
+            line += (f"\n📸 Failure-only mode: {s['discarded']} frames of passing tests never written "
+                     f"({s['bytes_avoided'] / 1024:.0f} KiB avoided), {s['failure_flushes']} failure(s) flushed")
+        return line
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._process(*item)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Screenshot write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, payload, path, stream):
+        # Frames from the failure buffer are already decoded.
+        data = payload if isinstance(payload, bytes) else base64.b64decode(payload)
+        digest = hashlib.sha1(data).digest()
+        if self.dedupe and self._last_digest.get(stream) == digest:
+            self.duplicates += 1
+            self.bytes_skipped += len(data)
+            return
+        self._last_digest[stream] = digest
+        if self.dedupe and self.near_duplicates is not None and self._near_duplicate(data, stream):
+            self.near_duplicates_dropped += 1
+            self.bytes_skipped += len(data)
+            return
+        data = self._transform(data)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.written += 1
+        self.bytes_written += len(data)
+
+    def _near_duplicate(self, data, stream):
+        """Whether the frame looks like the last one written for this stream (which stays the reference)."""
+        from .visual import compare, signature_of_png
+
+        try:
+            current = signature_of_png(data)
+        except ValueError:
+            return False
+        previous = self._last_signature.get(stream)
+        if previous is not None and compare(previous, current).within(self.near_duplicates):
+            return True
+        self._last_signature[stream] = current
+        return False
+
+    def _transform(self, data):
+        if not self.max_width and not self.jpeg_quality:
+            return data
+        try:
+            from PIL import Image
+        except ImportError:
+            if not self._pillow_warned:
+                print("⚠️ Pillow is not installed; screenshots are written unscaled. Run: pip install Pillow")
+                self._pillow_warned = True
+            return data
+        image = Image.open(io.BytesIO(data))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height))
+        out = io.BytesIO()
+        if self.jpeg_quality:
+            image.convert('RGB').save(out, 'JPEG', quality=self.jpeg_quality, optimize=True)
+        else:
+            image.save(out, 'PNG', optimize=True)
+        return out.getvalue()
+
+
+_default_pipeline = None
+
+
+def get_screenshot_pipeline():
+    """Process-wide pipeline configured from $SCREENSHOT_MAX_WIDTH / $SCREENSHOT_JPEG_QUALITY.
+
+    $SCREENSHOT_MODE=failure keeps the last $SCREENSHOT_RING_SIZE frames (default 20, at most
+    $SCREENSHOT_RING_MB MiB, default 32) in memory and writes them only for failed tests.
+    $SCREENSHOT_DEDUPE is perceptual (default: also drop near-duplicates within
+    $SCREENSHOT_NEAR_BITS hash bits, default 4, and $SCREENSHOT_NEAR_CHANGED of the screen,
+    default 0.002), exact or off.
+    """
+    global _default_pipeline
+    if _default_pipeline is None:
+        max_width = os.getenv('SCREENSHOT_MAX_WIDTH')
+        quality = os.getenv('SCREENSHOT_JPEG_QUALITY')
+        ring = None
+        if os.getenv('SCREENSHOT_MODE', 'always') == 'failure':
+            ring = FrameRing(int(os.getenv('SCREENSHOT_RING_SIZE', '20')),
+                             int(float(os.getenv('SCREENSHOT_RING_MB', '32')) * 1024 * 1024))
+        dedupe = os.getenv('SCREENSHOT_DEDUPE', 'perceptual')
+        near = None
+        if dedupe == 'perceptual':
+            from .visual import Tolerance
+
+            near = Tolerance(int(os.getenv('SCREENSHOT_NEAR_BITS', '4')),
+                             float(os.getenv('SCREENSHOT_NEAR_CHANGED', '0.002')))
+        _default_pipeline = ScreenshotPipeline(
+            dedupe=dedupe != 'off',
+            max_width=int(max_width) if max_width else None,
+            jpeg_quality=int(quality) if quality else None,
+            ring=ring,
+            near_duplicates=near,
+        )
+        atexit.register(_default_pipeline.close)
+    return _default_pipeline
+
+
+def shutdown_screenshot_pipeline():
+    """Flush and stop the process-wide pipeline if one was created and return it for reporting."""
+    global _default_pipeline
+    pipeline, _default_pipeline = _default_pipeline, None
+    if pipeline is not None:
+        atexit.unregister(pipeline.close)
+        pipeline.close()
+    return pipeline
+
+
+def flush_failure_screenshots():
+    """Write the frames buffered for the current test (called when it fails)."""
+    return _default_pipeline.flush_buffer() if _default_pipeline is not None else 0
+
+
+def discard_buffered_screenshots():
+    """Drop the frames buffered for the current test once it has passed."""
+    return _default_pipeline.discard_buffer() if _default_pipeline is not None else 0
@@ -0,0 +1,215 @@
+"""
+Warm WebDriver session pool.
+
+Creating an Appium session (WDA / UiAutomator2 server start with 180 s
+launch timeouts) is the most expensive thing a test does. The pool keeps
+sessions alive between tests, keyed by server URL and normalised
+capabilities, and only resets the app state when handing one out again.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from .capabilities import CapabilityError, get_profile, profile_of
+from .drivers import create_driver, platform_of
+
+
+APPIUM_PREFIX = 'appium:'
+
+
+def normalise_capabilities(capabilities):
+    """Return a stable, hashable key for a capability dict (prefix- and order-insensitive)."""
+    if hasattr(capabilities, 'to_capabilities'):
+        capabilities = capabilities.to_capabilities()
+    normalised = {}
+    for name, value in capabilities.items():
+        if name.startswith(APPIUM_PREFIX):
+            name = name[len(APPIUM_PREFIX):]
+        normalised[name] = value
+    return json.dumps(normalised, sort_keys=True, default=str)
+
+
+def app_id_for(capabilities):
+    """The bundle id (iOS) or package (Android) whose state is reset between tests."""
+    if hasattr(capabilities, 'to_capabilities'):
+        capabilities = capabilities.to_capabilities()
+    for name in ('bundleId', 'appPackage'):
+        value = capabilities.get(name) or capabilities.get(APPIUM_PREFIX + name)
+        if value:
+            return value
+    return None
+
+
+def reset_app_state(driver, app_id):
+    """Bring the app back to its launch screen without creating a new session."""
+    if not app_id:
+        return
+    driver.terminate_app(app_id)
+    driver.activate_app(app_id)
+
+
+def resets_app_data(options):
+    """Whether the options' profile promises a wiped app, which only a new session delivers."""
+    name = profile_of(options)
+    if not name:
+        return False
+    try:
+        return get_profile(platform_of(options), name).resets_app_data
+    except CapabilityError:
+        return False
+
+
+def check_session_alive(driver):
+    """Cheap health check: one GET /timeouts round trip on the session."""
+    driver.timeouts
+    return True
+
+
+class PooledSession:
+    """A live driver plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, key, driver, app_id, single_use=False):
+        self.key = key
+        self.driver = driver
+        self.app_id = app_id
+        self.single_use = single_use
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class SessionPool:
+    """Hands out live sessions keyed by (server URL, normalised capabilities)."""
+
+    def __init__(self, factory=None, max_uses=10, health_check=None, reset=None):
+        self.factory = factory or create_driver
+        self.max_uses = max_uses
+        self.health_check = health_check or check_session_alive
+        self.reset = reset or reset_app_state
+        self._idle = {}
+        self._in_use = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.health_failures = 0
+        self.creation_seconds = 0.0
+
+    def acquire(self, url, options):
+        """Return a live driver for these capabilities, reusing an idle session when possible."""
+        key = (url, normalise_capabilities(options))
+        while True:
+            with self._lock:
+                idle = self._idle.get(key) or []
+                pooled = idle.pop() if idle else None
+            if pooled is None:
+                pooled = self._create(key, url, options)
+                break
+            if self._is_healthy(pooled):
+                try:
+                    self.reset(pooled.driver, pooled.app_id)
+                except Exception as e:
+                    print(f"⚠️ App reset failed, recycling session: {e}")
+                    self._discard(pooled)
+                    continue
+                self.reused += 1
+                break
+            self.health_failures += 1
+            self._discard(pooled)
+
+        pooled.uses += 1
+        with self._lock:
+            self._in_use[id(pooled.driver)] = pooled
+        return pooled.driver
+
+    def release(self, driver, healthy=True):
+        """Return a driver to the pool; unhealthy or worn-out sessions are quit instead."""
+        with self._lock:
+            pooled = self._in_use.pop(id(driver), None)
+        if pooled is None:
+            driver.quit()
+            return
+        # A cold session's app is no longer fresh once a test used it
+        if not healthy or pooled.single_use or pooled.uses >= self.max_uses:
+            self._discard(pooled)
+            return
+        with self._lock:
+            self._idle.setdefault(pooled.key, []).append(pooled)
+
+    def close(self):
+        """Quit every session the pool still holds."""
+        with self._lock:
+            sessions = [p for idle in self._idle.values() for p in idle] + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+        for pooled in sessions:
+            _quit_quietly(pooled.driver)
+
+    @property
+    def sessions_saved(self):
+        """Session creations avoided by reuse."""
+        return self.reused
+
+    def stats(self):
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'recycled': self.recycled,
+            'health_failures': self.health_failures,
+            'sessions_saved': self.sessions_saved,
+            'avg_creation_seconds': round(self.creation_seconds / self.created, 3) if self.created else 0.0,
+        }
+
+    def format(self):
+        s = self.stats()
+        estimate = s['sessions_saved'] * s['avg_creation_seconds']
+        return (f"♻️ Session pool: {s['created']} created, {s['reused']} reused, "
+                f"{s['recycled']} recycled (~{estimate:.1f}s of session start-up saved)")
+
+    def _create(self, key, url, options):
+        start = time.perf_counter()
+        driver = self.factory(url, options)
+        self.creation_seconds += time.perf_counter() - start
+        self.created += 1
+        return PooledSession(key, driver, app_id_for(options), single_use=resets_app_data(options))
+
+    def _is_healthy(self, pooled):
+        try:
+            return bool(self.health_check(pooled.driver))
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        self.recycled += 1
+        _quit_quietly(pooled.driver)
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+_default_pool = None
+
+
+def get_session_pool():
+    """Process-wide pool shared by the test classes; closed automatically at exit."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = SessionPool(max_uses=int(os.getenv('SESSION_POOL_MAX_USES', '10')))
+        atexit.register(_default_pool.close)
+    return _default_pool
+
+
+def shutdown_session_pool():
+    """Close the process-wide pool if one was created and return it for reporting."""
+    global _default_pool
+    pool, _default_pool = _default_pool, None
+    if pool is not None:
+        atexit.unregister(pool.close)
+        pool.close()
+    return pool
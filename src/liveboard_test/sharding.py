@@ -0,0 +1,356 @@
+"""
+Duration-aware test sharding across several self-hosted runner machines.
+
+The planner reads historical per-test durations (timing_store.py or a JSON
+file), then assigns tests to shards longest-first, each to the eligible shard
+whose predicted finish time grows least (LPT bin packing). A shard is only
+eligible for a test if it has a device of the test's platform; within a shard
+the devices of one platform share its tests like DevicePoolScheduler does.
+
+    python -m liveboard_test.sharding plan tests/ --shards 3 --output shard_plan.json
+    python -m pytest tests/ --shard-plan shard_plan.json --shard-index 0 --shard-count 3
+    python -m liveboard_test.sharding report artifacts/*/shard-*.json
+
+The plan is a pure function of the collected node ids, the shard layout and
+the durations, so every runner computing it from the same inputs agrees.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import zlib
+
+from .scheduler import ANY_PLATFORM, Device, collect_items, item_platform, load_inventory
+
+
+# Assumed duration of a test that has never run (and no other history exists).
+DEFAULT_SECONDS = 60.0
+
+
+class Shard:
+    """One runner machine and the devices attached to it."""
+
+    def __init__(self, index, name, devices):
+        self.index = index
+        self.name = name
+        self.devices = list(devices)
+        self.items = []
+        self.loads = {}
+
+    @classmethod
+    def from_dict(cls, index, data):
+        return cls(index, data.get('name') or f"shard-{index}",
+                   [Device.from_dict(entry) for entry in data.get('devices', [])])
+
+    def lanes(self, platform):
+        if platform == ANY_PLATFORM:
+            return len(self.devices)
+        return sum(device.platform == platform for device in self.devices)
+
+    def accepts(self, platform):
+        return self.lanes(platform) > 0
+
+    def predicted(self, platform=None, seconds=0.0):
+        """Estimated wall time of the shard, optionally with one more test of `platform` added."""
+        loads = dict(self.loads)
+        if platform is not None:
+            loads[platform] = loads.get(platform, 0.0) + seconds
+        if not self.devices:
+            return 0.0
+        # Each platform's tests are spread over its devices; platform-agnostic ones over all of them.
+        estimate = sum(loads.values()) / len(self.devices)
+        for lane, load in loads.items():
+            if lane != ANY_PLATFORM:
+                estimate = max(estimate, load / self.lanes(lane))
+        return estimate
+
+    def add(self, nodeid, platform, seconds):
+        self.items.append(nodeid)
+        self.loads[platform] = self.loads.get(platform, 0.0) + seconds
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'name': self.name,
+            'devices': [device.name for device in self.devices],
+            'predicted_seconds': round(self.predicted(), 3),
+            'items': list(self.items),
+        }
+
+
+def default_shards(count):
+    """`count` identical runners, each with this machine's bench ($DEVICE_INVENTORY or iOS + Android)."""
+    return [Shard(index, f"shard-{index}", load_inventory()) for index in range(count)]
+
+
+def load_shards(path):
+    """Shard layout from {"shards": [{"name": ..., "devices": [inventory entries]}]}."""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('shards', [])
+    return [Shard.from_dict(index, entry) for index, entry in enumerate(data)]
+
+
+class ShardPlan:
+    """Test-to-shard assignment plus the per-shard and overall predicted makespan."""
+
+    def __init__(self, shards, durations, unassigned=(), estimated=(), predictions=None):
+        self.shards = shards
+        self.durations = durations
+        self.unassigned = list(unassigned)
+        self.estimated = sorted(estimated)
+        self.predictions = predictions or {shard.index: shard.predicted() for shard in shards}
+        self._index = {nodeid: shard.index for shard in shards for nodeid in shard.items}
+
+    @property
+    def makespan(self):
+        return max(self.predictions.values(), default=0.0)
+
+    def predicted(self, index):
+        return self.predictions.get(index, 0.0)
+
+    def index_for(self, nodeid, count=None):
+        """Shard of a planned test; tests added after planning go to a stable hash bucket."""
+        if nodeid in self._index:
+            return self._index[nodeid]
+        return zlib.crc32(nodeid.encode('utf-8')) % (count or len(self.shards))
+
+    def to_dict(self):
+        return {
+            'makespan_seconds': round(self.makespan, 3),
+            'shards': [dict(shard.to_dict(), predicted_seconds=round(self.predicted(shard.index), 3))
+                       for shard in self.shards],
+            'durations': {nodeid: round(seconds, 3) for nodeid, seconds in sorted(self.durations.items())},
+            'estimated': list(self.estimated),
+            'unassigned': list(self.unassigned),
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        shards = []
+        for entry in data['shards']:
+            shard = Shard(entry['index'], entry['name'], [])
+            shard.items = list(entry['items'])
+            shards.append(shard)
+        predictions = {entry['index']: entry['predicted_seconds'] for entry in data['shards']}
+        return cls(shards, data.get('durations', {}), data.get('unassigned', ()), data.get('estimated', ()),
+                   predictions)
+
+    def format(self):
+        lines = ["🧩 SHARD PLAN", "=" * 50]
+        for shard in self.shards:
+            lines.append(f"{shard.index:>2} {shard.name:<18} | {len(shard.items):3d} tests | "
+                         f"{self.predicted(shard.index):8.1f}s predicted")
+        lines.append("-" * 50)
+        lines.append(f"Predicted makespan: {self.makespan:.1f}s  "
+                     f"(no history for {len(self.estimated)} test(s))")
+        for nodeid in self.unassigned:
+            lines.append(f"⚠️ No shard has a device for {nodeid}")
+        return "\n".join(lines)
+
+
+def plan_shards(items, shards, durations, default=None):
+    """Longest-processing-time assignment of `items` onto `shards` respecting device platforms."""
+    known = [durations[nodeid] for nodeid in items if nodeid in durations]
+    if default is None:
+        default = statistics.median(known) if known else DEFAULT_SECONDS
+    estimated = {nodeid for nodeid in items if nodeid not in durations}
+    seconds = {nodeid: durations.get(nodeid, default) for nodeid in items}
+
+    unassigned = []
+    # Sorting by name after duration keeps the plan deterministic for equal durations.
+    for nodeid in sorted(set(items), key=lambda n: (-seconds[n], n)):
+        platform = item_platform(nodeid)
+        eligible = [shard for shard in shards if shard.accepts(platform)]
+        if not eligible:
+            unassigned.append(nodeid)
+            continue
+        best = min(eligible, key=lambda shard: (shard.predicted(platform, seconds[nodeid]), shard.index))
+        best.add(nodeid, platform, seconds[nodeid])
+    return ShardPlan(shards, seconds, unassigned, estimated)
+
+
+def load_durations(path=None, window=20):
+    """{nodeid: seconds} from a JSON file, or medians from the timing history database."""
+    if path:
+        with open(path) as f:
+            return {nodeid: float(seconds) for nodeid, seconds in json.load(f).items()}
+    from .timing_store import TimingStore, default_db_path
+
+    if not os.path.exists(default_db_path()):
+        return {}
+    store = TimingStore()
+    try:
+        return store.median_durations(window)
+    finally:
+        store.close()
+
+
+def add_shard_options(parser):
+    group = parser.getgroup('liveboard sharding')
+    group.addoption('--shard-index', type=int, default=None, help="Run only this shard (0-based)")
+    group.addoption('--shard-count', type=int, default=None, help="Total number of shards")
+    group.addoption('--shard-plan', default=None, help="Plan written by `python -m liveboard_test.sharding plan`")
+    group.addoption('--shard-durations', default=None,
+                    help="JSON {nodeid: seconds} used when no plan is given (default: timing history)")
+    group.addoption('--shard-report', default=None, help="Write predicted vs actual durations of this shard here")
+
+
+class ShardSelector:
+    """pytest plugin that deselects every collected test not assigned to --shard-index."""
+
+    def __init__(self, index, count, plan_path=None, durations_path=None, report_path=None):
+        if not 0 <= index < count:
+            raise ValueError(f"--shard-index {index} is outside 0..{count - 1}")
+        self.index = index
+        self.count = count
+        self.plan_path = plan_path
+        self.durations_path = durations_path
+        self.report_path = report_path
+        self.plan = None
+        self.selected = []
+        self.actual = {}
+        self._start = None
+
+    @classmethod
+    def from_config(cls, config):
+        if config.getoption('shard_count') is None:
+            return None
+        return cls(config.getoption('shard_index') or 0, config.getoption('shard_count'),
+                   config.getoption('shard_plan'), config.getoption('shard_durations'),
+                   config.getoption('shard_report'))
+
+    def select(self, nodeids):
+        if self.plan_path:
+            self.plan = ShardPlan.load(self.plan_path)
+        else:
+            self.plan = plan_shards(nodeids, default_shards(self.count), load_durations(self.durations_path))
+        return [nodeid for nodeid in nodeids if self.plan.index_for(nodeid, self.count) == self.index]
+
+    def pytest_collection_modifyitems(self, config, items):
+        chosen = set(self.select([item.nodeid for item in items]))
+        selected = [item for item in items if item.nodeid in chosen]
+        deselected = [item for item in items if item.nodeid not in chosen]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+        self.selected = [item.nodeid for item in selected]
+        self._start = time.perf_counter()
+
+    def pytest_runtest_logreport(self, report):
+        self.actual[report.nodeid] = self.actual.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        wall = time.perf_counter() - self._start if self._start is not None else 0.0
+        result = shard_result(self.index, self.count, self.plan, self.actual, wall)
+        print(f"\n{format_result(result)}")
+        if self.report_path:
+            write_result(self.report_path, result)
+
+
+def shard_result(index, count, plan, actual, wall):
+    """Predicted vs actual seconds of one shard and of each of its tests."""
+    durations = plan.durations if plan else {}
+    return {
+        'index': index,
+        'count': count,
+        'predicted_seconds': round(plan.predicted(index), 3) if plan else None,
+        'predicted_makespan': round(plan.makespan, 3) if plan else None,
+        'actual_seconds': round(wall, 3),
+        'items': {
+            nodeid: {'predicted': durations.get(nodeid), 'actual': round(seconds, 3)}
+            for nodeid, seconds in sorted(actual.items())
+        },
+    }
+
+
+def write_result(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def format_result(result):
+    predicted = result['predicted_seconds']
+    predicted = f"{predicted:.1f}s" if predicted is not None else "n/a"
+    return (f"🧩 Shard {result['index']}/{result['count']}: {len(result['items'])} tests, "
+            f"predicted {predicted}, actual {result['actual_seconds']:.1f}s")
+
+
+def merge_results(results):
+    """Predicted vs actual makespan over all shards, plus the worst per-test mispredictions."""
+    predicted = [r['predicted_makespan'] for r in results if r.get('predicted_makespan') is not None]
+    misses = []
+    for result in results:
+        for nodeid, item in result['items'].items():
+            if item['predicted'] is not None:
+                misses.append((item['actual'] - item['predicted'], nodeid, item['predicted'], item['actual']))
+    return {
+        'shards': len(results),
+        'predicted_makespan': max(predicted) if predicted else None,
+        'actual_makespan': max((r['actual_seconds'] for r in results), default=0.0),
+        'worst_mispredictions': [
+            {'test': nodeid, 'predicted': p, 'actual': a}
+            for _, nodeid, p, a in sorted(misses, key=lambda miss: (-abs(miss[0]), miss[1]))[:5]
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan and evaluate duration-aware test shards")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="Assign collected tests to shards")
+    plan.add_argument('paths', nargs='*', default=['tests/'])
+    plan.add_argument('--shards', type=int, default=None, help="Number of identical runners")
+    plan.add_argument('--shard-config', default=None, help="JSON shard layout with per-runner devices")
+    plan.add_argument('--durations', default=None, help="JSON {nodeid: seconds} (default: timing history)")
+    plan.add_argument('--output', default='shard_plan.json')
+
+    report = commands.add_parser('report', help="Compare predicted and actual makespan of finished shards")
+    report.add_argument('results', nargs='+', help="--shard-report files of every shard")
+
+    args = parser.parse_args(argv)
+    if args.command == 'plan':
+        if args.shard_config:
+            shards = load_shards(args.shard_config)
+        elif args.shards:
+            shards = default_shards(args.shards)
+        else:
+            parser.error("plan needs --shards or --shard-config")
+        result = plan_shards(collect_items(args.paths), shards, load_durations(args.durations))
+        result.save(args.output)
+        print(result.format())
+        print(f"💾 Shard plan written to {args.output}")
+        return 1 if result.unassigned else 0
+
+    results = []
+    for path in args.results:
+        with open(path) as f:
+            results.append(json.load(f))
+    for result in sorted(results, key=lambda r: r['index']):
+        print(format_result(result))
+    merged = merge_results(results)
+    predicted = merged['predicted_makespan']
+    print(f"⏱️ Makespan: predicted {predicted if predicted is not None else float('nan'):.1f}s, "
+          f"actual {merged['actual_makespan']:.1f}s over {merged['shards']} shard(s)")
+    for miss in merged['worst_mispredictions']:
+        print(f"   {miss['test']}: predicted {miss['predicted']:.1f}s, actual {miss['actual']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Bulk element snapshots: every element's attributes from one page_source.
+
+Deciding what to tap with find_elements() and then get_attribute("name"),
+is_enabled() and is_displayed() on each result costs one round trip per
+element per question. ElementSnapshot reads name, label, value, enabled,
+visible and rect for every element from a single page_source fetch and
+only asks the server for a WebElement when one is actually interacted with
+(one find_element with a locator that matches exactly that element):
+
+    snapshot = ElementSnapshot(driver).refresh()
+    for button in snapshot.of_type('XCUIElementTypeButton'):
+        if button.enabled and button.visible:
+            button.click()
+    print(snapshot.format())
+"""
+
+from .locators import (
+    ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, ID, IOS_PREDICATE, XPATH, UnsupportedLocator, compile_locator,
+)
+from .ui_tree import parse_page_source
+
+
+def _quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _flag(value, default=True):
+    if value is None:
+        return default
+    return str(value).lower() in ('true', '1', 'yes')
+
+
+class SnapshotElement:
+    """Attributes of one element as of the snapshot; the WebElement is looked up on first use."""
+
+    def __init__(self, snapshot, node):
+        self.snapshot = snapshot
+        self.node = node
+        self._element = None
+        self._locator = None
+
+    def _read(self, *names):
+        """First non-empty attribute of `names`; counts as one server call saved."""
+        self.snapshot.attribute_reads += 1
+        for name in names:
+            if self.node.attrs.get(name):
+                return self.node.attrs[name]
+        return None
+
+    @property
+    def type(self):
+        return self.node.attrs.get('type') or self.node.attrs.get('class') or self.node.tag
+
+    @property
+    def _ios(self):
+        return self.snapshot.platform == 'ios'
+
+    @property
+    def name(self):
+        return self._read('name') if self._ios else self._read('resource-id')
+
+    @property
+    def label(self):
+        return self._read('label') if self._ios else self._read('content-desc')
+
+    @property
+    def value(self):
+        return self._read('value') if self._ios else self._read('text')
+
+    @property
+    def text(self):
+        return self._read('label', 'value') if self._ios else self._read('text')
+
+    @property
+    def enabled(self):
+        return _flag(self._read('enabled'))
+
+    @property
+    def visible(self):
+        return _flag(self._read('visible') if self._ios else self._read('displayed'))
+
+    @property
+    def rect(self):
+        self.snapshot.attribute_reads += 1
+        return self.node.rect
+
+    def get_attribute(self, name):
+        return self._read(name)
+
+    @property
+    def locator(self):
+        """A (by, value) locator that matches exactly this element in the snapshot."""
+        if self._locator is None:
+            self._locator = self.snapshot.locator_for(self.node)
+        return self._locator
+
+    @property
+    def element(self):
+        """The server-side WebElement (one find_element round trip, then cached)."""
+        if self._element is None:
+            self._element = self.snapshot.materialise(self.locator)
+        return self._element
+
+    def click(self):
+        self.element.click()
+
+    def send_keys(self, *value):
+        self.element.send_keys(*value)
+
+    def __repr__(self):
+        attrs = self.node.attrs
+        label = attrs.get('name') or attrs.get('label') or attrs.get('text') or attrs.get('resource-id') or ''
+        return f"<SnapshotElement {self.type} {label!r}>"
+
+
+class ElementSnapshot:
+    """Every element of the current screen from one page_source, with lazily looked-up handles."""
+
+    def __init__(self, driver, source=None):
+        self.driver = driver
+        self.root = None
+        self.platform = None
+        self.fetches = 0
+        self.materialised = 0
+        self.queries = 0
+        self.attribute_reads = 0
+        if source is not None:
+            self._load(source)
+
+    def refresh(self):
+        """Fetch and parse the page source (one round trip)."""
+        self._load(self.driver.page_source)
+        self.fetches += 1
+        return self
+
+    def _load(self, source):
+        self.root = parse_page_source(source)
+        self.platform = 'android' if self.root.tag == 'hierarchy' else 'ios'
+
+    def find_all(self, by, value):
+        """Elements matching a locator, evaluated locally (what find_elements would return)."""
+        if self.root is None:
+            self.refresh()
+        self.queries += 1
+        return [SnapshotElement(self, node) for node in compile_locator(by, value)(self.root)]
+
+    def of_type(self, element_type):
+        """Elements of one XCUIElementType / Android class."""
+        return self.find_all('class name', element_type)
+
+    def locator_for(self, node):
+        """The cheapest server-side locator that only matches `node` in this snapshot."""
+        for by, value in self._candidates(node):
+            try:
+                matches = compile_locator(by, value)(self.root)
+            except UnsupportedLocator:
+                continue
+            if len(matches) == 1 and matches[0] is node:
+                return by, value
+        return XPATH, self._xpath(node)
+
+    def _candidates(self, node):
+        attrs = node.attrs
+        if self.platform == 'android':
+            if attrs.get('resource-id'):
+                yield ID, attrs['resource-id']
+            if attrs.get('content-desc'):
+                yield ACCESSIBILITY_ID, attrs['content-desc']
+            selector = f'new UiSelector().className({_quote(attrs.get("class", node.tag))})'
+            if attrs.get('text'):
+                selector += f'.text({_quote(attrs["text"])})'
+            yield ANDROID_UIAUTOMATOR, selector
+            same = compile_locator(ANDROID_UIAUTOMATOR, selector)(self.root)
+            if node in same:
+                yield ANDROID_UIAUTOMATOR, f'{selector}.instance({same.index(node)})'
+            return
+        element_type = attrs.get('type', node.tag)
+        if attrs.get('name'):
+            yield ACCESSIBILITY_ID, attrs['name']
+        conditions = [f'type == {_quote(element_type)}']
+        for name in ('name', 'label', 'value'):
+            if attrs.get(name):
+                conditions.append(f'{name} == {_quote(attrs[name])}')
+        yield IOS_PREDICATE, ' AND '.join(conditions)
+
+    @staticmethod
+    def _xpath(node):
+        steps = []
+        while node.parent is not None:
+            same = [c for c in node.parent.children if c.tag == node.tag]
+            steps.append(f'{node.tag}[{same.index(node) + 1}]')
+            node = node.parent
+        steps.append(node.tag)
+        return '/' + '/'.join(reversed(steps))
+
+    def materialise(self, locator):
+        self.materialised += 1
+        return self.driver.find_element(*locator)
+
+    @property
+    def round_trips(self):
+        return self.fetches + self.materialised
+
+    @property
+    def round_trips_without_snapshot(self):
+        """find_elements per query plus one get_attribute / is_enabled / is_displayed call per read."""
+        return self.queries + self.attribute_reads
+
+    def stats(self):
+        return {
+            'page_source_fetches': self.fetches,
+            'elements_materialised': self.materialised,
+            'round_trips': self.round_trips,
+            'round_trips_without_snapshot': self.round_trips_without_snapshot,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"📦 Element snapshot: {s['round_trips']} round trips ({s['page_source_fetches']} page source, "
+                f"{s['elements_materialised']} element lookups) in place of ~{s['round_trips_without_snapshot']} "
+                f"find_elements / attribute calls")
@@ -0,0 +1,77 @@
+"""
+Current test / step tracking.
+
+conftest.py marks test start and end, flows call step("...") where they
+used to only print a step banner, and listeners (instrumentation, event
+streams, reports) subscribe to the resulting events.
+"""
+
+import time
+
+
+_state = {'test': None, 'step': None, 'step_started': None}
+_listeners = []
+
+
+def add_listener(listener):
+    """Subscribe listener(event, data) to 'test_start', 'step', 'step_end', 'test_end' and notify()'d events."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def current_test():
+    return _state['test']
+
+
+def current_step():
+    return _state['step']
+
+
+def _emit(event, data):
+    for listener in list(_listeners):
+        try:
+            listener(event, data)
+        except Exception as e:
+            print(f"⚠️ Step listener failed on {event}: {e}")
+
+
+def _end_step():
+    if _state['step'] is not None:
+        _emit('step_end', {
+            'test': _state['test'],
+            'step': _state['step'],
+            'duration': time.monotonic() - _state['step_started'],
+        })
+    _state['step'] = _state['step_started'] = None
+
+
+def notify(event, **data):
+    """Emit a custom event (e.g. 'screenshot', 'failure') tagged with the current test and step."""
+    data.setdefault('test', _state['test'])
+    data.setdefault('step', _state['step'])
+    _emit(event, data)
+
+
+def start_test(nodeid):
+    _end_step()
+    _state['test'] = nodeid
+    _emit('test_start', {'test': nodeid})
+
+
+def step(name):
+    """Mark the start of a named step in the current test (ends the previous step)."""
+    _end_step()
+    _state['step'] = name
+    _state['step_started'] = time.monotonic()
+    _emit('step', {'test': _state['test'], 'step': name})
+
+
+def end_test(nodeid, outcome, duration=None, message=None):
+    _end_step()
+    _emit('test_end', {'test': nodeid, 'outcome': outcome, 'duration': duration, 'message': message})
+    _state['test'] = None
@@ -0,0 +1,262 @@
+"""
+Historical per-test / per-step timing store (SQLite) with regression detection.
+
+Every pytest run records how long each test and each step("...") took on
+each device, keyed by git commit, app build and capability profile. The CLI
+compares the latest sample of every test/step/device with the median and
+MAD of its previous runs and flags statistically significant slowdowns:
+
+    python -m liveboard_test.timing_store regressions --window 20 --threshold 3
+    python -m liveboard_test.timing_store history "tests/test_login_ios.py::TestLiveboardiOS::test_liveboard_login_flow"
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from . import steps
+from .artifacts import recording_enabled, run_id
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL,
+    started REAL NOT NULL,
+    git_commit TEXT,
+    app_build TEXT,
+    profile TEXT,
+    host TEXT
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    kind TEXT NOT NULL,
+    test TEXT NOT NULL,
+    step TEXT NOT NULL DEFAULT '',
+    device TEXT NOT NULL DEFAULT '',
+    seconds REAL NOT NULL,
+    outcome TEXT,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timings_key ON timings (kind, test, step, device, recorded);
+"""
+
+# Scale factor that makes the MAD a consistent estimator of the standard deviation.
+MAD_SCALE = 1.4826
+
+
+def default_db_path():
+    """$TIMING_DB or artifacts/timings.sqlite (kept across runs, unlike the per-run directory)."""
+    return os.getenv('TIMING_DB') or os.path.join(os.getenv('ARTIFACTS_DIR', 'artifacts'), 'timings.sqlite')
+
+
+def git_commit():
+    """$GITHUB_SHA in CI, otherwise the checked-out commit (None outside a git checkout)."""
+    if os.getenv('GITHUB_SHA'):
+        return os.getenv('GITHUB_SHA')
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Regression:
+    """One test/step/device whose latest duration is significantly above its history."""
+
+    def __init__(self, kind, test, step, device, seconds, median, mad, samples, threshold):
+        self.kind = kind
+        self.test = test
+        self.step = step
+        self.device = device
+        self.seconds = seconds
+        self.median = median
+        self.mad = mad
+        self.samples = samples
+        self.threshold = threshold
+
+    @property
+    def slowdown(self):
+        return self.seconds / self.median if self.median else float('inf')
+
+    def format(self):
+        what = f"{self.test} / {self.step}" if self.step else self.test
+        return (f"🐢 [{self.device or '-'}] {what}: {self.seconds:.2f}s vs median {self.median:.2f}s "
+                f"(MAD {self.mad:.2f}s, {self.samples} runs, x{self.slowdown:.2f})")
+
+
+class TimingStore:
+    """SQLite-backed history of test and step durations."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Parallel workers write to the same file; WAL lets readers and one writer coexist.
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+
+    def start_run(self, git_commit=None, app_build=None, profile=None, run_key=None):
+        with self._lock, self.db:
+            cursor = self.db.execute(
+                'INSERT INTO runs (run_key, started, git_commit, app_build, profile, host) VALUES (?, ?, ?, ?, ?, ?)',
+                (run_key or run_id(), time.time(), git_commit, app_build, profile, socket.gethostname()),
+            )
+        return cursor.lastrowid
+
+    def record(self, run, rows):
+        """Insert (kind, test, step, device, seconds, outcome) rows for a run in one transaction."""
+        now = time.time()
+        with self._lock, self.db:
+            self.db.executemany(
+                'INSERT INTO timings (run_id, kind, test, step, device, seconds, outcome, recorded) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run, kind, test, step or '', device or '', seconds, outcome, now)
+                 for kind, test, step, device, seconds, outcome in rows],
+            )
+
+    def history(self, test, step='', device=None, kind=None, limit=20):
+        """Most recent first: [(seconds, outcome, git_commit, app_build, profile, recorded)]."""
+        query = ('SELECT t.seconds, t.outcome, r.git_commit, r.app_build, r.profile, t.recorded '
+                 'FROM timings t JOIN runs r ON r.id = t.run_id WHERE t.test = ? AND t.step = ?')
+        params = [test, step or '']
+        if device is not None:
+            query += ' AND t.device = ?'
+            params.append(device)
+        if kind is not None:
+            query += ' AND t.kind = ?'
+            params.append(kind)
+        query += ' ORDER BY t.recorded DESC, t.rowid DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            return self.db.execute(query, params).fetchall()
+
+    def keys(self):
+        with self._lock:
+            return self.db.execute('SELECT DISTINCT kind, test, step, device FROM timings ORDER BY test, step').fetchall()
+
+    def median_durations(self, window=20):
+        """{test: median of its last `window` passing durations} over all devices."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT test, seconds FROM timings WHERE kind = 'test' AND (outcome IS NULL OR outcome = 'passed') "
+                'ORDER BY recorded DESC, rowid DESC'
+            ).fetchall()
+        samples = {}
+        for test, seconds in rows:
+            recent = samples.setdefault(test, [])
+            if len(recent) < window:
+                recent.append(seconds)
+        return {test: statistics.median(recent) for test, recent in samples.items()}
+
+    def regressions(self, window=20, threshold=3.0, min_runs=5, min_delta=0.25):
+        """Keys whose latest passing sample exceeds median + threshold * scaled MAD of the previous window."""
+        found = []
+        for kind, test, step, device in self.keys():
+            with self._lock:
+                rows = self.db.execute(
+                    'SELECT seconds FROM timings WHERE kind = ? AND test = ? AND step = ? AND device = ? '
+                    "AND (outcome IS NULL OR outcome = 'passed') ORDER BY recorded DESC, rowid DESC LIMIT ?",
+                    (kind, test, step, device, window + 1),
+                ).fetchall()
+            if len(rows) < min_runs + 1:
+                continue
+            latest, previous = rows[0][0], [row[0] for row in rows[1:]]
+            median = statistics.median(previous)
+            mad = statistics.median(abs(x - median) for x in previous) * MAD_SCALE
+            if latest > median + max(threshold * mad, min_delta):
+                found.append(Regression(kind, test, step, device, latest, median, mad, len(previous), threshold))
+        return sorted(found, key=lambda r: r.seconds - r.median, reverse=True)
+
+
+class TimingRecorder:
+    """Step listener that writes test and step durations to a TimingStore."""
+
+    def __init__(self, store, device=None, git_commit=None, app_build=None, profile=None):
+        self.store = store
+        self.device = device
+        self.run = store.start_run(git_commit, app_build, profile)
+        self._rows = []
+
+    def __call__(self, event, data):
+        if event == 'step_end':
+            self._rows.append(('step', data['test'] or '-', data['step'], self.device, data['duration'], None))
+        elif event == 'test_end':
+            outcome = data.get('outcome')
+            # Steps take the outcome of their test so failed attempts don't count as history.
+            rows = [row[:5] + (outcome,) for row in self._rows]
+            if data.get('duration') is not None:
+                rows.append(('test', data['test'], '', self.device, data['duration'], outcome))
+            self._rows = []
+            self.store.record(self.run, rows)
+
+    def close(self):
+        steps.remove_listener(self)
+        self.store.close()
+
+
+def install_timing_recorder(path=None):
+    """Record every test/step of a device run into the timing store; $TIMING_DB=off disables it."""
+    if os.getenv('TIMING_DB') == 'off' or not recording_enabled():
+        return None
+    from .capabilities import default_profile
+
+    recorder = TimingRecorder(
+        TimingStore(path),
+        device=os.getenv('LIVEBOARD_WORKER') or os.getenv('DEVICE_NAME') or os.getenv('ANDROID_DEVICE_NAME'),
+        git_commit=git_commit(),
+        app_build=os.getenv('APP_BUILD'),
+        profile=default_profile(),
+    )
+    steps.add_listener(recorder)
+    return recorder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the per-step timing history")
+    parser.add_argument('--db', default=None, help="SQLite file (default: $TIMING_DB or artifacts/timings.sqlite)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    regressions = commands.add_parser('regressions', help="Flag slowdowns of the latest run (exit 1 if any)")
+    regressions.add_argument('--window', type=int, default=20, help="Previous runs to compare against")
+    regressions.add_argument('--threshold', type=float, default=3.0, help="Scaled MADs above the median")
+    regressions.add_argument('--min-runs', type=int, default=5, help="History needed before judging")
+    regressions.add_argument('--min-delta', type=float, default=0.25, help="Ignore slowdowns below this many seconds")
+
+    history = commands.add_parser('history', help="Recent durations of one test or step")
+    history.add_argument('test')
+    history.add_argument('--step', default='')
+    history.add_argument('--device')
+    history.add_argument('--limit', type=int, default=20)
+
+    args = parser.parse_args(argv)
+    store = TimingStore(args.db)
+    try:
+        if args.command == 'regressions':
+            found = store.regressions(args.window, args.threshold, args.min_runs, args.min_delta)
+            for regression in found:
+                print(regression.format())
+            print(f"{'❌' if found else '✅'} {len(found)} significant slowdown(s) in {store.path}")
+            return 1 if found else 0
+        for seconds, outcome, commit, build, profile, recorded in store.history(
+                args.test, args.step, args.device, limit=args.limit):
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(recorded))
+            print(f"{when} | {seconds:8.2f}s | {outcome or '-':<7} | {(commit or '-')[:10]:<10} | "
+                  f"build {build or '-'} | {profile or '-'}")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Compact in-memory model of the iOS / Android UI hierarchy parsed from page_source.
+
+Besides the tree itself this gives the wait and flow code three cheap ways
+to compare two page sources:
+
+* node.shape: a hash of a subtree's structure (element types and the
+  attributes that identify elements), ignoring geometry, typed values and
+  enabled/focus state, so "the screen changed" means a different screen,
+  not a moved keyboard or a filled-in field
+* node.digest: a hash of everything, which lets diff_trees() skip identical
+  subtrees
+* fingerprint(root): a stable (cross-process) hex id of a screen's shape,
+  used by screens.ScreenCache to recognise screens it has seen before
+"""
+
+import hashlib
+import xml.etree.ElementTree as ET
+
+
+# Attributes that tell one element from another; everything else may change while a screen is shown.
+IDENTITY_ATTRIBUTES = ('type', 'name', 'label', 'class', 'resource-id', 'content-desc', 'text')
+
+# Geometry attributes of iOS (x, y, width, height) and Android (bounds) elements.
+GEOMETRY_ATTRIBUTES = frozenset({'x', 'y', 'width', 'height', 'bounds'})
+
+
+def _editable(tag):
+    """Android text inputs, whose text attribute is what was typed (iOS puts that in value)."""
+    return tag.endswith('EditText') or tag.endswith('AutoCompleteTextView')
+
+
+class UiNode:
+    """One element of the UI hierarchy."""
+
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'position', '_shape', '_digest')
+
+    def __init__(self, tag, attrs, parent=None, position=0):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        self.position = position
+        self._shape = None
+        self._digest = None
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def iter(self):
+        """Yield this node and all descendants in document order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    @property
+    def key(self):
+        """(tag, identifying attributes): what makes this element the same element in another snapshot."""
+        attrs = self.attrs
+        editable = _editable(self.tag)
+        return (self.tag,) + tuple(attrs.get(name) for name in IDENTITY_ATTRIBUTES
+                                   if not (editable and name == 'text'))
+
+    @property
+    def shape(self):
+        """Hash of this subtree's element keys (no geometry, values or state)."""
+        if self._shape is None:
+            self._hash_subtree()
+        return self._shape
+
+    @property
+    def digest(self):
+        """Hash of this subtree's tags and all attributes."""
+        if self._digest is None:
+            self._hash_subtree()
+        return self._digest
+
+    def _hash_subtree(self):
+        # Children before parents, without recursion (real hierarchies can be deep).
+        for node in reversed(list(self.iter())):
+            children = node.children
+            node._shape = hash((node.key, tuple(c._shape for c in children)))
+            node._digest = hash((node.tag, tuple(sorted(node.attrs.items())), tuple(c._digest for c in children)))
+
+    @property
+    def rect(self):
+        """(x, y, width, height) from iOS geometry attributes or Android bounds, if present."""
+        if 'x' in self.attrs:
+            try:
+                return tuple(int(float(self.attrs[k])) for k in ('x', 'y', 'width', 'height'))
+            except (KeyError, ValueError):
+                return None
+        bounds = self.attrs.get('bounds')
+        if bounds:
+            try:
+                left, top, right, bottom = (int(v) for v in bounds.replace('][', ',').strip('[]').split(','))
+            except ValueError:
+                return None
+            return (left, top, right - left, bottom - top)
+        return None
+
+    def __repr__(self):
+        label = self.attrs.get('name') or self.attrs.get('text') or self.attrs.get('resource-id') or ''
+        return f"<UiNode {self.tag} {label!r}>"
+
+
+def parse_page_source(source):
+    """Parse an Appium page_source XML string into a UiNode tree and return its root."""
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    root_element = ET.fromstring(source)
+    root = UiNode(root_element.tag, dict(root_element.attrib))
+    stack = [(root_element, root)]
+    while stack:
+        element, node = stack.pop()
+        for position, child_element in enumerate(element):
+            child = UiNode(child_element.tag, dict(child_element.attrib), node, position)
+            node.children.append(child)
+            stack.append((child_element, child))
+    return root
+
+
+def fingerprint(root):
+    """Stable hex id of a screen's shape (same across processes, unlike node.shape)."""
+    h = hashlib.blake2b(digest_size=8)
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        h.update(repr((depth, node.key)).encode('utf-8'))
+        stack.extend((child, depth + 1) for child in reversed(node.children))
+    return h.hexdigest()
+
+
+class TreeDiff:
+    """Elements added, removed and changed between two snapshots of a screen."""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = []
+
+    @property
+    def identical(self):
+        return not (self.added or self.removed or self.changed)
+
+    @property
+    def structural(self):
+        """Elements appeared or disappeared (a different or re-laid-out screen)."""
+        return bool(self.added or self.removed)
+
+    @property
+    def geometry_only(self):
+        """Only positions and sizes changed, e.g. an animation."""
+        return not self.structural and bool(self.changed) and all(
+            attributes <= GEOMETRY_ATTRIBUTES for _, _, attributes in self.changed)
+
+    def summary(self):
+        if self.identical:
+            return "identical"
+        kind = "structural" if self.structural else "geometry" if self.geometry_only else "attributes"
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)} ({kind})"
+
+
+def diff_trees(old, new):
+    """Compare two UiNode trees, skipping identical subtrees by digest.
+
+    Children are paired by position while their keys line up and by key
+    (in order) where elements were inserted or removed.
+    """
+    diff = TreeDiff()
+    stack = [(old, new)]
+    while stack:
+        a, b = stack.pop()
+        if a.digest == b.digest:
+            continue
+        if a.key != b.key:
+            diff.removed.append(a)
+            diff.added.append(b)
+            continue
+        if a.attrs != b.attrs:
+            names = {n for n in a.attrs.keys() | b.attrs.keys() if a.attrs.get(n) != b.attrs.get(n)}
+            diff.changed.append((a, b, names))
+        if len(a.children) == len(b.children) and all(
+                x.key == y.key for x, y in zip(a.children, b.children)):
+            stack.extend(zip(a.children, b.children))
+            continue
+        unmatched = {}
+        for child in b.children:
+            unmatched.setdefault(child.key, []).append(child)
+        for child in a.children:
+            candidates = unmatched.get(child.key)
+            if candidates:
+                stack.append((child, candidates.pop(0)))
+            else:
+                diff.removed.append(child)
+        diff.added.extend(child for candidates in unmatched.values() for child in candidates)
+    return diff
@@ -0,0 +1,467 @@
+"""
+Perceptual screenshot comparison with NumPy.
+
+Every frame is reduced once to a VisualSignature: a 64-bit DCT perceptual
+hash (phash) plus a small grey grid of the screen (GRID_WIDTH cells wide).
+Two signatures are compared with compare(): the Hamming distance of the
+hashes says how different the screens look overall, the grid says which
+share of the screen changed and where, ignoring masked regions (status bar
+clock, blinking cursors) given as (x, y, width, height) fractions:
+
+    diff = compare(signature(decode_png(a)), signature(decode_png(b)), mask=[(0, 0, 1, 0.06)])
+    if diff.within(Tolerance(max_distance=10, max_changed=0.02)): ...
+
+GoldenStore checks screenshots against stored golden screens (recording the
+ones that are missing), and the screenshot pipeline uses signatures to drop
+near-duplicate frames. phash_many() hashes a batch of frames with one
+batched DCT; see benchmarks/bench_visual.py for the throughput.
+
+PNGs are decoded with Pillow (a project dependency). decode_png_numpy(),
+which undoes the PNG row filters vectorised (Paeth and Average rows along
+anti-diagonals), is the fallback for an environment without it and is too
+slow on Paeth-filtered screenshots for a device run.
+"""
+
+import io
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+
+from .artifacts import process_tag, run_directory
+
+
+GRID_WIDTH = 64
+# Pixels per grid cell side that signatures sample at least; wider frames are strided.
+SAMPLES_PER_CELL = 4
+# Mean grey-level difference (0-255) above which a grid cell counts as changed.
+CELL_THRESHOLD = 12
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG colour type -> channels
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+# --- PNG -------------------------------------------------------------------
+
+def decode_png(data):
+    """An RGB uint8 array (height, width, 3) of a PNG; uses Pillow if installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return decode_png_numpy(data)
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def _chunks(data):
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG")
+    offset = 8
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def decode_png_numpy(data):
+    """Decode an 8- or 16-bit, non-interlaced PNG to an RGB uint8 array without Pillow."""
+    header, palette, idat = None, None, []
+    for kind, body in _chunks(data):
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = np.frombuffer(body, np.uint8).reshape(-1, 3)
+        elif kind == b'IDAT':
+            idat.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise ValueError("PNG has no IHDR chunk")
+    width, height, depth, colour, _, _, interlace = header
+    if interlace or depth not in (8, 16) or colour not in _CHANNELS:
+        raise ValueError(f"unsupported PNG (bit depth {depth}, colour type {colour}, interlace {interlace}); "
+                         f"install Pillow to decode it")
+    channels = _CHANNELS[colour]
+    bpp = channels * depth // 8
+    raw = np.frombuffer(zlib.decompress(b''.join(idat)), np.uint8).reshape(height, 1 + width * bpp)
+    pixels = _unfilter(raw[:, 0], raw[:, 1:].reshape(height, width, bpp))
+    if depth == 16:
+        pixels = pixels[:, :, 0::2]  # high byte of each big-endian sample
+    if colour == 3:
+        return palette[pixels[:, :, 0]]
+    if channels <= 2:
+        return np.repeat(pixels[:, :, :1], 3, axis=2)
+    return np.ascontiguousarray(pixels[:, :, :3])
+
+
+def _unfilter(filters, rows):
+    """Undo the per-row PNG filters of (height, width, bytes per pixel) filtered bytes."""
+    if filters.max(initial=0) > 4:
+        raise ValueError("corrupt PNG: unknown row filter")
+    if (filters >= 3).any():
+        return _unfilter_diagonal(filters, rows)
+    out = np.empty_like(rows)
+    previous = np.zeros_like(rows[0])
+    for y in range(rows.shape[0]):
+        row = rows[y]
+        if filters[y] == 2:
+            row = row + previous
+        elif filters[y] == 1:
+            row = np.cumsum(row, axis=0, dtype=np.uint8)  # wraps modulo 256 like the filter
+        out[y] = row
+        previous = row
+    return out
+
+
+def _unfilter_diagonal(filters, rows):
+    """Average/Paeth rows depend on the left and upper pixels: decode one anti-diagonal at a time."""
+    height, width, bpp = rows.shape
+    # One zero row above and one zero column left of the image stand in for "outside".
+    out = np.zeros((height + 1, width + 1, bpp), np.int16)
+    raw = rows.astype(np.int16)
+    kind = filters.astype(np.intp)
+    for d in range(height + width - 1):
+        ys = np.arange(max(0, d - width + 1), min(height, d + 1))
+        xs = d - ys
+        a = out[ys + 1, xs]
+        b = out[ys, xs + 1]
+        c = out[ys, xs]
+        p = a + b - c
+        pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+        paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+        predictor = np.choose(kind[ys][:, None], [np.zeros_like(a), a, b, (a + b) >> 1, paeth])
+        out[ys + 1, xs + 1] = (raw[ys, xs] + predictor) & 0xFF
+    return out[1:, 1:].astype(np.uint8)
+
+
+def encode_png(pixels):
+    """PNG bytes of an RGB (or grey) uint8 array; Up-filtered, which keeps UI screens small."""
+    pixels = np.ascontiguousarray(pixels, np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    height, width, channels = pixels.shape
+    rows = pixels.reshape(height, width * channels)
+    filtered = np.empty((height, 1 + width * channels), np.uint8)
+    filtered[:, 0] = 2
+    filtered[:, 1:] = rows - np.vstack([np.zeros_like(rows[:1]), rows[:-1]])
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    colour = {1: 0, 3: 2, 4: 6}[channels]
+    return (PNG_SIGNATURE
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, colour, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(filtered.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+# --- Signatures ------------------------------------------------------------
+
+def grey(pixels):
+    """Luma (ITU-R BT.601) of an RGB array as float32."""
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    return pixels[:, :, :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], np.float32)
+
+
+def _bins(size, count):
+    return np.linspace(0, size, count + 1).astype(np.intp)[:-1]
+
+
+def downscale(image, height, width):
+    """Area-average an image (2-D, or 3-D with channels last) down to (height, width) cells."""
+    if image.shape[0] < height or image.shape[1] < width:
+        image = np.repeat(np.repeat(image, -(-height // image.shape[0]), axis=0), -(-width // image.shape[1]), axis=1)
+    rows, cols = _bins(image.shape[0], height), _bins(image.shape[1], width)
+    # Sum uint8 pixels in uint32 rather than converting the whole frame to float first.
+    dtype = np.uint32 if image.dtype == np.uint8 else np.float64
+    sums = np.add.reduceat(np.add.reduceat(image, cols, axis=1, dtype=dtype), rows, axis=0, dtype=dtype)
+    counts = np.outer(np.diff(np.append(rows, image.shape[0])), np.diff(np.append(cols, image.shape[1])))
+    return np.divide(sums, counts[:, :, None] if sums.ndim == 3 else counts, dtype=np.float32)
+
+
+def _grid(pixels):
+    """Grey GRID_WIDTH-wide thumbnail of a frame (averaging is linear, so grey after downscaling).
+
+    Cells are averaged from every n-th pixel of big frames, at least SAMPLES_PER_CELL samples
+    per cell side: a 1170-pixel wide screenshot is read at a quarter of its rows and columns.
+    """
+    height, width = pixels.shape[:2]
+    step = max(1, width // (GRID_WIDTH * SAMPLES_PER_CELL))
+    return grey(downscale(pixels[::step, ::step], max(1, round(GRID_WIDTH * height / width)), GRID_WIDTH))
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    return np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)).astype(np.float32)
+
+
+_DCT32 = _dct_matrix(32)
+_BIT_WEIGHTS = (1 << np.arange(63, -1, -1, dtype=np.uint64)).astype(np.uint64)
+
+
+def _phash_cells(cells):
+    """64-bit hashes of (n, 32, 32) grey thumbnails: low 8x8 DCT frequencies above their median."""
+    freq = np.einsum('ij,njk,lk->nil', _DCT32, cells, _DCT32)[:, :8, :8].reshape(len(cells), 64)
+    # The DC term only says how bright the screen is; the median skips it. Flat UI screens have
+    # many coefficients at about the median, so a small dead zone keeps their bits from flickering.
+    ac = freq[:, 1:]
+    bits = freq > np.median(ac, axis=1, keepdims=True) + 0.05 * ac.std(axis=1, keepdims=True)
+    return (bits.astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1, dtype=np.uint64)
+
+
+def phash(pixels):
+    """64-bit DCT perceptual hash of one RGB or grey frame."""
+    return int(phash_many([pixels])[0])
+
+
+def phash_many(frames):
+    """Perceptual hashes of many frames (a uint64 array), with one batched DCT."""
+    if not len(frames):
+        return np.zeros(0, np.uint64)
+    return _phash_cells(np.stack([downscale(_grid(frame), 32, 32) for frame in frames]).astype(np.float32))
+
+
+def hamming(a, b):
+    return (int(a) ^ int(b)).bit_count()
+
+
+def hamming_many(hash_, hashes):
+    """Hamming distances of one hash to an array of hashes."""
+    x = np.asarray(hashes, np.uint64) ^ np.uint64(hash_)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x).astype(np.intp)
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class VisualSignature:
+    """Perceptual hash and grey grid of one frame; what comparisons need, a few KiB at most."""
+
+    __slots__ = ('hash', 'grid', 'size')
+
+    def __init__(self, hash_, grid, size):
+        self.hash = hash_
+        self.grid = grid
+        self.size = size
+
+    @property
+    def aspect(self):
+        return self.size[1] / self.size[0]
+
+
+def signature(pixels):
+    """VisualSignature of an RGB or grey frame."""
+    grid = _grid(pixels)
+    hash_ = int(_phash_cells(downscale(grid, 32, 32)[None].astype(np.float32))[0])
+    return VisualSignature(hash_, grid.round().astype(np.uint8), (pixels.shape[1], pixels.shape[0]))
+
+
+def signature_of_png(data):
+    return signature(decode_png(data))
+
+
+# --- Comparison ------------------------------------------------------------
+
+class Tolerance:
+    """How different two frames may be: hash bits and share of unmasked grid cells changed."""
+
+    def __init__(self, max_distance=10, max_changed=0.02):
+        self.max_distance = max_distance
+        self.max_changed = max_changed
+
+    def __repr__(self):
+        return f"Tolerance(max_distance={self.max_distance}, max_changed={self.max_changed})"
+
+
+class VisualDiff:
+    """Result of comparing two signatures."""
+
+    def __init__(self, distance, changed, box, cells=None, comparable=True):
+        self.distance = distance
+        self.changed = changed
+        self.box = box
+        self.cells = cells
+        self.comparable = comparable
+
+    def within(self, tolerance):
+        return self.comparable and self.distance <= tolerance.max_distance and self.changed <= tolerance.max_changed
+
+    def format(self):
+        if not self.comparable:
+            return "different screen sizes"
+        where = ""
+        if self.box:
+            x, y, w, h = self.box
+            where = f" in ({x:.2f}, {y:.2f}, {w:.2f}x{h:.2f})"
+        return f"{self.distance} bits apart, {self.changed:.1%} of the screen changed{where}"
+
+
+def mask_array(shape, regions):
+    """Boolean grid of `shape`, True inside the (x, y, width, height) fractions in `regions`."""
+    mask = np.zeros(shape, bool)
+    rows, cols = shape
+    for x, y, w, h in regions:
+        mask[int(y * rows):int(np.ceil((y + h) * rows)), int(x * cols):int(np.ceil((x + w) * cols))] = True
+    return mask
+
+
+def compare(a, b, mask=()):
+    """VisualDiff between signatures a and b, ignoring the masked regions."""
+    if abs(a.aspect - b.aspect) > 0.02 * a.aspect or a.grid.shape != b.grid.shape:
+        return VisualDiff(hamming(a.hash, b.hash), 1.0, None, comparable=False)
+    cells = np.abs(a.grid.astype(np.int16) - b.grid.astype(np.int16)) > CELL_THRESHOLD
+    ignored = mask_array(cells.shape, mask)
+    cells &= ~ignored
+    changed = cells.sum() / max(1, cells.size - ignored.sum())
+    box = None
+    if cells.any():
+        ys, xs = np.nonzero(cells)
+        rows, cols = cells.shape
+        box = (xs.min() / cols, ys.min() / rows, (xs.max() + 1 - xs.min()) / cols, (ys.max() + 1 - ys.min()) / rows)
+    return VisualDiff(hamming(a.hash, b.hash), float(changed), box, cells)
+
+
+def diff_image(a, b, cells):
+    """Golden next to the actual grid with changed cells in red, as RGB pixels (for review)."""
+    scale = 4
+    left, right = (np.repeat(g, 3).reshape(*g.shape, 3) for g in (a.grid, b.grid))
+    right = right.copy()
+    right[cells] = (right[cells] // 2 + np.array([127, 0, 0], np.uint8))
+    gap = np.full((a.grid.shape[0], 2, 3), 255, np.uint8)
+    side_by_side = np.concatenate([left, gap, right], axis=1)
+    return np.repeat(np.repeat(side_by_side, scale, axis=0), scale, axis=1)
+
+
+# --- Golden screens --------------------------------------------------------
+
+class VisualMismatch(AssertionError):
+    """A screenshot does not look like its golden screen."""
+
+
+class VisualResult:
+    def __init__(self, name, status, diff=None, path=None, artifacts=()):
+        self.name = name
+        self.status = status
+        self.diff = diff
+        self.path = path
+        self.artifacts = list(artifacts)
+
+    @property
+    def ok(self):
+        return self.status in ('match', 'recorded')
+
+    def format(self):
+        if self.status == 'recorded':
+            return f"🖼️ {self.name}: recorded golden {self.path}"
+        if self.status == 'missing':
+            seen = f" (this screen: {', '.join(self.artifacts)})" if self.artifacts else ""
+            return f"❌ {self.name}: no golden {self.path}; record it with VISUAL_UPDATE=1{seen}"
+        icon = "✅" if self.ok else "❌"
+        line = f"{icon} {self.name} vs golden: {self.diff.format()}"
+        if self.artifacts:
+            line += f" (see {', '.join(self.artifacts)})"
+        return line
+
+
+class GoldenStore:
+    """Golden screenshots under <directory>/<platform>[/<device>]/<name>.png.
+
+    A missing golden fails the check; update=True records (or re-records) instead.
+    """
+
+    def __init__(self, directory='goldens', tolerance=None, update=False, artifacts=None):
+        self.directory = directory
+        self.tolerance = tolerance or Tolerance()
+        self.update = update
+        self.artifacts = artifacts
+        self._signatures = {}
+        self.checked = 0
+        self.matched = 0
+        self.mismatched = 0
+        self.missing = 0
+        self.recorded = 0
+
+    def path(self, platform, name, device=None):
+        parts = [platform or 'any']
+        if device:
+            parts.append(re.sub(r'[^A-Za-z0-9_.-]+', '_', device).strip('_'))
+        return os.path.join(self.directory, *parts, f'{name}.png')
+
+    def golden(self, platform, name, device=None):
+        """Signature of a stored golden (read once), or None."""
+        path = self.path(platform, name, device)
+        if path not in self._signatures:
+            if not os.path.exists(path):
+                return None
+            with open(path, 'rb') as f:
+                self._signatures[path] = signature_of_png(f.read())
+        return self._signatures[path]
+
+    def record(self, platform, name, png, device=None):
+        path = self.path(platform, name, device)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(png)
+        self._signatures[path] = signature_of_png(png)
+        self.recorded += 1
+        return path
+
+    def check(self, platform, name, png, mask=(), device=None):
+        """Compare a PNG screenshot with the golden `name`; a missing golden fails unless updating."""
+        self.checked += 1
+        if self.update:
+            return VisualResult(name, 'recorded', path=self.record(platform, name, png, device))
+        path = self.path(platform, name, device)
+        golden = self.golden(platform, name, device)
+        if golden is None:
+            self.missing += 1
+            return VisualResult(name, 'missing', path=path,
+                                artifacts=self._write_artifacts(platform, name, png))
+        actual = signature_of_png(png)
+        diff = compare(golden, actual, mask)
+        if diff.within(self.tolerance):
+            self.matched += 1
+            return VisualResult(name, 'match', diff, path)
+        self.mismatched += 1
+        return VisualResult(name, 'mismatch', diff, path,
+                            self._write_artifacts(platform, name, png, golden, actual, diff))
+
+    def _write_artifacts(self, platform, name, png, golden=None, actual=None, diff=None):
+        directory = self.artifacts or run_directory('visual', process_tag())
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f'{platform}_{name}')
+        with open(f'{stem}_actual.png', 'wb') as f:
+            f.write(png)
+        if diff is None or not diff.comparable:
+            return [f'{stem}_actual.png']
+        with open(f'{stem}_diff.png', 'wb') as f:
+            f.write(encode_png(diff_image(golden, actual, diff.cells)))
+        return [f'{stem}_actual.png', f'{stem}_diff.png']
+
+    def stats(self):
+        return {'checked': self.checked, 'matched': self.matched, 'mismatched': self.mismatched,
+                'missing': self.missing, 'recorded': self.recorded}
+
+    def format(self):
+        s = self.stats()
+        return (f"🖼️ Visual checks: {s['matched']}/{s['checked']} matched, {s['mismatched']} mismatched, "
+                f"{s['missing']} without golden, {s['recorded']} golden(s) recorded -> {self.directory}")
+
+
+_default_store = None
+
+
+def get_golden_store():
+    """Process-wide store: $VISUAL_GOLDEN_DIR (default goldens), $VISUAL_UPDATE=1 records,
+    $VISUAL_MAX_DISTANCE hash bits (default 10) and $VISUAL_MAX_CHANGED share (default 0.02)."""
+    global _default_store
+    if _default_store is None:
+        _default_store = GoldenStore(
+            os.getenv('VISUAL_GOLDEN_DIR', 'goldens'),
+            Tolerance(int(os.getenv('VISUAL_MAX_DISTANCE', '10')), float(os.getenv('VISUAL_MAX_CHANGED', '0.02'))),
+            update=os.getenv('VISUAL_UPDATE', '') not in ('', '0'),
+        )
+    return _default_store
@@ -0,0 +1,219 @@
+"""
+Condition-based wait engine.
+
+Replaces fixed time.sleep() calls and the implicit + explicit wait mix with
+a single timeout policy: poll a real condition with adaptive backoff, stop
+as soon as it holds, and record how long every wait actually took.
+"""
+
+import re
+import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException, StaleElementReferenceException, TimeoutException, WebDriverException,
+)
+
+
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
+GEOMETRY_RE = re.compile(r'\b(?:x|y|width|height|bounds)="[^"]*"')
+
+# Seconds a click is given to change the screen before the (best effort) transition wait moves on.
+CHANGE_GRACE = 2.0
+
+
+def element_present(by, locator):
+    """Condition: the element exists; returns it."""
+    def condition(driver):
+        return driver.find_element(by, locator)
+    condition.__name__ = f"present {locator}"
+    return condition
+
+
+def element_clickable(by, locator):
+    """Condition: the element exists, is displayed and enabled; returns it."""
+    def condition(driver):
+        element = driver.find_element(by, locator)
+        return element if element.is_displayed() and element.is_enabled() else None
+    condition.__name__ = f"clickable {locator}"
+    return condition
+
+
+def screen_changed(previous_source):
+    """Condition: the page source differs from the one captured before an action."""
+    def condition(driver):
+        return driver.page_source != previous_source
+    condition.__name__ = "screen changed"
+    return condition
+
+
+def page_source_stable(quiet_period=0.5):
+    """Condition: the page source stayed identical for at least quiet_period seconds."""
+    state = {'source': None, 'since': None}
+
+    def condition(driver):
+        source = driver.page_source
+        now = time.monotonic()
+        if source != state['source']:
+            state['source'], state['since'] = source, now
+            return False
+        return now - state['since'] >= quiet_period
+    condition.__name__ = "page source stable"
+    return condition
+
+
+def no_animation(quiet_period=0.3):
+    """Condition: no element moved or resized (geometry attributes unchanged) for quiet_period seconds."""
+    state = {'geometry': None, 'since': None}
+
+    def condition(driver):
+        geometry = GEOMETRY_RE.findall(driver.page_source)
+        now = time.monotonic()
+        if geometry != state['geometry']:
+            state['geometry'], state['since'] = geometry, now
+            return False
+        return now - state['since'] >= quiet_period
+    condition.__name__ = "no animation"
+    return condition
+
+
+class WaitRecord:
+    """How long one wait took, and how long the fixed sleep it replaced would have taken."""
+
+    def __init__(self, name, elapsed, polls, succeeded, replaces):
+        self.name = name
+        self.elapsed = elapsed
+        self.polls = polls
+        self.succeeded = succeeded
+        self.replaces = replaces
+
+    @property
+    def saved(self):
+        return self.replaces - self.elapsed if self.replaces else 0.0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'elapsed': round(self.elapsed, 3),
+            'polls': self.polls,
+            'succeeded': self.succeeded,
+            'replaces': self.replaces,
+        }
+
+
+class WaitLog:
+    """Collects WaitRecords from every engine in the process."""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    @property
+    def total_waited(self):
+        return sum(r.elapsed for r in self.records)
+
+    @property
+    def fixed_sleep_seconds(self):
+        return sum(r.replaces for r in self.records)
+
+    @property
+    def seconds_saved(self):
+        return sum(r.saved for r in self.records)
+
+    def format(self):
+        return (f"⏱️ Waits: {len(self.records)} condition waits took {self.total_waited:.2f}s "
+                f"in place of {self.fixed_sleep_seconds:.2f}s of fixed sleeps "
+                f"({self.seconds_saved:.2f}s saved)")
+
+
+_default_log = WaitLog()
+
+
+def get_wait_log():
+    return _default_log
+
+
+class WaitEngine:
+    """Polls conditions against one driver under a single timeout policy."""
+
+    def __init__(self, driver, timeout=15, initial_interval=0.1, max_interval=1.0, backoff=1.5, log=None,
+                 change_grace=CHANGE_GRACE):
+        self.driver = driver
+        self.timeout = timeout
+        self.change_grace = change_grace
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.log = log if log is not None else get_wait_log()
+        self.records = []
+        # Implicit waits would stretch every poll below, so the engine owns all waiting.
+        driver.implicitly_wait(0)
+
+    def until(self, condition, name=None, timeout=None, replaces=0.0, required=True):
+        """Poll condition(driver) until it returns a truthy value and return that value.
+
+        On timeout raises TimeoutException, or returns None when required=False
+        (for waits that only replace a "give the app a moment" sleep).
+        """
+        name = name or getattr(condition, '__name__', 'condition')
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        value, polls, last_error = self._poll(condition, timeout)
+        self._record(name, start, polls, bool(value), replaces)
+        if value:
+            return value
+        if required:
+            raise TimeoutException(f"Timed out after {timeout}s waiting for {name}") from last_error
+        return None
+
+    def click_and_wait_for_transition(self, element, name="screen transition", timeout=None, replaces=0.0):
+        """Click an element, then wait (at most change_grace) for the screen to change, and for it to settle.
+
+        A click that leaves the screen as it was (a toggle, a lost tap) costs the grace period, not the timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            before = self.driver.page_source
+        except WebDriverException:
+            before = None
+        element.click()
+        # Both waits together stand in for the one fixed sleep, so they are recorded as one wait
+        start = time.monotonic()
+        polls = 0
+        if before is not None:
+            _, polls, _ = self._poll(screen_changed(before), min(timeout, self.change_grace))
+        value, settle_polls, _ = self._poll(page_source_stable(), timeout)
+        self._record(name, start, polls + settle_polls, bool(value), replaces)
+        return value or None
+
+    def format(self):
+        waited = sum(r.elapsed for r in self.records)
+        replaced = sum(r.replaces for r in self.records)
+        return f"⏱️ {len(self.records)} waits took {waited:.2f}s (fixed sleeps were {replaced:.2f}s)"
+
+    def _poll(self, condition, timeout):
+        """(value, polls, last ignored error) of polling condition with backoff for at most timeout."""
+        deadline = time.monotonic() + timeout
+        interval = self.initial_interval
+        polls = 0
+        last_error = None
+        while True:
+            polls += 1
+            try:
+                value = condition(self.driver)
+                if value:
+                    return value, polls, last_error
+            except IGNORED_EXCEPTIONS as e:
+                last_error = e
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, polls, last_error
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+    def _record(self, name, start, polls, succeeded, replaces):
+        record = WaitRecord(name, time.monotonic() - start, polls, succeeded, replaces)
+        self.records.append(record)
+        self.log.add(record)
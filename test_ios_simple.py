@@ -34,44 +34,21 @@ def test_ios_connection():
         from selenium.webdriver.support import expected_conditions as EC
         from selenium.webdriver.remote.remote_connection import RemoteConnection
         
-        # Configure iOS capabilities
-        capabilities = {
-            'platformName': 'iOS',
-            'platformVersion': platform_version,
-            'deviceName': device_name,
-            'udid': device_udid,
-            'bundleId': 'com.liveboard.LiveBoard',
-            'automationName': 'XCUITest',
-            'newCommandTimeout': 300,
-            'wdaLaunchTimeout': 60000,
-            'wdaConnectionTimeout': 60000,
-            'xcuitestTeamId': team_id,
-            'updateWDABundleId': f"{team_id}.WebDriverAgentRunner"
-        }
+        from liveboard_test.steps import step
         
+        step("Connect to Appium server")
         print("🔗 Connecting to Appium server...")
         
-        # Create driver with newer Appium syntax
-        from appium.options.ios.xcuitest.base import XCUITestOptions
-        
-        options = XCUITestOptions()
-        options.platform_name = "iOS"
-        options.platform_version = platform_version
-        options.device_name = device_name
-        options.udid = device_udid
-        options.bundle_id = "com.inconceptlabs.liveboard"
-        options.automation_name = "XCUITest"
-        options.new_command_timeout = 600
-        options.wda_launch_timeout = 180000
-        options.wda_connection_timeout = 180000
-        
-        # Add team ID and WDA bundle ID using set_capability
-        options.set_capability("xcuitestTeamId", team_id)
-        options.set_capability("updateWDABundleId", f"{team_id}.WebDriverAgentRunner")
-        options.set_capability("showXcodeLog", True)
-        options.set_capability("usePrebuiltWDA", True)
-        
-        driver = WebDriver('http://localhost:4723/wd/hub', options=options)
+        # Capabilities come from the shared profile registry; this smoke test reuses the installed WDA
+        from liveboard_test.capabilities import build_options, get_session_timings
+        
+        options = build_options('ios', profile=os.getenv('CAPABILITY_PROFILE', 'prebuilt'),
+                                overrides={'showXcodeLog': True})
+        
+        from liveboard_test.drivers import create_driver
+        from liveboard_test.instrumentation import get_recorder
+
+        driver = create_driver('http://localhost:4723/wd/hub', options)
         driver.implicitly_wait(10)
         
         print("✅ Connected to iOS device successfully!")
@@ -86,41 +63,49 @@ def test_ios_connection():
         time.sleep(5)
         
         # Try to find any elements on screen
+        step("Inspect UI elements")
         print("🔍 Looking for UI elements...")
         
-        # Get page source for debugging
+        # One page source gives every element's attributes (see liveboard_test.snapshot)
+        from liveboard_test.snapshot import ElementSnapshot
+
+        snapshot = ElementSnapshot(driver)
         try:
-            page_source = driver.page_source
+            snapshot.refresh()
             print("✅ Successfully retrieved page source")
             
             # Look for common iOS elements
-            elements = driver.find_elements(AppiumBy.CLASS_NAME, "XCUIElementTypeButton")
+            elements = snapshot.of_type("XCUIElementTypeButton")
             print(f"Found {len(elements)} buttons")
             
-            elements = driver.find_elements(AppiumBy.CLASS_NAME, "XCUIElementTypeTextField")
+            elements = snapshot.of_type("XCUIElementTypeTextField")
             print(f"Found {len(elements)} text fields")
             
-            elements = driver.find_elements(AppiumBy.CLASS_NAME, "XCUIElementTypeStaticText")
+            elements = snapshot.of_type("XCUIElementTypeStaticText")
             print(f"Found {len(elements)} text elements")
             
         except Exception as e:
             print(f"⚠️ Could not analyze page elements: {e}")
         
         # Try to interact with the app
+        step("Interact with app")
         print("🎯 Attempting to interact with app...")
         
-        # Find all clickable elements
+        # Find all clickable elements; a WebElement is only looked up for the ones we click
         try:
-            clickable_elements = driver.find_elements(AppiumBy.CLASS_NAME, "XCUIElementTypeButton")
+            clickable_elements = snapshot.of_type("XCUIElementTypeButton") if snapshot.root is not None else []
             
             if clickable_elements:
                 print(f"Found {len(clickable_elements)} clickable elements")
                 
                 # Click on first few elements
-                for i, element in enumerate(clickable_elements[:3]):
+                for i in range(3):
+                    if i >= len(clickable_elements):
+                        break
+                    element = clickable_elements[i]
                     try:
-                        element_name = element.get_attribute("name") or f"Button {i+1}"
-                        if element.is_enabled() and element.is_displayed():
+                        element_name = element.name or f"Button {i+1}"
+                        if element.enabled and element.visible:
                             print(f"🔘 Clicking: {element_name}")
                             element.click()
                             time.sleep(2)
@@ -130,6 +115,10 @@ def test_ios_connection():
                             driver.save_screenshot(screenshot_name)
                             print(f"📸 Screenshot saved: {screenshot_name}")
                             
+                            # The click may have changed the screen: pick the next button from a fresh snapshot
+                            snapshot.refresh()
+                            clickable_elements = snapshot.of_type("XCUIElementTypeButton")
+                            
                     except Exception as e:
                         print(f"⚠️ Could not click element {i+1}: {e}")
             else:
@@ -137,6 +126,7 @@ def test_ios_connection():
                 
         except Exception as e:
             print(f"⚠️ Error finding clickable elements: {e}")
+        print(snapshot.format())
         
         # Final screenshot
         screenshot_name = f"ios_test_final_{timestamp}.png"
@@ -149,6 +139,8 @@ def test_ios_connection():
         
         duration = time.time() - start_time
         print(f"✅ Test completed successfully in {duration:.2f} seconds!")
+        print(get_recorder().format())
+        print(get_session_timings().format())
         
         return True
         
@@ -167,5 +159,17 @@ def test_ios_connection():
 
 
 if __name__ == "__main__":
+    from liveboard_test import steps
+    from liveboard_test.timing_store import install_timing_recorder
+
+    # Keep this run's total and step durations in the timing history (it drives a real device)
+    os.environ.setdefault('LIVEBOARD_RECORD', '1')
+    recorder = install_timing_recorder()
+    steps.start_test("test_ios_simple.py::test_ios_connection")
+    run_start = time.time()
     success = test_ios_connection()
+    steps.end_test("test_ios_simple.py::test_ios_connection", outcome='passed' if success else 'failed',
+                   duration=time.time() - run_start)
+    if recorder:
+        recorder.close()
     sys.exit(0 if success else 1) 
\ No newline at end of file
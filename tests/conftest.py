@@ -1,64 +1,44 @@
 import pytest
 import os
-import time
-from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
 
+from liveboard_test import steps
+from liveboard_test.capabilities import build_options
+from liveboard_test.device_logs import start_device_logs, stop_device_logs
+from liveboard_test.drivers import create_driver
+from liveboard_test.mjpeg import start_mjpeg_capture
+from liveboard_test.preflight import unhealthy_reason
+from liveboard_test.screenshots import get_screenshot_pipeline
+
 
 @pytest.fixture(scope="session")
 def ios_driver():
     """Create iOS driver for testing."""
-    # Get device configuration from environment
-    device_udid = os.getenv('DEVICE_UDID', 'auto')
-    device_name = os.getenv('DEVICE_NAME', 'iPhone SE')
-    platform_version = os.getenv('PLATFORM_VERSION', '17.2')
-    team_id = os.getenv('TEAM_ID', '2FHJSTZ57U')
-    
-    # Configure iOS capabilities
-    capabilities = {
-        'platformName': 'iOS',
-        'platformVersion': platform_version,
-        'deviceName': device_name,
-        'udid': device_udid,
-        'bundleId': 'com.inconceptlabs.liveboard',
-        'automationName': 'XCUITest',
-        'newCommandTimeout': 600,
-        'wdaLaunchTimeout': 180000,
-        'wdaConnectionTimeout': 180000,
-        'xcuitestTeamId': team_id,
-        'updateWDABundleId': f"{team_id}.WebDriverAgentRunner"
-    }
-    
-    # Create driver
-    from appium.options.ios.xcuitest.base import XCUITestOptions
-    
-    options = XCUITestOptions()
-    options.platform_name = capabilities['platformName']
-    options.platform_version = capabilities['platformVersion']
-    options.device_name = capabilities['deviceName']
-    options.udid = capabilities['udid']
-    options.bundle_id = capabilities['bundleId']
-    options.automation_name = capabilities['automationName']
-    options.new_command_timeout = capabilities['newCommandTimeout']
-    options.wda_launch_timeout = capabilities['wdaLaunchTimeout']
-    options.wda_connection_timeout = capabilities['wdaConnectionTimeout']
-    
-    # Set additional capabilities
-    options.set_capability("xcuitestTeamId", capabilities['xcuitestTeamId'])
-    options.set_capability("updateWDABundleId", capabilities['updateWDABundleId'])
+    # Capabilities come from the shared profile registry ($CAPABILITY_PROFILE, device env vars)
+    options = build_options('ios')
+    capabilities = options.to_capabilities()
     
     # Support different Appium ports for parallel execution
     appium_port = os.getenv('APPIUM_PORT', '4723')  # Default to 4723 for iOS
     appium_url = f'http://localhost:{appium_port}/wd/hub'
+
+    # Don't wait for a session start on a device the last preflight found dead
+    reason = unhealthy_reason('ios', appium_port)
+    if reason:
+        pytest.skip(reason)
     
-    driver = webdriver.Remote(appium_url, options.to_capabilities())
+    driver = create_driver(appium_url, options)
     driver.implicitly_wait(10)
+    start_mjpeg_capture(driver)
+    start_device_logs(driver)
     
-    print(f"✅ Connected to iOS device: {device_name} (UDID: {device_udid})")
+    print(f"✅ Connected to iOS device: {capabilities['appium:deviceName']} (UDID: {capabilities['appium:udid']}, "
+          f"profile: {options.capability_profile})")
     
     yield driver
     
     # Cleanup
+    stop_device_logs(driver)
     driver.quit()
     print("✅ iOS driver session ended")
 
@@ -66,53 +46,189 @@ def ios_driver():
 @pytest.fixture(scope="session")
 def driver():
     """Create Android driver for testing."""
-    # Get device configuration from environment
-    device_udid = os.getenv('ANDROID_DEVICE_UDID', 'auto')
-    device_name = os.getenv('ANDROID_DEVICE_NAME', 'Android Device')
-    platform_version = os.getenv('ANDROID_PLATFORM_VERSION', '11.0')
-    
-    # Configure Android capabilities
-    capabilities = {
-        'platformName': 'Android',
-        'platformVersion': platform_version,
-        'deviceName': device_name,
-        'udid': device_udid,
-        'appPackage': 'com.inconceptlabs.liveboard',
-        'appActivity': '.pages.activities.LaunchActivity',
-        'automationName': 'UiAutomator2',
-        'newCommandTimeout': 600,
-        'uiautomator2ServerLaunchTimeout': 180000,
-        'uiautomator2ServerInstallTimeout': 180000,
-        'autoGrantPermissions': True,
-        'noReset': True,
-        'fullReset': False
-    }
-    
-    from appium.options.android.uiautomator2.base import UiAutomator2Options
-    
-    options = UiAutomator2Options()
-    options.load_capabilities(capabilities)
+    # Capabilities come from the shared profile registry ($CAPABILITY_PROFILE, device env vars)
+    options = build_options('android')
+    capabilities = options.to_capabilities()
     
     # Support different Appium ports for parallel execution
     appium_port = os.getenv('APPIUM_PORT', '4724')  # Default to 4724 for Android
     appium_url = f'http://localhost:{appium_port}/wd/hub'
+
+    # Don't wait for a session start on a device the last preflight found dead
+    reason = unhealthy_reason('android', appium_port)
+    if reason:
+        pytest.skip(reason)
     
-    driver = webdriver.Remote(appium_url, options=options)
+    driver = create_driver(appium_url, options)
     driver.implicitly_wait(10)
+    start_mjpeg_capture(driver)
+    start_device_logs(driver)
     
-    print(f"✅ Connected to Android device: {device_name} (UDID: {device_udid})")
+    print(f"✅ Connected to Android device: {capabilities['appium:deviceName']} (UDID: {capabilities['appium:udid']}, "
+          f"profile: {options.capability_profile})")
     
     yield driver
     
     # Cleanup
+    stop_device_logs(driver)
     driver.quit()
     print("✅ Android driver session ended")
 
 
+@pytest.fixture(scope="session")
+def auth_states():
+    """Login-once manager shared by every test of the session ($AUTH_STATE_MODE, $AUTH_STATE_TTL)."""
+    from liveboard_test.auth_state import get_auth_state_manager
+
+    return get_auth_state_manager()
+
+
+@pytest.fixture
+def logged_in_ios_driver(ios_driver, auth_states):
+    """iOS driver with the app signed in, logging in through the UI only when no valid state exists."""
+    auth_states.ensure(ios_driver, 'ios')
+    return ios_driver
+
+
+@pytest.fixture
+def logged_in_driver(driver, auth_states):
+    """Android driver with the app signed in, logging in through the UI only when no valid state exists."""
+    auth_states.ensure(driver, 'android')
+    return driver
+
+
 def take_screenshot(driver, name="screenshot"):
-    """Take a screenshot and save it with timestamp."""
-    timestamp = int(time.time())
-    filename = f"android_test_{name}_{timestamp}.png"
-    driver.save_screenshot(filename)
-    print(f"📸 Screenshot saved: {filename}")
-    return filename 
\ No newline at end of file
+    """Fetch a screenshot and hand it to the background writer; returns its file name."""
+    pipeline = get_screenshot_pipeline()
+    filename = pipeline.capture(driver, name, prefix="android_test_")
+    print(f"📸 Screenshot {'buffered' if pipeline.failure_only else 'queued'}: {filename}")
+    return filename 
+
+def pytest_addoption(parser):
+    from liveboard_test.sharding import add_shard_options
+
+    add_shard_options(parser)
+
+
+def pytest_configure(config):
+    """Stream JSONL test events to the parallel runner (or build the run report), record step timings history and flaky tests, and select a shard."""
+    from liveboard_test.events import install_from_env
+    from liveboard_test.quarantine import install_quarantine_tracker
+    from liveboard_test.run_report import install_run_report
+    from liveboard_test.sharding import ShardSelector
+    from liveboard_test.timing_store import install_timing_recorder
+
+    config.liveboard_events = install_from_env()
+    # --collect-only (the sharding planner's subprocess among others) runs no test worth recording
+    if not config.option.collectonly:
+        install_run_report()
+        config.liveboard_timings = install_timing_recorder()
+        config.liveboard_quarantine = install_quarantine_tracker()
+    selector = ShardSelector.from_config(config)
+    if selector is not None:
+        config.pluginmanager.register(selector, 'liveboard-shards')
+
+
+def pytest_unconfigure(config):
+    for name in ('liveboard_events', 'liveboard_timings', 'liveboard_quarantine'):
+        listener = getattr(config, name, None)
+        if listener is not None:
+            listener.close()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    """Run quarantined (flaky) tests last so they don't hold up the rest of the suite."""
+    from liveboard_test.quarantine import load_quarantine
+
+    quarantine = load_quarantine()
+    if quarantine.entries:
+        items.sort(key=lambda item: item.nodeid in quarantine)
+
+
+def pytest_runtest_setup(item):
+    """Tag everything recorded from here on with the running test."""
+    steps.start_test(item.nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Remember the most relevant report (call phase, or whichever phase failed) on the item."""
+    from liveboard_test.screenshots import flush_failure_screenshots
+
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == 'call' or report.failed:
+        item.liveboard_report = report
+    if report.failed:
+        # Failure-only screenshot mode: write the frames leading up to the failure.
+        flush_failure_screenshots()
+        # Surface the failure right away rather than when the test has been torn down.
+        message = report.longreprtext.splitlines()[-1] if report.longreprtext else None
+        steps.notify('failure', test=item.nodeid, when=report.when, message=message)
+
+
+def pytest_runtest_teardown(item, nextitem):
+    report = getattr(item, 'liveboard_report', None)
+    if report is None:
+        steps.end_test(item.nodeid, outcome='skipped')
+    else:
+        message = report.longreprtext.splitlines()[-1] if report.failed and report.longreprtext else None
+        steps.end_test(item.nodeid, outcome=report.outcome, duration=report.duration, message=message)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    """All phases reported without a failure flush: the buffered screenshots are not needed."""
+    from liveboard_test.screenshots import discard_buffered_screenshots
+
+    discard_buffered_screenshots()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Collect device logs, quit pooled sessions, flush screenshots, save auth states and report what was saved."""
+    from liveboard_test.artifacts import process_tag, recording_enabled, run_directory
+    from liveboard_test.auth_state import shutdown_auth_state_manager
+    from liveboard_test.capabilities import get_session_timings, timings_path
+    from liveboard_test.connection_pool import shutdown_connection_pools
+    from liveboard_test.device_logs import shutdown_device_log_collectors
+    from liveboard_test.instrumentation import get_recorder
+    from liveboard_test.mjpeg import shutdown_mjpeg_recorders
+    from liveboard_test.run_report import shutdown_run_report
+    from liveboard_test.screenshots import shutdown_screenshot_pipeline
+    from liveboard_test.session_pool import shutdown_session_pool
+    from liveboard_test.waits import get_wait_log
+
+    # Pooled sessions are still open: collect their last log entries before they quit
+    for logs in shutdown_device_log_collectors():
+        print(logs.format())
+    pool = shutdown_session_pool()
+    if pool is not None:
+        print(f"\n{pool.format()}")
+    if get_wait_log().records:
+        print(get_wait_log().format())
+    for video in shutdown_mjpeg_recorders():
+        print(video.format())
+    pipeline = shutdown_screenshot_pipeline()
+    if pipeline is not None:
+        print(pipeline.format())
+    recorder = get_recorder()
+    if recorder.samples:
+        if recording_enabled():
+            path = recorder.write_json(os.path.join(run_directory(), f'command_latency-{process_tag()}.json'))
+            print(f"📈 Appium command latency ({path}):\n{recorder.format()}")
+        else:
+            print(f"📈 Appium command latency:\n{recorder.format()}")
+    timings = get_session_timings()
+    if timings.samples:
+        if recording_enabled():
+            timings.load(timings_path()).save(timings_path())
+        print(timings.format())
+    auth = shutdown_auth_state_manager()
+    if auth is not None:
+        print(auth.format())
+    pools = shutdown_connection_pools()
+    if pools is not None:
+        print(pools.format())
+    report = shutdown_run_report()
+    if report is not None:
+        print(report.format())
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+from liveboard_test.appium_servers import AppiumServerManager
+from liveboard_test.scheduler import Device
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# The fake server's CLI takes the same --address/--port/--base-path flags as appium.
+STUB_COMMAND = f'"{sys.executable}" -m liveboard_test.fake_appium'
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', SRC)
+    manager = AppiumServerManager(STUB_COMMAND, warm=1, max_sessions=2, max_rss_mb=None, log_dir=str(tmp_path))
+    yield manager
+    manager.close()
+
+
+def ios(udid='UDID-1'):
+    return Device('iPhone SE', 'ios', udid, 4723)
+
+
+def test_binds_a_warm_server_per_device_and_reuses_it(manager):
+    manager.prewarm()
+    assert manager.started == 1
+    warm_port = manager.servers()[0].port
+
+    device = ios()
+    first = manager.acquire(device)
+    assert first.port == warm_port and device.appium_port == warm_port
+    assert first.healthy()
+    manager.release(device)
+    assert manager.acquire(device) is first
+
+    other = ios('UDID-2')
+    manager.prewarm()
+    assert manager.acquire(other).port not in (warm_port, 4723)
+    stats = manager.stats()
+    assert stats['warm_hits'] == 2
+    assert stats['reused'] == 1 and stats['reuse_ratio'] == pytest.approx(1 / 3, abs=0.001)
+    assert stats['avg_start_seconds'] > 0
+
+
+def test_recycles_worn_out_and_dead_servers(manager):
+    device = ios()
+    with manager.server_for(device) as first:
+        pass
+    with manager.server_for(device) as same:
+        assert same is first
+    # Two sessions reached max_sessions: the process is gone and the next item gets a new one.
+    assert not first.alive()
+    second = manager.acquire(device)
+    assert second is not first and device.appium_port == second.port
+
+    second.process.kill()
+    second.process.wait()
+    third = manager.acquire(device)
+    assert third.healthy()
+    assert manager.stats()['recycled'] == {'sessions': 1, 'unhealthy': 1}
+
+
+def test_memory_limit_and_close_stop_every_process(tmp_path, monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', SRC)
+    manager = AppiumServerManager(STUB_COMMAND, warm=1, max_rss_mb=1, log_dir=str(tmp_path))
+    devices = [ios(), Device('Pixel', 'android', 'HT7991A08308', 4724)]
+    manager.bind(devices)
+    servers = manager.servers()
+    assert {d.appium_port for d in devices} == {s.port for s in servers if s.device}
+    # Every device streams its screen to its own port
+    assert len({d.mjpeg_port for d in devices}) == 2 and devices[0].env()['MJPEG_PORT'] == str(devices[0].mjpeg_port)
+    # ...and iOS devices forward WebDriverAgent to their own local port
+    assert devices[0].env()['WDA_LOCAL_PORT'] == str(devices[0].wda_port) and devices[1].wda_port is None
+
+    manager.release(devices[0])
+    assert manager.stats()['recycled'] == {'memory': 1}
+    manager.close()
+    assert not any(server.alive() for server in servers)
+    assert manager.servers() == []
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchElementException
+
+from liveboard_test.async_driver import AsyncWebDriver, SyncDriver
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.flows import FlowRunner
+from liveboard_test.liveboard_flows import LOGIN
+from liveboard_test.locators import IOS_PREDICATE
+from liveboard_test.waits import WaitEngine
+
+LOG_IN = (IOS_PREDICATE, "name == 'Log in' AND label == 'Log in' AND type == 'XCUIElementTypeButton'")
+WELCOME = (
+    '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT>'
+    '<XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard">'
+    '<XCUIElementTypeTextField type="XCUIElementTypeTextField" value="Email address"/>'
+    '<XCUIElementTypeButton type="XCUIElementTypeButton" name="Log in" label="Log in"/>'
+    '</XCUIElementTypeApplication></AppiumAUT>'
+)
+
+
+def options():
+    options = XCUITestOptions()
+    options.bundle_id = 'com.inconceptlabs.liveboard'
+    return options
+
+
+async def open_app(url):
+    """Ten commands of a typical test; returns (button text, source, png, the session's connection)."""
+    async with await AsyncWebDriver.create(url, options()) as driver:
+        await driver.implicitly_wait(0)
+        button = await driver.find_element(*LOG_IN)
+        await button.click()
+        text = await button.text()
+        source = await driver.page_source()
+        png = await driver.screenshot()
+        await driver.terminate_app('com.inconceptlabs.liveboard')
+        await driver.activate_app('com.inconceptlabs.liveboard')
+    return text, source, png, driver.connection
+
+
+def test_one_loop_drives_many_sessions_concurrently():
+    sessions = 20
+    with FakeAppiumServer(latency=0.05) as server:
+        server.page_source = WELCOME
+
+        async def run_all():
+            return await asyncio.gather(*(open_app(server.url) for _ in range(sessions)))
+
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        wall = time.perf_counter() - start
+
+        assert server.sessions == {}
+    assert all(text == 'Log in' and 'Email address' in source and png.startswith(b'\x89PNG')
+               for text, source, png, _ in results)
+    # Ten 50 ms commands per session: one after another that would take 10 s.
+    assert wall < 10 * 0.05 * sessions / 4, wall
+    assert all(connection.connections == 1 and connection.requests == 10 for *_, connection in results)
+
+
+def test_protocol_errors_raise_selenium_exceptions():
+    with FakeAppiumServer() as server:
+        server.page_source = WELCOME
+
+        async def scenario():
+            driver = await AsyncWebDriver.create(server.url, options())
+            with pytest.raises(NoSuchElementException):
+                await driver.find_element(IOS_PREDICATE, "name == 'Nope'")
+            session_id = driver.session_id
+            await driver.quit()
+            driver.session_id = session_id
+            with pytest.raises(InvalidSessionIdException):
+                await driver.page_source()
+            await driver.connection.close()
+
+        asyncio.run(scenario())
+
+
+def test_sync_adapter_runs_the_login_flow(monkeypatch):
+    monkeypatch.setenv('APPIUM_CLIENT', 'async')
+    with FakeAppiumServer(latency=0.005) as server:
+        app = FakeLiveboardApp('ios', transition_delay=0.05).install(server)
+        driver = create_driver(server.url, options())
+        assert isinstance(driver, SyncDriver)
+        try:
+            FlowRunner(driver, WaitEngine(driver, timeout=5, max_interval=0.2),
+                       screenshot=lambda name: driver.get_screenshot_as_base64()).run(LOGIN.compile('ios'))
+            assert app.screen == 'dashboard'
+        finally:
+            driver.quit()
+        assert server.sessions == {}
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test.auth_state import AuthState, AuthStateManager
+from liveboard_test.capabilities import APP_ID
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.liveboard_flows import AUTH_FILES, LOGIN, SIGNED_OUT
+from liveboard_test.waits import WaitEngine
+
+
+def options(platform, no_reset=True):
+    options = XCUITestOptions() if platform == 'ios' else UiAutomator2Options()
+    options.udid = 'DEVICE-1'
+    options.no_reset = no_reset
+    if platform == 'ios':
+        options.bundle_id = APP_ID
+    else:
+        options.app_package = APP_ID
+    return options
+
+
+def manager(tmp_path, **kwargs):
+    kwargs.setdefault('app_build', '100')
+    return AuthStateManager(LOGIN, SIGNED_OUT, AUTH_FILES, path=str(tmp_path / 'auth_state.json'),
+                            settle_timeout=1, **kwargs)
+
+
+@pytest.fixture
+def fake():
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('ios', remember_login=True).install(server)
+        yield server, app
+
+
+def ensure(auth, server, platform='ios', no_reset=True):
+    """Open a session like a test would, make sure it is signed in and close it again."""
+    driver = create_driver(server.url, options(platform, no_reset))
+    try:
+        return auth.ensure(driver, platform, WaitEngine(driver, timeout=5, max_interval=0.2))
+    finally:
+        driver.quit()
+
+
+def test_logs_in_once_and_reuses_the_kept_session(fake, tmp_path):
+    server, app = fake
+    auth = manager(tmp_path)
+
+    assert ensure(auth, server) == 'logged_in'
+    assert ensure(auth, server) == 'reused'
+    # A later run picks the stored state up from disk.
+    assert ensure(manager(tmp_path), server) == 'reused'
+
+    assert app.logins == 1 and app.screen == 'dashboard'
+    assert auth.stats()['logins'] == 1 and auth.reused == 1
+    assert auth.seconds_saved >= 0
+
+
+def test_invalidates_expired_rebuilt_and_signed_out_state(fake, tmp_path):
+    server, app = fake
+    auth = manager(tmp_path, ttl=3600)
+    ensure(auth, server)
+
+    auth.states['ios:DEVICE-1:' + APP_ID].captured_at -= 7200
+    assert ensure(auth, server) == 'logged_in'
+    assert ensure(manager(tmp_path, app_build='101'), server) == 'logged_in'
+    app.sign_out()
+    assert ensure(auth, server) == 'logged_in'
+
+    assert [reason.split(' ')[0] for _, reason in auth.invalidated] == ['expired', 'app']
+    assert app.logins == 4
+
+
+def test_container_mode_restores_auth_files_after_a_full_reset(tmp_path):
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('android', remember_login=True).install(server)
+        auth = manager(tmp_path, mode='container')
+
+        assert ensure(auth, server, 'android') == 'logged_in'
+        saved = json.loads((tmp_path / 'auth_state.json').read_text())['states'][0]
+        assert list(saved['files']) == AUTH_FILES['android']
+
+        # A session without noReset wipes the container; the stored files bring the login back.
+        assert ensure(auth, server, 'android', no_reset=False) == 'restored'
+        assert app.logins == 1 and app.screen == 'dashboard'
+
+
+def test_stale_reason():
+    state = AuthState('ios:A:app', 'login@1', captured_at=1000.0)
+
+    assert state.stale_reason('login@1', ttl=600, now=1500.0) is None
+    assert state.stale_reason('login@1', ttl=600, now=2000.0).startswith('expired')
+    assert state.stale_reason('login@2', ttl=600, now=1500.0).startswith('app build changed')
+
+
+def test_parallel_workers_merge_their_states_and_a_corrupt_file_reads_as_empty(tmp_path):
+    path = tmp_path / 'auth_state.json'
+    path.write_text('{"states": [')
+    first, second = manager(tmp_path), manager(tmp_path)
+    assert first.states == {}
+
+    first.states['ios:A:app'] = AuthState('ios:A:app', 'login@100', captured_at=1000.0)
+    first.save()
+    second.states['android:B:app'] = AuthState('android:B:app', 'login@100', captured_at=1001.0)
+    second.save()
+    assert set(manager(tmp_path).states) == {'ios:A:app', 'android:B:app'}
+
+    second.invalidate('ios:A:app', 'app is signed out')
+    assert set(manager(tmp_path).states) == {'android:B:app'}
+    assert oct(path.stat().st_mode & 0o777) == '0o600'
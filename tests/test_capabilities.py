@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from liveboard_test.capabilities import (
+    CapabilityError, SessionTimings, build_capabilities, build_options, profile_names, validate_capabilities,
+)
+from liveboard_test.drivers import create_driver
+from liveboard_test.capabilities import get_session_timings
+from liveboard_test.fake_appium import FakeAppiumServer
+
+
+@pytest.fixture
+def inspector_config(tmp_path):
+    path = tmp_path / 'appium_inspector_config.json'
+    path.write_text(json.dumps({
+        'platformName': 'iOS', 'udid': 'FILE-UDID', 'deviceName': 'iPhone 15',
+        'useNewWDA': True, 'wdaLocalPort': 8100,
+    }))
+    return str(path)
+
+
+def test_every_platform_has_the_three_profiles():
+    assert profile_names('ios') == ['cold', 'prebuilt', 'warm']
+    assert profile_names('android') == ['cold', 'prebuilt', 'warm']
+
+
+def test_merge_order_base_file_profile_env_overrides(inspector_config):
+    environ = {'DEVICE_NAME': 'iPhone SE (env)', 'TEAM_ID': 'TEAM42'}
+    capabilities = build_capabilities('ios', 'prebuilt', overrides={'wdaLocalPort': 8101},
+                                      config_file=inspector_config, environ=environ)
+
+    assert capabilities['bundleId'] == 'com.inconceptlabs.liveboard'
+    assert capabilities['udid'] == 'FILE-UDID'
+    assert capabilities['useNewWDA'] is False
+    assert capabilities['usePrebuiltWDA'] is True
+    assert capabilities['deviceName'] == 'iPhone SE (env)'
+    assert capabilities['updateWDABundleId'] == 'TEAM42.WebDriverAgentRunner'
+    assert capabilities['wdaLocalPort'] == 8101
+
+
+def test_device_ports_from_environment_replace_the_config_file_ones(inspector_config):
+    environ = {'WDA_LOCAL_PORT': '8123', 'MJPEG_PORT': '9123'}
+    capabilities = build_capabilities('ios', 'warm', config_file=inspector_config, environ=environ)
+    assert capabilities['wdaLocalPort'] == 8123
+    assert capabilities['mjpegServerPort'] == 9123
+
+
+def test_config_file_for_another_platform_is_ignored(inspector_config):
+    capabilities = build_capabilities('android', 'warm', config_file=inspector_config,
+                                      environ={'ANDROID_DEVICE_UDID': 'emulator-5554'})
+    assert capabilities['udid'] == 'emulator-5554'
+    assert capabilities['noReset'] is True
+    assert 'wdaLocalPort' not in capabilities
+
+
+def test_profile_comes_from_environment(monkeypatch, inspector_config):
+    monkeypatch.setenv('CAPABILITY_PROFILE', 'cold')
+    options = build_options('android', config_file=inspector_config)
+    assert options.capability_profile == 'cold'
+    assert options.to_capabilities()['appium:fullReset'] is True
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({'fullReset': True, 'noReset': True}, "fullReset and noReset"),
+    ({'usePrebuiltWDA': True, 'useNewWDA': True}, "useNewWDA"),
+    ({'wdaLaunchTimeout': '180000'}, "wdaLaunchTimeout must be a positive integer"),
+    ({'udid': ''}, "udid is missing"),
+    ({'platformName': 'Android'}, "platformName"),
+])
+def test_validation_rejects_inconsistent_capabilities(inspector_config, overrides, message):
+    with pytest.raises(CapabilityError, match=message):
+        build_capabilities('ios', 'warm', overrides=overrides, config_file=inspector_config, environ={})
+
+
+def test_unknown_profile_lists_known_ones():
+    with pytest.raises(CapabilityError, match="known: cold, prebuilt, warm"):
+        build_capabilities('ios', 'lukewarm', environ={})
+    with pytest.raises(CapabilityError, match="bundleId / app"):
+        validate_capabilities('ios', {'platformName': 'iOS', 'automationName': 'XCUITest',
+                                      'deviceName': 'x', 'udid': 'y'})
+
+
+def test_session_creation_time_is_recorded_per_profile(inspector_config):
+    timings = get_session_timings()
+    timings.samples.clear()
+    with FakeAppiumServer() as server:
+        server.delay('POST', r'/session', 0.05)
+        for profile in ('warm', 'prebuilt'):
+            create_driver(server.url, build_options('ios', profile, config_file=inspector_config)).quit()
+
+    summary = timings.summary()
+    assert set(summary) == {'ios/warm', 'ios/prebuilt'}
+    assert summary['ios/warm']['median'] >= 0.05
+    timings.samples.clear()
+
+
+def test_fastest_safe_profile_skips_profiles_that_failed(tmp_path):
+    timings = SessionTimings()
+    for seconds in (60, 62, 58):
+        timings.record('ios', 'cold', seconds)
+    for seconds in (9, 11):
+        timings.record('ios', 'warm', seconds)
+    timings.record('ios', 'prebuilt', 3)
+    timings.record('ios', 'prebuilt', 40, ok=False)
+    timings.record('ios', None, 1)
+    assert timings.fastest_profile('ios') == 'custom'
+
+    path = str(tmp_path / 'timings.json')
+    timings.save(path)
+    reloaded = SessionTimings().load(path)
+    # Hand-built options say nothing about the next run
+    assert 'ios/custom' not in reloaded.samples and reloaded.fastest_profile('ios') == 'warm'
+    assert reloaded.summary()['ios/cold'] == {'sessions': 3, 'failures': 0, 'median': 60, 'min': 58, 'max': 62}
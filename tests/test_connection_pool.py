@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test.connection_pool import ConnectionPools, get_connection_pools, shutdown_connection_pools
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    monkeypatch.setenv('APPIUM_POOL_MAXSIZE', '2')
+    monkeypatch.setenv('APPIUM_CONNECT_TIMEOUT', '3')
+    monkeypatch.setenv('APPIUM_READ_TIMEOUT', '7')
+    shutdown_connection_pools()
+    yield get_connection_pools()
+    shutdown_connection_pools()
+
+
+def host_stats(pools, server):
+    return pools.stats()[f"127.0.0.1:{server.port}"]
+
+
+def test_pools_are_configured_from_environment(pools):
+    assert pools.maxsize == 2
+    assert pools.timeout.connect_timeout == 3
+    assert pools.timeout.read_timeout == 7
+
+
+def test_drivers_share_keep_alive_connections_across_sessions(pools):
+    with FakeAppiumServer() as server:
+        for _ in range(3):
+            driver = create_driver(server.url, XCUITestOptions())
+            driver.page_source
+            assert driver.command_executor._client_config.timeout is pools.timeout
+            driver.quit()
+
+        stats = host_stats(pools, server)
+        assert stats['requests'] == server.command_count == 9
+        assert stats['connections_opened'] == 1
+        assert stats['idle'] == 1
+        assert stats['reuse_ratio'] == pytest.approx(1 - 1 / 9, abs=0.001)
+
+
+def test_concurrent_drivers_stay_within_the_per_host_limit(pools):
+    with FakeAppiumServer(latency=0.02) as server:
+        drivers = [create_driver(server.url, XCUITestOptions()) for _ in range(4)]
+
+        def work(driver):
+            for _ in range(5):
+                driver.page_source
+
+        threads = [threading.Thread(target=work, args=(driver,)) for driver in drivers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for driver in drivers:
+            driver.quit()
+
+        assert host_stats(pools, server)['connections_opened'] <= 2
+
+
+def test_clear_keeps_counters_for_the_report():
+    pools = ConnectionPools(maxsize=1)
+    with FakeAppiumServer() as server:
+        pools.manager.request('GET', server.url + '/status')
+        pools.clear()
+        pools.manager.request('GET', server.url + '/status')
+        stats = pools.stats()[f"127.0.0.1:{server.port}"]
+        assert stats['requests'] == 2
+        assert stats['connections_opened'] == 2
+        assert "2 requests over 2 connections" in pools.format()
+        pools.clear()
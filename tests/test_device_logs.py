@@ -0,0 +1,104 @@
+import io
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+
+from liveboard_test import steps
+from liveboard_test.device_logs import DeviceLogCollector, LogCursor, RotatingLogWriter
+from liveboard_test.drivers import create_driver
+from liveboard_test.events import EventReport, EventWriter, read_events
+from liveboard_test.fake_appium import FakeAppiumServer
+
+TEST = "tests/test_login_android_compose.py::TestLiveboardAndroid::test_android_login_flow"
+
+
+def test_server_and_cursor_hand_out_each_entry_once():
+    with FakeAppiumServer() as server:
+        driver = create_driver(server.url, UiAutomator2Options())
+        try:
+            assert 'logcat' in driver.log_types
+            server.emit_log('logcat', 'first', timestamp=1000)
+            server.emit_log('logcat', 'second', timestamp=1000)
+            assert [e['message'] for e in driver.get_log('logcat')] == ['first', 'second']
+            server.emit_log('logcat', 'third', timestamp=1000)
+            assert [e['message'] for e in driver.get_log('logcat')] == ['third']
+            assert driver.get_log('logcat') == []
+        finally:
+            driver.quit()
+
+    # A driver that returns its whole buffer every time: only the new tail is kept
+    buffer = [{'timestamp': 1000, 'level': 'INFO', 'message': m} for m in ('first', 'second')]
+    cursor = LogCursor()
+    assert len(cursor.new_entries(buffer)) == 2
+    buffer.append({'timestamp': 1000, 'level': 'INFO', 'message': 'third'})
+    buffer.append({'timestamp': 1001, 'level': 'WARN', 'message': 'fourth'})
+    assert [e['message'] for e in cursor.new_entries(buffer)] == ['third', 'fourth']
+    assert cursor.new_entries(buffer) == []
+    # Same timestamp but a different message is new
+    assert len(cursor.new_entries([{'timestamp': 1001, 'level': 'WARN', 'message': 'fifth'}])) == 1
+
+
+def test_writer_rotates_segments_and_reads_ranges_across_them(tmp_path):
+    writer = RotatingLogWriter(str(tmp_path), 'pixel.logcat', max_bytes=1000, keep=3)
+    lines = [f"line {i:05d} " + 'x' * 40 + "\n" for i in range(200)]
+    offsets = []
+    for line in lines:
+        offsets.append(writer.offset)
+        writer.write(line)
+    writer.flush()
+
+    # 11 KiB of text in 1 KB segments, of which only the last 3 are kept
+    assert writer.dropped > 0 and len(writer.segments) == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(s[0]) for s in writer.segments)
+    first_kept = writer.segments[0][1]
+    i = next(i for i, offset in enumerate(offsets) if offset >= first_kept)
+    # An open (not yet finished) segment is readable too
+    assert writer.read(offsets[i], offsets[i + 20]) == ''.join(lines[i:i + 20])
+    assert writer.read(offsets[i], limit=100) == ''.join(lines)[-100:]
+    # Rotated-out ranges come back empty rather than failing
+    assert writer.read(0, offsets[5]) == ''
+    writer.close()
+    assert writer.read(offsets[-3]) == ''.join(lines[-3:])
+
+
+def test_failed_tests_get_their_own_log_slice_in_the_report(tmp_path, monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(steps, '_listeners', [EventWriter(stream, worker='Pixel')])
+    with FakeAppiumServer() as server:
+        driver = create_driver(server.url, UiAutomator2Options())
+        collector = DeviceLogCollector(driver, directory=str(tmp_path), interval=0.05).start()
+        try:
+            server.start_synthetic_logs(per_second=500, log_types=['logcat'])
+            for name, outcome in (('passes', 'passed'), ('fails', 'failed')):
+                steps.start_test(f"{TEST}[{name}]")
+                time.sleep(0.3)  # a few background polls of the synthetic log
+                server.emit_log('logcat', f"inside {name}", level='ERROR')
+                steps.end_test(f"{TEST}[{name}]", outcome=outcome)
+            server.stop_synthetic_logs()
+        finally:
+            collector.stop()
+            driver.quit()
+
+    assert collector.log_types == ['logcat'] and collector.errors == 0 and collector.polls > 6
+    assert collector.stats()['compressed_bytes'] < collector.stats()['bytes']
+    with open(tmp_path / f"{collector.name}.index.jsonl") as f:
+        index = [json.loads(line) for line in f]
+    assert [(e['outcome'], e['start']['logcat'] < e['end']['logcat']) for e in index] == [
+        ('passed', True), ('failed', True)]
+
+    [path] = collector.slices
+    with open(path) as f:
+        text = f.read()
+    assert 'ERROR inside fails' in text and 'inside passes' not in text
+    assert len(text) == index[1]['end']['logcat'] - index[1]['start']['logcat']
+
+    report = EventReport()
+    for event in read_events(io.StringIO(stream.getvalue())):
+        report(event)
+    passed, failed = report.tests
+    assert passed['logs'] == [] and failed['logs'][0]['path'] == path
+    junit = ET.parse(report.write_junit(str(tmp_path / 'junit.xml'))).getroot()
+    assert 'ERROR inside fails' in junit.find('.//testcase/system-out').text
@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import textwrap
+import time
+import xml.etree.ElementTree as ET
+
+from liveboard_test import steps
+from liveboard_test.events import EventReport, EventWriter, LiveConsole, read_events
+from liveboard_test.scheduler import Device, run_pytest_item
+
+
+def test_writer_streams_step_events_as_jsonl():
+    stream = io.StringIO()
+    writer = EventWriter(stream, worker='iPhone SE')
+    steps.add_listener(writer)
+    try:
+        steps.start_test("tests/test_x.py::test_a")
+        steps.step("Step 1: open")
+        steps.notify('screenshot', path='artifacts/x/0001_open.png')
+        steps.end_test("tests/test_x.py::test_a", outcome='passed', duration=1.5)
+    finally:
+        steps.remove_listener(writer)
+
+    events = list(read_events(io.StringIO(stream.getvalue() + "not json\n")))
+    assert [e['event'] for e in events] == ['test_start', 'step', 'screenshot', 'step_end', 'test_end']
+    assert {e['worker'] for e in events} == {'iPhone SE'}
+    assert events[2]['step'] == "Step 1: open"
+
+
+def test_report_merges_workers_into_junit_and_json(tmp_path):
+    report = EventReport()
+    for event in [
+        {'event': 'test_start', 'worker': 'ios', 'test': 'tests/test_login_ios.py::T::test_login'},
+        {'event': 'test_start', 'worker': 'android', 'test': 'tests/test_login_android_compose.py::A::test_login'},
+        {'event': 'step', 'worker': 'ios', 'test': 'tests/test_login_ios.py::T::test_login', 'step': 'Step 1'},
+        {'event': 'failure', 'worker': 'android', 'test': 'tests/test_login_android_compose.py::A::test_login',
+         'when': 'call', 'message': 'TimeoutException: <login>'},
+        {'event': 'test_end', 'worker': 'android', 'test': 'tests/test_login_android_compose.py::A::test_login',
+         'outcome': 'failed', 'duration': 2.0},
+        {'event': 'test_end', 'worker': 'ios', 'test': 'tests/test_login_ios.py::T::test_login',
+         'outcome': 'passed', 'duration': 3.0},
+    ]:
+        report(event)
+
+    assert report.counts() == {'tests': 2, 'passed': 1, 'failed': 1, 'skipped': 0}
+    junit_path = str(tmp_path / 'junit.xml')
+    root = ET.parse(report.write_junit(junit_path)).getroot()
+    assert sorted(os.listdir(tmp_path)) == ['junit.xml']
+    assert root.get('tests') == '2' and root.get('failures') == '1'
+    failure = root.find(".//testsuite[@name='android']/testcase/failure")
+    assert failure.get('message') == 'TimeoutException: <login>'
+    data = json.load(open(report.write_json(str(tmp_path / 'results.json'))))
+    assert data['tests'][1]['steps'] == 1
+
+
+def test_console_prints_failures_with_worker_prefix():
+    out = io.StringIO()
+    LiveConsole(out=out)({'event': 'failure', 'worker': 'Pixel', 'test': 't::x', 'when': 'call', 'message': 'boom'})
+    assert out.getvalue() == "[Pixel] ❌ t::x failed in call: boom\n"
+
+
+def test_worker_events_arrive_while_the_worker_is_still_running(tmp_path, monkeypatch):
+    (tmp_path / 'conftest.py').write_text(textwrap.dedent("""
+        from liveboard_test import steps
+        from liveboard_test.events import install_from_env
+
+        def pytest_configure(config):
+            config.writer = install_from_env()
+
+        def pytest_runtest_setup(item):
+            steps.start_test(item.nodeid)
+
+        def pytest_runtest_teardown(item, nextitem):
+            steps.end_test(item.nodeid, outcome='passed')
+    """))
+    (tmp_path / 'test_ios_slow.py').write_text(textwrap.dedent("""
+        import time
+        from liveboard_test import steps
+
+        def test_slow():
+            steps.step("Step 1: first")
+            print("x" * 100000)
+            time.sleep(1.0)
+    """))
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    monkeypatch.setenv('PYTHONPATH', src)
+    received = []
+
+    def on_event(event):
+        received.append((event['event'], time.monotonic()))
+
+    result = run_pytest_item('test_ios_slow.py::test_slow', Device('se', 'ios', 'A', 1), cwd=str(tmp_path),
+                             pytest_args=('-s', '-p', 'no:cacheprovider'), on_event=on_event,
+                             log_dir=str(tmp_path))
+
+    assert result.passed, open(result.log_path).read()
+    arrived = dict(received)
+    assert [name for name, _ in received] == ['test_start', 'step', 'step_end', 'test_end', 'worker_exit']
+    assert arrived['worker_exit'] - arrived['step'] >= 0.8
+    assert os.path.getsize(result.log_path) > 100000
+    assert result.stdout == ''
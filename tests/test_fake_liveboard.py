@@ -0,0 +1,56 @@
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.common.appiumby import AppiumBy
+
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.session_pool import reset_app_state
+
+
+def test_ios_login_screens_follow_the_flow():
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('ios').install(server)
+        driver = create_driver(server.url, XCUITestOptions())
+        try:
+            driver.find_element(AppiumBy.IOS_PREDICATE, "name == 'Log in' AND type == 'XCUIElementTypeButton'").click()
+            driver.find_element(AppiumBy.ACCESSIBILITY_ID, 'Continue with Email').click()
+            driver.find_element(AppiumBy.IOS_PREDICATE, "value == 'Email address'").send_keys("prod@mailinator.com")
+            driver.find_element(AppiumBy.IOS_PREDICATE, "name == 'Log in' AND type == 'XCUIElementTypeButton'").click()
+            assert app.history == ['welcome', 'welcome', 'auth_options', 'email_login', 'dashboard']
+
+            reset_app_state(driver, 'com.inconceptlabs.liveboard')
+            assert app.screen == 'welcome'
+        finally:
+            driver.quit()
+
+
+def test_android_login_screens_match_the_uiselector_instances():
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('android').install(server)
+        driver = create_driver(server.url, UiAutomator2Options())
+        view = 'new UiSelector().className("android.view.View").instance({})'
+        try:
+            driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, view.format(3)).click()
+            driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, view.format(3)).click()
+            assert app.screen == 'login'
+            fields = driver.find_elements(AppiumBy.CLASS_NAME, 'android.widget.EditText')
+            assert [f.get_attribute('resource-id') for f in fields] == ['email', 'password']
+            driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, view.format(5)).click()
+            assert app.screen == 'dashboard'
+        finally:
+            driver.quit()
+
+
+def test_transition_delay_switches_screen_later():
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('ios', transition_delay=0.05).install(server)
+        driver = create_driver(server.url, XCUITestOptions())
+        try:
+            before = driver.page_source
+            driver.find_element(AppiumBy.ACCESSIBILITY_ID, 'Log in').click()
+            assert driver.page_source == before
+            app._timer.join()
+            assert app.screen == 'auth_options'
+        finally:
+            driver.quit()
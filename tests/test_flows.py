@@ -0,0 +1,110 @@
+import pytest
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from selenium.common.exceptions import TimeoutException
+
+from liveboard_test import steps
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import FakeLiveboardApp
+from liveboard_test.flows import ActOp, CaptureOp, Flow, FlowError, FlowRunner, Tap, WaitOp
+from liveboard_test.liveboard_flows import LOGIN
+from liveboard_test.locators import IOS_PREDICATE
+from liveboard_test.waits import WaitEngine
+
+OPTIONS = {'ios': XCUITestOptions, 'android': UiAutomator2Options}
+
+
+def run_login(platform, optimize):
+    """(commands, screenshots, final screen) of the login flow against the fake server."""
+    with FakeAppiumServer(latency=0.005) as server:
+        app = FakeLiveboardApp(platform, transition_delay=0.05).install(server)
+        driver = create_driver(server.url, OPTIONS[platform]())
+        shots = []
+        try:
+            server.reset_counters()
+            runner = FlowRunner(driver, WaitEngine(driver, timeout=5, max_interval=0.2),
+                                screenshot=lambda name: shots.append(name) or driver.get_screenshot_as_base64())
+            runner.run(LOGIN.compile(platform, optimize))
+            return server.command_count, shots, app.screen
+        finally:
+            driver.quit()
+
+
+def test_optimized_plan_prefetches_merges_waits_and_drops_repeated_screenshots():
+    plan = LOGIN.compile('ios')
+
+    waits = [op for op in plan.ops if isinstance(op, WaitOp)]
+    # Launch, three transitions (each merged with the next screen's elements) and the form animation.
+    assert len(waits) == 5
+    assert [len(w.locators) for w in waits] == [1, 1, 3, 1, 0]
+    assert waits[2].changed and waits[2].settle == 0.5
+    assert plan.skipped_screenshots == ["login_form_completed"]
+    # The screenshot after a transition is taken once the next screen has settled.
+    names = [type(op).__name__ for op in plan.ops]
+    assert names[names.index('WaitOp', 3) + 1] == 'CaptureOp'
+    assert sum(isinstance(op, ActOp) for op in plan.ops) == 5
+
+
+def test_compiled_plan_needs_fewer_commands_than_step_by_step():
+    step_commands, step_shots, step_screen = run_login('ios', optimize=False)
+    plan_commands, plan_shots, plan_screen = run_login('ios', optimize=True)
+
+    assert step_screen == plan_screen == 'dashboard'
+    assert plan_shots == step_shots[:-1]
+    assert plan_commands < step_commands * 0.8, (plan_commands, step_commands)
+
+
+def test_same_flow_logs_in_on_android():
+    commands, shots, screen = run_login('android', optimize=True)
+
+    assert screen == 'dashboard'
+    assert shots[-1] == "after_login_submit"
+
+
+def test_missing_platform_locator_and_element_fail_clearly():
+    flow = Flow("broken", [Tap("Step 1", ios=(IOS_PREDICATE, "name == 'Nope'"))])
+    with pytest.raises(FlowError, match="has no android locator"):
+        flow.compile('android')
+
+    with FakeAppiumServer() as server:
+        FakeLiveboardApp('ios').install(server)
+        driver = create_driver(server.url, XCUITestOptions())
+        shots = []
+        try:
+            with pytest.raises(TimeoutException):
+                FlowRunner(driver, WaitEngine(driver, timeout=0.3), screenshot=shots.append,
+                           retries=0).run(flow.compile('ios'))
+        finally:
+            driver.quit()
+    assert shots == ["error_state"]
+    assert not any(isinstance(op, CaptureOp) for op in flow.compile('ios').ops)
+
+
+def test_lost_transition_tap_is_retried_on_the_same_session(monkeypatch):
+    # Keep the retry events away from the real quarantine tracker.
+    events = []
+    monkeypatch.setattr(steps, '_listeners', [lambda event, data: events.append((event, data))])
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('android').install(server)
+        driver = create_driver(server.url, UiAutomator2Options())
+        try:
+            app.lose_clicks = 1
+            runner = FlowRunner(driver, WaitEngine(driver, timeout=0.5, max_interval=0.1),
+                                screenshot=lambda name: None, retries=1)
+            runner.run(LOGIN.compile('android'))
+            sessions, screen = len(server.sessions), app.screen
+
+            app.launch()
+            app.lose_clicks = 2
+            with pytest.raises(TimeoutException):
+                FlowRunner(driver, WaitEngine(driver, timeout=0.5, max_interval=0.1),
+                           screenshot=lambda name: None, retries=1).run(LOGIN.compile('android'))
+        finally:
+            driver.quit()
+
+    assert screen == 'dashboard'
+    assert runner.retried == [("Step 1: Tap 'Log in'", 'TimeoutException')]
+    assert sessions == 1
+    # The second run loses the retried tap too: Step 1 is out of retries and the flow fails in Step 2.
+    assert [data['step'][:6] for event, data in events if event == 'retry'] == ['Step 1', 'Step 1', 'Step 2']
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import NoSuchElementException
+
+from liveboard_test import steps
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.instrumentation import CommandRecorder, get_recorder, percentile
+
+
+@pytest.fixture
+def recorder():
+    get_recorder().clear()
+    yield get_recorder()
+    get_recorder().clear()
+
+
+def test_percentile_nearest_rank():
+    values = sorted(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_records_latency_payload_and_tags_against_delayed_server(recorder):
+    options = XCUITestOptions()
+    options.udid = 'FAKE-UDID'
+    with FakeAppiumServer() as server:
+        server.delay('GET', r'/session/[^/]+/source', 0.05)
+        server.page_source = '<AppiumAUT>' + '<e name="x"/>' * 200 + '</AppiumAUT>'
+        driver = create_driver(server.url, options)
+        try:
+            steps.start_test("tests/test_x.py::test_login")
+            steps.step("Step 1: read screen")
+            for _ in range(3):
+                driver.page_source
+            steps.step("Step 2: find")
+            with pytest.raises(NoSuchElementException):
+                driver.find_element(AppiumBy.ACCESSIBILITY_ID, 'missing')
+            steps.end_test("tests/test_x.py::test_login", 'passed')
+        finally:
+            driver.quit()
+
+    summary = recorder.summary()
+    source = summary['getPageSource']
+    assert source['count'] == 3
+    assert source['p50'] >= 0.05
+    assert source['retries'] == 2
+    assert source['response_bytes'] == 3 * len(server.page_source)
+    assert summary['newSession']['count'] == 1
+    assert summary['findElement']['errors'] == 1
+    assert summary['findElement']['p95'] < source['p50']
+
+    report = recorder.to_dict()
+    assert report['by_step']["Step 1: read screen"]['count'] == 3
+    assert report['by_test']["tests/test_x.py::test_login"]['count'] == 4
+    assert set(report['by_device']) == {'FAKE-UDID'}
+
+
+def test_write_json(tmp_path):
+    recorder = CommandRecorder()
+    path = recorder.write_json(str(tmp_path / "latency.json"))
+    with open(path) as f:
+        assert json.load(f) == {'commands': {}, 'by_test': {}, 'by_step': {}, 'by_device': {}}
@@ -0,0 +1,126 @@
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.common.appiumby import AppiumBy
+from appium.webdriver.webdriver import WebDriver
+
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.locators import LocatorResolver, UnsupportedLocator, compile_locator
+from liveboard_test.ui_tree import parse_page_source
+
+
+IOS_SOURCE = """<?xml version="1.0" encoding="UTF-8"?>
+<AppiumAUT>
+  <XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard" enabled="true" visible="true" x="0" y="0" width="375" height="667">
+    <XCUIElementTypeOther type="XCUIElementTypeOther" enabled="true" visible="true" x="0" y="0" width="375" height="667">
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="Welcome" label="Welcome" value="Welcome" enabled="true" visible="true" x="20" y="80" width="335" height="40"/>
+      <XCUIElementTypeTextField type="XCUIElementTypeTextField" value="Email address" enabled="true" visible="true" x="20" y="200" width="335" height="44"/>
+      <XCUIElementTypeSecureTextField type="XCUIElementTypeSecureTextField" value="Password" enabled="true" visible="true" x="20" y="260" width="335" height="44"/>
+      <XCUIElementTypeButton type="XCUIElementTypeButton" name="Log in" label="Log in" enabled="true" visible="true" x="20" y="400" width="335" height="50"/>
+      <XCUIElementTypeButton type="XCUIElementTypeButton" name="Continue with Email" label="Continue with Email" enabled="false" visible="true" x="20" y="460" width="335" height="50"/>
+    </XCUIElementTypeOther>
+  </XCUIElementTypeApplication>
+</AppiumAUT>"""
+
+ANDROID_SOURCE = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy index="0" rotation="0">
+  <android.widget.FrameLayout index="0" class="android.widget.FrameLayout" bounds="[0,0][1080,2340]">
+    <android.view.View index="0" class="android.view.View" clickable="false" bounds="[0,0][1080,2340]">
+      <android.view.View index="0" class="android.view.View" clickable="false" bounds="[0,0][1080,200]"/>
+      <android.view.View index="1" class="android.view.View" text="Log in" clickable="true" bounds="[40,1800][1040,1900]"/>
+      <android.widget.EditText index="2" class="android.widget.EditText" text="" resource-id="email" clickable="true" bounds="[40,600][1040,700]"/>
+      <android.widget.EditText index="3" class="android.widget.EditText" text="" resource-id="password" clickable="true" bounds="[40,750][1040,850]"/>
+    </android.view.View>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+
+def names(nodes):
+    return [n.get('name') or n.get('value') or n.get('resource-id') or n.get('text') for n in nodes]
+
+
+@pytest.fixture(scope="module")
+def ios_root():
+    return parse_page_source(IOS_SOURCE)
+
+
+@pytest.fixture(scope="module")
+def android_root():
+    return parse_page_source(ANDROID_SOURCE)
+
+
+@pytest.mark.parametrize("predicate, expected", [
+    ("name == 'Log in' AND label == 'Log in' AND type == 'XCUIElementTypeButton'", ['Log in']),
+    ("value == 'Email address'", ['Email address']),
+    ("type == 'XCUIElementTypeButton' AND enabled == true", ['Log in']),
+    ("name BEGINSWITH[c] 'continue' OR value CONTAINS 'Pass'", ['Password', 'Continue with Email']),
+    ("type == 'XCUIElementTypeButton' AND NOT (name == 'Log in')", ['Continue with Email']),
+    ("label LIKE 'Wel*' && y < 100", ['Welcome']),
+    ("name MATCHES 'Log.*'", ['Log in']),
+    # enabled="true" / "false" in the page source compare as 1 / 0
+    ("type == 'XCUIElementTypeButton' AND enabled == 1", ['Log in']),
+    ("type == 'XCUIElementTypeButton' AND enabled < 1", ['Continue with Email']),
+])
+def test_ios_predicates(ios_root, predicate, expected):
+    assert names(compile_locator(AppiumBy.IOS_PREDICATE, predicate)(ios_root)) == expected
+
+
+@pytest.mark.parametrize("selector, expected", [
+    ('new UiSelector().className("android.view.View").instance(2)', ['Log in']),
+    ('new UiSelector().className("android.widget.EditText").instance(1)', ['password']),
+    ('new UiSelector().className("android.view.View").clickable(true)', ['Log in']),
+    ('new UiSelector().textContains("Log")', ['Log in']),
+    ('new UiSelector().resourceId("email")', ['email']),
+    ('new UiSelector().className("android.view.View").instance(9)', []),
+])
+def test_uiselectors(android_root, selector, expected):
+    assert names(compile_locator(AppiumBy.ANDROID_UIAUTOMATOR, selector)(android_root)) == expected
+
+
+@pytest.mark.parametrize("xpath, expected", [
+    ("//XCUIElementTypeButton[@name='Log in']", ['Log in']),
+    ("//XCUIElementTypeButton[2]", ['Continue with Email']),
+    ("//XCUIElementTypeOther/XCUIElementTypeTextField", ['Email address']),
+    ("//*[contains(@value, 'word')]", ['Password']),
+    ("/AppiumAUT/XCUIElementTypeApplication/*/*[@enabled='false' or @name='Welcome']", ['Welcome', 'Continue with Email']),
+])
+def test_xpath(ios_root, xpath, expected):
+    assert names(compile_locator(AppiumBy.XPATH, xpath)(ios_root)) == expected
+
+
+def test_rect_from_ios_and_android(ios_root, android_root):
+    login = compile_locator(AppiumBy.ACCESSIBILITY_ID, 'Log in')(ios_root)[0]
+    email = compile_locator(AppiumBy.ID, 'email')(android_root)[0]
+    assert login.rect == (20, 400, 335, 50)
+    assert email.rect == (40, 600, 1000, 100)
+
+
+def test_unsupported_locators_are_reported():
+    with pytest.raises(UnsupportedLocator):
+        compile_locator(AppiumBy.IOS_CLASS_CHAIN, '**/XCUIElementTypeButton')
+    with pytest.raises(UnsupportedLocator):
+        compile_locator(AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().childSelector(new UiSelector())')
+
+
+def test_resolver_uses_one_fetch_for_many_locators():
+    with FakeAppiumServer() as server:
+        server.page_source = IOS_SOURCE
+        driver = WebDriver(server.url, options=XCUITestOptions())
+        try:
+            server.reset_counters()
+            resolver = LocatorResolver(driver)
+            locators = [
+                (AppiumBy.IOS_PREDICATE, "value == 'Email address'"),
+                (AppiumBy.IOS_PREDICATE, "value == 'Password'"),
+                (AppiumBy.IOS_PREDICATE, "name == 'Log in' AND type == 'XCUIElementTypeButton'"),
+            ]
+
+            found = resolver.resolve_many(locators)
+            element = resolver.element(*locators[0])
+            element.send_keys("prod@mailinator.com")
+
+            assert all(found.values())
+            assert resolver.round_trips == 2
+            assert server.command_count == 3
+            assert 'prod@mailinator.com' in server.tree().children[0].children[0].children[1].get('value')
+        finally:
+            driver.quit()
@@ -1,11 +1,16 @@
 import pytest
-from appium import webdriver
-from appium.options.android.uiautomator2.base import UiAutomator2Options
-from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-import time
+import os
+
+from liveboard_test.capabilities import build_options
+from liveboard_test.device_logs import start_device_logs
+from liveboard_test.flows import FlowRunner
+from liveboard_test.liveboard_flows import LOGIN
+from liveboard_test.mjpeg import start_mjpeg_capture
+from liveboard_test.preflight import unhealthy_reason
+from liveboard_test.screenshots import get_screenshot_pipeline
+from liveboard_test.session_pool import get_session_pool
+from liveboard_test.visual import get_golden_store
+from liveboard_test.waits import WaitEngine
 
 
 class TestAndroidLogin:
@@ -13,109 +18,48 @@ class TestAndroidLogin:
     
     def setup_method(self):
         """Setup Appium driver for Android"""
-        # Android capabilities
-        options = UiAutomator2Options()
-        options.platform_name = "Android"
-        options.platform_version = "13"
-        options.device_name = "Android Device"
-        options.udid = "HT7991A08308"
-        options.app_package = "com.inconceptlabs.liveboard"
-        options.app_activity = "com.inconceptlabs.liveboard.pages.activities.LaunchActivity"
-        options.automation_name = "UiAutomator2"
-        options.new_command_timeout = 600
-        options.uiautomator2_server_launch_timeout = 180000
-        options.uiautomator2_server_install_timeout = 180000
-        options.auto_grant_permissions = True
-        options.no_reset = True
+        # The login flow starts signed out: always a cold (reinstalled, data wiped) app, never
+        # $CAPABILITY_PROFILE's default, which keeps the app signed in after the first login
+        options = build_options('android', 'cold')
         
-        # Connect to Appium server
-        from appium.webdriver.webdriver import WebDriver
-        self.driver = WebDriver(
-            command_executor='http://localhost:4724/wd/hub',
-            options=options
-        )
+        # Connect to Appium server (port can be overridden for parallel execution)
+        appium_port = os.getenv('APPIUM_PORT', '4724')
+        # Skip at once if the last preflight found this device dead
+        reason = unhealthy_reason('android', appium_port)
+        if reason:
+            pytest.skip(reason)
+        self.session_pool = get_session_pool()
+        self.driver = self.session_pool.acquire(f'http://localhost:{appium_port}/wd/hub', options)
+        # Continuous screen clip of every test when $MJPEG_CAPTURE is set
+        start_mjpeg_capture(self.driver)
+        # Device log slices for failed tests when $DEVICE_LOGS is set
+        start_device_logs(self.driver)
         
-        # Initialize wait
-        self.wait = WebDriverWait(self.driver, 20)
+        # Initialize wait engine (single timeout policy, no implicit wait)
+        self.wait = WaitEngine(self.driver, timeout=20)
     
     def teardown_method(self):
-        """Cleanup after test"""
+        """Return the session to the pool after test"""
         if hasattr(self, 'driver'):
-            self.driver.quit()
+            print(self.wait.format())
+            self.session_pool.release(self.driver)
+    
+    def take_screenshot(self, name="screenshot"):
+        """Fetch a screenshot and hand it to the background writer; returns its file name."""
+        pipeline = get_screenshot_pipeline()
+        filename = pipeline.capture(self.driver, name, prefix="android_test_")
+        print(f"📸 Screenshot {'buffered' if pipeline.failure_only else 'queued'}: {filename}")
+        return filename
     
     def test_android_login_flow(self):
         """Test the complete Android login flow"""
         
-        # Step 1: Click on the first view element (likely a login button or menu item)
-        print("Step 1: Clicking on first view element...")
-        first_view = self.wait.until(
-            EC.element_to_be_clickable((AppiumBy.ANDROID_UIAUTOMATOR, 
-                'new UiSelector().className("android.view.View").instance(3)'))
-        )
-        first_view.click()
-        
-        # Wait for new screen to open
-        print("Waiting for new screen to open...")
-        time.sleep(3)
-        
-        # Step 2: Click on the second view element (likely another navigation element)
-        print("Step 2: Clicking on second view element...")
-        second_view = self.wait.until(
-            EC.element_to_be_clickable((AppiumBy.ANDROID_UIAUTOMATOR, 
-                'new UiSelector().className("android.view.View").instance(3)'))
-        )
-        second_view.click()
-        
-        # Wait for login screen to appear
-        print("Waiting for login screen...")
-        time.sleep(3)
+        # The journey is declared once in liveboard_flows and compiled for Android
+        plan = LOGIN.compile('android')
+        print(plan.format())
+        FlowRunner(self.driver, self.wait, screenshot=self.take_screenshot, goldens=get_golden_store()).run(plan)
         
-        # Step 3: Fill the email input field
-        print("Step 3: Filling email field...")
-        email_input = self.wait.until(
-            EC.element_to_be_clickable((AppiumBy.ANDROID_UIAUTOMATOR, 
-                'new UiSelector().className("android.widget.EditText").instance(0)'))
-        )
-        email_input.clear()
-        email_input.send_keys("prod@mailinator.com")
-        
-        # Step 4: Fill the password input field
-        print("Step 4: Filling password field...")
-        password_input = self.wait.until(
-            EC.element_to_be_clickable((AppiumBy.ANDROID_UIAUTOMATOR, 
-                'new UiSelector().className("android.widget.EditText").instance(1)'))
-        )
-        password_input.clear()
-        password_input.send_keys("testtest1")
-        
-        # Step 5: Click the login button
-        print("Step 5: Clicking login button...")
-        login_button = self.wait.until(
-            EC.element_to_be_clickable((AppiumBy.ANDROID_UIAUTOMATOR, 
-                'new UiSelector().className("android.view.View").instance(5)'))
-        )
-        login_button.click()
-        
-        # Step 6: Wait for new screen to open (successful login)
-        print("Step 6: Waiting for successful login...")
-        time.sleep(5)
-        
-        # Verify we're on a new screen (you can add more specific verification here)
         print("Login flow completed successfully!")
-        
-        # Optional: Add verification that we're logged in
-        # For example, check for a dashboard element or user profile element
-        try:
-            # Wait for some element that indicates successful login
-            # This could be a dashboard title, user avatar, etc.
-            dashboard_element = self.wait.until(
-                EC.presence_of_element_located((AppiumBy.ANDROID_UIAUTOMATOR, 
-                    'new UiSelector().className("android.view.View")'))
-            )
-            print("Successfully logged in - dashboard element found!")
-        except Exception as e:
-            print(f"Could not verify dashboard element: {e}")
-            # Don't fail the test here, as the main flow completed
 
 
 if __name__ == "__main__":
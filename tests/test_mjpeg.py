@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import time
+
+from liveboard_test import steps
+from liveboard_test.capabilities import build_options
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_mjpeg import FakeMjpegServer, fake_jpeg
+from liveboard_test.mjpeg import MjpegRecorder, mjpeg_url, read_frames
+
+TEST = "tests/test_login_ios.py::TestLiveboardiOS::test_liveboard_login_flow"
+
+
+def test_reads_length_and_marker_framed_parts():
+    body = (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 9\r\n\r\n' + fake_jpeg('first') + b'\r\n'
+            + b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + fake_jpeg('second') + b'\r\n'
+            + b'--frame\r\nContent-Length: 20\r\n\r\n\xff\xd8truncated')
+
+    assert list(read_frames(io.BytesIO(body))) == [fake_jpeg('first'), fake_jpeg('second')]
+
+
+def test_marker_framed_parts_split_across_reads():
+    class Trickle(io.BytesIO):
+        """Hands out a few bytes per read, like a slow connection."""
+
+        def read1(self, size=-1):
+            return super().read1(min(size, 7))
+
+    frames = [fake_jpeg(f'frame {i}' * 50) for i in range(20)]
+    body = b''.join(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n' for frame in frames)
+
+    assert list(read_frames(Trickle(body))) == frames
+    assert list(read_frames(io.BytesIO(body))) == frames
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_samples_the_stream_into_a_step_tagged_clip_per_test(tmp_path):
+    with FakeMjpegServer(fps=50, content_length=False) as server:
+        recorder = MjpegRecorder(server.url, fps=5, directory=str(tmp_path)).start()
+        try:
+            steps.start_test(TEST)
+            steps.step("Step 1: Tap 'Log in'")
+            assert wait_for(lambda: recorder.received >= 20)
+            steps.step("Step 2: Tap 'Continue with Email'")
+            assert wait_for(lambda: recorder.received >= 40)
+            steps.end_test(TEST, outcome='passed')
+        finally:
+            recorder.stop()
+
+    clip = recorder.clips[-1]
+    assert os.path.basename(clip) == "tests_test_login_ios.py_TestLiveboardiOS_test_liveboard_login_flow.mjpeg"
+    with open(clip[:-len('.mjpeg')] + '.json') as f:
+        index = json.load(f)
+    frames = index['frames']
+    assert index['outcome'] == 'passed'
+    tagged = [f['step'] for f in frames if f['step']]
+    assert tagged[0] == "Step 1: Tap 'Log in'"
+    assert set(tagged) == {"Step 1: Tap 'Log in'", "Step 2: Tap 'Continue with Email'"}
+    # Sampled well below the stream's rate, with every kept frame stored back to back.
+    assert len(frames) < recorder.received / 2
+    assert os.path.getsize(clip) == sum(f['length'] for f in frames)
+    with open(clip, 'rb') as f:
+        data = f.read()
+    assert data[frames[1]['offset']:frames[1]['offset'] + frames[1]['length']].startswith(b'\xff\xd8frame ')
+
+
+def test_frames_outside_a_test_are_dropped_and_outages_retried(tmp_path):
+    recorder = MjpegRecorder('http://127.0.0.1:9/', directory=str(tmp_path), reconnect_delay=0.05, timeout=1)
+    recorder.start()
+    try:
+        # The running pytest test opened a clip; end it as if the test had finished.
+        recorder('test_end', {'test': steps.current_test(), 'outcome': 'passed'})
+        assert not recorder.offer(fake_jpeg('idle'))
+        assert wait_for(lambda: recorder.errors >= 2)
+    finally:
+        recorder.stop()
+    assert len(recorder.clips) == 1 and recorder.sampled == 0
+
+
+def test_stream_url_uses_the_devices_port_on_the_appium_host(monkeypatch):
+    monkeypatch.delenv('MJPEG_URL', raising=False)
+    with FakeAppiumServer() as server:
+        for port in ('9101', '9102'):
+            driver = create_driver(f'http://localhost:{server.port}/wd/hub',
+                                   build_options('ios', 'warm', environ={'MJPEG_PORT': port}))
+            try:
+                assert mjpeg_url(driver) == f'http://localhost:{port}/'
+            finally:
+                driver.quit()
@@ -1,57 +1,114 @@
-import subprocess
-import multiprocessing
+import json
+import os
 import sys
 
+from liveboard_test.appium_servers import get_server_manager, shutdown_server_manager
+from liveboard_test.artifacts import run_directory, run_id
+from liveboard_test.events import EventReport, LiveConsole
+from liveboard_test.preflight import get_health_report
+from liveboard_test.quarantine import load_quarantine
+from liveboard_test.run_report import RunReport
+from liveboard_test.scheduler import DevicePoolScheduler, collect_items, load_inventory, run_pytest_item, tail
+from liveboard_test.sharding import ShardSelector, format_result, shard_result, write_result
+
 ANDROID_TEST = "tests/test_login_android_compose.py"
 IOS_TEST = "tests/test_login_ios.py"
 
 
-def run_pytest(test_path, result_queue):
-    """Run pytest for the given test file and put the result in the queue."""
-    try:
-        result = subprocess.run([
-            sys.executable, '-m', 'pytest', test_path, '-v'
-        ], capture_output=True, text=True)
-        result_queue.put((test_path, result.returncode, result.stdout, result.stderr))
-    except Exception as e:
-        result_queue.put((test_path, 1, '', str(e)))
+def print_result(result):
+    """Print where an item's log went once its device finishes it (events were shown live)."""
+    if result.passed:
+        print(f"✅ {result.nodeid} on {result.device.name} PASSED ({result.duration:.2f}s) - log: {result.log_path}")
+    else:
+        print(f"❌ {result.nodeid} on {result.device.name} FAILED ({result.duration:.2f}s) - log: {result.log_path}")
+        print(tail(result.log_path) or result.stderr)
 
 
 def main():
-    print("\n=== Running Android and iOS tests in parallel ===\n")
-    result_queue = multiprocessing.Queue()
-
-    android_proc = multiprocessing.Process(target=run_pytest, args=(ANDROID_TEST, result_queue))
-    ios_proc = multiprocessing.Process(target=run_pytest, args=(IOS_TEST, result_queue))
-
-    android_proc.start()
-    ios_proc.start()
-
-    android_proc.join()
-    ios_proc.join()
-
-    # Collect results
-    results = [result_queue.get() for _ in range(2)]
-
-    print("\n=== Test Results Summary ===\n")
-    all_passed = True
-    for test_path, returncode, stdout, stderr in results:
-        print(f"--- {test_path} ---")
-        print(stdout)
-        if returncode == 0:
-            print(f"✅ {test_path} PASSED")
-        else:
-            print(f"❌ {test_path} FAILED")
-            if stderr:
-                print(stderr)
-            all_passed = False
-        print("\n--------------------------\n")
-
-    if not all_passed:
-        sys.exit(1)
-    else:
-        sys.exit(0)
+    # Workers inherit it, so the whole run shares one artifacts/<RUN_ID>/ directory
+    os.environ.setdefault('RUN_ID', run_id())
+    devices = load_inventory()
+    servers = None
+    if os.getenv('APPIUM_MANAGED'):
+        # Start (warm) Appium servers on free ports and bind one to each device
+        servers = get_server_manager().bind(devices)
+    if os.getenv('PREFLIGHT') != 'off':
+        # Probe all servers and devices at once (or reuse a fresh report) and leave dead devices out
+        health = get_health_report(devices)
+        print(health.format())
+        healthy = health.healthy(devices)
+        for device in devices:
+            if device not in healthy:
+                print(f"⚠️ Skipping {device.name}: {'; '.join(health.devices[device.name]['reasons'])}")
+        devices = healthy
+        if not devices:
+            print("❌ No healthy device left after preflight")
+            sys.exit(1)
+    print(f"\n=== Running tests across {len(devices)} device(s) ===\n")
+    for device in devices:
+        print(f"📱 {device.name} ({device.platform}) -> port {device.appium_port}")
+
+    console = LiveConsole()
+    events = EventReport()
+    run_report = RunReport()
+
+    def on_event(event):
+        console(event)
+        events(event)
+        run_report(event)
+
+    items = collect_items(sys.argv[1:] or [ANDROID_TEST, IOS_TEST])
+    selector = None
+    if os.getenv('SHARD_COUNT'):
+        # Only this runner's share of the suite (see liveboard_test.sharding)
+        selector = ShardSelector(int(os.getenv('SHARD_INDEX', '0')), int(os.getenv('SHARD_COUNT')),
+                                 os.getenv('SHARD_PLAN'))
+        items = selector.select(items)
+        print(f"🧩 Shard {selector.index}/{selector.count}: {len(items)} test(s), "
+              f"predicted {selector.plan.predicted(selector.index):.1f}s")
+    # Flaky tests run in a lower-priority lane once everything else is done
+    quarantine = load_quarantine()
+    critical, quarantined = quarantine.split(items)
+    if quarantined:
+        print(f"🚧 {len(quarantined)} quarantined test(s) run last and only fail the run once they break for real")
+    runner = None
+    if servers is not None:
+        def runner(nodeid, device):
+            # Recycles the device's server between items once it is worn out
+            with servers.server_for(device):
+                return run_pytest_item(nodeid, device, on_event=on_event)
+    report = DevicePoolScheduler(devices, runner=runner, on_event=on_event, quarantined=quarantined).run(
+        critical + quarantined, on_result=print_result)
+
+    # Workers take tests that broke for real out of quarantine; their failures count again
+    for result in report.unquarantine(load_quarantine()):
+        print(f"❌ {result.nodeid} left quarantine failing - counted as a failure")
+    print(report.format())
+    if servers is not None:
+        shutdown_server_manager()
+        print(servers.format())
+    for nodeid in report.unscheduled:
+        print(f"❌ No device for {nodeid} - not run, which fails the run")
+
+    junit_path = events.write_junit(os.getenv('JUNIT_REPORT') or os.path.join(run_directory(), 'junit.xml'))
+    events_path = events.write_json(os.getenv('EVENTS_REPORT') or os.path.join(run_directory(), 'results.json'))
+    print(f"🧾 Merged reports: {junit_path}, {events_path}")
+    run_report.close()
+    print(run_report.format())
+
+    if selector is not None:
+        result = shard_result(selector.index, selector.count, selector.plan,
+                              {r.nodeid: r.duration for r in report.results}, report.wall)
+        print(format_result(result))
+        write_result(os.getenv('SHARD_REPORT') or os.path.join(run_directory(), f"shard-{selector.index}.json"), result)
+
+    report_path = os.getenv('SCHEDULER_REPORT')
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+
+    sys.exit(0 if report.all_passed else 1)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,99 @@
+import json
+import os
+import socket
+import stat
+import time
+
+import pytest
+
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.preflight import (
+    HealthProber, HealthReport, get_health_report, installed_drivers, unhealthy_reason,
+)
+from liveboard_test.scheduler import Device
+
+IOS_UDID = '00008030-000151561A85402E'
+
+
+def stub(directory, name, output, delay=0.3):
+    path = directory / name
+    path.write_text(f"#!/bin/sh\nsleep {delay}\ncat <<'EOF'\n{output}\nEOF\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    """Stub appium, idevice_id and adb executables, each taking 0.3 s to answer."""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub(bin_dir, 'appium', json.dumps({'xcuitest': {'version': '5.12.2', 'installed': True},
+                                         'uiautomator2': {'version': '2.29.2', 'installed': True}}))
+    stub(bin_dir, 'idevice_id', f"{IOS_UDID}\n00008110-001A2C3E0E84801E")
+    stub(bin_dir, 'adb', "List of devices attached\nHT7991A08308\tdevice\nEMULATOR-1\toffline\n")
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_probes_servers_drivers_and_devices_concurrently(tools):
+    dead = free_port()
+    with FakeAppiumServer() as server:
+        devices = [
+            Device('iPhone SE', 'ios', IOS_UDID, server.port),
+            Device('Pixel', 'android', 'HT7991A08308', server.port),
+            Device('Emulator', 'android', 'EMULATOR-1', server.port),
+            Device('Unplugged', 'android', 'GONE', dead),
+        ]
+        report = HealthProber(devices, timeout=2).run()
+
+    verdicts = {name: (entry['healthy'], entry['reasons']) for name, entry in report.devices.items()}
+    assert verdicts['iPhone SE'] == (True, [])
+    assert verdicts['Pixel'] == (True, [])
+    assert verdicts['Emulator'] == (False, ["EMULATOR-1 is offline"])
+    assert not verdicts['Unplugged'][0]
+    assert verdicts['Unplugged'][1][0].startswith(f"Appium on :{dead}")
+    assert verdicts['Unplugged'][1][1] == "GONE not connected"
+    assert [d.name for d in report.healthy(devices)] == ['iPhone SE', 'Pixel']
+    # Three 0.3 s commands and the HTTP probes ran at the same time.
+    assert report.duration < 0.8, report.format()
+
+
+def test_missing_tools_and_drivers_make_devices_unhealthy(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub(bin_dir, 'appium', "✔ Listing installed drivers\n- uiautomator2@2.29.2 [installed (npm)]", delay=0)
+    monkeypatch.setenv('PATH', str(bin_dir))
+    with FakeAppiumServer() as server:
+        report = HealthProber([Device('iPhone SE', 'ios', IOS_UDID, server.port)], timeout=2).run()
+
+    reasons = report.devices['iPhone SE']['reasons']
+    assert reasons[0] == "Appium driver xcuitest not installed"
+    assert reasons[1].startswith("cannot list ios devices")
+
+
+def test_report_is_cached_for_its_ttl_and_read_by_fixtures(tools, tmp_path):
+    path = str(tmp_path / 'preflight.json')
+    devices = [Device('iPhone SE', 'ios', IOS_UDID, free_port())]
+
+    first = get_health_report(devices, ttl=60, path=path)
+    assert get_health_report(devices, ttl=60, path=path).generated == first.generated
+    assert get_health_report(devices, ttl=60, path=path, force=True).generated > first.generated
+
+    reason = unhealthy_reason('ios', devices[0].appium_port, path=path)
+    assert reason.startswith(f"ios device on :{devices[0].appium_port} failed preflight: Appium on")
+    assert unhealthy_reason('android', 4724, path=path) is None
+    # A stale report is never used to skip anything.
+    report = HealthReport.load(path)
+    report.generated = time.time() - 3600
+    report.save(path)
+    assert unhealthy_reason('ios', devices[0].appium_port, path=path, ttl=60) is None
+
+
+def test_installed_drivers_from_text_output():
+    output = "✔ Listing installed drivers\n- uiautomator2@2.29.2 [installed (npm)]\n- xcuitest@5.12.2 [installed (npm)]"
+    assert installed_drivers(output) == ['uiautomator2', 'xcuitest']
@@ -0,0 +1,54 @@
+import json
+
+from liveboard_test import steps
+from liveboard_test.quarantine import Quarantine, QuarantineTracker
+
+TEST = "tests/test_login_android_compose.py::TestAndroidLogin::test_android_login_flow"
+
+
+def test_passing_only_after_a_retry_quarantines_until_clean_passes(tmp_path):
+    path = str(tmp_path / "quarantine.json")
+    quarantine = Quarantine(path, release_after=2)
+
+    assert quarantine.record(TEST, 'passed') is None
+    assert quarantine.record(TEST, 'failed', [("Step 2", 'TimeoutException')]) is None
+    assert quarantine.record(TEST, 'passed', [("Step 2", 'TimeoutException')]) == 'quarantined'
+    # Another worker process sees the entry.
+    assert TEST in Quarantine(path)
+    assert Quarantine(path).split(["a", TEST, "b"]) == (["a", "b"], [TEST])
+
+    assert quarantine.record(TEST, 'passed') is None
+    assert quarantine.record(TEST, 'failed', [("Step 2", 'TimeoutException')]) is None
+    assert quarantine.record(TEST, 'passed') is None
+    assert quarantine.record(TEST, 'passed') == 'released'
+    with open(path) as f:
+        assert json.load(f) == {'tests': {}}
+
+
+def test_tests_that_break_for_real_leave_quarantine_failing(tmp_path):
+    quarantine = Quarantine(str(tmp_path / "quarantine.json"), fail_after=2)
+    retried = [("Step 2", 'TimeoutException')]
+
+    assert quarantine.record(TEST, 'passed', retried) == 'quarantined'
+    # A failure without any retry is not flaky
+    assert quarantine.record(TEST, 'failed') == 'failing' and TEST not in quarantine
+
+    assert quarantine.record(TEST, 'passed', retried) == 'quarantined'
+    assert quarantine.record(TEST, 'failed', retried) is None
+    assert quarantine.record(TEST, 'failed', retried) == 'failing' and TEST not in quarantine
+
+
+def test_tracker_quarantines_tests_with_retried_steps(tmp_path, monkeypatch):
+    quarantine = Quarantine(str(tmp_path / "quarantine.json"))
+    # Only this tracker listens, not the one conftest installed for the real run.
+    monkeypatch.setattr(steps, '_listeners', [QuarantineTracker(quarantine)])
+
+    steps.start_test(TEST)
+    steps.step("Step 1: Tap 'Log in'")
+    steps.notify('retry', attempt=1, error='TimeoutException')
+    steps.end_test(TEST, outcome='passed')
+    steps.start_test("tests/test_x.py::test_clean")
+    steps.end_test("tests/test_x.py::test_clean", outcome='passed')
+
+    assert list(quarantine.entries) == [TEST]
+    assert quarantine.entries[TEST]['reason'] == "passed after retrying Step 1: Tap 'Log in' (TimeoutException)"
@@ -0,0 +1,95 @@
+import json
+import os
+
+from liveboard_test import steps
+from liveboard_test.run_report import RunReport, install_run_report, read_index, render_html
+
+IOS = "tests/test_login_ios.py::TestLiveboardiOS::test_liveboard_login_flow"
+ANDROID = "tests/test_login_android_compose.py::TestAndroidLogin::test_android_login_flow"
+
+
+def test_interleaved_workers_become_one_record_per_test(tmp_path):
+    shot = tmp_path / 'shots' / '0001_welcome.png'
+    shot.parent.mkdir()
+    shot.write_bytes(b'png')
+    report = RunReport(str(tmp_path / 'report'))
+    for event in [
+        {'event': 'test_start', 'worker': 'iPhone SE', 'test': IOS, 'time': 100.0},
+        {'event': 'test_start', 'worker': 'Pixel', 'test': ANDROID, 'time': 100.5},
+        {'event': 'step', 'worker': 'iPhone SE', 'test': IOS, 'step': 'Step 1: Tap <Log in>', 'time': 101.0},
+        {'event': 'screenshot', 'worker': 'iPhone SE', 'test': IOS, 'path': str(shot), 'time': 101.5},
+        {'event': 'screenshot', 'worker': 'iPhone SE', 'test': IOS, 'path': str(tmp_path / 'dropped.png')},
+        {'event': 'step_end', 'worker': 'iPhone SE', 'test': IOS, 'step': 'Step 1: Tap <Log in>', 'duration': 2.0},
+        {'event': 'failure', 'worker': 'iPhone SE', 'test': IOS, 'when': 'call', 'message': 'TimeoutException',
+         'time': 103.5},
+        {'event': 'test_end', 'worker': 'iPhone SE', 'test': IOS, 'outcome': 'failed', 'duration': 4.0, 'time': 104.0},
+        {'event': 'device_log', 'worker': 'iPhone SE', 'test': IOS, 'type': 'syslog', 'path': 'ios.syslog.log',
+         'lines': 12},
+        {'event': 'worker_exit', 'worker': 'iPhone SE', 'test': IOS, 'returncode': 1, 'log': 'logs/ios.log'},
+        # A worker that dies mid-test
+        {'event': 'worker_exit', 'worker': 'Pixel', 'test': ANDROID, 'returncode': -9, 'log': 'logs/pixel.log',
+         'time': 110.5},
+    ]:
+        report(event)
+    html_path = report.close()
+
+    ios, android = list(read_index(report.index_path))
+    assert ios['outcome'] == 'failed' and ios['device'] == 'iPhone SE'
+    assert ios['steps'] == [{'name': 'Step 1: Tap <Log in>', 'start': 1.0, 'duration': 2.0}]
+    assert ios['failure']['at'] == 3.5 and ios['logs'][0]['lines'] == 12 and ios['log'] == 'logs/ios.log'
+    assert android['outcome'] == 'failed' and android['duration'] == 10.0
+    assert android['message'] == 'worker exited with -9'
+
+    with open(html_path, encoding='utf-8') as f:
+        html = f.read()
+    assert '2 tests: 0 passed, 2 failed, 0 skipped on 2 device(s)' in html
+    assert f'<a href="#t0">{IOS}</a>' in html
+    assert 'Step 1: Tap &lt;Log in&gt;' in html and '<pre>TimeoutException</pre>' in html
+    # Only screenshots that were written, linked relative to the page
+    assert html.count('<img loading="lazy"') == 1 and 'src="../shots/0001_welcome.png"' in html
+
+
+def test_plain_pytest_runs_feed_the_report_through_step_events(tmp_path, monkeypatch):
+    report = RunReport(str(tmp_path))
+    monkeypatch.setattr(steps, '_listeners', [report.step_listener()])
+    steps.start_test(IOS)
+    steps.step("Step 1: open")
+    steps.notify('screen', screen='welcome')
+    steps.end_test(IOS, outcome='passed', duration=0.5)
+    steps.start_test(ANDROID)
+    steps.end_test(ANDROID, outcome='skipped')
+    report.close()
+
+    records = list(read_index(report.index_path))
+    assert [(r['test'], r['outcome'], r['device']) for r in records] == [
+        (IOS, 'passed', 'ios'), (ANDROID, 'skipped', 'android')]
+    assert records[0]['steps'][0]['duration'] is not None
+    assert records[0]['marks'] == [{'kind': 'screen', 'at': records[0]['marks'][0]['at'], 'label': 'welcome'}]
+    # Unit-test runs (no worker, no opt-in) build no report of their own
+    assert install_run_report(environ={}) is None
+
+
+def test_renders_hundreds_of_tests_from_the_index_alone(tmp_path):
+    report = RunReport(str(tmp_path))
+    devices = [f"device-{d}" for d in range(8)]
+    for n in range(50):
+        for d, device in enumerate(devices):
+            test = f"tests/test_many.py::test_{n}[{d}]"
+            report({'event': 'test_start', 'worker': device, 'test': test, 'time': n})
+        for d, device in enumerate(devices):
+            test = f"tests/test_many.py::test_{n}[{d}]"
+            report({'event': 'step', 'worker': device, 'test': test, 'step': 'Step 1', 'time': n + 0.1})
+            report({'event': 'test_end', 'worker': device, 'test': test, 'time': n + 0.5,
+                    'outcome': 'failed' if (n + d) % 10 == 0 else 'passed'})
+        # Nothing but the last test of each device is held back
+        assert not report._running and len(report._finished) == len(devices)
+    report.close()
+
+    assert sum(1 for _ in read_index(report.index_path)) == 400
+    with open(report.index_path) as f:
+        assert json.loads(f.readline())['device'] == 'device-0'
+    html_path = render_html(report.index_path, str(tmp_path / 'again.html'), title='rerendered')
+    with open(html_path, encoding='utf-8') as f:
+        html = f.read()
+    assert '400 tests: 360 passed, 40 failed' in html and html.count('<section') == 400
+    assert html.count('<li><a href="#t') == 40 and os.path.exists(report.html_path)
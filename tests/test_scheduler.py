@@ -0,0 +1,126 @@
+import json
+import textwrap
+import time
+
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.scheduler import (
+    Device, DevicePoolScheduler, ItemResult, collect_items, item_platform, load_inventory,
+)
+
+
+def test_device_env_matches_conftest_variables():
+    ios = Device('iPhone SE', 'iOS', 'IOS-UDID', 4800, '17.2')
+    android = Device('Pixel', 'android', 'ANDROID-UDID', 4801)
+
+    assert ios.env() == {
+        'APPIUM_PORT': '4800', 'DEVICE_UDID': 'IOS-UDID',
+        'DEVICE_NAME': 'iPhone SE', 'PLATFORM_VERSION': '17.2',
+    }
+    assert android.env() == {
+        'APPIUM_PORT': '4801', 'ANDROID_DEVICE_UDID': 'ANDROID-UDID', 'ANDROID_DEVICE_NAME': 'Pixel',
+    }
+
+
+def test_load_inventory_from_json(tmp_path):
+    path = tmp_path / "devices.json"
+    path.write_text(json.dumps({'devices': [
+        {'name': 'se', 'platform': 'ios', 'udid': 'A', 'appium_port': 4723},
+        {'platform': 'android', 'udid': 'B', 'appium_port': 4724},
+    ]}))
+
+    devices = load_inventory(str(path))
+
+    assert [(d.name, d.platform, d.appium_port) for d in devices] == [('se', 'ios', 4723), ('B', 'android', 4724)]
+
+
+def test_item_platform_from_file_name():
+    assert item_platform("tests/test_login_ios.py::TestLiveboardiOS::test_x") == 'ios'
+    assert item_platform("tests/test_login_android_compose.py::TestAndroidLogin::test_x") == 'android'
+    assert item_platform("tests/test_misc.py::test_x") == 'any'
+
+
+def test_fast_device_steals_work_from_slow_one():
+    fast = Device('fast', 'ios', 'F', 1)
+    slow = Device('slow', 'ios', 'S', 2)
+
+    def runner(nodeid, device):
+        time.sleep(0.05 if device is fast else 0.3)
+        return ItemResult(nodeid, device, 0, 0)
+
+    items = [f"tests/test_ios_{i}.py::test_a" for i in range(8)]
+    report = DevicePoolScheduler([fast, slow], runner=runner).run(items)
+
+    by_device = {s.device.name: s.items for s in report.stats}
+    assert sum(by_device.values()) == 8
+    assert by_device['fast'] > by_device['slow']
+    assert report.all_passed
+
+
+def test_items_without_matching_device_are_unscheduled():
+    device = Device('se', 'ios', 'A', 1)
+    runner = lambda nodeid, d: ItemResult(nodeid, d, 0, 0)
+
+    report = DevicePoolScheduler([device], runner=runner).run([
+        "tests/test_login_ios.py::t", "tests/test_login_android_compose.py::t", "tests/test_misc.py::t",
+    ])
+
+    assert report.unscheduled == ["tests/test_login_android_compose.py::t"]
+    assert len(report.results) == 2
+    # A test that never ran is not a pass
+    assert not report.all_passed
+
+
+def test_quarantined_items_run_last_and_do_not_fail_the_run():
+    device = Device('se', 'ios', 'A', 1)
+    order = []
+
+    def runner(nodeid, d):
+        order.append(nodeid)
+        return ItemResult(nodeid, d, 1 if 'flaky' in nodeid else 0, 0)
+
+    items = ["tests/test_ios_flaky.py::t", "tests/test_ios_a.py::t", "tests/test_misc.py::t"]
+    report = DevicePoolScheduler([device], runner=runner, quarantined=[items[0]]).run(items)
+
+    assert order == items[1:] + items[:1]
+    assert report.all_passed
+    assert report.to_dict()['quarantined'] == {items[0]: 'failed'}
+    assert "Quarantine lane: 1 items, 1 failed" in report.format()
+
+    # The worker took it out of quarantine for failing for real: the run fails
+    assert [r.nodeid for r in report.unquarantine(set())] == items[:1]
+    assert not report.all_passed and report.to_dict()['quarantined'] == {}
+
+
+def test_runs_real_pytest_items_against_fake_appium_servers(tmp_path):
+    (tmp_path / "test_ios_fake.py").write_text(textwrap.dedent("""
+        import json, os, urllib.request
+        import pytest
+
+        @pytest.mark.parametrize('n', range(6))
+        def test_status(n):
+            assert os.environ['DEVICE_UDID'].startswith('udid-')
+            url = f"http://127.0.0.1:{os.environ['APPIUM_PORT']}/wd/hub/status"
+            with urllib.request.urlopen(url) as response:
+                assert json.load(response)['value']['ready']
+    """))
+    servers = [FakeAppiumServer().start() for _ in range(3)]
+    try:
+        devices = [Device(f"phone-{i}", 'ios', f"udid-{i}", s.port) for i, s in enumerate(servers)]
+        items = collect_items(["test_ios_fake.py"], cwd=str(tmp_path))
+
+        def runner(nodeid, device):
+            from liveboard_test.scheduler import run_pytest_item
+            return run_pytest_item(nodeid, device, cwd=str(tmp_path), pytest_args=['-p', 'no:cacheprovider'])
+
+        report = DevicePoolScheduler(devices, runner=runner).run(items)
+    finally:
+        for server in servers:
+            server.stop()
+
+    assert len(items) == 6
+    assert report.all_passed, [r.stdout for r in report.results]
+    assert sum(s.command_count for s in servers) == 6
+    summary = report.to_dict()
+    assert summary['items'] == 6
+    assert summary['throughput_per_minute'] > 0
+    assert all(0 < d['utilisation'] <= 1 for d in summary['devices'].values() if d['items'])
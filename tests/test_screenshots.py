@@ -0,0 +1,106 @@
+import base64
+import os
+
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.webdriver import WebDriver
+
+from liveboard_test import artifacts
+from liveboard_test.fake_appium import FakeAppiumServer, solid_png
+from liveboard_test.screenshots import FrameRing, ScreenshotPipeline
+
+
+def payload(rgb):
+    return base64.b64encode(solid_png(rgb=rgb)).decode('ascii')
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = ScreenshotPipeline(directory=str(tmp_path))
+    yield pipeline
+    pipeline.close()
+
+
+def test_names_are_collision_free_within_the_same_second(pipeline):
+    first = pipeline.submit(payload((1, 2, 3)), "login")
+    second = pipeline.submit(payload((4, 5, 6)), "login")
+    pipeline.flush()
+
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_identical_consecutive_frames_are_dropped(pipeline):
+    frame = payload((9, 9, 9))
+    paths = [pipeline.submit(frame, f"step{i}") for i in range(3)]
+    pipeline.submit(payload((0, 0, 0)), "changed")
+    pipeline.submit(frame, "back")
+    pipeline.flush()
+
+    stats = pipeline.stats()
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1]) and not os.path.exists(paths[2])
+    assert stats['written'] == 3
+    assert stats['duplicates_dropped'] == 2
+    assert stats['bytes_written'] == sum(os.path.getsize(os.path.join(pipeline.directory, f))
+                                         for f in os.listdir(pipeline.directory))
+    assert stats['queue_depth'] == 0
+
+
+def test_capture_only_fetches_on_the_test_thread(pipeline):
+    with FakeAppiumServer() as server:
+        driver = WebDriver(server.url, options=XCUITestOptions())
+        try:
+            path = pipeline.capture(driver, "app launch", prefix="ios_test_")
+        finally:
+            driver.quit()
+    pipeline.flush()
+
+    assert os.path.basename(path) == "ios_test_0001_app_launch.png"
+    with open(path, 'rb') as f:
+        assert f.read() == server.screenshot_png
+
+
+def test_failure_only_mode_writes_buffered_frames_only_when_flushed(tmp_path):
+    pipeline = ScreenshotPipeline(directory=str(tmp_path), ring=FrameRing(size=2))
+    try:
+        passed = pipeline.submit(payload((1, 1, 1)), "passed")
+        assert pipeline.discard_buffer() == 1
+        frames = [pipeline.submit(payload((i, 0, 0)), f"step{i}") for i in range(3)]
+        assert pipeline.flush_buffer() == 2
+        pipeline.flush()
+    finally:
+        pipeline.close()
+
+    # Only the last two frames of the failed test survive; nothing of the passing one.
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in frames[1:])
+    assert not os.path.exists(passed)
+    stats = pipeline.stats()
+    assert stats['discarded'] == 2 and stats['failure_flushes'] == 1
+    assert stats['bytes_avoided'] == len(solid_png(rgb=(1, 1, 1))) + len(solid_png(rgb=(0, 0, 0)))
+
+
+def test_frame_ring_respects_the_memory_cap():
+    ring = FrameRing(size=10, max_bytes=25)
+    evicted = [ring.add(b'x' * 10, f"frame{i}", None) for i in range(4)]
+
+    assert [len(e) for e in evicted] == [0, 0, 1, 1]
+    assert len(ring) == 2 and ring.bytes == 20
+
+
+def test_worker_processes_sharing_a_run_write_to_their_own_directories(tmp_path, monkeypatch):
+    monkeypatch.setenv('ARTIFACTS_DIR', str(tmp_path))
+    monkeypatch.setattr(artifacts, '_run_id', 'shared')
+    paths = []
+    for worker in ('iPhone SE', 'iPhone 15'):
+        monkeypatch.setenv('LIVEBOARD_WORKER', worker)
+        pipeline = ScreenshotPipeline()
+        try:
+            paths.append(pipeline.submit(payload((1, 2, 3)), "app_launch", prefix="ios_test_"))
+        finally:
+            pipeline.close()
+
+    # Each worker numbers from 1 again, yet nothing is overwritten
+    assert [os.path.basename(p) for p in paths] == ["ios_test_0001_app_launch.png"] * 2
+    assert os.path.dirname(paths[0]) == str(tmp_path / 'shared' / 'screenshots' / f"iPhone_SE-{os.getpid()}")
+    assert all(os.path.exists(p) for p in paths)
@@ -0,0 +1,112 @@
+import pytest
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test.capabilities import build_options
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.session_pool import SessionPool, app_id_for, normalise_capabilities
+
+
+@pytest.fixture
+def server():
+    with FakeAppiumServer() as fake:
+        yield fake
+
+
+def ios_options(udid='UDID-1'):
+    options = XCUITestOptions()
+    options.udid = udid
+    options.bundle_id = 'com.inconceptlabs.liveboard'
+    options.wda_launch_timeout = 180000
+    return options
+
+
+def test_normalised_key_ignores_prefix_and_order():
+    assert normalise_capabilities({'appium:udid': 'A', 'platformName': 'iOS'}) == \
+        normalise_capabilities({'platformName': 'iOS', 'udid': 'A'})
+    assert normalise_capabilities({'udid': 'A'}) != normalise_capabilities({'udid': 'B'})
+
+
+def test_app_id_for_ios_and_android():
+    android = UiAutomator2Options()
+    android.app_package = 'com.inconceptlabs.liveboard'
+
+    assert app_id_for(ios_options()) == 'com.inconceptlabs.liveboard'
+    assert app_id_for(android) == 'com.inconceptlabs.liveboard'
+
+
+def test_reuses_session_and_resets_app(server):
+    pool = SessionPool()
+    try:
+        first = pool.acquire(server.url, ios_options())
+        pool.release(first)
+        second = pool.acquire(server.url, ios_options())
+
+        assert second is first
+        assert server.sessions_created == 1
+        assert server.sessions[second.session_id]['app_launches'] == 2
+        assert pool.stats()['sessions_saved'] == 1
+    finally:
+        pool.close()
+    assert server.sessions == {}
+
+
+def test_different_capabilities_get_different_sessions(server):
+    pool = SessionPool()
+    try:
+        a = pool.acquire(server.url, ios_options('A'))
+        pool.release(a)
+        b = pool.acquire(server.url, ios_options('B'))
+
+        assert a is not b
+        assert server.sessions_created == 2
+    finally:
+        pool.close()
+
+
+def test_recycles_after_max_uses(server):
+    pool = SessionPool(max_uses=2)
+    try:
+        drivers = []
+        for _ in range(3):
+            driver = pool.acquire(server.url, ios_options())
+            drivers.append(driver)
+            pool.release(driver)
+
+        assert drivers[0] is drivers[1]
+        assert drivers[2] is not drivers[0]
+        assert pool.stats()['recycled'] == 1
+        assert server.sessions_created == 2
+    finally:
+        pool.close()
+
+
+def test_cold_profile_sessions_are_never_reused(server):
+    pool = SessionPool()
+    try:
+        cold = build_options('ios', 'cold', overrides={'udid': 'UDID-1'}, config_file='', environ={})
+        first = pool.acquire(server.url, cold)
+        pool.release(first)
+        second = pool.acquire(server.url, cold)
+
+        assert second is not first
+        assert server.sessions_created == 2
+        assert pool.stats()['recycled'] == 1
+    finally:
+        pool.close()
+
+
+def test_dead_session_fails_health_check_and_is_replaced(server):
+    pool = SessionPool()
+    try:
+        driver = pool.acquire(server.url, ios_options())
+        pool.release(driver)
+        server.sessions.clear()  # server forgot the session, e.g. after a WDA crash
+
+        replacement = pool.acquire(server.url, ios_options())
+
+        assert replacement is not driver
+        assert pool.stats()['health_failures'] == 1
+        assert replacement.session_id in server.sessions
+    finally:
+        pool.close()
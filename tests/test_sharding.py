@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from liveboard_test.scheduler import Device
+from liveboard_test.sharding import Shard, ShardPlan, merge_results, plan_shards
+
+IOS = "tests/test_login_ios.py::TestLiveboardiOS::test_{}"
+ANDROID = "tests/test_login_android_compose.py::TestAndroidLogin::test_{}"
+
+
+def _bench(count):
+    return [Shard(i, f"mac-{i}", [Device('se', 'ios', f'I{i}', 4723), Device('pixel', 'android', f'A{i}', 4724)])
+            for i in range(count)]
+
+
+def test_lpt_balances_platform_lanes_deterministically():
+    durations = {IOS.format('a'): 50, IOS.format('b'): 40, IOS.format('c'): 30, IOS.format('d'): 20,
+                 ANDROID.format('a'): 45, ANDROID.format('b'): 35}
+    plan = plan_shards(list(durations), _bench(2), durations)
+
+    assert [shard.items for shard in plan.shards] == [
+        [IOS.format('a'), ANDROID.format('b'), IOS.format('d')],
+        [ANDROID.format('a'), IOS.format('b'), IOS.format('c')],
+    ]
+    assert plan.makespan == 70
+    again = plan_shards(sorted(durations, reverse=True), _bench(2), durations)
+    assert [s.items for s in again.shards] == [s.items for s in plan.shards]
+
+
+def test_platform_constraints_and_unknown_durations():
+    shards = [Shard(0, 'ios-mac', [Device('se', 'ios', 'I', 4723)]),
+              Shard(1, 'android-mac', [Device('pixel', 'android', 'A', 4724)])]
+    durations = {IOS.format('a'): 10, IOS.format('b'): 30}
+    items = [IOS.format('a'), IOS.format('b'), IOS.format('new'), ANDROID.format('a')]
+
+    plan = plan_shards(items, shards, durations)
+
+    assert sorted(plan.shards[0].items) == sorted(items[:3])
+    assert plan.shards[1].items == [ANDROID.format('a')]
+    # Tests without history are assumed to take the median of the known ones.
+    assert plan.estimated == sorted([IOS.format('new'), ANDROID.format('a')])
+    assert plan.durations[IOS.format('new')] == 20
+    assert plan.predicted(0) == 60 and plan.predicted(1) == 20
+
+    only_ios = plan_shards([ANDROID.format('x')], shards[:1], {})
+    assert only_ios.unassigned == [ANDROID.format('x')]
+
+
+def test_saved_plan_routes_new_tests_to_a_stable_shard(tmp_path):
+    durations = {IOS.format('a'): 10, ANDROID.format('a'): 10}
+    path = plan_shards(list(durations), _bench(3), durations).save(str(tmp_path / 'plan.json'))
+
+    plan = ShardPlan.load(path)
+
+    assert plan.index_for(IOS.format('a')) == 0 and plan.index_for(ANDROID.format('a')) == 0
+    assert plan.makespan == 10
+    assert plan.index_for("tests/test_misc.py::test_new") == ShardPlan.load(path).index_for(
+        "tests/test_misc.py::test_new")
+
+
+def test_pytest_plugin_runs_only_its_shard_and_reports(tmp_path):
+    (tmp_path / 'conftest.py').write_text(textwrap.dedent("""
+        from liveboard_test.sharding import ShardSelector, add_shard_options
+
+        def pytest_addoption(parser):
+            add_shard_options(parser)
+
+        def pytest_configure(config):
+            selector = ShardSelector.from_config(config)
+            if selector is not None:
+                config.pluginmanager.register(selector, 'liveboard-shards')
+    """))
+    (tmp_path / 'test_misc.py').write_text("".join(f"def test_{i}():\n    pass\n" for i in range(6)))
+    (tmp_path / 'durations.json').write_text(json.dumps({f"test_misc.py::test_{i}": i + 1 for i in range(6)}))
+    env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'),
+               TIMING_DB='off')
+
+    results, ran = [], []
+    for index in range(2):
+        report = tmp_path / f"shard-{index}.json"
+        output = subprocess.run(
+            [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', '--shard-count', '2',
+             '--shard-index', str(index), '--shard-durations', 'durations.json', '--shard-report', str(report)],
+            cwd=tmp_path, env=env, capture_output=True, text=True,
+        ).stdout
+        # Platform-agnostic tests share both default devices: (6 + 3 + 2) / 2 and (5 + 4 + 1) / 2.
+        assert f"🧩 Shard {index}/2: 3 tests, predicted {[5.5, 5.0][index]:.1f}s" in output
+        results.append(json.loads(report.read_text()))
+        ran += list(results[-1]['items'])
+
+    assert sorted(ran) == [f"test_misc.py::test_{i}" for i in range(6)]
+    merged = merge_results(results)
+    assert merged['predicted_makespan'] == 5.5 and merged['actual_makespan'] < 10
+    assert merged['worst_mispredictions'][0]['test'] == "test_misc.py::test_5"
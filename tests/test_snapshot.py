@@ -0,0 +1,68 @@
+from appium.options.ios.xcuitest.base import XCUITestOptions
+from appium.webdriver.common.appiumby import AppiumBy
+
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.locators import XPATH, compile_locator
+from liveboard_test.snapshot import ElementSnapshot
+
+SCREEN = """<?xml version="1.0" encoding="UTF-8"?>
+<AppiumAUT>
+  <XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Liveboard" enabled="true" visible="true" x="0" y="0" width="375" height="667">
+    <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="Welcome" label="Welcome" enabled="true" visible="true" x="20" y="80" width="335" height="40"/>
+    <XCUIElementTypeTextField type="XCUIElementTypeTextField" value="Email address" enabled="true" visible="true" x="20" y="200" width="335" height="44"/>
+    <XCUIElementTypeButton type="XCUIElementTypeButton" name="Log in" label="Log in" enabled="true" visible="true" x="20" y="400" width="335" height="50"/>
+    <XCUIElementTypeButton type="XCUIElementTypeButton" name="Sign up" label="Sign up" enabled="false" visible="true" x="20" y="460" width="335" height="50"/>
+    <XCUIElementTypeButton type="XCUIElementTypeButton" enabled="true" visible="true" x="20" y="520" width="40" height="40"/>
+    <XCUIElementTypeButton type="XCUIElementTypeButton" enabled="true" visible="false" x="80" y="520" width="40" height="40"/>
+    <XCUIElementTypeButton type="XCUIElementTypeButton" enabled="true" visible="true" x="140" y="520" width="40" height="40"/>
+  </XCUIElementTypeApplication>
+</AppiumAUT>"""
+
+TYPES = ('XCUIElementTypeButton', 'XCUIElementTypeTextField', 'XCUIElementTypeStaticText')
+
+
+def test_snapshot_decides_what_to_tap_in_one_round_trip():
+    with FakeAppiumServer() as server:
+        server.page_source = SCREEN
+        tapped = []
+        server.on_click = lambda node: tapped.append(node.rect)
+        driver = create_driver(server.url, XCUITestOptions())
+        try:
+            # Per-element questions, as test_ios_simple.py used to ask them
+            server.reset_counters()
+            counts = [len(driver.find_elements(AppiumBy.CLASS_NAME, t)) for t in TYPES]
+            for button in driver.find_elements(AppiumBy.CLASS_NAME, TYPES[0]):
+                button.get_attribute("name")
+                button.is_enabled() and button.is_displayed()
+            per_element = server.command_count
+
+            server.reset_counters()
+            snapshot = ElementSnapshot(driver).refresh()
+            assert [len(snapshot.of_type(t)) for t in TYPES] == counts == [5, 1, 1]
+            for button in snapshot.of_type(TYPES[0]):
+                button.name
+                if button.enabled and button.visible:
+                    button.click()
+            bulk = server.command_count
+        finally:
+            driver.quit()
+
+    # Four find_elements, five names, five is_enabled and four is_displayed ('Sign up' is disabled).
+    assert per_element == 18
+    # One page source, then one find_element + click per tapped button only.
+    assert bulk == 1 + 3 * 2
+    assert tapped == [(20, 400, 335, 50), (20, 520, 40, 40), (140, 520, 40, 40)]
+    assert snapshot.round_trips == 4 and snapshot.round_trips_without_snapshot == per_element
+    assert "4 round trips" in snapshot.format()
+
+
+def test_locators_match_exactly_their_element():
+    snapshot = ElementSnapshot(None, SCREEN)
+    buttons = snapshot.of_type('XCUIElementTypeButton')
+
+    assert buttons[0].locator == ('accessibility id', 'Log in')
+    # Nameless twins fall back to a positional XPath.
+    assert buttons[2].locator == (XPATH, '/AppiumAUT/XCUIElementTypeApplication[1]/XCUIElementTypeButton[3]')
+    for element in snapshot.find_all('xpath', '//*'):
+        assert compile_locator(*element.locator)(snapshot.root) == [element.node], element
@@ -0,0 +1,85 @@
+from liveboard_test import steps
+from liveboard_test.timing_store import TimingRecorder, TimingStore, install_timing_recorder, main
+
+TEST = "tests/test_login_ios.py::TestLiveboardiOS::test_liveboard_login_flow"
+
+
+def _history(store, durations, step="Step 3: Wait for login", device='iPhone SE'):
+    for seconds in durations:
+        run = store.start_run(git_commit='abc123', app_build='1.0', profile='warm')
+        store.record(run, [('step', TEST, step, device, seconds, 'passed')])
+
+
+def test_flags_latest_sample_far_above_history(tmp_path):
+    store = TimingStore(str(tmp_path / 'timings.sqlite'))
+    _history(store, [2.0, 2.1, 1.9, 2.05, 1.95, 2.0, 4.5])
+    _history(store, [1.0, 1.1, 0.9, 1.0, 1.05, 1.1], step="Step 1: Open app")
+
+    found = store.regressions(window=20, threshold=3.0, min_runs=5)
+    assert [(r.step, r.device) for r in found] == [("Step 3: Wait for login", 'iPhone SE')]
+    assert found[0].median == 2.0 and found[0].slowdown == 2.25
+    assert "🐢 [iPhone SE]" in found[0].format()
+    store.close()
+
+
+def test_needs_enough_history_and_ignores_failed_runs(tmp_path):
+    store = TimingStore(str(tmp_path / 'timings.sqlite'))
+    _history(store, [2.0, 2.0, 9.0])
+    assert store.regressions(min_runs=5) == []
+
+    _history(store, [2.0, 2.0, 2.0])
+    run = store.start_run()
+    store.record(run, [('step', TEST, "Step 3: Wait for login", 'iPhone SE', 30.0, 'failed')])
+    # The 9.0s sample is inside the window but the failed 30s attempt is not the "latest".
+    assert store.regressions(min_runs=5) == []
+    store.close()
+
+
+def test_recorder_writes_steps_with_their_test_outcome(tmp_path):
+    store = TimingStore(str(tmp_path / 'timings.sqlite'))
+    recorder = TimingRecorder(store, device='Pixel', git_commit='abc123', app_build='42', profile='cold')
+    steps.add_listener(recorder)
+    try:
+        steps.start_test(TEST)
+        steps.step("Step 1: Open app")
+        steps.step("Step 2: Log in")
+        steps.end_test(TEST, outcome='failed', duration=3.0)
+    finally:
+        steps.remove_listener(recorder)
+
+    (seconds, outcome, commit, build, profile, _), = store.history(TEST, kind='test', device='Pixel')
+    assert (seconds, outcome, commit, build, profile) == (3.0, 'failed', 'abc123', '42', 'cold')
+    assert [row[1] for row in store.history(TEST, "Step 1: Open app")] == ['failed']
+    assert len(store.keys()) == 3
+    recorder.close()
+
+
+def test_cli_exits_non_zero_on_regressions(tmp_path, capsys):
+    path = str(tmp_path / 'timings.sqlite')
+    store = TimingStore(path)
+    _history(store, [2.0, 2.1, 1.9, 2.0, 2.0, 2.0])
+    assert main(['--db', path, 'regressions']) == 0
+
+    _history(store, [6.0])
+    store.close()
+    assert main(['--db', path, 'regressions', '--window', '10']) == 1
+    assert "1 significant slowdown(s)" in capsys.readouterr().out
+
+    assert main(['--db', path, 'history', TEST, '--step', "Step 3: Wait for login", '--limit', '2']) == 0
+    assert capsys.readouterr().out.count("abc123") == 2
+
+
+def test_only_device_runs_record_history(tmp_path, monkeypatch):
+    monkeypatch.setenv('TIMING_DB', str(tmp_path / 'timings.sqlite'))
+    monkeypatch.delenv('LIVEBOARD_WORKER', raising=False)
+    monkeypatch.delenv('LIVEBOARD_RECORD', raising=False)
+    assert install_timing_recorder() is None
+
+    monkeypatch.setenv('LIVEBOARD_WORKER', 'Pixel')
+    recorder = install_timing_recorder()
+    try:
+        assert recorder.device == 'Pixel'
+    finally:
+        recorder.close()
+    monkeypatch.setenv('LIVEBOARD_RECORD', '0')
+    assert install_timing_recorder() is None
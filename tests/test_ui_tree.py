@@ -0,0 +1,83 @@
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test import steps
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer
+from liveboard_test.fake_liveboard import ANDROID_SCREENS, IOS_SCREENS, FakeLiveboardApp
+from liveboard_test.flows import FlowRunner
+from liveboard_test.liveboard_flows import LOGIN, SCREENS
+from liveboard_test.screens import ScreenCache
+from liveboard_test.ui_tree import diff_trees, fingerprint, parse_page_source
+from liveboard_test.waits import WaitEngine
+
+
+def test_shape_ignores_geometry_typed_values_and_state():
+    email = IOS_SCREENS['email_login']
+    root = parse_page_source(email)
+    typed = parse_page_source(email.replace('value="Email address"', 'value="tester@example.com"'))
+    moved = parse_page_source(email.replace('y="400"', 'y="180"').replace('enabled="true"', 'enabled="false"'))
+    other = parse_page_source(IOS_SCREENS['auth_options'])
+
+    assert root.shape == typed.shape == moved.shape
+    assert root.digest != typed.digest and root.digest != moved.digest
+    assert root.shape != other.shape
+    assert fingerprint(root) == fingerprint(typed) != fingerprint(other)
+
+    # Typing into an Android EditText changes its text attribute, not the screen
+    login = ANDROID_SCREENS['login']
+    filled = login.replace('text="" resource-id="email"', 'text="tester@example.com" resource-id="email"')
+    assert parse_page_source(login).shape == parse_page_source(filled).shape
+
+
+def test_diff_trees_classifies_changes():
+    email = IOS_SCREENS['email_login']
+    root = parse_page_source(email)
+
+    assert diff_trees(root, parse_page_source(email)).identical
+    assert diff_trees(root, parse_page_source(email.replace('y="400"', 'y="180"'))).geometry_only
+
+    typed = diff_trees(root, parse_page_source(email.replace('value="Email address"', 'value="tester@example.com"')))
+    assert not typed.structural and not typed.geometry_only
+    assert [names for _, _, names in typed.changed] == [{'value'}]
+
+    banner = '<XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="Wrong password"/>'
+    inserted = diff_trees(root, parse_page_source(email.replace('<XCUIElementTypeButton', banner + '<XCUIElementTypeButton', 1)))
+    assert inserted.structural
+    assert [node.get('name') for node in inserted.added] == ['Wrong password'] and not inserted.removed
+    assert inserted.summary() == "+1 -0 ~0 (structural)"
+
+
+def test_screen_cache_classifies_once_and_recognises_filled_forms():
+    cache = ScreenCache(SCREENS)
+    for name in ('welcome', 'auth_options', 'email_login'):
+        assert cache.recognise(parse_page_source(IOS_SCREENS[name]), 'ios')[0] == name
+    assert cache.recognise(parse_page_source(IOS_SCREENS['dashboard']), 'ios')[0] is None
+
+    # The email rule no longer matches once typed into; the fingerprint still does
+    typed = IOS_SCREENS['email_login'].replace('value="Email address"', 'value="tester@example.com"')
+    assert cache.recognise(parse_page_source(typed), 'ios')[0] == 'email_login'
+    assert cache.stats() == {'screens': 4, 'hits': 1, 'misses': 4}
+
+    cache.learn('dashboard', parse_page_source(IOS_SCREENS['dashboard']))
+    assert cache.recognise(parse_page_source(IOS_SCREENS['dashboard']), 'ios')[0] == 'dashboard'
+
+
+def test_flow_reports_each_new_screen(monkeypatch):
+    events = []
+    monkeypatch.setattr(steps, '_listeners', [lambda event, data: events.append((event, data))])
+    with FakeAppiumServer(latency=0.005) as server:
+        FakeLiveboardApp('ios', transition_delay=0.05).install(server)
+        driver = create_driver(server.url, XCUITestOptions())
+        try:
+            cache = ScreenCache(SCREENS)
+            cache.learn('dashboard', parse_page_source(IOS_SCREENS['dashboard']))
+            runner = FlowRunner(driver, WaitEngine(driver, timeout=5, max_interval=0.2),
+                                screenshot=lambda name: None, screens=cache)
+            runner.run(LOGIN.compile('ios', True))
+        finally:
+            driver.quit()
+
+    screens = [data for event, data in events if event == 'screen']
+    assert [e['screen'] for e in screens] == ['welcome', 'auth_options', 'email_login', 'dashboard']
+    assert screens[0]['changes'] is None and all('structural' in e['changes'] for e in screens[1:])
+    assert runner.screen == 'dashboard'
@@ -0,0 +1,135 @@
+import base64
+import os
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from appium.options.ios.xcuitest.base import XCUITestOptions
+
+from liveboard_test.drivers import create_driver
+from liveboard_test.fake_appium import FakeAppiumServer, render_png
+from liveboard_test.fake_liveboard import IOS_SCREENS, FakeLiveboardApp
+from liveboard_test.flows import FlowRunner
+from liveboard_test.liveboard_flows import LOGIN
+from liveboard_test.screenshots import ScreenshotPipeline
+from liveboard_test.visual import (
+    PNG_SIGNATURE, GoldenStore, Tolerance, VisualMismatch, compare, decode_png_numpy, encode_png, hamming_many,
+    phash, phash_many, signature, signature_of_png,
+)
+from liveboard_test.waits import WaitEngine
+
+
+def filtered_png(pixels, filters):
+    """RGB PNG whose rows cycle through the given PNG filter types."""
+    height, width, _ = pixels.shape
+    p = pixels.astype(np.int16)
+    rows = []
+    for y in range(height):
+        kind = filters[y % len(filters)]
+        up = p[y - 1] if y else np.zeros_like(p[y])
+        left = np.vstack([np.zeros((1, 3), np.int16), p[y][:-1]])
+        upleft = np.vstack([np.zeros((1, 3), np.int16), up[:-1]])
+        estimate = left + up - upleft
+        pa, pb, pc = abs(estimate - left), abs(estimate - up), abs(estimate - upleft)
+        paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+        predictor = [0 * left, left, up, (left + up) >> 1, paeth][kind]
+        rows.append(bytes([kind]) + ((p[y] - predictor) & 0xFF).astype(np.uint8).tobytes())
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    return (PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(b''.join(rows))) + chunk(b'IEND', b''))
+
+
+def test_numpy_decoder_undoes_every_row_filter():
+    pixels = np.random.default_rng(7).integers(0, 256, (23, 17, 3), dtype=np.uint8)
+    for filters in ([0], [1], [2], [3], [4], [0, 1, 2, 3, 4]):
+        assert np.array_equal(decode_png_numpy(filtered_png(pixels, filters)), pixels), filters
+    assert np.array_equal(decode_png_numpy(encode_png(pixels)), pixels)
+
+
+def test_signatures_tell_screens_apart_and_ignore_masked_regions():
+    welcome, dashboard = (decode_png_numpy(render_png(IOS_SCREENS[s])) for s in ('welcome', 'dashboard'))
+    assert compare(signature(welcome), signature(dashboard)).changed > 0.1
+
+    # A different clock in the status bar: visible unmasked, ignored masked
+    clock = welcome.copy()
+    clock[2:6, 50:70] = 0
+    diff = compare(signature(welcome), signature(clock))
+    assert 0 < diff.changed < 0.02 and diff.box[1] < 0.05
+    assert compare(signature(welcome), signature(clock), mask=[(0, 0, 1, 0.07)]).changed == 0
+
+    cursor = welcome.copy()
+    cursor[60, 30] = 0
+    hashes = phash_many([welcome, cursor, dashboard])
+    assert int(hashes[0]) == phash(welcome)
+    assert list(hamming_many(hashes[0], hashes)[:2]) == [0, 0] and hamming_many(hashes[0], hashes)[2] > 4
+
+
+def test_golden_store_records_matches_and_reports_mismatches(tmp_path):
+    store = GoldenStore(str(tmp_path / 'goldens'), Tolerance(10, 0.02), artifacts=str(tmp_path / 'visual'))
+    dashboard, welcome = render_png(IOS_SCREENS['dashboard']), render_png(IOS_SCREENS['welcome'])
+
+    # No golden yet: a failure (with the screen kept for review), not a silent recording
+    missing = store.check('ios', 'dashboard', dashboard, device='iPhone 15 Pro')
+    assert missing.status == 'missing' and not missing.ok and 'VISUAL_UPDATE=1' in missing.format()
+    assert os.listdir(tmp_path / 'visual') == ['ios_dashboard_actual.png']
+    (tmp_path / 'visual' / 'ios_dashboard_actual.png').unlink()
+
+    recorder = GoldenStore(str(tmp_path / 'goldens'), update=True)
+    assert recorder.check('ios', 'dashboard', dashboard, device='iPhone 15 Pro').status == 'recorded'
+    assert os.path.exists(tmp_path / 'goldens' / 'ios' / 'iPhone_15_Pro' / 'dashboard.png')
+    assert store.check('ios', 'dashboard', dashboard, device='iPhone 15 Pro').status == 'match'
+    # Goldens are per device
+    assert store.check('ios', 'dashboard', dashboard, device='iPhone SE').status == 'missing'
+
+    result = store.check('ios', 'dashboard', welcome, device='iPhone 15 Pro')
+    assert not result.ok and result.diff.changed > 0.02
+    assert sorted(os.listdir(tmp_path / 'visual')) == ['ios_dashboard_actual.png', 'ios_dashboard_diff.png']
+    assert store.stats() == {'checked': 4, 'matched': 1, 'mismatched': 1, 'missing': 2, 'recorded': 0}
+
+
+def test_login_flow_checks_the_dashboard_against_its_golden(tmp_path):
+    store = GoldenStore(str(tmp_path), artifacts=str(tmp_path / 'visual'))
+    with FakeAppiumServer() as server:
+        app = FakeLiveboardApp('ios').install(server)
+        driver = create_driver(server.url, XCUITestOptions())
+        try:
+            # Without a golden the login flow fails
+            app.launch()
+            with pytest.raises(VisualMismatch):
+                FlowRunner(driver, WaitEngine(driver, timeout=5), screenshot=lambda name: None,
+                           goldens=store, retries=0).run(LOGIN.compile('ios'))
+            for goldens in (GoldenStore(str(tmp_path), update=True), store):
+                app.launch()
+                FlowRunner(driver, WaitEngine(driver, timeout=5), screenshot=lambda name: None,
+                           goldens=goldens).run(LOGIN.compile('ios'))
+            assert store.stats()['missing'] == 1 and store.stats()['matched'] == 1
+
+            # Signed in to a screen that does not look like the dashboard
+            app._images['dashboard'] = render_png(IOS_SCREENS['auth_options'])
+            app.launch()
+            with pytest.raises(VisualMismatch):
+                FlowRunner(driver, WaitEngine(driver, timeout=5), screenshot=lambda name: None,
+                           goldens=store, retries=0).run(LOGIN.compile('ios'))
+        finally:
+            driver.quit()
+
+
+def test_pipeline_drops_near_duplicate_frames(tmp_path):
+    welcome = decode_png_numpy(render_png(IOS_SCREENS['welcome']))
+    cursor = welcome.copy()
+    cursor[60, 30] = 0
+    frames = [encode_png(welcome), encode_png(cursor), render_png(IOS_SCREENS['auth_options'])]
+    pipeline = ScreenshotPipeline(directory=str(tmp_path), near_duplicates=Tolerance(4, 0.002))
+    try:
+        paths = [pipeline.submit(base64.b64encode(frame).decode('ascii'), f"frame{i}") for i, frame in enumerate(frames)]
+        pipeline.flush()
+    finally:
+        pipeline.close()
+
+    assert [os.path.exists(p) for p in paths] == [True, False, True]
+    assert pipeline.stats()['near_duplicates_dropped'] == 1
+    assert signature_of_png(frames[0]).size == (120, 213)
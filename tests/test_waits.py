@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from liveboard_test.waits import (
+    WaitEngine, WaitLog, element_present, no_animation, page_source_stable, screen_changed,
+)
+
+
+class StubDriver:
+    """Driver stand-in whose page source and elements follow a scripted timeline."""
+
+    def __init__(self, sources=None, element_after=None):
+        self.sources = list(sources or ['<screen/>'])
+        self.element_after = element_after
+        self.started = time.monotonic()
+        self.implicit_wait = 10
+        self.source_calls = 0
+
+    def implicitly_wait(self, seconds):
+        self.implicit_wait = seconds
+
+    @property
+    def page_source(self):
+        self.source_calls += 1
+        return self.sources.pop(0) if len(self.sources) > 1 else self.sources[0]
+
+    def find_element(self, by, locator):
+        if self.element_after is None or time.monotonic() - self.started < self.element_after:
+            raise NoSuchElementException(locator)
+        return f"element:{locator}"
+
+
+def test_engine_disables_implicit_wait():
+    driver = StubDriver()
+    WaitEngine(driver, log=WaitLog())
+    assert driver.implicit_wait == 0
+
+
+def test_returns_as_soon_as_element_is_present():
+    log = WaitLog()
+    engine = WaitEngine(StubDriver(element_after=0.2), timeout=5, log=log)
+
+    element = engine.until(element_present('id', 'login'), replaces=3)
+
+    assert element == "element:login"
+    record = log.records[0]
+    assert record.succeeded and record.polls > 1
+    assert 0.2 <= record.elapsed < 1.0
+    assert log.seconds_saved > 2
+
+
+def test_backoff_is_capped_and_polls_are_bounded():
+    engine = WaitEngine(StubDriver(), timeout=1.0, initial_interval=0.05, max_interval=0.2, log=WaitLog())
+
+    with pytest.raises(TimeoutException):
+        engine.until(element_present('id', 'never'))
+
+    # 0.05, 0.075, 0.11, 0.17, then 0.2 steps: far fewer polls than a fixed 50 ms poll
+    assert 5 <= engine.records[0].polls <= 10
+
+
+def test_optional_wait_returns_none_on_timeout():
+    engine = WaitEngine(StubDriver(), timeout=0.2, log=WaitLog())
+    assert engine.until(element_present('id', 'never'), required=False) is None
+    assert not engine.records[0].succeeded
+
+
+def test_screen_changed_and_stable():
+    driver = StubDriver(sources=['<a/>', '<a/>', '<b/>'])
+    engine = WaitEngine(driver, timeout=2, initial_interval=0.01, log=WaitLog())
+
+    assert engine.until(screen_changed('<a/>'))
+    assert engine.until(page_source_stable(quiet_period=0.1))
+
+
+def test_no_animation_ignores_non_geometry_changes():
+    sources = ['<e x="0" value="a"/>', '<e x="5" value="a"/>', '<e x="5" value="b"/>', '<e x="5" value="c"/>']
+    engine = WaitEngine(StubDriver(sources=sources), timeout=2, initial_interval=0.01, log=WaitLog())
+
+    assert engine.until(no_animation(quiet_period=0.05))
+
+
+def test_click_that_changes_nothing_waits_only_the_grace_period():
+    class Button:
+        def click(self):
+            pass
+
+    engine = WaitEngine(StubDriver(), timeout=5, initial_interval=0.01, log=WaitLog(), change_grace=0.2)
+    start = time.monotonic()
+    engine.click_and_wait_for_transition(Button(), "toggle")
+
+    assert time.monotonic() - start < 2
+    (record,) = engine.records
+    assert record.name == "toggle" and record.succeeded
+
+
+def test_transition_counts_both_waits_against_one_replaced_sleep():
+    class Button:
+        def click(self):
+            pass
+
+    engine = WaitEngine(StubDriver(), timeout=5, initial_interval=0.01, log=WaitLog(), change_grace=0.2)
+    engine.click_and_wait_for_transition(Button(), "toggle", replaces=3)
+
+    (record,) = engine.records
+    # The grace period spent waiting for a change is part of the wait, not free
+    assert record.elapsed >= 0.2 and record.replaces == 3
+    assert abs(record.saved - (3 - record.elapsed)) < 1e-9